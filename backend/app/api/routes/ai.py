@@ -10,12 +10,14 @@ import logging
 import base64
 from datetime import datetime, timezone, timedelta, date
 from pathlib import Path
-from typing import Optional, List, Dict
+from typing import Awaitable, Callable, Optional, List, Dict
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field, ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
-from PIL import Image, ImageDraw, ImageFont, ImageFilter
+from PIL import Image, ImageDraw, ImageFilter
 
 from app.core.database import get_db
 from app.core.security import get_current_user_id
@@ -23,8 +25,10 @@ from app.core.text_generator import generate_text_content, regenerate_single_fie
 from app.core.config import settings
 from app.core.rate_limiter import ai_rate_limiter
 from app.core.strategy_loader import StrategyLoader
+from app.services.user_settings import UserSettings, get_user_settings
+from app.services.image_renderer import render_placeholder, render_style_transfer, render_outpainting, get_font
+from app.services.task_manager import validate_callback_url
 from app.models.asset import Asset
-from app.models.setting import Setting
 from app.models.post import Post
 from app.models.content_suggestion import ContentSuggestion
 from app.models.humor_format import HumorFormat
@@ -180,28 +184,12 @@ def asset_to_dict(asset: Asset) -> dict:
         "tags": asset.tags,
         "usage_count": asset.usage_count,
         "created_at": asset.created_at.isoformat() if asset.created_at else None,
+        "thumbnail_small": asset.thumbnail_small,
+        "thumbnail_medium": asset.thumbnail_medium,
+        "thumbnail_large": asset.thumbnail_large,
     }
 
 
-async def _get_gemini_api_key(user_id: int, db: AsyncSession) -> Optional[str]:
-    """Get Gemini API key: first from user settings, then from env."""
-    # Check user settings
-    result = await db.execute(
-        select(Setting).where(
-            Setting.user_id == user_id, Setting.key == "gemini_api_key"
-        )
-    )
-    setting = result.scalar_one_or_none()
-    if setting and setting.value and setting.value.strip():
-        return setting.value.strip()
-
-    # Check environment
-    if settings.GEMINI_API_KEY:
-        return settings.GEMINI_API_KEY
-
-    return None
-
-
 async def _generate_with_gemini(
     prompt: str,
     api_key: str,
@@ -285,185 +273,12 @@ async def _generate_with_gemini(
         return None
 
 
-def _generate_placeholder_image(prompt: str, width: int = 1024, height: int = 1024) -> bytes:
-    """Generate a branded placeholder image with the prompt theme using Pillow.
-
-    Creates a visually appealing gradient image with TREFF branding
-    that represents the AI-generated concept.
-    """
-    img = Image.new("RGB", (width, height))
-    draw = ImageDraw.Draw(img)
-
-    # TREFF brand colors
-    treff_blue = (59, 122, 177)  # #3B7AB1
-    treff_yellow = (253, 208, 0)  # #FDD000
-    dark_bg = (26, 26, 46)  # #1A1A2E
-
-    # Determine theme colors based on prompt keywords
-    prompt_lower = prompt.lower()
-    if any(w in prompt_lower for w in ["usa", "american", "high school", "hallway"]):
-        color1 = (30, 60, 120)  # Deep blue
-        color2 = (180, 60, 40)  # Red accent
-        accent = treff_yellow
-    elif any(w in prompt_lower for w in ["canada", "kanada", "maple", "mountain"]):
-        color1 = (120, 20, 20)  # Maple red
-        color2 = (40, 80, 40)  # Forest green
-        accent = (255, 255, 255)
-    elif any(w in prompt_lower for w in ["australia", "australien", "sydney", "beach"]):
-        color1 = (20, 100, 160)  # Ocean blue
-        color2 = (200, 160, 60)  # Sandy gold
-        accent = (255, 255, 255)
-    elif any(w in prompt_lower for w in ["neuseeland", "new zealand", "green"]):
-        color1 = (20, 80, 40)  # Deep green
-        color2 = (60, 140, 180)  # Sky blue
-        accent = (255, 255, 255)
-    elif any(w in prompt_lower for w in ["ireland", "irland", "green"]):
-        color1 = (20, 100, 50)  # Irish green
-        color2 = (40, 60, 80)  # Celtic dark
-        accent = treff_yellow
-    else:
-        color1 = dark_bg
-        color2 = treff_blue
-        accent = treff_yellow
-
-    # Draw gradient background
-    for y in range(height):
-        ratio = y / height
-        r = int(color1[0] * (1 - ratio) + color2[0] * ratio)
-        g = int(color1[1] * (1 - ratio) + color2[1] * ratio)
-        b = int(color1[2] * (1 - ratio) + color2[2] * ratio)
-        draw.line([(0, y), (width, y)], fill=(r, g, b))
-
-    # Add subtle geometric shapes for visual interest
-    import random
-    random.seed(hash(prompt) % 2**32)
-
-    for _ in range(15):
-        x = random.randint(0, width)
-        y = random.randint(0, height)
-        size = random.randint(40, 200)
-        opacity_color = (
-            min(255, color1[0] + 30),
-            min(255, color1[1] + 30),
-            min(255, color1[2] + 30),
-        )
-        shape_type = random.choice(["circle", "rect"])
-        if shape_type == "circle":
-            draw.ellipse(
-                [x - size, y - size, x + size, y + size],
-                fill=None,
-                outline=opacity_color,
-                width=2,
-            )
-        else:
-            draw.rectangle(
-                [x, y, x + size, y + size * 0.6],
-                fill=None,
-                outline=opacity_color,
-                width=2,
-            )
-
-    # Apply a slight blur for atmosphere
-    img = img.filter(ImageFilter.GaussianBlur(radius=2))
-    draw = ImageDraw.Draw(img)
-
-    # Add TREFF branding badge (top-left)
-    badge_w, badge_h = 120, 40
-    badge_x, badge_y = 30, 30
-    draw.rounded_rectangle(
-        [badge_x, badge_y, badge_x + badge_w, badge_y + badge_h],
-        radius=8,
-        fill=treff_blue,
-    )
-
-    # Try to use a font, fall back to default
-    try:
-        font_large = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 32)
-        font_small = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 18)
-        font_badge = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 22)
-        font_prompt = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 16)
-    except (OSError, IOError):
-        try:
-            font_large = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 32)
-            font_small = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 18)
-            font_badge = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 22)
-            font_prompt = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 16)
-        except (OSError, IOError):
-            font_large = ImageFont.load_default()
-            font_small = ImageFont.load_default()
-            font_badge = ImageFont.load_default()
-            font_prompt = ImageFont.load_default()
-
-    # Draw badge text
-    draw.text(
-        (badge_x + 15, badge_y + 8),
-        "TREFF",
-        fill=(255, 255, 255),
-        font=font_badge,
-    )
-
-    # Add "AI Generated" label (top-right)
-    ai_label = "KI-generiert"
-    ai_label_w = 140
-    draw.rounded_rectangle(
-        [width - ai_label_w - 30, 30, width - 30, 70],
-        radius=8,
-        fill=(0, 0, 0, 128),
-    )
-    draw.text(
-        (width - ai_label_w - 15, 38),
-        ai_label,
-        fill=accent,
-        font=font_small,
-    )
-
-    # Add prompt text in center area (wrapped)
-    prompt_display = prompt[:120] + ("..." if len(prompt) > 120 else "")
-    # Simple word wrap
-    words = prompt_display.split()
-    lines = []
-    current_line = ""
-    max_chars_per_line = 35
-    for word in words:
-        if len(current_line) + len(word) + 1 <= max_chars_per_line:
-            current_line = current_line + " " + word if current_line else word
-        else:
-            if current_line:
-                lines.append(current_line)
-            current_line = word
-    if current_line:
-        lines.append(current_line)
-
-    # Draw prompt text with shadow
-    text_y = height // 2 - (len(lines) * 28) // 2
-    for line in lines:
-        # Shadow
-        draw.text((width // 2 - 2, text_y + 2), line, fill=(0, 0, 0), font=font_large, anchor="mt")
-        # Text
-        draw.text((width // 2, text_y), line, fill=(255, 255, 255), font=font_large, anchor="mt")
-        text_y += 38
-
-    # Add bottom bar with info
-    bar_h = 60
-    draw.rectangle([0, height - bar_h, width, height], fill=(0, 0, 0))
-    draw.text(
-        (20, height - bar_h + 18),
-        f"Prompt: {prompt[:60]}{'...' if len(prompt) > 60 else ''}",
-        fill=(180, 180, 180),
-        font=font_prompt,
-    )
-
-    # Convert to PNG bytes
-    buffer = io.BytesIO()
-    img.save(buffer, format="PNG", quality=95)
-    return buffer.getvalue()
-
-
 @router.post("/generate-text")
 async def generate_text(
     request: dict,
     user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
+    user_settings: UserSettings = Depends(get_user_settings),
 ):
     """Generate slide texts, captions, hashtags, CTA.
 
@@ -533,7 +348,7 @@ async def generate_text(
                     logger.warning("Invalid personality_preset JSON for student %d", student_id)
 
         # Get Gemini API key for AI-powered text generation
-        api_key = await _get_gemini_api_key(user_id, db)
+        api_key = user_settings.gemini_api_key
 
         # If content_pillar is explicitly provided, use it for pillar-specific
         # prompt injection (overrides category-to-pillar mapping)
@@ -682,6 +497,7 @@ async def regenerate_field(
     request: dict,
     user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
+    user_settings: UserSettings = Depends(get_user_settings),
 ):
     """Regenerate a single text field without changing other content.
 
@@ -725,7 +541,7 @@ async def regenerate_field(
             )
 
         # Get Gemini API key for AI-powered field regeneration
-        api_key = await _get_gemini_api_key(user_id, db)
+        api_key = user_settings.gemini_api_key
 
         result = regenerate_single_field(
             field=field,
@@ -754,6 +570,7 @@ async def optimize_caption(
     request: dict,
     user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
+    user_settings: UserSettings = Depends(get_user_settings),
 ):
     """Optimize a caption text with multiple A/B variant suggestions.
 
@@ -821,7 +638,7 @@ async def optimize_caption(
         max_chars = char_limits.get(platform, 2200)
 
         # Try Gemini first
-        api_key = await _get_gemini_api_key(user_id, db)
+        api_key = user_settings.gemini_api_key
         variants = None
 
         if api_key:
@@ -1071,42 +888,90 @@ PLATFORM_DIMENSIONS = {
 }
 
 
-@router.post("/generate-image")
-async def generate_image(
-    request: dict,
-    user_id: int = Depends(get_current_user_id),
-    db: AsyncSession = Depends(get_db),
-):
-    """Generate image via AI (Nano Banana Pro / Gemini API or local fallback).
+# Max edge of the low-res local preview returned by async image jobs
+ASYNC_PREVIEW_MAX_EDGE = 320
 
-    Expects:
-    - prompt (str): Image description / prompt
-    - platform (str, optional): Target platform for automatic aspect ratio.
-      Supported: instagram_feed (4:5), instagram_story (9:16), instagram_stories (9:16),
-      instagram_reels (9:16), tiktok (9:16), youtube (16:9).
-    - aspect_ratio (str, optional): Manual aspect ratio override. Takes precedence
-      over platform if both are provided. (e.g. '1:1', '9:16', '16:9', '3:4', '4:3')
-    - width (int, optional): Image width in pixels (default: based on platform or 1024)
-    - height (int, optional): Image height in pixels (default: based on platform or 1024)
-    - image_size (str, optional): Output resolution for Nano Banana Pro
-      ('1K', '2K', '4K'). Default: '2K'.
-    - style (str, optional): Image style. One of:
-      'photorealistic' (default), 'illustration', 'minimalist', 'branded'.
-      The style is prepended to the prompt for AI generation.
-    - category (str, optional): Asset category for library
-    - country (str, optional): Country tag for the image
 
-    Returns:
-    - status: "success"
-    - image_url: URL to access the generated image
-    - asset: Full asset object stored in the library
-    - source: "gemini" or "local_generated"
-    - aspect_ratio: The aspect ratio used for generation
-    - platform: The platform used (if provided)
+class AsyncJobOptions(BaseModel):
+    """Background-job switches of /generate-image and /edit-image."""
+    run_async: bool = Field(False, alias="async")
+    callback_url: Optional[str] = Field(None, max_length=512)
+
+
+async def _parse_async_options(request: dict) -> AsyncJobOptions:
+    """Read `async` as a real bool ("false" is false) and admit only public http(s) callback URLs."""
+    try:
+        options = AsyncJobOptions.model_validate(request)
+    except ValidationError as e:
+        field = ".".join(str(loc) for loc in e.errors()[0]["loc"])
+        raise HTTPException(status_code=400, detail=f"Ungueltiger Wert fuer {field}.")
+    if options.callback_url:
+        try:
+            await validate_callback_url(options.callback_url)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Ungueltige callback_url: {e}")
+    return options
+
+
+def _preview_data_url(image_bytes: bytes) -> Optional[str]:
+    """Downscale an image to a small JPEG data URL for progressive previews."""
+    try:
+        img = Image.open(io.BytesIO(image_bytes))
+        img.draft("RGB", (ASYNC_PREVIEW_MAX_EDGE, ASYNC_PREVIEW_MAX_EDGE))
+        img = img.convert("RGB")
+        img.thumbnail((ASYNC_PREVIEW_MAX_EDGE, ASYNC_PREVIEW_MAX_EDGE))
+        buf = io.BytesIO()
+        img.save(buf, format="JPEG", quality=70)
+        return "data:image/jpeg;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
+    except Exception as e:
+        logger.debug(f"Preview generation failed: {e}")
+        return None
+
+
+async def _store_image_asset(
+    db: AsyncSession,
+    user_id: int,
+    image_bytes: bytes,
+    filename_prefix: str,
+    **asset_fields,
+) -> Asset:
+    """Save image bytes through the asset pipeline (file, thumbnails, DB row).
+
+    The image is decoded once; dimensions and thumbnails come from that image.
     """
-    # Rate limit check (raises 429 if exceeded)
-    ai_rate_limiter.check_rate_limit(user_id, "generate-image")
+    from app.core.paths import save_and_encode
+    from app.api.routes.assets import _generate_image_thumbnails
+
+    unique_filename = f"{filename_prefix}_{uuid.uuid4().hex[:12]}.png"
+    b64 = save_and_encode(image_bytes, ASSETS_UPLOAD_DIR / unique_filename)
+
+    img = Image.open(io.BytesIO(image_bytes))
+    img.load()
+    width, height = img.size
+    thumbs = _generate_image_thumbnails(image_bytes, unique_filename, image=img)
+
+    asset = Asset(
+        user_id=user_id,
+        filename=unique_filename,
+        file_path=f"/uploads/assets/{unique_filename}",
+        file_type="image/png",
+        file_size=len(image_bytes),
+        width=width,
+        height=height,
+        thumbnail_small=thumbs.get("thumbnail_small"),
+        thumbnail_medium=thumbs.get("thumbnail_medium"),
+        thumbnail_large=thumbs.get("thumbnail_large"),
+        file_data=b64,
+        **asset_fields,
+    )
+    db.add(asset)
+    await db.flush()
+    await db.refresh(asset)
+    return asset
 
+
+def _parse_image_request(request: dict) -> dict:
+    """Validate a /generate-image body and resolve prompt, ratio and size."""
     prompt = request.get("prompt", "").strip()
     if not prompt:
         raise HTTPException(status_code=400, detail="Prompt darf nicht leer sein.")
@@ -1116,10 +981,7 @@ async def generate_image(
 
     platform = request.get("platform")  # e.g. "instagram_feed", "tiktok"
     aspect_ratio = request.get("aspect_ratio")  # e.g. "1:1", "9:16", "16:9"
-    image_size = request.get("image_size")  # e.g. "1K", "2K", "4K"
     style = request.get("style", "photorealistic")  # photorealistic, illustration, minimalist, branded
-    category = request.get("category", "ai_generated")
-    country = request.get("country")
 
     # Map style to prompt prefix for AI generation
     STYLE_PREFIXES = {
@@ -1144,20 +1006,38 @@ async def generate_image(
     else:
         default_w, default_h = 1024, 1024
 
-    req_width = min(max(request.get("width", default_w), 256), 4096)
-    req_height = min(max(request.get("height", default_h), 256), 4096)
+    return {
+        "prompt": prompt,
+        "styled_prompt": styled_prompt,
+        "platform": platform,
+        "aspect_ratio": aspect_ratio,
+        "image_size": request.get("image_size"),  # e.g. "1K", "2K", "4K"
+        "style": style,
+        "category": request.get("category", "ai_generated"),
+        "country": request.get("country"),
+        "width": min(max(request.get("width", default_w), 256), 4096),
+        "height": min(max(request.get("height", default_h), 256), 4096),
+    }
 
+
+async def _generate_and_store_image(
+    params: dict,
+    api_key: Optional[str],
+    user_id: int,
+    db: AsyncSession,
+) -> dict:
+    """Generate an image (Gemini, else local placeholder) and store it as asset."""
+    styled_prompt = params["styled_prompt"]
     image_bytes = None
     source = "local_generated"
 
     # Try Gemini API first (Nano Banana Pro with fallback to Flash)
-    api_key = await _get_gemini_api_key(user_id, db)
     if api_key:
         logger.info(f"Attempting Gemini image generation for styled prompt: {styled_prompt[:80]}...")
         image_bytes = await _generate_with_gemini(
-            styled_prompt, api_key, req_width, req_height,
-            aspect_ratio=aspect_ratio,
-            image_size=image_size,
+            styled_prompt, api_key, params["width"], params["height"],
+            aspect_ratio=params["aspect_ratio"],
+            image_size=params["image_size"],
         )
         if image_bytes:
             source = "gemini"
@@ -1168,52 +1048,29 @@ async def generate_image(
     # Fallback: generate a branded placeholder image
     if not image_bytes:
         logger.info(f"Generating local branded image for: {styled_prompt[:80]}...")
-        image_bytes = _generate_placeholder_image(styled_prompt, req_width, req_height)
+        image_bytes = await render_placeholder(styled_prompt, params["width"], params["height"])
 
     # Save image to disk and database with proper error handling
     try:
-        from app.core.paths import save_and_encode
-
-        unique_filename = f"ai_{uuid.uuid4().hex[:12]}.png"
-        file_path = ASSETS_UPLOAD_DIR / unique_filename
-
-        b64 = save_and_encode(image_bytes, file_path)
-
-        # Get dimensions
-        img = Image.open(io.BytesIO(image_bytes))
-        width, height = img.size
-
-        # Save to asset library
-        asset = Asset(
-            user_id=user_id,
-            filename=unique_filename,
+        prompt = params["prompt"]
+        asset = await _store_image_asset(
+            db, user_id, image_bytes, "ai",
             original_filename=f"AI: {prompt[:80]}",
-            file_path=f"/uploads/assets/{unique_filename}",
-            file_type="image/png",
-            file_size=len(image_bytes),
-            width=width,
-            height=height,
             source="ai_generated",
             ai_prompt=prompt,
-            category=category,
-            country=country,
+            category=params["category"],
+            country=params["country"],
             tags="ai,generated",
-            file_data=b64,
         )
-        db.add(asset)
-        await db.flush()
-        await db.refresh(asset)
-
-        asset_data = asset_to_dict(asset)
 
         return {
             "status": "success",
-            "image_url": f"/api/uploads/assets/{unique_filename}",
-            "asset": asset_data,
+            "image_url": f"/api/uploads/assets/{asset.filename}",
+            "asset": asset_to_dict(asset),
             "source": source,
-            "aspect_ratio": aspect_ratio or "4:5",
-            "platform": platform,
-            "style": style,
+            "aspect_ratio": params["aspect_ratio"] or "4:5",
+            "platform": params["platform"],
+            "style": params["style"],
             "message": "Bild erfolgreich generiert!" if source == "gemini" else "Bild generiert (lokale Vorschau - fuer KI-Bilder Gemini API-Key in Einstellungen hinterlegen)",
         }
     except OSError as e:
@@ -1230,62 +1087,120 @@ async def generate_image(
         )
 
 
-@router.post("/edit-image")
-async def edit_image(
+async def _submit_image_task(
+    user_id: int,
+    task_type: str,
+    title: str,
+    preview_url: Optional[str],
+    produce: Callable[[AsyncSession], Awaitable[dict]],
+    callback_url: Optional[str],
+) -> JSONResponse:
+    """Run an image job as background task and answer 202 with the task id.
+
+    The task publishes the preview as interim result right away, so clients
+    polling /api/tasks/status/{task_id} see it before the final image.
+    """
+    from app.core.database import async_session
+    from app.services.task_manager import task_manager, TaskContext
+
+    async def operation(ctx: TaskContext):
+        await ctx.update_progress(0.1, "Vorschau erstellt", data={"preview_url": preview_url})
+        async with async_session() as session:
+            result = await produce(session)
+            await session.commit()
+        return result
+
+    task = await task_manager.submit_task(
+        user_id=user_id,
+        task_type=task_type,
+        title=title,
+        func=operation,
+        timeout_seconds=180,
+        callback_url=callback_url,
+    )
+    return JSONResponse(
+        status_code=202,
+        content={
+            **task,
+            "preview_url": preview_url,
+            "status_url": f"/api/tasks/status/{task['task_id']}",
+        },
+    )
+
+
+@router.post("/generate-image")
+async def generate_image(
     request: dict,
     user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
+    user_settings: UserSettings = Depends(get_user_settings),
 ):
-    """Edit existing image: background removal, style transfer, or outpainting.
+    """Generate image via AI (Nano Banana Pro / Gemini API or local fallback).
 
     Expects:
-    - asset_id (int): ID of the source asset to edit
-    - operation (str): One of 'remove_background', 'style_transfer', 'outpainting'
-    - style (str, optional): For style_transfer: 'illustration', 'watercolor', 'minimalist', 'comic', 'oil_painting'
-    - target_aspect_ratio (str, optional): For outpainting: '1:1', '4:5', '9:16', '16:9'
+    - prompt (str): Image description / prompt
+    - platform (str, optional): Target platform for automatic aspect ratio.
+      Supported: instagram_feed (4:5), instagram_story (9:16), instagram_stories (9:16),
+      instagram_reels (9:16), tiktok (9:16), youtube (16:9).
+    - aspect_ratio (str, optional): Manual aspect ratio override. Takes precedence
+      over platform if both are provided. (e.g. '1:1', '9:16', '16:9', '3:4', '4:3')
+    - width (int, optional): Image width in pixels (default: based on platform or 1024)
+    - height (int, optional): Image height in pixels (default: based on platform or 1024)
+    - image_size (str, optional): Output resolution for Nano Banana Pro
+      ('1K', '2K', '4K'). Default: '2K'.
+    - style (str, optional): Image style. One of:
+      'photorealistic' (default), 'illustration', 'minimalist', 'branded'.
+      The style is prepended to the prompt for AI generation.
+    - category (str, optional): Asset category for library
+    - country (str, optional): Country tag for the image
+    - async (bool, optional): Run as background task. Returns 202 immediately with
+      task_id, status_url and a low-res local preview_url; the final result is
+      available via /api/tasks/status/{task_id}.
+    - callback_url (str, optional): With async, POST the task result to this URL
+      (http/https only; hosts resolving to private or loopback addresses are rejected).
 
-    Returns edited image saved as new asset (original preserved).
+    Returns:
+    - status: "success"
+    - image_url: URL to access the generated image
+    - asset: Full asset object stored in the library
+    - source: "gemini" or "local_generated"
+    - aspect_ratio: The aspect ratio used for generation
+    - platform: The platform used (if provided)
     """
-    ai_rate_limiter.check_rate_limit(user_id, "edit-image")
+    # Rate limit check (raises 429 if exceeded)
+    ai_rate_limiter.check_rate_limit(user_id, "generate-image")
 
-    asset_id = request.get("asset_id")
-    operation = request.get("operation", "").strip()
+    params = _parse_image_request(request)
+    options = await _parse_async_options(request)
+    api_key = user_settings.gemini_api_key
+
+    if options.run_async:
+        # Fast local preview at reduced size, then the full job in the background
+        scale = ASYNC_PREVIEW_MAX_EDGE / max(params["width"], params["height"])
+        preview_bytes = await render_placeholder(
+            params["styled_prompt"],
+            max(1, int(params["width"] * scale)),
+            max(1, int(params["height"] * scale)),
+        )
 
-    if not asset_id:
-        raise HTTPException(status_code=400, detail="asset_id ist erforderlich.")
-    if operation not in ("remove_background", "style_transfer", "outpainting"):
-        raise HTTPException(
-            status_code=400,
-            detail="Unbekannte Operation. Erlaubt: remove_background, style_transfer, outpainting",
+        async def produce(session: AsyncSession) -> dict:
+            return await _generate_and_store_image(params, api_key, user_id, session)
+
+        return await _submit_image_task(
+            user_id, "ai_image", f"KI-Bild: {params['prompt'][:60]}",
+            _preview_data_url(preview_bytes), produce, options.callback_url,
         )
 
-    # Load source asset
-    result = await db.execute(
-        select(Asset).where(Asset.id == asset_id, Asset.user_id == user_id)
-    )
-    source_asset = result.scalar_one_or_none()
-    if not source_asset:
-        raise HTTPException(status_code=404, detail="Asset nicht gefunden.")
+    return await _generate_and_store_image(params, api_key, user_id, db)
 
-    # Load image bytes
-    source_bytes = None
-    if source_asset.file_data:
-        try:
-            source_bytes = base64.b64decode(source_asset.file_data)
-        except Exception:
-            pass
-    if not source_bytes:
-        for try_path in [
-            ASSETS_UPLOAD_DIR / source_asset.filename,
-            Path(source_asset.file_path.lstrip("/")),
-        ]:
-            if try_path.exists():
-                source_bytes = try_path.read_bytes()
-                break
-    if not source_bytes:
-        raise HTTPException(status_code=404, detail="Bilddaten konnten nicht geladen werden.")
 
-    api_key = await _get_gemini_api_key(user_id, db)
+async def _apply_edit_operation(
+    operation: str,
+    source_bytes: bytes,
+    request: dict,
+    api_key: Optional[str],
+) -> tuple[bytes, str, str]:
+    """Run an edit operation (Gemini, else local). Returns (bytes, source, label)."""
     edited_bytes = None
     edit_source = "local"
     edit_label = ""
@@ -1309,7 +1224,7 @@ async def edit_image(
             if edited_bytes:
                 edit_source = "gemini"
         if not edited_bytes:
-            edited_bytes = _style_transfer_local(source_bytes, style)
+            edited_bytes = await render_style_transfer(source_bytes, style)
 
     elif operation == "outpainting":
         target_ratio = request.get("target_aspect_ratio", "4:5")
@@ -1319,45 +1234,43 @@ async def edit_image(
             if edited_bytes:
                 edit_source = "gemini"
         if not edited_bytes:
-            edited_bytes = _outpainting_local(source_bytes, target_ratio)
+            edited_bytes = await render_outpainting(source_bytes, target_ratio)
 
     if not edited_bytes:
         raise HTTPException(status_code=500, detail="Bildbearbeitung fehlgeschlagen.")
+    return edited_bytes, edit_source, edit_label
+
+
+async def _edit_and_store_image(
+    source_asset: Asset,
+    source_bytes: bytes,
+    operation: str,
+    request: dict,
+    api_key: Optional[str],
+    user_id: int,
+    db: AsyncSession,
+) -> dict:
+    """Apply an edit operation and save the result as new asset (original preserved)."""
+    edited_bytes, edit_source, edit_label = await _apply_edit_operation(
+        operation, source_bytes, request, api_key,
+    )
 
-    # Save as new asset (original preserved)
     try:
-        from app.core.paths import save_and_encode
-        unique_filename = f"edit_{operation}_{uuid.uuid4().hex[:10]}.png"
-        file_path = ASSETS_UPLOAD_DIR / unique_filename
-        b64 = save_and_encode(edited_bytes, file_path)
-        img = Image.open(io.BytesIO(edited_bytes))
-        width, height = img.size
-
-        new_asset = Asset(
-            user_id=user_id,
-            filename=unique_filename,
+        new_asset = await _store_image_asset(
+            db, user_id, edited_bytes, f"edit_{operation}",
             original_filename=f"{edit_label}: {source_asset.original_filename or source_asset.filename}",
-            file_path=f"/uploads/assets/{unique_filename}",
-            file_type="image/png",
-            file_size=len(edited_bytes),
-            width=width,
-            height=height,
             source="ai_edited",
             ai_prompt=f"{operation}: {edit_label}",
             category=source_asset.category,
             country=source_asset.country,
             tags=f"edited,{operation}",
-            file_data=b64,
         )
-        db.add(new_asset)
-        await db.flush()
-        await db.refresh(new_asset)
 
         return {
             "status": "success",
-            "image_url": f"/api/uploads/assets/{unique_filename}",
+            "image_url": f"/api/uploads/assets/{new_asset.filename}",
             "asset": asset_to_dict(new_asset),
-            "original_asset_id": asset_id,
+            "original_asset_id": source_asset.id,
             "operation": operation,
             "source": edit_source,
             "message": f"Bild erfolgreich bearbeitet ({edit_label})!",
@@ -1367,6 +1280,85 @@ async def edit_image(
         raise HTTPException(status_code=500, detail="Fehler beim Speichern des bearbeiteten Bildes.")
 
 
+@router.post("/edit-image")
+async def edit_image(
+    request: dict,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+    user_settings: UserSettings = Depends(get_user_settings),
+):
+    """Edit existing image: background removal, style transfer, or outpainting.
+
+    Expects:
+    - asset_id (int): ID of the source asset to edit
+    - operation (str): One of 'remove_background', 'style_transfer', 'outpainting'
+    - style (str, optional): For style_transfer: 'illustration', 'watercolor', 'minimalist', 'comic', 'oil_painting'
+    - target_aspect_ratio (str, optional): For outpainting: '1:1', '4:5', '9:16', '16:9'
+    - async (bool, optional): Run as background task (202 + task_id, preview of the
+      source image as preview_url). See /generate-image.
+    - callback_url (str, optional): With async, POST the task result to this URL
+      (http/https only; hosts resolving to private or loopback addresses are rejected).
+
+    Returns edited image saved as new asset (original preserved).
+    """
+    ai_rate_limiter.check_rate_limit(user_id, "edit-image")
+
+    asset_id = request.get("asset_id")
+    operation = request.get("operation", "").strip()
+
+    if not asset_id:
+        raise HTTPException(status_code=400, detail="asset_id ist erforderlich.")
+    if operation not in ("remove_background", "style_transfer", "outpainting"):
+        raise HTTPException(
+            status_code=400,
+            detail="Unbekannte Operation. Erlaubt: remove_background, style_transfer, outpainting",
+        )
+
+    # Load source asset
+    result = await db.execute(
+        select(Asset).where(Asset.id == asset_id, Asset.user_id == user_id)
+    )
+    source_asset = result.scalar_one_or_none()
+    if not source_asset:
+        raise HTTPException(status_code=404, detail="Asset nicht gefunden.")
+
+    # Load image bytes
+    source_bytes = None
+    if source_asset.file_data:
+        try:
+            source_bytes = base64.b64decode(source_asset.file_data)
+        except Exception:
+            pass
+    if not source_bytes:
+        for try_path in [
+            ASSETS_UPLOAD_DIR / source_asset.filename,
+            Path(source_asset.file_path.lstrip("/")),
+        ]:
+            if try_path.exists():
+                source_bytes = try_path.read_bytes()
+                break
+    if not source_bytes:
+        raise HTTPException(status_code=404, detail="Bilddaten konnten nicht geladen werden.")
+
+    options = await _parse_async_options(request)
+    api_key = user_settings.gemini_api_key
+
+    if options.run_async:
+        async def produce(session: AsyncSession) -> dict:
+            return await _edit_and_store_image(
+                source_asset, source_bytes, operation, request, api_key, user_id, session,
+            )
+
+        return await _submit_image_task(
+            user_id, "ai_image_edit", f"Bildbearbeitung: {operation}",
+            _preview_data_url(source_bytes), produce, options.callback_url,
+        )
+
+    return await _edit_and_store_image(
+        source_asset, source_bytes, operation, request, api_key, user_id, db,
+    )
+
+
 # ── Image Editing Helpers ──
 
 async def _remove_background_gemini(image_bytes: bytes, api_key: str) -> Optional[bytes]:
@@ -1405,11 +1397,7 @@ def _remove_background_local(image_bytes: bytes) -> bytes:
     result = Image.new("RGBA", (w, h), (255, 255, 255, 255))
     result.paste(img, (0, 0), mask)
     draw2 = ImageDraw.Draw(result)
-    try:
-        font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", max(12, h // 35))
-    except Exception:
-        font = ImageFont.load_default()
-    draw2.text((8, h - 24), "Vorschau - KI-Freisteller mit API-Key", fill=(160, 160, 160, 180), font=font)
+    draw2.text((8, h - 24), "Vorschau - KI-Freisteller mit API-Key", fill=(160, 160, 160, 180), font=get_font(max(12, h // 35)))
     buf = io.BytesIO()
     result.save(buf, format="PNG")
     return buf.getvalue()
@@ -1446,40 +1434,6 @@ async def _style_transfer_gemini(image_bytes: bytes, style: str, api_key: str) -
         return None
 
 
-def _style_transfer_local(image_bytes: bytes, style: str) -> bytes:
-    """Local fallback: apply basic PIL filters to approximate style."""
-    img = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-    w, h = img.size
-    from PIL import ImageEnhance, ImageOps
-    if style == "illustration":
-        img = img.filter(ImageFilter.EDGE_ENHANCE_MORE)
-        img = ImageOps.posterize(img, 4)
-    elif style == "watercolor":
-        img = img.filter(ImageFilter.GaussianBlur(radius=2))
-        img = img.filter(ImageFilter.SMOOTH_MORE)
-        img = ImageEnhance.Color(img).enhance(1.3)
-    elif style == "minimalist":
-        img = ImageEnhance.Color(img).enhance(0.3)
-        img = ImageEnhance.Contrast(img).enhance(1.5)
-    elif style == "comic":
-        img = img.filter(ImageFilter.CONTOUR)
-        img = ImageOps.posterize(img, 3)
-        img = ImageEnhance.Color(img).enhance(2.0)
-    elif style == "oil_painting":
-        img = img.filter(ImageFilter.GaussianBlur(radius=3))
-        img = ImageEnhance.Contrast(img).enhance(1.4)
-        img = ImageEnhance.Color(img).enhance(1.3)
-    draw = ImageDraw.Draw(img)
-    try:
-        font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", max(12, h // 35))
-    except Exception:
-        font = ImageFont.load_default()
-    draw.text((8, h - 24), "Vorschau - KI-Style mit API-Key", fill=(160, 160, 160), font=font)
-    buf = io.BytesIO()
-    img.save(buf, format="PNG")
-    return buf.getvalue()
-
-
 async def _outpainting_gemini(image_bytes: bytes, target_ratio: str, api_key: str) -> Optional[bytes]:
     """Extend image to new aspect ratio using Gemini."""
     try:
@@ -1504,39 +1458,6 @@ async def _outpainting_gemini(image_bytes: bytes, target_ratio: str, api_key: st
         return None
 
 
-def _outpainting_local(image_bytes: bytes, target_ratio: str) -> bytes:
-    """Local fallback: extend canvas with blurred edge fill."""
-    img = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-    ow, oh = img.size
-    ratios = {"1:1": (1, 1), "4:5": (4, 5), "9:16": (9, 16), "16:9": (16, 9), "3:4": (3, 4), "4:3": (4, 3)}
-    rw, rh = ratios.get(target_ratio, (4, 5))
-    tr = rw / rh
-    if tr > ow / oh:
-        nw, nh = int(oh * tr), oh
-    else:
-        nw, nh = ow, int(ow / tr)
-    bg = img.resize((nw, nh), Image.LANCZOS).filter(ImageFilter.GaussianBlur(radius=max(nw, nh) // 15))
-    xo, yo = (nw - ow) // 2, (nh - oh) // 2
-    # Soft edge mask
-    mask = Image.new("L", (ow, oh), 255)
-    draw = ImageDraw.Draw(mask)
-    fade = min(ow, oh) // 10
-    for i in range(fade):
-        a = int(255 * (i / fade))
-        draw.rectangle([i, i, ow - i - 1, oh - i - 1], outline=a)
-    mask = mask.filter(ImageFilter.GaussianBlur(radius=fade // 2))
-    bg.paste(img, (xo, yo), mask)
-    draw2 = ImageDraw.Draw(bg)
-    try:
-        font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", max(12, nh // 35))
-    except Exception:
-        font = ImageFont.load_default()
-    draw2.text((8, nh - 24), "Vorschau - KI-Outpainting mit API-Key", fill=(160, 160, 160), font=font)
-    buf = io.BytesIO()
-    bg.save(buf, format="PNG")
-    return buf.getvalue()
-
-
 # ── TREFF Seasonal Calendar for Content Suggestions ──
 
 TREFF_SEASONAL_CALENDAR = [
@@ -2085,6 +2006,7 @@ async def suggest_content(
     request: dict,
     user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
+    user_settings: UserSettings = Depends(get_user_settings),
 ):
     """Generate AI-powered content suggestions based on season, TREFF calendar, and posting history.
 
@@ -2110,7 +2032,7 @@ async def suggest_content(
     upcoming_deadlines = _get_upcoming_deadlines(today, lookahead_days=60)
 
     # Try Gemini first, fall back to rule-based
-    api_key = await _get_gemini_api_key(user_id, db)
+    api_key = user_settings.gemini_api_key
     source = "rule_based"
     suggestion_dicts = None
 
@@ -2585,6 +2507,7 @@ async def suggest_weekly_plan(
     request: dict,
     user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
+    user_settings: UserSettings = Depends(get_user_settings),
 ):
     """Generate a complete weekly content plan using Gemini 2.5 Flash.
 
@@ -2630,7 +2553,7 @@ async def suggest_weekly_plan(
     upcoming_deadlines = _get_upcoming_deadlines(today, lookahead_days=30)
 
     # Try Gemini first, fall back to rule-based
-    api_key = await _get_gemini_api_key(user_id, db)
+    api_key = user_settings.gemini_api_key
     source = "rule_based"
     plan = None
 
@@ -3461,6 +3384,7 @@ async def generate_humor(
     request: dict,
     user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
+    user_settings: UserSettings = Depends(get_user_settings),
 ):
     """Generate humor/meme content for a specific humor format.
 
@@ -3500,7 +3424,7 @@ async def generate_humor(
         example_text = json.loads(humor_format.example_text) if humor_format.example_text else {}
 
         # Try Gemini first
-        api_key = await _get_gemini_api_key(user_id, db)
+        api_key = user_settings.gemini_api_key
         result = None
 
         if api_key:
@@ -3871,6 +3795,7 @@ async def generate_hooks(
     request: dict,
     user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
+    user_settings: UserSettings = Depends(get_user_settings),
 ):
     """Generate multiple hook/attention-grabber variants for a post.
 
@@ -3900,7 +3825,7 @@ async def generate_hooks(
         count = 5
     count = max(1, min(8, count))
 
-    api_key = await _get_gemini_api_key(user_id, db)
+    api_key = user_settings.gemini_api_key
     source = "rule_based"
     hooks = None
 
@@ -4180,6 +4105,7 @@ async def suggest_hashtags(
     request: dict,
     user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
+    user_settings: UserSettings = Depends(get_user_settings),
 ):
     """Suggest optimized hashtags based on topic, country, and platform.
 
@@ -4233,7 +4159,7 @@ async def suggest_hashtags(
         })
 
     # Try Gemini first
-    api_key = await _get_gemini_api_key(user_id, db)
+    api_key = user_settings.gemini_api_key
     source = "rule_based"
     result = None
 
@@ -4607,6 +4533,7 @@ async def generate_interactive(
     request: dict,
     user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
+    user_settings: UserSettings = Depends(get_user_settings),
 ):
     """Generate interactive Story element content (poll, quiz, slider, question).
 
@@ -4632,7 +4559,7 @@ async def generate_interactive(
         )
 
     # Try Gemini first
-    api_key = await _get_gemini_api_key(user_id, db)
+    api_key = user_settings.gemini_api_key
     result = None
 
     if api_key:
@@ -5091,6 +5018,7 @@ async def engagement_boost(
     request: dict,
     user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
+    user_settings: UserSettings = Depends(get_user_settings),
 ):
     """Analyze a post draft and return engagement improvement suggestions.
 
@@ -5120,7 +5048,7 @@ async def engagement_boost(
         )
 
     # Try Gemini first
-    api_key = await _get_gemini_api_key(user_id, db)
+    api_key = user_settings.gemini_api_key
     suggestions = None
     source = "rule_based"
 
@@ -5507,6 +5435,7 @@ async def suggest_episode_text(
     request: dict,
     user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
+    user_settings: UserSettings = Depends(get_user_settings),
 ):
     """Generate AI suggestions for episode-specific text fields.
 
@@ -5575,7 +5504,7 @@ async def suggest_episode_text(
             prev_episode_summaries.append(summary)
 
     # Try AI generation first
-    api_key = await _get_gemini_api_key(user_id, db)
+    api_key = user_settings.gemini_api_key
     suggestion = None
     source = "rule_based"
 
@@ -5771,6 +5700,7 @@ async def generate_cliffhanger(
     request: dict,
     user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
+    user_settings: UserSettings = Depends(get_user_settings),
 ):
     """Generate cliffhanger text and teaser variants for a story arc episode.
 
@@ -5868,7 +5798,7 @@ async def generate_cliffhanger(
         }
 
     # Try AI generation
-    api_key = await _get_gemini_api_key(user_id, db)
+    api_key = user_settings.gemini_api_key
     cliffhanger_text = None
     all_variants = {}
     source = "rule_based"
@@ -6105,6 +6035,7 @@ async def auto_generate_cliffhanger_slide(
     Returns the generated cliffhanger data and slide info.
     """
     from app.models.post_slide import PostSlide
+    from app.services.slide_summary import parse_slides, set_slides
 
     post_id = request.get("post_id")
     teaser_variant = request.get("teaser_variant", "question")
@@ -6135,29 +6066,17 @@ async def auto_generate_cliffhanger_slide(
 
     cliffhanger_result = await generate_cliffhanger(cliffhanger_request, user_id, db)
 
-    # Find last slide index
-    result = await db.execute(
-        select(PostSlide)
-        .where(PostSlide.post_id == post_id)
-        .order_by(PostSlide.slide_index.desc())
-    )
-    last_slide = result.scalar_one_or_none()
-    next_index = (last_slide.slide_index + 1) if last_slide else 0
-
-    # Check if a cliffhanger slide already exists
-    result = await db.execute(
-        select(PostSlide).where(PostSlide.post_id == post_id)
-    )
-    existing_slides = result.scalars().all()
-    cliffhanger_slide = None
-    for s in existing_slides:
-        if s.custom_css_overrides:
+    # Find an existing cliffhanger slide in the post's slides
+    slides = parse_slides(post.slide_data)
+    cliffhanger_index = None
+    for index, s in enumerate(slides):
+        if s.get("custom_css_overrides"):
             try:
-                overrides = json.loads(s.custom_css_overrides) if isinstance(s.custom_css_overrides, str) else s.custom_css_overrides
+                overrides = json.loads(s["custom_css_overrides"]) if isinstance(s["custom_css_overrides"], str) else s["custom_css_overrides"]
                 if overrides.get("_cliffhanger_slide"):
-                    cliffhanger_slide = s
+                    cliffhanger_index = index
                     break
-            except (json.JSONDecodeError, TypeError):
+            except (json.JSONDecodeError, TypeError, AttributeError):
                 pass
 
     # Build slide data
@@ -6178,28 +6097,25 @@ async def auto_generate_cliffhanger_slide(
         }),
     }
 
-    if cliffhanger_slide:
-        for key, value in slide_data.items():
-            setattr(cliffhanger_slide, key, value)
-        await db.flush()
-        await db.refresh(cliffhanger_slide)
-        slide_dict = {
-            "id": cliffhanger_slide.id,
-            "post_id": cliffhanger_slide.post_id,
-            "slide_index": cliffhanger_slide.slide_index,
-            **slide_data,
-        }
+    # Written through slide_data; the PostSlide rows are rebuilt on flush
+    if cliffhanger_index is not None:
+        slides[cliffhanger_index] = {**slides[cliffhanger_index], **slide_data}
     else:
-        new_slide = PostSlide(post_id=post_id, slide_index=next_index, **slide_data)
-        db.add(new_slide)
-        await db.flush()
-        await db.refresh(new_slide)
-        slide_dict = {
-            "id": new_slide.id,
-            "post_id": new_slide.post_id,
-            "slide_index": new_slide.slide_index,
-            **slide_data,
-        }
+        cliffhanger_index = len(slides)
+        slides.append(slide_data)
+    set_slides(post, slides)
+    await db.flush()
+
+    result = await db.execute(
+        select(PostSlide).where(PostSlide.post_id == post_id, PostSlide.slide_index == cliffhanger_index)
+    )
+    cliffhanger_slide = result.scalar_one()
+    slide_dict = {
+        "id": cliffhanger_slide.id,
+        "post_id": cliffhanger_slide.post_id,
+        "slide_index": cliffhanger_slide.slide_index,
+        **slide_data,
+    }
 
     await db.commit()
 
@@ -6273,6 +6189,7 @@ async def generate_recurring_format_text(
     request: dict,
     user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
+    user_settings: UserSettings = Depends(get_user_settings),
 ):
     """Generate AI text content for a specific recurring format.
 
@@ -6343,7 +6260,7 @@ async def generate_recurring_format_text(
         topic = f"{topic} ({country_label})"
 
     # Try Gemini API for AI generation
-    api_key = await _get_gemini_api_key(user_id, db)
+    api_key = user_settings.gemini_api_key
 
     if api_key:
         try:
@@ -6532,7 +6449,7 @@ async def repurpose_video(
         raise HTTPException(status_code=404, detail="Source post not found")
 
     # Generate derivatives via multiply service
-    derivatives = await multiply_content(
+    derivatives, failed = await multiply_content(
         source_post=source_post,
         target_formats=target_formats,
         user_id=user_id,
@@ -6547,22 +6464,23 @@ async def repurpose_video(
             base_date += timedelta(days=1)
 
         optimal_times = ["17:00", "18:00", "12:00", "19:00", "11:00"]
+        post_result = await db.execute(
+            select(Post).where(
+                Post.id.in_([d["post_id"] for d in derivatives]),
+                Post.user_id == user_id,
+            )
+        )
+        deriv_posts = {p.id: p for p in post_result.scalars().all()}
         for i, deriv in enumerate(derivatives):
             scheduled_date = base_date + timedelta(days=i)
             scheduled_time = optimal_times[i % len(optimal_times)]
-            try:
-                post_result = await db.execute(
-                    select(Post).where(Post.id == deriv["post_id"], Post.user_id == user_id)
-                )
-                deriv_post = post_result.scalar_one_or_none()
-                if deriv_post:
-                    deriv_post.scheduled_date = scheduled_date
-                    deriv_post.scheduled_time = scheduled_time
-                    deriv_post.status = "scheduled"
-                    deriv["scheduled_date"] = scheduled_date.isoformat()
-                    deriv["scheduled_time"] = scheduled_time
-            except Exception as e:
-                logger.warning(f"Failed to schedule derivative {deriv['post_id']}: {e}")
+            deriv_post = deriv_posts.get(deriv["post_id"])
+            if deriv_post:
+                deriv_post.scheduled_date = scheduled_date
+                deriv_post.scheduled_time = scheduled_time
+                deriv_post.status = "scheduled"
+                deriv["scheduled_date"] = scheduled_date.isoformat()
+                deriv["scheduled_time"] = scheduled_time
 
     # Load repurposing workflow metadata from social-content config
     workflow_metadata = []
@@ -6591,6 +6509,8 @@ async def repurpose_video(
         "source_platform": source_post.platform,
         "derivatives": derivatives,
         "derivative_count": len(derivatives),
+        "failed": failed,
+        "fallback": any(d["fallback"] for d in derivatives),
         "scheduled": schedule_across_week,
         "workflow_metadata": workflow_metadata,
         "message": f"{len(derivatives)} Video-Derivat(e) erfolgreich erstellt"
@@ -6805,6 +6725,7 @@ async def generate_voiceover(
     request: dict,
     user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
+    user_settings: UserSettings = Depends(get_user_settings),
 ):
     """Generate voiceover text with timing markers and hook formulas.
 
@@ -6859,15 +6780,7 @@ async def generate_voiceover(
     variants = []
     source = "rule_based"
 
-    api_key = None
-    try:
-        result = await db.execute(
-            select(Setting).where(Setting.user_id == user_id, Setting.key == "gemini_api_key")
-        )
-        setting = result.scalar_one_or_none()
-        api_key = setting.value if setting else os.environ.get("GEMINI_API_KEY", "")
-    except Exception:
-        api_key = os.environ.get("GEMINI_API_KEY", "")
+    api_key = user_settings.gemini_api_key
 
     if api_key:
         try:
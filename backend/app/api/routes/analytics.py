@@ -4,27 +4,31 @@ Dashboard analytics: category distribution, platform breakdown, country mix,
 posting frequency, template usage, content mix balance, and goal tracking.
 """
 
-import csv
-import io
 from datetime import datetime, timezone, timedelta
 from fastapi import APIRouter, Depends, Query, Request
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, case
+from sqlalchemy.orm import load_only
 from typing import Optional
 
 from app.core.database import get_db
+from app.core.export_stream import csv_lines, download_response, encode_chunks, stream_rows
 from app.core.security import get_current_user_id
 from app.core.cache import api_cache
+from app.core.projection import Projection
 from app.models.post import Post
+from app.models.post_daily_stats import PostDailyStats
 from app.models.asset import Asset
 from app.models.calendar_entry import CalendarEntry
 from app.models.content_suggestion import ContentSuggestion
-from app.models.setting import Setting
 from app.models.campaign import Campaign
 from app.models.campaign_post import CampaignPost
 from app.models.pipeline_item import PipelineItem
 from app.models.student import Student
+from app.services.analytics_rollup import count_by, counts_by_day, totals_by_day
+from app.services.slide_summary import without_slide_blobs
+from app.services.user_settings import UserSettings, get_user_settings
 
 router = APIRouter()
 
@@ -55,26 +59,15 @@ async def get_overview(
     week_start = week_start.replace(hour=0, minute=0, second=0, microsecond=0)
     month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
 
-    total_result = await db.execute(
-        select(func.count(Post.id)).where(Post.user_id == user_id)
-    )
-    total = total_result.scalar() or 0
-
-    week_result = await db.execute(
-        select(func.count(Post.id)).where(
-            Post.user_id == user_id,
-            Post.created_at >= week_start,
-        )
-    )
-    posts_this_week = week_result.scalar() or 0
-
-    month_result = await db.execute(
-        select(func.count(Post.id)).where(
-            Post.user_id == user_id,
-            Post.created_at >= month_start,
-        )
+    # One rollup query instead of three COUNTs over posts
+    result = await db.execute(
+        select(
+            func.coalesce(func.sum(PostDailyStats.post_count), 0),
+            func.coalesce(func.sum(case((PostDailyStats.day >= week_start.date(), PostDailyStats.post_count), else_=0)), 0),
+            func.coalesce(func.sum(case((PostDailyStats.day >= month_start.date(), PostDailyStats.post_count), else_=0)), 0),
+        ).where(PostDailyStats.user_id == user_id)
     )
-    posts_this_month = month_result.scalar() or 0
+    total, posts_this_week, posts_this_month = result.one()
 
     data = {
         "total_posts": total,
@@ -111,65 +104,38 @@ async def get_dashboard_data(
     week_start = now - timedelta(days=now.weekday())
     week_start = week_start.replace(hour=0, minute=0, second=0, microsecond=0)
 
-    # Quick stats
-    total_result = await db.execute(
-        select(func.count(Post.id)).where(Post.user_id == user_id)
+    # Quick stats (one rollup query instead of four COUNTs over posts)
+    stats_result = await db.execute(
+        select(
+            func.coalesce(func.sum(PostDailyStats.post_count), 0),
+            func.coalesce(func.sum(case((PostDailyStats.day >= week_start.date(), PostDailyStats.post_count), else_=0)), 0),
+            func.coalesce(func.sum(case((PostDailyStats.status == "scheduled", PostDailyStats.post_count), else_=0)), 0),
+            func.coalesce(func.sum(case((PostDailyStats.status == "draft", PostDailyStats.post_count), else_=0)), 0),
+        ).where(PostDailyStats.user_id == user_id)
     )
-    total_posts = total_result.scalar() or 0
-
-    week_result = await db.execute(
-        select(func.count(Post.id)).where(
-            Post.user_id == user_id,
-            Post.created_at >= week_start,
-        )
-    )
-    posts_this_week = week_result.scalar() or 0
-
-    scheduled_result = await db.execute(
-        select(func.count(Post.id)).where(
-            Post.user_id == user_id,
-            Post.status == "scheduled",
-        )
-    )
-    scheduled_posts = scheduled_result.scalar() or 0
-
-    # Drafts count
-    drafts_result = await db.execute(
-        select(func.count(Post.id)).where(
-            Post.user_id == user_id,
-            Post.status == "draft",
-        )
-    )
-    draft_posts = drafts_result.scalar() or 0
+    total_posts, posts_this_week, scheduled_posts, draft_posts = stats_result.one()
 
     asset_result = await db.execute(
         select(func.count(Asset.id)).where(Asset.user_id == user_id)
     )
     total_assets = asset_result.scalar() or 0
 
-    # Recent posts (last 8) with thumbnail info
+    # Recent posts (last 8) with thumbnail info (slide summary columns, no slide_data)
     recent_result = await db.execute(
         select(Post)
+        .options(load_only(
+            Post.id, Post.title, Post.category, Post.platform, Post.status, Post.country,
+            Post.thumbnail_url, Post.slide_count, Post.created_at, Post.updated_at,
+            raiseload=True,
+        ))
         .where(Post.user_id == user_id)
         .order_by(Post.created_at.desc())
         .limit(8)
     )
     recent_posts_raw = recent_result.scalars().all()
 
-    import json as _json
-
     recent_posts = []
     for p in recent_posts_raw:
-        # Extract first slide thumbnail from slide_data
-        thumbnail_url = None
-        try:
-            slides = _json.loads(p.slide_data) if p.slide_data else []
-            if slides and isinstance(slides, list) and len(slides) > 0:
-                first_slide = slides[0]
-                thumbnail_url = first_slide.get("background_image") or first_slide.get("image_url") or first_slide.get("thumbnail")
-        except (ValueError, TypeError, KeyError):
-            pass
-
         recent_posts.append({
             "id": p.id,
             "title": p.title,
@@ -177,8 +143,8 @@ async def get_dashboard_data(
             "platform": p.platform,
             "status": p.status,
             "country": p.country,
-            "thumbnail_url": thumbnail_url,
-            "slide_count": len(_json.loads(p.slide_data)) if p.slide_data else 0,
+            "thumbnail_url": p.thumbnail_url,
+            "slide_count": p.slide_count or 0,
             "created_at": p.created_at.isoformat() if p.created_at else None,
             "updated_at": p.updated_at.isoformat() if p.updated_at else None,
         })
@@ -286,14 +252,8 @@ async def get_frequency(
 
     start_date = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
 
-    # Query posts in the date range
-    result = await db.execute(
-        select(Post.created_at).where(
-            Post.user_id == user_id,
-            Post.created_at >= start_date,
-        )
-    )
-    post_dates = [row[0] for row in result.all()]
+    # Daily counts from rollups (O(days), independent of post volume)
+    daily = await counts_by_day(db, user_id, since=start_date.date())
 
     # Build data points
     data = []
@@ -302,7 +262,7 @@ async def get_frequency(
         # Group by day
         for i in range(days_count):
             day = (start_date + timedelta(days=i)).date()
-            count = sum(1 for d in post_dates if d.date() == day)
+            count = daily.get(day, 0)
             data.append({
                 "label": day.strftime("%d.%m."),
                 "date": day.isoformat(),
@@ -315,8 +275,8 @@ async def get_frequency(
             week_start = start_date + timedelta(weeks=week_num)
             week_end = week_start + timedelta(days=6)
             count = sum(
-                1 for d in post_dates
-                if week_start.date() <= d.date() <= week_end.date()
+                c for d, c in daily.items()
+                if week_start.date() <= d <= week_end.date()
             )
             data.append({
                 "label": f"KW {week_start.strftime('%d.%m.')}",
@@ -335,7 +295,7 @@ async def get_frequency(
             month_names = ["Jan", "Feb", "Mär", "Apr", "Mai", "Jun",
                            "Jul", "Aug", "Sep", "Okt", "Nov", "Dez"]
             count = sum(
-                1 for d in post_dates
+                c for d, c in daily.items()
                 if d.month == m and d.year == y
             )
             data.append({
@@ -362,12 +322,8 @@ async def get_categories(
             "X-Cache": "HIT", "X-Cache-Age": str(entry.age_seconds),
         })
 
-    result = await db.execute(
-        select(Post.category, func.count(Post.id))
-        .where(Post.user_id == user_id)
-        .group_by(Post.category)
-    )
-    data = [{"category": row[0], "count": row[1]} for row in result.all()]
+    counts = await count_by(db, user_id, "category")
+    data = [{"category": category, "count": count} for category, count in counts.items()]
     new_entry = api_cache.set(cache_key, data)
     return JSONResponse(content=data, headers={
         "ETag": f'"{new_entry.etag}"', "Cache-Control": "private, max-age=900", "X-Cache": "MISS",
@@ -389,12 +345,8 @@ async def get_platforms(
             "X-Cache": "HIT", "X-Cache-Age": str(entry.age_seconds),
         })
 
-    result = await db.execute(
-        select(Post.platform, func.count(Post.id))
-        .where(Post.user_id == user_id)
-        .group_by(Post.platform)
-    )
-    data = [{"platform": row[0], "count": row[1]} for row in result.all()]
+    counts = await count_by(db, user_id, "platform")
+    data = [{"platform": platform, "count": count} for platform, count in counts.items()]
     new_entry = api_cache.set(cache_key, data)
     return JSONResponse(content=data, headers={
         "ETag": f'"{new_entry.etag}"', "Cache-Control": "private, max-age=900", "X-Cache": "MISS",
@@ -416,12 +368,8 @@ async def get_countries(
             "X-Cache": "HIT", "X-Cache-Age": str(entry.age_seconds),
         })
 
-    result = await db.execute(
-        select(Post.country, func.count(Post.id))
-        .where(Post.user_id == user_id, Post.country.isnot(None))
-        .group_by(Post.country)
-    )
-    data = [{"country": row[0], "count": row[1]} for row in result.all()]
+    counts = await count_by(db, user_id, "country")
+    data = [{"country": country, "count": count} for country, count in counts.items() if country]
     new_entry = api_cache.set(cache_key, data)
     return JSONResponse(content=data, headers={
         "ETag": f'"{new_entry.etag}"', "Cache-Control": "private, max-age=900", "X-Cache": "MISS",
@@ -447,6 +395,7 @@ async def get_template_usage(
 async def get_goals(
     user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
+    user_settings: UserSettings = Depends(get_user_settings),
 ):
     """Get weekly/monthly targets vs actual.
 
@@ -458,25 +407,9 @@ async def get_goals(
     week_start = week_start.replace(hour=0, minute=0, second=0, microsecond=0)
     month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
 
-    # Read user-configured targets from settings
-    settings_result = await db.execute(
-        select(Setting).where(
-            Setting.user_id == user_id,
-            Setting.key.in_(["posts_per_week", "posts_per_month"]),
-        )
-    )
-    user_settings = {s.key: s.value for s in settings_result.scalars().all()}
-
-    # Parse targets with defaults
-    try:
-        weekly_target = int(user_settings.get("posts_per_week", "4"))
-    except (ValueError, TypeError):
-        weekly_target = 4
-
-    try:
-        monthly_target = int(user_settings.get("posts_per_month", "16"))
-    except (ValueError, TypeError):
-        monthly_target = 16
+    # Read user-configured targets from settings (with defaults)
+    weekly_target = user_settings.get_int("posts_per_week", 4)
+    monthly_target = user_settings.get_int("posts_per_month", 16)
 
     week_result = await db.execute(
         select(func.count(Post.id)).where(
@@ -507,6 +440,7 @@ async def get_content_mix(
     period: str = "week",
     user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
+    user_settings: UserSettings = Depends(get_user_settings),
 ):
     """Get content mix analysis for donut/bar charts, warnings, and recommendations.
 
@@ -523,8 +457,6 @@ async def get_content_mix(
         warnings: list of imbalance warnings
         recommendations: list of content recommendations
     """
-    import json as json_module
-
     now = datetime.now(timezone.utc)
 
     if period == "month":
@@ -536,81 +468,46 @@ async def get_content_mix(
         start = start.replace(hour=0, minute=0, second=0, microsecond=0)
         period_label = "diese Woche"
 
-    # Fetch all posts in the period
+    # Distributions from rollups
+    cat_counts = await count_by(db, user_id, "category", since=start.date())
+    plat_counts = await count_by(db, user_id, "platform", since=start.date())
+    country_counts = await count_by(db, user_id, "country", since=start.date())
+    total = sum(cat_counts.values())
+
+    categories = [{"category": k or "unbekannt", "count": v} for k, v in sorted(cat_counts.items(), key=lambda x: -x[1])]
+    platforms = [{"platform": k or "unbekannt", "count": v} for k, v in sorted(plat_counts.items(), key=lambda x: -x[1])]
+    country_counts.pop(None, None)
+    countries = [{"country": k, "count": v} for k, v in sorted(country_counts.items(), key=lambda x: -x[1])]
+
+    # Weekday and story-arc split need per-post columns (projected, not full rows)
     result = await db.execute(
-        select(Post).where(
+        select(Post.scheduled_date, Post.created_at, Post.story_arc_id).where(
             Post.user_id == user_id,
             Post.created_at >= start,
         )
     )
-    posts = result.scalars().all()
-    total = len(posts)
-
-    # Category distribution
-    cat_counts = {}
-    for p in posts:
-        cat = p.category or "unbekannt"
-        cat_counts[cat] = cat_counts.get(cat, 0) + 1
-    categories = [{"category": k, "count": v} for k, v in sorted(cat_counts.items(), key=lambda x: -x[1])]
-
-    # Platform distribution
-    plat_counts = {}
-    for p in posts:
-        plat = p.platform or "unbekannt"
-        plat_counts[plat] = plat_counts.get(plat, 0) + 1
-    platforms = [{"platform": k, "count": v} for k, v in sorted(plat_counts.items(), key=lambda x: -x[1])]
-
-    # Country distribution
-    country_counts = {}
-    for p in posts:
-        if p.country:
-            country_counts[p.country] = country_counts.get(p.country, 0) + 1
-    countries = [{"country": k, "count": v} for k, v in sorted(country_counts.items(), key=lambda x: -x[1])]
+    post_rows = result.all()
 
     # Posts per day of week (0=Monday, 6=Sunday)
     day_names_de = ["Mo", "Di", "Mi", "Do", "Fr", "Sa", "So"]
     day_counts = [0] * 7
-    for p in posts:
-        if p.scheduled_date:
-            dow = p.scheduled_date.weekday()  # 0=Monday
+    for scheduled_date, created_at, _ in post_rows:
+        if scheduled_date:
+            dow = scheduled_date.weekday()  # 0=Monday
             day_counts[dow] += 1
-        elif p.created_at:
-            dow = p.created_at.weekday()
+        elif created_at:
+            dow = created_at.weekday()
             day_counts[dow] += 1
     days_of_week = [{"day": day_names_de[i], "day_index": i, "count": day_counts[i]} for i in range(7)]
 
     # Story arc posts count
-    arc_count = sum(1 for p in posts if p.story_arc_id)
+    arc_count = sum(1 for _, _, story_arc_id in post_rows if story_arc_id)
     single_count = total - arc_count
 
-    # Read user target-mix settings
-    settings_result = await db.execute(
-        select(Setting).where(
-            Setting.user_id == user_id,
-            Setting.key.in_([
-                "posts_per_week", "posts_per_month",
-                "target_mix_categories", "target_mix_platforms", "target_mix_countries",
-            ]),
-        )
-    )
-    user_settings = {s.key: s.value for s in settings_result.scalars().all()}
-
-    # Parse target mix (JSON strings)
-    target_categories = {}
-    target_platforms = {}
-    target_countries = {}
-    try:
-        target_categories = json_module.loads(user_settings.get("target_mix_categories", "{}"))
-    except (json_module.JSONDecodeError, TypeError):
-        pass
-    try:
-        target_platforms = json_module.loads(user_settings.get("target_mix_platforms", "{}"))
-    except (json_module.JSONDecodeError, TypeError):
-        pass
-    try:
-        target_countries = json_module.loads(user_settings.get("target_mix_countries", "{}"))
-    except (json_module.JSONDecodeError, TypeError):
-        pass
+    # Read user target-mix settings (JSON strings)
+    target_categories = user_settings.get_json("target_mix_categories", {})
+    target_platforms = user_settings.get_json("target_mix_platforms", {})
+    target_countries = user_settings.get_json("target_mix_countries", {})
 
     # Generate warnings
     warnings = []
@@ -915,12 +812,11 @@ async def get_top_posts(
         conditions.append(Post.created_at >= start_date)
 
     result = await db.execute(
-        select(Post).where(*conditions)
+        select(Post).options(*without_slide_blobs()).where(*conditions)
     )
     posts = result.scalars().all()
 
     # Build ranked list with computed engagement rate
-    import json as _json
     ranked = []
     for p in posts:
         likes = p.perf_likes or 0
@@ -930,16 +826,6 @@ async def get_top_posts(
         reach = p.perf_reach or 0
         eng_rate = round(((likes + comments + shares) / reach) * 100, 2) if reach > 0 else 0.0
 
-        # Get thumbnail
-        thumbnail_url = None
-        try:
-            slides = _json.loads(p.slide_data) if p.slide_data else []
-            if slides and isinstance(slides, list) and len(slides) > 0:
-                first_slide = slides[0]
-                thumbnail_url = first_slide.get("background_image") or first_slide.get("image_url") or first_slide.get("thumbnail")
-        except (ValueError, TypeError, KeyError):
-            pass
-
         ranked.append({
             "id": p.id,
             "title": p.title,
@@ -947,7 +833,7 @@ async def get_top_posts(
             "platform": p.platform,
             "country": p.country,
             "status": p.status,
-            "thumbnail_url": thumbnail_url,
+            "thumbnail_url": p.thumbnail_url,
             "perf_likes": p.perf_likes,
             "perf_comments": p.perf_comments,
             "perf_shares": p.perf_shares,
@@ -999,90 +885,56 @@ async def get_performance_trend(
     delta, num_buckets = period_map.get(period, (timedelta(days=30), 30))
     start_date = now - delta
 
-    result = await db.execute(
-        select(Post).where(
-            Post.user_id == user_id,
-            Post.created_at >= start_date,
-            (Post.perf_likes.isnot(None)) |
-            (Post.perf_comments.isnot(None)) |
-            (Post.perf_shares.isnot(None)) |
-            (Post.perf_reach.isnot(None)),
-        )
-    )
-    posts = result.scalars().all()
+    # Per-day engagement sums from rollups
+    daily = await totals_by_day(db, user_id, since=start_date.date())
+
+    def bucket(days) -> dict:
+        rows = [daily[d] for d in days if d in daily]
+        sums = {k: sum(r[k] for r in rows) for k in ("posts_with_metrics", "likes", "comments", "shares", "saves", "reach")}
+        reach = sums["reach"]
+        eng_rate = round(((sums["likes"] + sums["comments"] + sums["shares"]) / reach) * 100, 2) if reach > 0 else 0
+        return {
+            "post_count": sums["posts_with_metrics"],
+            "likes": sums["likes"],
+            "comments": sums["comments"],
+            "shares": sums["shares"],
+            "saves": sums["saves"],
+            "reach": reach,
+            "engagement_rate": eng_rate,
+        }
 
     data = []
     if period in ("week", "month"):
         # Day-level buckets
         for i in range(num_buckets):
             day = (start_date + timedelta(days=i)).date()
-            day_posts = [p for p in posts if p.created_at.date() == day]
-            likes = sum(p.perf_likes or 0 for p in day_posts)
-            comments = sum(p.perf_comments or 0 for p in day_posts)
-            shares = sum(p.perf_shares or 0 for p in day_posts)
-            saves = sum(p.perf_saves or 0 for p in day_posts)
-            reach = sum(p.perf_reach or 0 for p in day_posts)
-            eng_rate = round(((likes + comments + shares) / reach) * 100, 2) if reach > 0 else 0
             data.append({
                 "label": day.strftime("%d.%m."),
                 "date": day.isoformat(),
-                "post_count": len(day_posts),
-                "likes": likes,
-                "comments": comments,
-                "shares": shares,
-                "saves": saves,
-                "reach": reach,
-                "engagement_rate": eng_rate,
+                **bucket([day]),
             })
     elif period == "quarter":
         # Week-level buckets
         for w in range(num_buckets):
             w_start = start_date + timedelta(weeks=w)
-            w_end = w_start + timedelta(days=6)
-            w_posts = [p for p in posts if w_start.date() <= p.created_at.date() <= w_end.date()]
-            likes = sum(p.perf_likes or 0 for p in w_posts)
-            comments = sum(p.perf_comments or 0 for p in w_posts)
-            shares = sum(p.perf_shares or 0 for p in w_posts)
-            saves = sum(p.perf_saves or 0 for p in w_posts)
-            reach = sum(p.perf_reach or 0 for p in w_posts)
-            eng_rate = round(((likes + comments + shares) / reach) * 100, 2) if reach > 0 else 0
             data.append({
                 "label": f"KW {w_start.strftime('%d.%m.')}",
                 "date": w_start.date().isoformat(),
-                "post_count": len(w_posts),
-                "likes": likes,
-                "comments": comments,
-                "shares": shares,
-                "saves": saves,
-                "reach": reach,
-                "engagement_rate": eng_rate,
+                **bucket([w_start.date() + timedelta(days=i) for i in range(7)]),
             })
     elif period == "year":
         # Month-level buckets
+        month_names = ["Jan", "Feb", "Mär", "Apr", "Mai", "Jun",
+                       "Jul", "Aug", "Sep", "Okt", "Nov", "Dez"]
         for m_offset in range(num_buckets):
             m = (now.month - 11 + m_offset) % 12
             if m == 0:
                 m = 12
             y = now.year if (now.month - 11 + m_offset) > 0 else now.year - 1
-            m_posts = [p for p in posts if p.created_at.month == m and p.created_at.year == y]
-            likes = sum(p.perf_likes or 0 for p in m_posts)
-            comments = sum(p.perf_comments or 0 for p in m_posts)
-            shares = sum(p.perf_shares or 0 for p in m_posts)
-            saves = sum(p.perf_saves or 0 for p in m_posts)
-            reach = sum(p.perf_reach or 0 for p in m_posts)
-            eng_rate = round(((likes + comments + shares) / reach) * 100, 2) if reach > 0 else 0
-            month_names = ["Jan", "Feb", "Mär", "Apr", "Mai", "Jun",
-                           "Jul", "Aug", "Sep", "Okt", "Nov", "Dez"]
             data.append({
                 "label": month_names[m - 1],
                 "date": f"{y}-{m:02d}-01",
-                "post_count": len(m_posts),
-                "likes": likes,
-                "comments": comments,
-                "shares": shares,
-                "saves": saves,
-                "reach": reach,
-                "engagement_rate": eng_rate,
+                **bucket([d for d in daily if d.month == m and d.year == y]),
             })
 
     return {"period": period, "data": data}
@@ -1130,16 +982,50 @@ async def get_performance_reminder(
     }
 
 
+# Columns of the performance CSV export
+PERFORMANCE_POST = Projection(
+    "PerformancePost",
+    Post.id, Post.title, Post.category, Post.platform, Post.country, Post.status,
+    Post.perf_likes, Post.perf_comments, Post.perf_shares, Post.perf_saves, Post.perf_reach,
+    Post.created_at, Post.posted_at, Post.perf_updated_at,
+)
+
+
+def _performance_csv_row(p) -> list:
+    likes = p.perf_likes or 0
+    comments = p.perf_comments or 0
+    shares = p.perf_shares or 0
+    reach = p.perf_reach or 0
+    eng_rate = round(((likes + comments + shares) / reach) * 100, 2) if reach > 0 else ""
+    return [
+        p.id,
+        p.title or "",
+        p.category or "",
+        p.platform or "",
+        p.country or "",
+        p.status or "",
+        p.perf_likes if p.perf_likes is not None else "",
+        p.perf_comments if p.perf_comments is not None else "",
+        p.perf_shares if p.perf_shares is not None else "",
+        p.perf_saves if p.perf_saves is not None else "",
+        p.perf_reach if p.perf_reach is not None else "",
+        eng_rate,
+        p.created_at.strftime("%Y-%m-%d %H:%M") if p.created_at else "",
+        p.posted_at.strftime("%Y-%m-%d %H:%M") if p.posted_at else "",
+        p.perf_updated_at.strftime("%Y-%m-%d %H:%M") if p.perf_updated_at else "",
+    ]
+
+
 @router.get("/performance-export")
 async def export_performance_csv(
+    request: Request,
     period: Optional[str] = Query(default=None, pattern="^(week|month|quarter|year)$"),
     user_id: int = Depends(get_current_user_id),
-    db: AsyncSession = Depends(get_db),
 ):
-    """Export post performance data as CSV file.
+    """Export post performance data as CSV file (streamed, gzip if accepted).
 
     Args:
-        period: Optional time period filter (week, month, quarter, year)
+        period: Optional time period filter (week, month, quarter, year); all posts if omitted
     """
     now = datetime.now(timezone.utc)
     conditions = [Post.user_id == user_id]
@@ -1154,52 +1040,19 @@ async def export_performance_csv(
         start_date = now - period_map.get(period, timedelta(days=30))
         conditions.append(Post.created_at >= start_date)
 
-    result = await db.execute(
-        select(Post).where(*conditions).order_by(Post.created_at.desc())
+    query = PERFORMANCE_POST.select().where(*conditions).order_by(Post.created_at.desc())
+    lines = csv_lines(
+        stream_rows(PERFORMANCE_POST, query),
+        [
+            "ID", "Titel", "Kategorie", "Plattform", "Land", "Status",
+            "Likes", "Kommentare", "Shares", "Saves", "Reichweite",
+            "Engagement Rate (%)", "Erstellt", "Gepostet", "Metriken aktualisiert"
+        ],
+        _performance_csv_row,
+        delimiter=";",
     )
-    posts = result.scalars().all()
-
-    # Build CSV
-    output = io.StringIO()
-    writer = csv.writer(output, delimiter=";")
-    writer.writerow([
-        "ID", "Titel", "Kategorie", "Plattform", "Land", "Status",
-        "Likes", "Kommentare", "Shares", "Saves", "Reichweite",
-        "Engagement Rate (%)", "Erstellt", "Gepostet", "Metriken aktualisiert"
-    ])
-
-    for p in posts:
-        likes = p.perf_likes or 0
-        comments = p.perf_comments or 0
-        shares = p.perf_shares or 0
-        reach = p.perf_reach or 0
-        eng_rate = round(((likes + comments + shares) / reach) * 100, 2) if reach > 0 else ""
-        writer.writerow([
-            p.id,
-            p.title or "",
-            p.category or "",
-            p.platform or "",
-            p.country or "",
-            p.status or "",
-            p.perf_likes if p.perf_likes is not None else "",
-            p.perf_comments if p.perf_comments is not None else "",
-            p.perf_shares if p.perf_shares is not None else "",
-            p.perf_saves if p.perf_saves is not None else "",
-            p.perf_reach if p.perf_reach is not None else "",
-            eng_rate,
-            p.created_at.strftime("%Y-%m-%d %H:%M") if p.created_at else "",
-            p.posted_at.strftime("%Y-%m-%d %H:%M") if p.posted_at else "",
-            p.perf_updated_at.strftime("%Y-%m-%d %H:%M") if p.perf_updated_at else "",
-        ])
-
-    output.seek(0)
     filename = f"treff_performance_{now.strftime('%Y%m%d')}.csv"
-
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
-    )
+    return download_response(request, encode_chunks(lines), "text/csv", filename)
 
 
 @router.get("/formats")
@@ -1218,8 +1071,6 @@ async def get_formats(
 
     Cached for 15 minutes.
     """
-    import json as _json
-
     cache_key = api_cache._build_key("formats", {"user_id": user_id})
     entry = api_cache.get(cache_key)
     if entry is not None:
@@ -1229,25 +1080,21 @@ async def get_formats(
         })
 
     result = await db.execute(
-        select(Post.platform, Post.slide_data).where(Post.user_id == user_id)
+        select(Post.platform, Post.slide_count).where(Post.user_id == user_id)
     )
     rows = result.all()
 
     format_counts = {"Feed": 0, "Carousel": 0, "Story": 0, "Reel": 0}
-    for platform, slide_data in rows:
+    for platform, slide_count in rows:
         if platform == "instagram_story":
             format_counts["Story"] += 1
         elif platform == "tiktok":
             format_counts["Reel"] += 1
         elif platform == "instagram_feed":
             # Check slide count to distinguish Feed vs Carousel
-            try:
-                slides = _json.loads(slide_data) if slide_data else []
-                if isinstance(slides, list) and len(slides) > 1:
-                    format_counts["Carousel"] += 1
-                else:
-                    format_counts["Feed"] += 1
-            except (ValueError, TypeError):
+            if (slide_count or 0) > 1:
+                format_counts["Carousel"] += 1
+            else:
                 format_counts["Feed"] += 1
         else:
             format_counts["Feed"] += 1
@@ -1280,25 +1127,31 @@ async def get_heatmap(
     start_date = now - timedelta(days=364)
     start_date = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
 
-    # Query all posts in the date range
-    result = await db.execute(
-        select(Post.created_at, Post.title).where(
+    # Daily counts from rollups; titles only for the first 5 posts per day
+    counts_by_date = await counts_by_day(db, user_id, since=start_date.date())
+    daily_counts = {day.isoformat(): count for day, count in counts_by_date.items()}
+
+    post_day = func.date(Post.created_at)
+    ranked = (
+        select(
+            post_day.label("day"),
+            Post.title,
+            func.row_number().over(partition_by=post_day, order_by=Post.created_at).label("rank"),
+        )
+        .where(
             Post.user_id == user_id,
             Post.created_at >= start_date,
-        ).order_by(Post.created_at)
+            Post.title.isnot(None),
+            Post.title != "",
+        )
+        .subquery()
+    )
+    title_result = await db.execute(
+        select(ranked.c.day, ranked.c.title).where(ranked.c.rank <= 5).order_by(ranked.c.day, ranked.c.rank)
     )
-    rows = result.all()
-
-    # Build daily counts dict
-    daily_counts = {}
     daily_titles = {}
-    for created_at, title in rows:
-        day_str = created_at.date().isoformat()
-        daily_counts[day_str] = daily_counts.get(day_str, 0) + 1
-        if day_str not in daily_titles:
-            daily_titles[day_str] = []
-        if title and len(daily_titles[day_str]) < 5:
-            daily_titles[day_str].append(title)
+    for day_str, title in title_result.all():
+        daily_titles.setdefault(day_str, []).append(title)
 
     # Build complete day list for the grid
     days = []
@@ -1370,6 +1223,7 @@ async def get_heatmap(
 async def get_dashboard_widgets(
     user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
+    user_settings: UserSettings = Depends(get_user_settings),
 ):
     """Get aggregated data for dashboard widgets: content queue, student inbox,
     performance pulse, and active campaigns."""
@@ -1383,6 +1237,7 @@ async def get_dashboard_widgets(
     # ── 1. Content Queue: next 5 scheduled posts ──
     queue_query = (
         select(Post)
+        .options(*without_slide_blobs())
         .where(
             Post.user_id == user_id,
             Post.status == "scheduled",
@@ -1397,15 +1252,6 @@ async def get_dashboard_widgets(
 
     content_queue = []
     for p in queue_posts:
-        thumbnail_url = None
-        try:
-            slides = _json.loads(p.slide_data) if p.slide_data else []
-            if slides and isinstance(slides, list) and len(slides) > 0:
-                first_slide = slides[0]
-                thumbnail_url = first_slide.get("background_image") or first_slide.get("image_url") or first_slide.get("thumbnail")
-        except (ValueError, TypeError, KeyError):
-            pass
-
         content_queue.append({
             "id": p.id,
             "title": p.title or "Ohne Titel",
@@ -1415,7 +1261,7 @@ async def get_dashboard_widgets(
             "status": p.status,
             "scheduled_date": p.scheduled_date if isinstance(p.scheduled_date, str) else (p.scheduled_date.isoformat() if p.scheduled_date else None),
             "scheduled_time": p.scheduled_time,
-            "thumbnail_url": thumbnail_url,
+            "thumbnail_url": p.thumbnail_url,
         })
 
     # ── 2. Student Inbox: pending/analyzed items ──
@@ -1493,14 +1339,7 @@ async def get_dashboard_widgets(
         })
 
     # Get posting goal from settings
-    goal_result = await db.execute(
-        select(Setting).where(
-            Setting.user_id == user_id,
-            Setting.key == "posts_per_week",
-        )
-    )
-    goal_setting = goal_result.scalar_one_or_none()
-    posts_per_week_goal = int(goal_setting.value) if goal_setting and goal_setting.value else 3
+    posts_per_week_goal = user_settings.get_int("posts_per_week", 3)
 
     # Trend direction
     if len(weeks_data) >= 2:
@@ -1588,6 +1427,9 @@ async def get_dashboard_widgets(
 # Strategy IST-vs-SOLL Dashboard — compares actual posts against strategy targets
 # ═══════════════════════════════════════════════════════════════════════════════
 
+# Strategy health only reads captions of this week's posts (hook detection)
+WEEK_CAPTION_POST = Projection("WeekCaptionPost", Post.id, Post.caption_instagram, Post.caption_tiktok)
+
 
 @router.get("/strategy-health")
 async def get_strategy_health(
@@ -1633,24 +1475,21 @@ async def get_strategy_health(
     except (FileNotFoundError, _json.JSONDecodeError):
         pass
 
-    # ── Fetch all posts from last 30 days ──
-    result = await db.execute(
-        select(Post).where(
-            Post.user_id == user_id,
-            Post.created_at >= thirty_days_ago,
-        )
+    # ── Post counts of the last 30 days from rollups, grouped by all mix dimensions ──
+    mix_counts = await count_by(
+        db, user_id, "category", "pillar_id", "platform", "country",
+        since=thirty_days_ago.date(),
     )
-    posts = result.scalars().all()
-    total_posts = len(posts)
+    total_posts = sum(mix_counts.values())
 
-    # ── Fetch posts from this week for frequency + hook tracking ──
-    result_week = await db.execute(
-        select(Post).where(
+    # ── Fetch posts from this week for frequency + hook tracking (captions only) ──
+    week_posts = await WEEK_CAPTION_POST.all(
+        db,
+        WEEK_CAPTION_POST.select().where(
             Post.user_id == user_id,
             Post.created_at >= week_start,
-        )
+        ),
     )
-    week_posts = result_week.scalars().all()
 
     # ════════════════════════════════════════════════════
     # 1. PILLAR HEALTH — 7 content pillars IST vs SOLL
@@ -1676,9 +1515,9 @@ async def get_strategy_health(
 
     # Count posts per pillar (use pillar_id field if available, else map from category)
     pillar_counts = {}
-    for p in posts:
-        pillar = p.pillar_id or category_to_pillar.get(p.category, p.category)
-        pillar_counts[pillar] = pillar_counts.get(pillar, 0) + 1
+    for (category, pillar_id, _, _), count in mix_counts.items():
+        pillar = pillar_id or category_to_pillar.get(category, category)
+        pillar_counts[pillar] = pillar_counts.get(pillar, 0) + count
 
     pillar_health = []
     for pillar_id in pillar_targets:
@@ -1717,12 +1556,11 @@ async def get_strategy_health(
         pillar_journey_map[p_config["id"]] = stages
 
     journey_counts = {"awareness": 0, "consideration": 0, "decision": 0}
-    for p in posts:
-        pillar = p.pillar_id or category_to_pillar.get(p.category, p.category)
+    for pillar, count in pillar_counts.items():
         stages = pillar_journey_map.get(pillar, ["awareness"])
         for stage in stages:
             if stage in journey_counts:
-                journey_counts[stage] += 1
+                journey_counts[stage] += count
 
     # Normalize: total journey attributions
     journey_total = sum(journey_counts.values()) or 1
@@ -1758,9 +1596,9 @@ async def get_strategy_health(
     }
 
     country_counts = {}
-    for p in posts:
-        if p.country:
-            country_counts[p.country] = country_counts.get(p.country, 0) + 1
+    for (_, _, _, country), count in mix_counts.items():
+        if country:
+            country_counts[country] = country_counts.get(country, 0) + count
 
     country_total = sum(country_counts.values()) or 1
     country_health = []
@@ -1794,8 +1632,8 @@ async def get_strategy_health(
 
     # Simplified mapping: combine instagram_feed + instagram_stories = "Instagram"
     platform_counts = {}
-    for p in posts:
-        platform_counts[p.platform] = platform_counts.get(p.platform, 0) + 1
+    for (_, _, platform, _), count in mix_counts.items():
+        platform_counts[platform] = platform_counts.get(platform, 0) + count
 
     platform_total = sum(platform_counts.values()) or 1
     platform_labels_map = {
@@ -1838,13 +1676,13 @@ async def get_strategy_health(
     # 5. VIDEO RATIO — Reels percentage (target: 40%)
     # ════════════════════════════════════════════════════
     reel_count = 0
-    for p in posts:
-        if p.platform == "tiktok":
-            reel_count += 1
-        elif p.platform == "instagram_feed":
-            # Check if it's a Reel based on category or slide data
-            if p.category == "reel_tiktok_thumbnails":
-                reel_count += 1
+    for (category, _, platform, _), count in mix_counts.items():
+        if platform == "tiktok":
+            reel_count += count
+        elif platform == "instagram_feed":
+            # Check if it's a Reel based on category
+            if category == "reel_tiktok_thumbnails":
+                reel_count += count
 
     video_pct = round((reel_count / total_posts) * 100, 1) if total_posts > 0 else 0
     video_target = 40
@@ -12,7 +12,7 @@ import uuid
 from typing import Optional
 from pathlib import Path
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import load_only
@@ -20,7 +20,11 @@ from sqlalchemy.orm import load_only
 from app.core.database import get_db
 from app.core.security import get_current_user_id
 from app.core.paths import get_upload_dir
+from app.core.pagination import keyset_page, stream_json_response
+from app.core.media import FFMPEG_AVAILABLE
 from app.models.asset import Asset
+from app.services import search_index
+from app.services.video_proxy import submit_proxy_job
 
 logger = logging.getLogger(__name__)
 
@@ -97,9 +101,11 @@ THUMBNAIL_SIZES = {
 }
 
 
-def _generate_image_thumbnails(image_bytes: bytes, original_filename: str) -> dict:
+def _generate_image_thumbnails(image_bytes: bytes, original_filename: str, image=None) -> dict:
     """Generate 3 thumbnail sizes (small, medium, large) for an image.
 
+    Pass `image` (an already opened PIL image) to skip decoding `image_bytes` again.
+
     Returns dict with keys: thumbnail_small, thumbnail_medium, thumbnail_large
     Each value is the relative serving path or None if generation failed.
     """
@@ -111,7 +117,7 @@ def _generate_image_thumbnails(image_bytes: bytes, original_filename: str) -> di
         from PIL import Image
         import io
 
-        img = Image.open(io.BytesIO(image_bytes))
+        img = image if image is not None else Image.open(io.BytesIO(image_bytes))
 
         # Determine output format
         ext = os.path.splitext(original_filename or "img.jpg")[1].lower()
@@ -360,6 +366,9 @@ async def list_assets(
     file_type: Optional[str] = None,
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
+    cursor: Optional[str] = Query(default=None, description="Keyset pagination: empty for the first page, then the returned next_cursor"),
+    limit: Optional[int] = Query(default=None, ge=1, le=200, description="Page size for cursor pagination (default 50)"),
+    stream: Optional[str] = Query(default=None, pattern="^(ndjson|json)$", description="Stream all matching rows as NDJSON or a JSON array"),
     user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
 ):
@@ -373,6 +382,9 @@ async def list_assets(
         file_type: Filter by type (image, video, audio, or specific MIME type)
         date_from: Filter assets created on or after this date (ISO format: YYYY-MM-DD)
         date_to: Filter assets created on or before this date (ISO format: YYYY-MM-DD)
+        cursor: Keyset pagination (empty for the first page, then next_cursor)
+        limit: Page size for cursor pagination
+        stream: Stream all matching assets as "ndjson" or "json"
     """
     query = select(Asset).where(Asset.user_id == user_id).options(
         load_only(
@@ -403,11 +415,15 @@ async def list_assets(
         else:
             query = query.where(Asset.file_type == file_type)
     if search:
-        query = query.where(
-            (Asset.filename.ilike(f"%{search}%"))
-            | (Asset.original_filename.ilike(f"%{search}%"))
-            | (Asset.tags.ilike(f"%{search}%"))
-        )
+        matches = search_index.match_subquery(user_id, "asset", search)
+        if matches is not None:
+            query = query.where(Asset.id.in_(matches))
+        else:
+            query = query.where(
+                (Asset.filename.ilike(f"%{search}%"))
+                | (Asset.original_filename.ilike(f"%{search}%"))
+                | (Asset.tags.ilike(f"%{search}%"))
+            )
     if date_from:
         try:
             from datetime import datetime as _dt
@@ -423,6 +439,11 @@ async def list_assets(
         except ValueError:
             pass
 
+    if cursor is not None:
+        return await keyset_page(db, query, Asset.created_at, Asset.id, cursor, limit, asset_to_dict)
+    if stream:
+        return stream_json_response(query.order_by(Asset.created_at.desc(), Asset.id.desc()), asset_to_dict, stream)
+
     result = await db.execute(query.order_by(Asset.created_at.desc()))
     assets = result.scalars().all()
     return [asset_to_dict(a) for a in assets]
@@ -601,6 +622,13 @@ async def upload_asset(
     await db.flush()
     await db.refresh(asset)
 
+    # Low-resolution proxy for fast editing previews. The task manager writes
+    # its task row in its own session, so the asset must be committed first
+    # (SQLite allows one writer; the open request transaction would lock it out)
+    if is_video and FFMPEG_AVAILABLE:
+        await db.commit()
+        await submit_proxy_job(user_id, asset.id, file_path)
+
     return asset_to_dict(asset)
 
 
@@ -1502,6 +1530,13 @@ async def complete_chunked_upload(
     await db.flush()
     await db.refresh(asset)
 
+    # Low-resolution proxy for fast editing previews. The task manager writes
+    # its task row in its own session, so the asset must be committed first
+    # (SQLite allows one writer; the open request transaction would lock it out)
+    if is_video and FFMPEG_AVAILABLE:
+        await db.commit()
+        await submit_proxy_job(user_id, asset.id, final_path)
+
     # Clean up session
     del _chunk_sessions[upload_id]
 
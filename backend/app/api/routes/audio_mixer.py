@@ -1,5 +1,6 @@
 """Audio mixer routes - Music library browsing and audio mixing via ffmpeg."""
 
+import asyncio
 import json
 import logging
 import os
@@ -19,6 +20,7 @@ from app.core.security import get_current_user_id
 from app.core.paths import get_upload_dir
 from app.models.music_track import MusicTrack
 from app.models.asset import Asset
+from app.services.audio_engine import AudioEngineError, analyze, mix_with_stems
 
 logger = logging.getLogger(__name__)
 
@@ -42,6 +44,7 @@ class AudioMixRequest(BaseModel):
     music_volume: float = Field(default=0.5, ge=0.0, le=2.0)
     fade_in_seconds: float = Field(default=0.0, ge=0.0, le=10.0)
     fade_out_seconds: float = Field(default=0.0, ge=0.0, le=10.0)
+    auto_duck: bool = False  # lower the music automatically while the video's own audio (voice) is loud
     save_as_new: bool = True
 
 
@@ -130,11 +133,13 @@ async def mix_audio(
     user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
 ):
-    """Mix background music/audio into a video using ffmpeg amerge/amix filter.
+    """Mix background music/audio into a video using ffmpeg amix filter.
 
     Takes a video asset and an audio source (library track or uploaded audio),
-    mixes them with configurable volume levels and fade effects, and outputs
-    a new video with the mixed audio.
+    mixes them with configurable volume levels, fade effects and optional
+    ducking, and outputs a new video with the mixed audio. Both sources are
+    decoded and loudness-normalized once (cached stems, see
+    app.services.audio_engine); the video stream is copied.
     """
     if not FFMPEG_AVAILABLE:
         raise HTTPException(status_code=501, detail="Audio-Mixing ist auf diesem Server nicht verfuegbar (ffmpeg fehlt).")
@@ -179,22 +184,34 @@ async def mix_audio(
         if not audio_path.exists():
             raise HTTPException(status_code=404, detail="Audio file not found on disk")
 
-    # 3. Get video duration for fade calculations
-    video_duration = video_asset.duration_seconds or _get_duration(video_path)
+    # 3. Analyze both sources (loudness + stems; cached after the first mix)
+    try:
+        voice = await analyze(video_path)
+        music = await analyze(audio_path)
+    except AudioEngineError as e:
+        raise HTTPException(status_code=500, detail=f"Audio analysis failed: {e}")
+    if not music["has_audio"]:
+        raise HTTPException(status_code=400, detail="Audio source has no audio stream")
+
+    # Video duration for fade calculations
+    video_duration = video_asset.duration_seconds or voice["duration"] or 10.0
 
-    # 4. Build ffmpeg command for audio mixing
+    # 4. Mix the stems into the video
     output_filename = f"mixed_{uuid.uuid4().hex[:12]}.mp4"
     output_path = EXPORTS_DIR / output_filename
 
-    success, error_msg = _mix_audio_with_ffmpeg(
+    success, error_msg = await asyncio.to_thread(
+        mix_with_stems,
         video_path=video_path,
-        audio_path=audio_path,
+        voice=voice,
+        music=music,
         output_path=output_path,
+        duration=video_duration,
         original_volume=data.original_volume,
         music_volume=data.music_volume,
         fade_in_seconds=data.fade_in_seconds,
         fade_out_seconds=data.fade_out_seconds,
-        video_duration=video_duration,
+        duck=data.auto_duck,
     )
 
     if not success:
@@ -319,127 +336,6 @@ def _track_to_dict(track: MusicTrack) -> dict:
     }
 
 
-def _get_duration(file_path: Path) -> float:
-    """Get duration of an audio/video file using ffprobe."""
-    try:
-        cmd = [
-            "ffprobe", "-v", "quiet", "-print_format", "json",
-            "-show_format", str(file_path),
-        ]
-        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=15)
-        if proc.returncode == 0:
-            data = json.loads(proc.stdout)
-            dur = data.get("format", {}).get("duration")
-            if dur:
-                return float(dur)
-    except Exception as e:
-        logger.warning(f"Failed to get duration: {e}")
-    return 10.0  # default fallback
-
-
-def _mix_audio_with_ffmpeg(
-    video_path: Path,
-    audio_path: Path,
-    output_path: Path,
-    original_volume: float,
-    music_volume: float,
-    fade_in_seconds: float,
-    fade_out_seconds: float,
-    video_duration: float,
-) -> tuple[bool, str]:
-    """Mix background audio into a video using ffmpeg amix/amerge filter.
-
-    Returns (success: bool, error_message: str).
-    """
-    # Build the audio filter chain
-    # Input 0 = video (with original audio), Input 1 = music/audio track
-    audio_filters = []
-
-    # Original audio volume adjustment
-    orig_filter = f"[0:a]volume={original_volume}"
-    audio_filters.append(f"{orig_filter}[orig]")
-
-    # Music audio: volume + fade in/out + trim to video length
-    music_parts = [f"[1:a]volume={music_volume}"]
-
-    # Trim music to match video duration
-    music_parts.append(f"atrim=0:{video_duration}")
-    music_parts.append(f"asetpts=PTS-STARTPTS")
-
-    # Add fade-in
-    if fade_in_seconds > 0:
-        music_parts.append(f"afade=t=in:d={fade_in_seconds}")
-
-    # Add fade-out
-    if fade_out_seconds > 0:
-        fade_out_start = max(0, video_duration - fade_out_seconds)
-        music_parts.append(f"afade=t=out:st={fade_out_start}:d={fade_out_seconds}")
-
-    audio_filters.append(",".join(music_parts) + "[music]")
-
-    # Mix the two audio streams
-    audio_filters.append("[orig][music]amix=inputs=2:duration=first:dropout_transition=2[mixed]")
-
-    filter_complex = ";".join(audio_filters)
-
-    cmd = [
-        "ffmpeg",
-        "-y",
-        "-i", str(video_path),
-        "-i", str(audio_path),
-        "-filter_complex", filter_complex,
-        "-map", "0:v",  # Keep video from first input
-        "-map", "[mixed]",  # Use mixed audio
-        "-c:v", "copy",  # Copy video stream (no re-encode)
-        "-c:a", "aac",
-        "-b:a", "192k",
-        "-shortest",
-        str(output_path),
-    ]
-
-    logger.info(f"Running audio mix: ffmpeg -> {output_path.name}")
-
-    try:
-        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
-        if proc.returncode != 0:
-            error_msg = proc.stderr[:1000] if proc.stderr else "Unknown ffmpeg error"
-            logger.error(f"ffmpeg audio mixing failed: {error_msg}")
-
-            # Fallback: try without stream copy (re-encode everything)
-            cmd_fallback = [
-                "ffmpeg",
-                "-y",
-                "-i", str(video_path),
-                "-i", str(audio_path),
-                "-filter_complex", filter_complex,
-                "-map", "0:v",
-                "-map", "[mixed]",
-                "-c:v", "libx264",
-                "-preset", "fast",
-                "-crf", "23",
-                "-c:a", "aac",
-                "-b:a", "192k",
-                "-shortest",
-                str(output_path),
-            ]
-            proc2 = subprocess.run(cmd_fallback, capture_output=True, text=True, timeout=600)
-            if proc2.returncode != 0:
-                error_msg2 = proc2.stderr[:1000] if proc2.stderr else "Unknown error"
-                return False, f"Mixing failed (both attempts): {error_msg2}"
-
-        if output_path.exists() and output_path.stat().st_size > 0:
-            return True, ""
-        else:
-            return False, "ffmpeg produced empty or missing output file"
-
-    except FileNotFoundError:
-        return False, "ffmpeg not found on system"
-    except subprocess.TimeoutExpired:
-        return False, "Audio mixing timed out (>5 min)"
-    except Exception as e:
-        return False, str(e)
-
-
 def _generate_waveform_data(audio_path: Path, num_samples: int = 100) -> list[float]:
     """Generate waveform amplitude data from an audio file using ffmpeg.
 
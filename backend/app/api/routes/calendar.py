@@ -11,23 +11,26 @@ import uuid
 from typing import Optional, List
 from datetime import datetime, date, timedelta
 from calendar import monthrange
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
-from fastapi.responses import StreamingResponse, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, File
+from fastapi.responses import Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_, extract, func
 
 from app.core.database import get_db
+from app.core.export_stream import csv_lines, download_response, encode_chunks, stream_rows
+from app.core.projection import Projection
 from app.core.security import get_current_user_id
 from app.models.post import Post
-from app.models.setting import Setting
 from app.models.story_arc import StoryArc
 from app.models.recurring_format import RecurringFormat
+from app.services.bulk_posts import insert_posts
+from app.services.user_settings import UserSettings, get_user_settings, store_user_settings
 
 router = APIRouter()
 
 
 def post_to_calendar_dict(post: Post) -> dict:
-    """Convert a Post model to a calendar-friendly dict."""
+    """Convert a Post model or CALENDAR_POST row to a calendar-friendly dict."""
     return {
         "id": post.id,
         "title": post.title,
@@ -46,6 +49,16 @@ def post_to_calendar_dict(post: Post) -> dict:
     }
 
 
+# Read-only calendar views select only these columns (namedtuple rows, no ORM objects)
+CALENDAR_POST = Projection(
+    "CalendarPost",
+    Post.id, Post.title, Post.category, Post.country, Post.platform, Post.status,
+    Post.scheduled_date, Post.scheduled_time, Post.story_arc_id, Post.episode_number,
+    Post.linked_post_group_id, Post.recurring_rule_id, Post.is_recurring_instance, Post.created_at,
+)
+ICAL_POST = CALENDAR_POST.extend("IcalPost", Post.hashtags_instagram)
+
+
 @router.get("")
 async def get_calendar(
     month: Optional[int] = None,
@@ -82,10 +95,8 @@ async def get_calendar(
     if platform:
         conditions.append(Post.platform == platform)
 
-    query = select(Post).where(and_(*conditions)).order_by(Post.scheduled_date)
-
-    result = await db.execute(query)
-    posts = result.scalars().all()
+    query = CALENDAR_POST.select().where(and_(*conditions)).order_by(Post.scheduled_date)
+    posts = await CALENDAR_POST.all(db, query)
 
     # Group posts by date
     posts_by_date = {}
@@ -140,10 +151,8 @@ async def get_calendar_week(
     if platform:
         conditions.append(Post.platform == platform)
 
-    query = select(Post).where(and_(*conditions)).order_by(Post.scheduled_date)
-
-    result = await db.execute(query)
-    posts = result.scalars().all()
+    query = CALENDAR_POST.select().where(and_(*conditions)).order_by(Post.scheduled_date)
+    posts = await CALENDAR_POST.all(db, query)
 
     posts_by_date = {}
     for post in posts:
@@ -189,10 +198,8 @@ async def get_calendar_day(
     if platform:
         conditions.append(Post.platform == platform)
 
-    query = select(Post).where(and_(*conditions)).order_by(Post.scheduled_date)
-
-    result = await db.execute(query)
-    posts = result.scalars().all()
+    query = CALENDAR_POST.select().where(and_(*conditions)).order_by(Post.scheduled_date)
+    posts = await CALENDAR_POST.all(db, query)
 
     # Group posts by hour for timeline display
     posts_by_hour = {}
@@ -290,6 +297,7 @@ async def get_calendar_gaps(
 async def get_calendar_stats(
     user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
+    user_settings: UserSettings = Depends(get_user_settings),
 ):
     """Get posting frequency and goal progress."""
     from datetime import timedelta
@@ -330,27 +338,9 @@ async def get_calendar_stats(
     month_result = await db.execute(month_query)
     posts_this_month = month_result.scalar() or 0
 
-    # Fetch user's posting goals from settings
-    settings_result = await db.execute(
-        select(Setting).where(
-            and_(
-                Setting.user_id == user_id,
-                Setting.key.in_(["posts_per_week", "posts_per_month"]),
-            )
-        )
-    )
-    user_settings = {s.key: s.value for s in settings_result.scalars().all()}
-
-    # Use user settings or defaults (3 per week, 12 per month)
-    try:
-        weekly_goal = int(user_settings.get("posts_per_week", "3"))
-    except (ValueError, TypeError):
-        weekly_goal = 3
-
-    try:
-        monthly_goal = int(user_settings.get("posts_per_month", "12"))
-    except (ValueError, TypeError):
-        monthly_goal = 12
+    # Use user's posting goals or defaults (3 per week, 12 per month)
+    weekly_goal = user_settings.get_int("posts_per_week", 3)
+    monthly_goal = user_settings.get_int("posts_per_month", 12)
 
     return {
         "posts_this_week": posts_this_week,
@@ -470,13 +460,12 @@ async def get_calendar_queue(
         conditions.append(Post.platform == platform)
 
     query = (
-        select(Post)
+        CALENDAR_POST.select()
         .where(and_(*conditions))
         .order_by(Post.scheduled_date.asc(), Post.scheduled_time.asc())
     )
 
-    result = await db.execute(query)
-    posts = result.scalars().all()
+    posts = await CALENDAR_POST.all(db, query)
 
     return {
         "posts": [post_to_calendar_dict(post) for post in posts],
@@ -484,56 +473,69 @@ async def get_calendar_queue(
     }
 
 
+EXPORT_MONTH_NAMES_EN = [
+    "january", "february", "march", "april", "may", "june",
+    "july", "august", "september", "october", "november", "december",
+]
+
+
+def _export_window(period: str, month: Optional[int], year: Optional[int]) -> tuple[list, str, str]:
+    """(date conditions, filename suffix, calendar label) of a calendar export period.
+
+    period: "month" (default month/year: current), "year" or "all".
+    """
+    now = datetime.now()
+    year = year or now.year
+    if period == "all":
+        return [], "all", "gesamt"
+    if period == "year":
+        first_dt = datetime(year, 1, 1, 0, 0, 0)
+        last_dt = datetime(year, 12, 31, 23, 59, 59)
+        return [Post.scheduled_date >= first_dt, Post.scheduled_date <= last_dt], str(year), str(year)
+
+    month = month or now.month
+    last_day_num = monthrange(year, month)[1]
+    first_dt = datetime(year, month, 1, 0, 0, 0)
+    last_dt = datetime(year, month, last_day_num, 23, 59, 59)
+    return (
+        [Post.scheduled_date >= first_dt, Post.scheduled_date <= last_dt],
+        f"{EXPORT_MONTH_NAMES_EN[month - 1]}_{year}",
+        f"{month:02d}/{year}",
+    )
+
+
 @router.get("/export-csv")
 async def export_calendar_csv(
+    request: Request,
     month: Optional[int] = None,
     year: Optional[int] = None,
+    period: str = Query(default="month", pattern="^(month|year|all)$"),
     platform: Optional[str] = None,
     user_id: int = Depends(get_current_user_id),
-    db: AsyncSession = Depends(get_db),
 ):
-    """Export all scheduled posts for a given month as a CSV file.
+    """Export scheduled posts of a month, a year or all time as a CSV file.
     Columns: date, time, title, category, platform, status, country.
-    Returns a downloadable CSV file."""
-    now = datetime.now()
-    if not month:
-        month = now.month
-    if not year:
-        year = now.year
-
-    last_day_num = monthrange(year, month)[1]
-    first_dt = datetime(year, month, 1, 0, 0, 0)
-    last_dt = datetime(year, month, last_day_num, 23, 59, 59)
-
+    Returns a downloadable CSV file, streamed (gzip if accepted) while rows are read."""
+    window, file_label, _ = _export_window(period, month, year)
     conditions = [
         Post.user_id == user_id,
         Post.scheduled_date.isnot(None),
-        Post.scheduled_date >= first_dt,
-        Post.scheduled_date <= last_dt,
+        *window,
     ]
 
     if platform:
         conditions.append(Post.platform == platform)
 
     query = (
-        select(Post)
+        CALENDAR_POST.select()
         .where(and_(*conditions))
         .order_by(Post.scheduled_date.asc(), Post.scheduled_time.asc())
     )
 
-    result = await db.execute(query)
-    posts = result.scalars().all()
-
-    # Build CSV in memory
-    output = io.StringIO()
-    writer = csv.writer(output)
-
-    # Header row
-    writer.writerow(["date", "time", "title", "category", "platform", "status", "country"])
-
-    # Data rows
-    for post in posts:
-        writer.writerow([
+    lines = csv_lines(
+        stream_rows(CALENDAR_POST, query),
+        ["date", "time", "title", "category", "platform", "status", "country"],
+        lambda post: [
             post.scheduled_date.strftime("%Y-%m-%d") if post.scheduled_date else "",
             post.scheduled_time or "",
             post.title or "",
@@ -541,24 +543,10 @@ async def export_calendar_csv(
             post.platform or "",
             post.status or "",
             post.country or "",
-        ])
-
-    output.seek(0)
-
-    # Month names for filename
-    month_names_en = [
-        "january", "february", "march", "april", "may", "june",
-        "july", "august", "september", "october", "november", "december",
-    ]
-    filename = f"TREFF_calendar_{month_names_en[month - 1]}_{year}.csv"
-
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={
-            "Content-Disposition": f'attachment; filename="{filename}"',
-        },
+        ],
     )
+    filename = f"TREFF_calendar_{file_label}.csv"
+    return download_response(request, encode_chunks(lines), "text/csv", filename)
 
 
 # ========== SEASONAL MARKERS ==========
@@ -1189,23 +1177,6 @@ async def _get_arc_episodes(db: AsyncSession, user_id: int, arc_id: int) -> list
     return list(result.scalars().all())
 
 
-async def _get_min_episode_gap(db: AsyncSession, user_id: int) -> int:
-    """Get min_episode_gap_days from user settings (default: 1)."""
-    result = await db.execute(
-        select(Setting).where(
-            Setting.user_id == user_id,
-            Setting.key == "min_episode_gap_days",
-        )
-    )
-    setting = result.scalar_one_or_none()
-    if setting:
-        try:
-            return max(0, int(setting.value))
-        except (ValueError, TypeError):
-            pass
-    return 1  # Default: 1 day minimum gap
-
-
 def _validate_episode_order(
     episodes: list,
     target_post_id: int,
@@ -1302,6 +1273,7 @@ async def validate_episode_order(
     data: dict,
     user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
+    user_settings: UserSettings = Depends(get_user_settings),
 ):
     """Validate that scheduling an episode at a target date respects series ordering.
 
@@ -1348,7 +1320,7 @@ async def validate_episode_order(
 
     # Get all episodes in the arc
     episodes = await _get_arc_episodes(db, user_id, arc_id)
-    min_gap = await _get_min_episode_gap(db, user_id)
+    min_gap = user_settings.min_episode_gap_days
 
     validation = _validate_episode_order(episodes, post_id, target_date_parsed, min_gap)
 
@@ -1372,6 +1344,7 @@ async def schedule_episode(
     data: dict,
     user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
+    user_settings: UserSettings = Depends(get_user_settings),
 ):
     """Schedule an episode post with order validation and optional cascade shift.
 
@@ -1432,7 +1405,7 @@ async def schedule_episode(
     if arc_id and not force:
         # Validate episode order
         episodes = await _get_arc_episodes(db, user_id, arc_id)
-        min_gap = await _get_min_episode_gap(db, user_id)
+        min_gap = user_settings.min_episode_gap_days
         validation = _validate_episode_order(episodes, post_id, target_date_only, min_gap)
 
         if not validation["valid"]:
@@ -1495,12 +1468,10 @@ async def schedule_episode(
 
 @router.get("/episode-gap-setting")
 async def get_episode_gap_setting(
-    user_id: int = Depends(get_current_user_id),
-    db: AsyncSession = Depends(get_db),
+    user_settings: UserSettings = Depends(get_user_settings),
 ):
     """Get the min_episode_gap_days setting for the user."""
-    min_gap = await _get_min_episode_gap(db, user_id)
-    return {"min_episode_gap_days": min_gap}
+    return {"min_episode_gap_days": user_settings.min_episode_gap_days}
 
 
 @router.put("/episode-gap-setting")
@@ -1524,21 +1495,8 @@ async def set_episode_gap_setting(
     except (ValueError, TypeError):
         raise HTTPException(status_code=400, detail="min_episode_gap_days must be 0-30")
 
-    # Upsert setting
-    result = await db.execute(
-        select(Setting).where(
-            Setting.user_id == user_id,
-            Setting.key == "min_episode_gap_days",
-        )
-    )
-    setting = result.scalar_one_or_none()
-    if setting:
-        setting.value = str(gap_days)
-    else:
-        new_setting = Setting(user_id=user_id, key="min_episode_gap_days", value=str(gap_days))
-        db.add(new_setting)
-
-    await db.commit()
+    # Upsert setting (also refreshes the cached settings snapshot)
+    await store_user_settings(user_id, {"min_episode_gap_days": gap_days}, db)
     return {"min_episode_gap_days": gap_days, "message": "Einstellung gespeichert."}
 
 
@@ -1604,9 +1562,8 @@ async def get_platform_lanes(
         Post.scheduled_date <= last_dt,
     ]
 
-    query = select(Post).where(and_(*conditions)).order_by(Post.scheduled_date)
-    result = await db.execute(query)
-    posts = result.scalars().all()
+    query = CALENDAR_POST.select().where(and_(*conditions)).order_by(Post.scheduled_date)
+    posts = await CALENDAR_POST.all(db, query)
 
     # Group by platform then by date
     lanes = []
@@ -1677,9 +1634,8 @@ async def get_cross_platform_stats(
     for platform in PLATFORM_LANE_ORDER:
         pass
 
-    query = select(Post).where(and_(*conditions)).order_by(Post.scheduled_date)
-    result = await db.execute(query)
-    posts = result.scalars().all()
+    query = CALENDAR_POST.select().where(and_(*conditions)).order_by(Post.scheduled_date)
+    posts = await CALENDAR_POST.all(db, query)
 
     platform_data = {}
     category_per_platform = {}
@@ -1943,136 +1899,121 @@ async def get_recurring_placeholders(
 
 # ========== CALENDAR EXPORT: iCal ==========
 
+ICAL_PLATFORM_LABELS = {
+    "instagram_feed": "Instagram Feed",
+    "instagram_story": "Instagram Story",
+    "tiktok": "TikTok",
+}
+
+
+def _ical_event(post) -> str:
+    """VEVENT lines (CRLF-terminated) of one scheduled post."""
+    dt_date = post.scheduled_date.strftime("%Y%m%d")
+    # Parse time or default to 10:00
+    hour, minute = 10, 0
+    if post.scheduled_time:
+        try:
+            parts = post.scheduled_time.split(":")
+            hour, minute = int(parts[0]), int(parts[1])
+        except (ValueError, IndexError):
+            pass
+
+    dt_start = f"{dt_date}T{hour:02d}{minute:02d}00"
+    # 30 minute event duration
+    end_hour = hour
+    end_minute = minute + 30
+    if end_minute >= 60:
+        end_hour += 1
+        end_minute -= 60
+    if end_hour >= 24:
+        end_hour = 23
+        end_minute = 59
+    dt_end = f"{dt_date}T{end_hour:02d}{end_minute:02d}00"
+
+    uid = f"treff-post-{post.id}@treff-sprachreisen.de"
+
+    plat_label = ICAL_PLATFORM_LABELS.get(post.platform, post.platform or "")
+    description_parts = []
+    if post.category:
+        description_parts.append(f"Kategorie: {post.category}")
+    if plat_label:
+        description_parts.append(f"Plattform: {plat_label}")
+    if post.country:
+        description_parts.append(f"Land: {post.country}")
+    if post.status:
+        description_parts.append(f"Status: {post.status}")
+    if post.hashtags_instagram:
+        description_parts.append(f"Hashtags: {post.hashtags_instagram}")
+
+    description = "\\n".join(description_parts)
+
+    summary = (post.title or "Unbenannter Post").replace(",", "\\,")
+    description = description.replace(",", "\\,")
+
+    return "\r\n".join([
+        "BEGIN:VEVENT",
+        f"UID:{uid}",
+        f"DTSTART:{dt_start}",
+        f"DTEND:{dt_end}",
+        f"SUMMARY:{summary}",
+        f"DESCRIPTION:{description}",
+        f"CATEGORIES:{post.category or ''}",
+        f"STATUS:{'CONFIRMED' if post.status == 'scheduled' else 'TENTATIVE'}",
+        "END:VEVENT",
+    ]) + "\r\n"
+
+
+async def _ical_lines(posts, calendar_label: str):
+    """iCalendar (RFC 5545) text: header, one VEVENT per post, footer."""
+    yield "\r\n".join([
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//TREFF Sprachreisen//Content Calendar//DE",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:TREFF Content-Kalender {calendar_label}",
+    ]) + "\r\n"
+    async for post in posts:
+        yield _ical_event(post)
+    yield "END:VCALENDAR\r\n"
+
+
 @router.get("/export/ical")
 async def export_calendar_ical(
+    request: Request,
     month: Optional[int] = None,
     year: Optional[int] = None,
+    period: str = Query(default="month", pattern="^(month|year|all)$"),
     platform: Optional[str] = None,
     user_id: int = Depends(get_current_user_id),
-    db: AsyncSession = Depends(get_db),
 ):
-    """Export scheduled posts as iCalendar (.ics) file.
+    """Export scheduled posts of a month, a year or all time as iCalendar (.ics) file.
 
     Each scheduled post becomes a calendar event with:
     - Summary: Post title
     - Description: Category, platform, country, status, hashtags
     - DTSTART/DTEND: Scheduled date/time (30min duration)
-    """
-    now = datetime.now()
-    if not month:
-        month = now.month
-    if not year:
-        year = now.year
-
-    last_day_num = monthrange(year, month)[1]
-    first_dt = datetime(year, month, 1, 0, 0, 0)
-    last_dt = datetime(year, month, last_day_num, 23, 59, 59)
 
+    The file is streamed (gzip if accepted) while rows are read.
+    """
+    window, file_label, calendar_label = _export_window(period, month, year)
     conditions = [
         Post.user_id == user_id,
         Post.scheduled_date.isnot(None),
-        Post.scheduled_date >= first_dt,
-        Post.scheduled_date <= last_dt,
+        *window,
     ]
     if platform:
         conditions.append(Post.platform == platform)
 
     query = (
-        select(Post)
+        ICAL_POST.select()
         .where(and_(*conditions))
         .order_by(Post.scheduled_date.asc(), Post.scheduled_time.asc())
     )
-    result = await db.execute(query)
-    posts = result.scalars().all()
-
-    # Build iCal content (RFC 5545)
-    lines = [
-        "BEGIN:VCALENDAR",
-        "VERSION:2.0",
-        "PRODID:-//TREFF Sprachreisen//Content Calendar//DE",
-        "CALSCALE:GREGORIAN",
-        "METHOD:PUBLISH",
-        f"X-WR-CALNAME:TREFF Content-Kalender {month:02d}/{year}",
-    ]
-
-    platform_labels = {
-        "instagram_feed": "Instagram Feed",
-        "instagram_story": "Instagram Story",
-        "tiktok": "TikTok",
-    }
 
-    for post in posts:
-        dt_date = post.scheduled_date.strftime("%Y%m%d")
-        # Parse time or default to 10:00
-        hour, minute = 10, 0
-        if post.scheduled_time:
-            try:
-                parts = post.scheduled_time.split(":")
-                hour, minute = int(parts[0]), int(parts[1])
-            except (ValueError, IndexError):
-                pass
-
-        dt_start = f"{dt_date}T{hour:02d}{minute:02d}00"
-        # 30 minute event duration
-        end_hour = hour
-        end_minute = minute + 30
-        if end_minute >= 60:
-            end_hour += 1
-            end_minute -= 60
-        if end_hour >= 24:
-            end_hour = 23
-            end_minute = 59
-        dt_end = f"{dt_date}T{end_hour:02d}{end_minute:02d}00"
-
-        uid = f"treff-post-{post.id}@treff-sprachreisen.de"
-
-        plat_label = platform_labels.get(post.platform, post.platform or "")
-        description_parts = []
-        if post.category:
-            description_parts.append(f"Kategorie: {post.category}")
-        if plat_label:
-            description_parts.append(f"Plattform: {plat_label}")
-        if post.country:
-            description_parts.append(f"Land: {post.country}")
-        if post.status:
-            description_parts.append(f"Status: {post.status}")
-        if post.hashtags_instagram:
-            description_parts.append(f"Hashtags: {post.hashtags_instagram}")
-
-        description = "\\n".join(description_parts)
-
-        summary = (post.title or "Unbenannter Post").replace(",", "\\,")
-        description = description.replace(",", "\\,")
-
-        lines.extend([
-            "BEGIN:VEVENT",
-            f"UID:{uid}",
-            f"DTSTART:{dt_start}",
-            f"DTEND:{dt_end}",
-            f"SUMMARY:{summary}",
-            f"DESCRIPTION:{description}",
-            f"CATEGORIES:{post.category or ''}",
-            f"STATUS:{'CONFIRMED' if post.status == 'scheduled' else 'TENTATIVE'}",
-            "END:VEVENT",
-        ])
-
-    lines.append("END:VCALENDAR")
-
-    ical_content = "\r\n".join(lines) + "\r\n"
-
-    month_names_en = [
-        "january", "february", "march", "april", "may", "june",
-        "july", "august", "september", "october", "november", "december",
-    ]
-    filename = f"TREFF_calendar_{month_names_en[month - 1]}_{year}.ics"
-
-    return Response(
-        content=ical_content,
-        media_type="text/calendar",
-        headers={
-            "Content-Disposition": f'attachment; filename="{filename}"',
-        },
-    )
+    lines = _ical_lines(stream_rows(ICAL_POST, query), calendar_label)
+    filename = f"TREFF_calendar_{file_label}.ics"
+    return download_response(request, encode_chunks(lines), "text/calendar", filename)
 
 
 # ========== CALENDAR EXPORT: PDF ==========
@@ -2111,12 +2052,11 @@ async def export_calendar_pdf(
         conditions.append(Post.platform == platform)
 
     query = (
-        select(Post)
+        CALENDAR_POST.select()
         .where(and_(*conditions))
         .order_by(Post.scheduled_date.asc(), Post.scheduled_time.asc())
     )
-    result = await db.execute(query)
-    posts = result.scalars().all()
+    posts = await CALENDAR_POST.all(db, query)
 
     # Group posts by date
     posts_by_date = {}
@@ -2242,11 +2182,7 @@ async def export_calendar_pdf(
 </body>
 </html>"""
 
-    month_names_en = [
-        "january", "february", "march", "april", "may", "june",
-        "july", "august", "september", "october", "november", "december",
-    ]
-    filename = f"TREFF_calendar_{month_names_en[month - 1]}_{year}.html"
+    filename = f"TREFF_calendar_{EXPORT_MONTH_NAMES_EN[month - 1]}_{year}.html"
 
     return Response(
         content=html,
@@ -2478,9 +2414,9 @@ async def import_csv(
     if not rows:
         raise HTTPException(status_code=400, detail="Keine Zeilen zum Importieren.")
 
-    imported = 0
     skipped = 0
     errors_list = []
+    new_posts = []
 
     for row in rows:
         if not row.get("valid", False):
@@ -2498,29 +2434,32 @@ async def import_csv(
             skipped += 1
             continue
 
-        post = Post(
-            user_id=user_id,
-            title=row.get("title", "Import Post"),
-            category=row.get("category", "laender-spotlight"),
-            platform=row.get("platform", "instagram_feed"),
-            country=row.get("country"),
-            status="scheduled",
-            scheduled_date=scheduled_date,
-            scheduled_time=row.get("time", "10:00"),
-            slide_data="[]",
-            tone="jugendlich",
-        )
+        post = {
+            "user_id": user_id,
+            "title": row.get("title", "Import Post"),
+            "category": row.get("category", "laender-spotlight"),
+            "platform": row.get("platform", "instagram_feed"),
+            "country": row.get("country"),
+            "status": "scheduled",
+            "scheduled_date": scheduled_date,
+            "scheduled_time": row.get("time", "10:00"),
+            "slide_data": "[]",
+            "tone": "jugendlich",
+            "hashtags_instagram": None,
+            "hashtags_tiktok": None,
+        }
 
         # Set hashtags based on platform
         if row.get("hashtags"):
-            if post.platform == "tiktok":
-                post.hashtags_tiktok = row["hashtags"]
+            if post["platform"] == "tiktok":
+                post["hashtags_tiktok"] = row["hashtags"]
             else:
-                post.hashtags_instagram = row["hashtags"]
+                post["hashtags_instagram"] = row["hashtags"]
 
-        db.add(post)
-        imported += 1
+        new_posts.append(post)
 
+    # One multi-row INSERT per chunk instead of one per post
+    imported = len(await insert_posts(db, new_posts))
     if imported > 0:
         await db.commit()
 
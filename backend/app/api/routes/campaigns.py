@@ -15,6 +15,7 @@ from sqlalchemy import select, func
 
 from app.core.database import get_db
 from app.core.security import get_current_user_id
+from app.core.batch_loader import Loaders, get_loaders
 from app.models.campaign import Campaign
 from app.models.campaign_post import CampaignPost
 from app.models.post import Post
@@ -206,6 +207,7 @@ async def list_campaigns(
     goal: Optional[str] = Query(None),
     user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
+    loaders: Loaders = Depends(get_loaders),
 ):
     """List all campaigns for the current user, with optional status/goal filters."""
     where = [Campaign.user_id == user_id]
@@ -222,14 +224,13 @@ async def list_campaigns(
     result = await db.execute(query)
     campaigns = result.scalars().all()
 
-    # Enrich with post counts
+    # Enrich with post counts (one GROUP BY query for all campaigns)
+    post_counts = await loaders.counts(CampaignPost.campaign_id).load_many([c.id for c in campaigns])
+
     response = []
-    for c in campaigns:
+    for c, post_count in zip(campaigns, post_counts):
         c_dict = campaign_to_dict(c)
-        count_result = await db.execute(
-            select(func.count(CampaignPost.id)).where(CampaignPost.campaign_id == c.id)
-        )
-        c_dict["post_count"] = count_result.scalar() or 0
+        c_dict["post_count"] = post_count
         response.append(c_dict)
 
     return response
@@ -242,6 +243,7 @@ async def get_campaign(
     campaign_id: int,
     user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
+    loaders: Loaders = Depends(get_loaders),
 ):
     """Get a single campaign with all its associated posts."""
     result = await db.execute(
@@ -261,38 +263,18 @@ async def get_campaign(
     )
     campaign_posts = cp_result.scalars().all()
 
+    # Linked post details (one batched query for all linked posts)
+    linked_posts = await loaders.rows(Post.id).load_many([cp.post_id for cp in campaign_posts])
+
     posts_list = []
-    for cp in campaign_posts:
+    for cp, post in zip(campaign_posts, linked_posts):
         cp_dict = campaign_post_to_dict(cp)
-
-        # Get linked post details if available
-        if cp.post_id:
-            post_result = await db.execute(
-                select(Post).where(Post.id == cp.post_id)
-            )
-            post = post_result.scalar_one_or_none()
-            if post:
-                cp_dict["post_title"] = post.title
-                cp_dict["post_status"] = post.status
-                cp_dict["post_category"] = post.category
-                cp_dict["post_platform"] = post.platform
-                cp_dict["post_country"] = post.country
-                cp_dict["post_scheduled_date"] = post.scheduled_date.isoformat() if post.scheduled_date else None
-            else:
-                cp_dict["post_title"] = None
-                cp_dict["post_status"] = None
-                cp_dict["post_category"] = None
-                cp_dict["post_platform"] = None
-                cp_dict["post_country"] = None
-                cp_dict["post_scheduled_date"] = None
-        else:
-            cp_dict["post_title"] = None
-            cp_dict["post_status"] = None
-            cp_dict["post_category"] = None
-            cp_dict["post_platform"] = None
-            cp_dict["post_country"] = None
-            cp_dict["post_scheduled_date"] = None
-
+        cp_dict["post_title"] = post.title if post else None
+        cp_dict["post_status"] = post.status if post else None
+        cp_dict["post_category"] = post.category if post else None
+        cp_dict["post_platform"] = post.platform if post else None
+        cp_dict["post_country"] = post.country if post else None
+        cp_dict["post_scheduled_date"] = post.scheduled_date.isoformat() if post and post.scheduled_date else None
         posts_list.append(cp_dict)
 
     c_dict["posts"] = posts_list
@@ -3,22 +3,29 @@ from __future__ import annotations
 """Export routes.
 
 Render posts to PNG/PDF images, batch export carousels, and download previously exported files.
+PNGs are rendered server-side (app.services.post_renderer); carousel and batch ZIPs are streamed.
 """
 
 import os
 import uuid
 from datetime import datetime, timezone
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import FileResponse, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
+from app.core.bulk import bulk_insert
 from app.core.database import get_db
+from app.core.export_stream import download_response, zip_chunks
 from app.core.security import get_current_user_id
 from app.core.paths import get_upload_dir
 from app.models.post import Post
 from app.models.export_history import ExportHistory
+from app.services.bulk_posts import update_posts
+from app.services.post_renderer import (
+    FRAMES, RESOLUTIONS, load_render_sources, parse_resolution, render_slide, slide_jobs, zip_entries,
+)
 
 router = APIRouter()
 
@@ -36,9 +43,27 @@ def export_to_dict(export: ExportHistory) -> dict:
         "resolution": export.resolution,
         "slide_count": export.slide_count,
         "exported_at": export.exported_at.isoformat() if export.exported_at else None,
+        "download_url": f"/api/export/download/{export.id}",
     }
 
 
+FRAME_PATTERN = "^(" + "|".join(FRAMES) + ")$"
+RESOLUTION_PATTERN = "^(" + "|".join(RESOLUTIONS) + ")$"
+
+
+async def _render_source(db: AsyncSession, user_id: int, post_id: int) -> dict:
+    sources = await load_render_sources(db, user_id, [post_id])
+    if not sources:
+        raise HTTPException(status_code=404, detail="Post not found")
+    return sources[0]
+
+
+def _zip_response(request: Request, sources: list[dict], resolution: str, frame: Optional[str],
+                  filename: str, folders: bool = False):
+    entries = zip_entries(sources, resolution, frame, folders=folders)
+    return download_response(request, zip_chunks(entries), "application/zip", filename, gzip=False)
+
+
 @router.post("/render")
 async def render_post(
     request: dict,
@@ -138,11 +163,15 @@ async def render_carousel(
 
 @router.get("/download/{export_id}")
 async def download_export(
+    request: Request,
     export_id: int,
     user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
 ):
-    """Download rendered file."""
+    """Download an exported file, rendering it server-side if it is not on disk.
+
+    PNG exports return the first slide, ZIP exports stream all slides.
+    """
     result = await db.execute(
         select(ExportHistory).where(ExportHistory.id == export_id)
     )
@@ -151,17 +180,62 @@ async def download_export(
         raise HTTPException(status_code=404, detail="Export not found")
 
     # Verify the export's post belongs to the current user
-    post_result = await db.execute(
-        select(Post).where(Post.id == export.post_id, Post.user_id == user_id)
-    )
-    if not post_result.scalar_one_or_none():
+    sources = await load_render_sources(db, user_id, [export.post_id])
+    if not sources:
         raise HTTPException(status_code=404, detail="Export not found")
 
-    file_path = os.path.join(EXPORT_DIR, os.path.basename(export.file_path))
-    if not os.path.exists(file_path):
-        raise HTTPException(status_code=404, detail="Export file not found on disk")
+    filename = os.path.basename(export.file_path)
+    file_path = os.path.join(EXPORT_DIR, filename)
+    if os.path.exists(file_path):
+        return FileResponse(file_path, filename=filename)
+
+    resolution, frame = parse_resolution(export.resolution)
+    if export.format == "zip":
+        return _zip_response(request, sources, resolution, frame, filename)
+    png = await render_slide(slide_jobs(sources[0], resolution, frame)[0])
+    return Response(png, media_type="image/png",
+                    headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+
+@router.get("/posts/{post_id}/slides/{slide_index}")
+async def render_post_slide(
+    request: Request,
+    post_id: int,
+    slide_index: int,
+    resolution: str = Query("1080", pattern=RESOLUTION_PATTERN),
+    frame: Optional[str] = Query(None, pattern=FRAME_PATTERN),
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    """Render one slide of a post as PNG (served from the render cache when unchanged).
 
-    return FileResponse(file_path, filename=os.path.basename(export.file_path))
+    `frame` overrides the template/platform frame: feed_square (1080x1080),
+    feed_portrait (1080x1350), story/tiktok (1080x1920); `resolution` is the width.
+    """
+    source = await _render_source(db, user_id, post_id)
+    jobs = slide_jobs(source, resolution, frame)
+    if not 0 <= slide_index < len(jobs):
+        raise HTTPException(status_code=404, detail="Slide not found")
+    job = jobs[slide_index]
+    headers = {"ETag": f'"{job["cache_key"]}"', "Cache-Control": "private, max-age=0"}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    png = await render_slide(job)
+    return Response(png, media_type="image/png", headers=headers)
+
+
+@router.get("/posts/{post_id}/carousel.zip")
+async def download_carousel_zip(
+    request: Request,
+    post_id: int,
+    resolution: str = Query("1080", pattern=RESOLUTION_PATTERN),
+    frame: Optional[str] = Query(None, pattern=FRAME_PATTERN),
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    """Stream all slides of a post as a ZIP archive (slide_1.png, slide_2.png, ...)."""
+    source = await _render_source(db, user_id, post_id)
+    return _zip_response(request, [source], resolution, frame, f"post_{post_id}_{source['platform']}_carousel.zip")
 
 
 @router.get("/history")
@@ -227,16 +301,7 @@ async def multi_platform_export(
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
 
-    # Determine slide count
-    slide_count = 1
-    if post.slide_data:
-        try:
-            import json
-            slides = json.loads(post.slide_data)
-            if isinstance(slides, list):
-                slide_count = len(slides)
-        except (json.JSONDecodeError, TypeError):
-            pass
+    slide_count = post.slide_count or 0
 
     now = datetime.now(timezone.utc)
     export_records = []
@@ -325,11 +390,12 @@ async def batch_export(
     if len(post_ids) > 50:
         raise HTTPException(status_code=400, detail="Maximum 50 posts per batch export")
 
-    # Verify all posts belong to user
+    # Verify all posts belong to user (slide count comes from the summary column)
     result = await db.execute(
-        select(Post).where(Post.id.in_(post_ids), Post.user_id == user_id)
+        select(Post.id, Post.platform, Post.status, Post.slide_count)
+        .where(Post.id.in_(post_ids), Post.user_id == user_id)
     )
-    posts = result.scalars().all()
+    posts = result.all()
 
     if len(posts) != len(post_ids):
         found_ids = {p.id for p in posts}
@@ -339,54 +405,31 @@ async def batch_export(
             detail=f"Posts not found or not owned by user: {missing}"
         )
 
-    export_records = []
     now = datetime.now(timezone.utc)
-
+    rows = []
     for post in posts:
-        # Determine slide count from slide_data
-        slide_count = 1
-        if post.slide_data:
-            try:
-                import json
-                slides = json.loads(post.slide_data)
-                if isinstance(slides, list):
-                    slide_count = len(slides)
-            except (json.JSONDecodeError, TypeError):
-                pass
+        slide_count = post.slide_count or 0
 
         fmt = "zip" if slide_count > 1 else "png"
         suffix = "_carousel.zip" if slide_count > 1 else ".png"
 
-        export = ExportHistory(
-            post_id=post.id,
-            platform=post.platform or platform,
-            format=fmt,
-            file_path=f"exports/post_{post.id}_{post.platform or platform}{suffix}",
-            resolution=resolution,
-            slide_count=slide_count,
-            exported_at=now,
-        )
-        db.add(export)
-
-        # Update post status
-        post.exported_at = now
-        if post.status == "draft":
-            post.status = "exported"
+        rows.append({
+            "post_id": post.id,
+            "platform": post.platform or platform,
+            "format": fmt,
+            "file_path": f"exports/post_{post.id}_{post.platform or platform}{suffix}",
+            "resolution": resolution,
+            "slide_count": slide_count,
+            "exported_at": now,
+        })
 
-    await db.flush()
+    # Export records come back from INSERT ... RETURNING (no read-back per post)
+    exports = await bulk_insert(db, ExportHistory, rows, returning=ExportHistory.__table__.c)
+    export_records = [export_to_dict(exp) for exp in exports]
 
-    # Collect export records after flush (IDs assigned)
-    for post in posts:
-        # Get the latest export record for this post
-        exp_result = await db.execute(
-            select(ExportHistory)
-            .where(ExportHistory.post_id == post.id)
-            .order_by(ExportHistory.id.desc())
-            .limit(1)
-        )
-        exp = exp_result.scalar_one_or_none()
-        if exp:
-            export_records.append(export_to_dict(exp))
+    # Update post status
+    await update_posts(db, [p.id for p in posts], {"exported_at": now})
+    await update_posts(db, [p.id for p in posts if p.status == "draft"], {"status": "exported"})
 
     await db.commit()
 
@@ -395,3 +438,43 @@ async def batch_export(
         "count": len(export_records),
         "status": "ok",
     }
+
+
+@router.post("/batch/download")
+async def batch_download(
+    request: Request,
+    body: dict,
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    """Stream a ZIP with the rendered slides of up to 50 posts (one folder per post).
+
+    Body: {"post_ids": [int], "resolution": "1080" | "2160", "frame": optional frame name}
+    Posts are rendered while the archive is sent; unchanged slides come from the render cache.
+    """
+    post_ids = body.get("post_ids", [])
+    resolution = str(body.get("resolution", "1080"))
+    frame = body.get("frame")
+
+    if not post_ids or not isinstance(post_ids, list):
+        raise HTTPException(status_code=400, detail="post_ids is required and must be a list")
+    if len(post_ids) > 50:
+        raise HTTPException(status_code=400, detail="Maximum 50 posts per batch export")
+    if resolution not in RESOLUTIONS:
+        raise HTTPException(status_code=400, detail=f"resolution must be one of {list(RESOLUTIONS)}")
+    if frame is not None and frame not in FRAMES:
+        raise HTTPException(status_code=400, detail=f"frame must be one of {list(FRAMES)}")
+
+    # Each post once, in request order (a repeated id must not count as missing)
+    post_ids = list(dict.fromkeys(post_ids))
+    sources = await load_render_sources(db, user_id, post_ids)
+    if len(sources) != len(post_ids):
+        found_ids = {s["id"] for s in sources}
+        missing = [pid for pid in post_ids if pid not in found_ids]
+        raise HTTPException(
+            status_code=404,
+            detail=f"Posts not found or not owned by user: {missing}"
+        )
+
+    date = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    return _zip_response(request, sources, resolution, frame, f"treff_batch_export_{date}.zip", folders=True)
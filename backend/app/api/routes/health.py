@@ -14,6 +14,7 @@ from sqlalchemy.pool import NullPool
 
 from app.core.database import get_db
 from app.core.cache import api_cache
+from app.core.query_stats import route_query_stats
 
 logger = logging.getLogger(__name__)
 
@@ -359,6 +360,33 @@ async def get_cache_stats():
     return api_cache.get_stats()
 
 
+@router.get(
+    "/health/perf",
+    summary="Query Performance Statistics",
+    description="Per-route SQL statistics since startup: request count, average/max queries per request, DB time, slowest statements and N+1 suspects (the same statement shape repeated within one request).",
+    response_description="Per-route query statistics ordered by total DB time",
+)
+async def get_perf_stats(limit: int = 50):
+    """Get aggregated per-route query statistics.
+
+    Collected by the query instrumentation middleware (in memory, reset on
+    restart). Each response also carries its own numbers in the
+    `Server-Timing` and `X-DB-Query-Count` headers.
+    """
+    return route_query_stats.get_stats(limit=limit)
+
+
+@router.post(
+    "/health/perf/reset",
+    summary="Reset Query Statistics",
+    description="Clears the aggregated per-route query statistics.",
+)
+async def reset_perf_stats():
+    """Reset per-route query statistics."""
+    count = route_query_stats.reset()
+    return {"message": f"Query statistics reset: {count} routes cleared", "cleared": count}
+
+
 @router.post(
     "/admin/cache-clear",
     summary="Clear Cache",
@@ -1,5 +1,6 @@
 """Content Pipeline routes - Smart Content Pipeline for media analysis, inbox, processing, and multiplication."""
 
+import asyncio
 import json
 import logging
 import os
@@ -8,17 +9,19 @@ from typing import Optional
 from pathlib import Path
 
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, desc
 
-from app.core.database import get_db
+from app.core.database import get_db, async_session
 from app.core.security import get_current_user_id
 from app.core.paths import get_upload_dir
+from app.core.batch_loader import Loaders, get_loaders
 from app.models.asset import Asset
 from app.models.post import Post
 from app.models.student import Student
 from app.models.pipeline_item import PipelineItem
-from app.services.content_analyzer import analyze_media_with_ai
+from app.services.content_analyzer import analyze_media_with_ai, analyze_media_batch
 from app.services.content_multiplier import multiply_content
 
 logger = logging.getLogger(__name__)
@@ -31,6 +34,9 @@ ALLOWED_IMAGE_TYPES = ["image/jpeg", "image/png", "image/webp"]
 ALLOWED_VIDEO_TYPES = ["video/mp4", "video/quicktime", "video/webm"]
 ALLOWED_TYPES = ALLOWED_IMAGE_TYPES + ALLOWED_VIDEO_TYPES
 
+# Max files / inbox items per bulk analysis request
+MAX_BATCH_ITEMS = 50
+
 
 def pipeline_item_to_dict(item: PipelineItem, student_name: str = None, asset: Asset = None) -> dict:
     """Convert PipelineItem to dict for API response."""
@@ -145,6 +151,154 @@ async def analyze_media(
     }
 
 
+# ═══════════════════════════════════════════════════════════════════════
+# POST /api/pipeline/analyze-batch
+# Bulk inbox ingestion: many uploads/items, streamed per-item results
+# ═══════════════════════════════════════════════════════════════════════
+
+@router.post("/analyze-batch")
+async def analyze_media_batch_route(
+    files: list[UploadFile] = File(default=[]),
+    item_ids: Optional[str] = Form(default=None),
+    student_id: Optional[int] = Form(default=None),
+    source_description: Optional[str] = Form(default=None),
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    """Analyze many media files at once.
+
+    New uploads (`files`) are stored as assets + pending inbox items; existing
+    inbox items can be (re-)analyzed via `item_ids` (comma-separated). All items
+    are analyzed through a bounded worker pool and the response streams one
+    NDJSON line per finished item, so the inbox can update progressively:
+
+        {"event": "queued", "pipeline_item_ids": [...]}
+        {"event": "item", "pipeline_item_id": 12, "status": "analyzed", ...}
+        {"event": "done", "analyzed": 48, "failed": 2, "missing": 0}
+
+    Items deleted while the batch runs are reported with "status": "missing".
+    """
+    requested_ids = []
+    if item_ids:
+        try:
+            requested_ids = [int(i) for i in item_ids.split(",") if i.strip()]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="item_ids must be comma-separated integers")
+
+    if not files and not requested_ids:
+        raise HTTPException(status_code=400, detail="files or item_ids is required")
+    if len(files) + len(requested_ids) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Maximal {MAX_BATCH_ITEMS} Dateien pro Batch erlaubt")
+
+    for upload in files:
+        if upload.content_type not in ALLOWED_TYPES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported file type: {upload.content_type} ({upload.filename}). Allowed: {', '.join(ALLOWED_TYPES)}"
+            )
+
+    if student_id:
+        result = await db.execute(
+            select(Student.id).where(Student.id == student_id, Student.user_id == user_id)
+        )
+        if not result.first():
+            raise HTTPException(status_code=404, detail="Student not found")
+
+    # (pipeline_item, file_path, file_type, source_description) for each job
+    jobs: list[tuple[PipelineItem, Path, str, Optional[str]]] = []
+
+    if requested_ids:
+        result = await db.execute(
+            select(PipelineItem, Asset)
+            .join(Asset, Asset.id == PipelineItem.asset_id)
+            .where(PipelineItem.id.in_(requested_ids), PipelineItem.user_id == user_id)
+        )
+        found = result.all()
+        if len(found) != len(set(requested_ids)):
+            raise HTTPException(status_code=404, detail="Pipeline item not found")
+        for item, asset in found:
+            item.status = "pending"
+            item.error_message = None
+            jobs.append((item, PIPELINE_UPLOAD_DIR / asset.filename, asset.file_type, item.source_description))
+
+    # Store new uploads as assets + pending inbox items
+    PIPELINE_UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    new_assets = []
+    for upload in files:
+        file_bytes = await upload.read()
+        file_ext = Path(upload.filename).suffix if upload.filename else ".jpg"
+        unique_filename = f"{uuid.uuid4()}{file_ext}"
+        file_path = PIPELINE_UPLOAD_DIR / unique_filename
+        with open(file_path, "wb") as f:
+            f.write(file_bytes)
+
+        new_assets.append((file_path, upload.content_type, Asset(
+            user_id=user_id,
+            filename=unique_filename,
+            original_filename=upload.filename or unique_filename,
+            file_path=f"/uploads/pipeline/{unique_filename}",
+            file_type=upload.content_type,
+            file_size=len(file_bytes),
+            source="upload",
+            category="pipeline",
+        )))
+
+    if new_assets:
+        db.add_all([asset for _, _, asset in new_assets])
+        await db.flush()  # Asset IDs for all uploads in one round trip
+
+        for file_path, file_type, asset in new_assets:
+            item = PipelineItem(
+                user_id=user_id,
+                student_id=student_id,
+                asset_id=asset.id,
+                status="pending",
+                source_description=source_description,
+            )
+            db.add(item)
+            jobs.append((item, file_path, file_type, source_description))
+
+    await db.flush()
+    # Commit before streaming: results are written from separate sessions
+    await db.commit()
+
+    item_ids_in_order = [item.id for item, _, _, _ in jobs]
+
+    async def stream():
+        yield json.dumps({"event": "queued", "pipeline_item_ids": item_ids_in_order}) + "\n"
+
+        analyzed = failed = missing = 0
+        async for item_id, analysis in analyze_media_batch(
+            [(item.id, str(path), file_type, desc) for item, path, file_type, desc in jobs]
+        ):
+            async with async_session() as session:
+                item = await session.get(PipelineItem, item_id)
+                if item is None:
+                    # Deleted while the batch was running; keep streaming the rest
+                    missing += 1
+                    line = {"event": "item", "pipeline_item_id": item_id, "status": "missing"}
+                elif isinstance(analysis, Exception):
+                    failed += 1
+                    item.status = "failed"
+                    item.error_message = str(analysis)[:500]
+                    line = {"event": "item", "pipeline_item_id": item_id, "status": "failed", "error": item.error_message}
+                else:
+                    analyzed += 1
+                    item.suggested_post_type = analysis["suggested_post_type"]
+                    item.suggested_caption_seeds = json.dumps(analysis["suggested_caption_seeds"], ensure_ascii=False)
+                    item.suggested_platforms = json.dumps(analysis["suggested_platforms"], ensure_ascii=False)
+                    item.detected_country = analysis["detected_country"]
+                    item.analysis_summary = analysis["analysis_summary"]
+                    item.status = "analyzed"
+                    line = {"event": "item", "pipeline_item_id": item_id, "status": "analyzed", **analysis}
+                await session.commit()
+            yield json.dumps(line, ensure_ascii=False) + "\n"
+
+        yield json.dumps({"event": "done", "analyzed": analyzed, "failed": failed, "missing": missing}) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
 # ═══════════════════════════════════════════════════════════════════════
 # GET /api/pipeline/inbox
 # List unprocessed student uploads with pagination and filters
@@ -158,6 +312,7 @@ async def get_inbox(
     limit: int = Query(default=20, ge=1, le=100),
     user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
+    loaders: Loaders = Depends(get_loaders),
 ):
     """List pipeline inbox items with pagination and optional filters."""
     # Build query
@@ -185,26 +340,15 @@ async def get_inbox(
     result = await db.execute(items_query)
     items = result.scalars().all()
 
-    # Enrich with student names and asset info
-    response_items = []
-    for item in items:
-        student_name = None
-        asset = None
-
-        if item.student_id:
-            s_result = await db.execute(
-                select(Student.name).where(Student.id == item.student_id)
-            )
-            s_row = s_result.first()
-            student_name = s_row[0] if s_row else None
-
-        if item.asset_id:
-            a_result = await db.execute(
-                select(Asset).where(Asset.id == item.asset_id)
-            )
-            asset = a_result.scalar_one_or_none()
-
-        response_items.append(pipeline_item_to_dict(item, student_name, asset))
+    # Enrich with student names and asset info (one batched query per relation)
+    student_names, assets = await asyncio.gather(
+        loaders.values(Student.id, Student.name).load_many([item.student_id for item in items]),
+        loaders.rows(Asset.id).load_many([item.asset_id for item in items]),
+    )
+    response_items = [
+        pipeline_item_to_dict(item, student_name, asset)
+        for item, student_name, asset in zip(items, student_names, assets)
+    ]
 
     return {
         "items": response_items,
@@ -359,24 +503,29 @@ async def multiply_post(
         raise HTTPException(status_code=404, detail="Source post not found")
 
     # Generate derivatives
-    derivatives = await multiply_content(
+    derivatives, failed = await multiply_content(
         source_post=source_post,
         target_formats=formats,
         user_id=user_id,
         db=db,
     )
 
-    if not derivatives:
+    if not derivatives and not failed:
         return {
             "source_post_id": post_id,
             "derivatives": [],
+            "failed": [],
+            "fallback": False,
             "message": "Keine neuen Formate zum Generieren (Quellformat uebersprungen oder alle Formate identisch)",
         }
 
     return {
         "source_post_id": post_id,
         "derivatives": derivatives,
-        "message": f"{len(derivatives)} Derivat(e) erfolgreich erstellt",
+        "failed": failed,
+        "fallback": any(d["fallback"] for d in derivatives),
+        "message": f"{len(derivatives)} Derivat(e) erfolgreich erstellt"
+        + (f", {len(failed)} fehlgeschlagen" if failed else ""),
     }
 
 
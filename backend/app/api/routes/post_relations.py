@@ -12,6 +12,7 @@ from app.models.post import Post
 from app.models.post_relation import PostRelation
 from app.models.story_arc import StoryArc
 from app.models.story_episode import StoryEpisode
+from app.services import post_similarity
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +33,14 @@ def relation_to_dict(rel: PostRelation) -> dict:
     }
 
 
+async def _load_user_posts(db: AsyncSession, user_id: int, post_ids: list[int]) -> dict[int, Post]:
+    """The user's posts by id (ids of other users or deleted posts are dropped)."""
+    if not post_ids:
+        return {}
+    result = await db.execute(select(Post).where(Post.id.in_(post_ids), Post.user_id == user_id))
+    return {post.id: post for post in result.scalars().all()}
+
+
 def post_summary(post: Post) -> dict:
     """Return a compact summary of a post for display in relation lists."""
     return {
@@ -222,6 +231,36 @@ async def delete_post_relation(
     return {"message": "Relation deleted", "id": relation_id}
 
 
+@router.get("/{post_id}/similar")
+async def get_similar_posts(
+    post_id: int,
+    limit: int = Query(default=10, ge=1, le=50),
+    min_similarity: float = Query(default=post_similarity.RELATED_THRESHOLD, ge=0.0, le=1.0),
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    """Posts whose text (slides, captions, hashtags) is most similar to this post."""
+    result = await db.execute(
+        select(Post.id).where(Post.id == post_id, Post.user_id == user_id)
+    )
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Post not found")
+
+    index = await post_similarity.user_index(db, user_id)
+    similar = index.similar(post_id, limit=limit, min_similarity=min_similarity)
+    posts = await _load_user_posts(db, user_id, [pid for pid, _ in similar])
+    items = [
+        {
+            "post": post_summary(posts[pid]),
+            "similarity": similarity,
+            "near_duplicate": similarity >= post_similarity.NEAR_DUPLICATE_THRESHOLD,
+        }
+        for pid, similarity in similar
+        if pid in posts
+    ]
+    return {"post_id": post_id, "similar": items, "count": len(items)}
+
+
 @router.post("/{post_id}/suggest-relations")
 async def suggest_post_relations(
     post_id: int,
@@ -232,9 +271,10 @@ async def suggest_post_relations(
 
     Auto-suggests:
     1. Posts in the same story arc (for story_teaser links)
-    2. Feed posts when current is a story (and vice versa)
-    3. Posts with the same student
-    4. Posts with the same country and category
+    2. Posts with similar content (post_similarity index)
+    3. Feed posts when current is a story (and vice versa)
+    4. Posts with the same student
+    5. Posts with the same country and category
     """
     result = await db.execute(
         select(Post).where(Post.id == post_id, Post.user_id == user_id)
@@ -294,7 +334,20 @@ async def suggest_post_relations(
                 "reason": "Feed-Post als Teaser fuer Story-Serie",
             })
 
-    # 2. Cross-platform: If this is a story, suggest feed posts (and vice versa)
+    # 2. Similar content (text of slides, captions and hashtags)
+    index = await post_similarity.user_index(db, user_id)
+    similar = index.similar(post_id, limit=5, exclude=linked_ids | {s["post"]["id"] for s in suggestions})
+    similar_posts = await _load_user_posts(db, user_id, [pid for pid, _ in similar])
+    for pid, similarity in similar:
+        if pid in similar_posts:
+            suggestions.append({
+                "post": post_summary(similar_posts[pid]),
+                "suggested_type": "related",
+                "reason": f"Aehnlicher Inhalt ({round(similarity * 100)}%)",
+                "similarity": similarity,
+            })
+
+    # 3. Cross-platform: If this is a story, suggest feed posts (and vice versa)
     if post.platform == "instagram_story":
         result = await db.execute(
             select(Post).where(
@@ -330,7 +383,7 @@ async def suggest_post_relations(
                     "reason": "Story-Post zum gleichen Thema",
                 })
 
-    # 3. Same student (if student_id is set)
+    # 4. Same student (if student_id is set)
     if post.student_id:
         result = await db.execute(
             select(Post).where(
@@ -349,7 +402,7 @@ async def suggest_post_relations(
                     "reason": "Gleicher Student",
                 })
 
-    # 4. Same country + category
+    # 5. Same country + category
     if post.country:
         result = await db.execute(
             select(Post).where(
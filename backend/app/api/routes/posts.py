@@ -15,13 +15,21 @@ from sqlalchemy import select, or_, func, and_
 from app.core.database import get_db
 from app.core.security import get_current_user_id
 from app.core.cache import invalidate_cache
+from app.core.pagination import keyset_page, stream_json_response
 from app.models.post import Post
+from app.services import post_similarity, search_index
+from app.services.bulk_posts import update_posts
+from app.services.slide_summary import SUMMARY_COLUMNS, without_slide_blobs
 
 router = APIRouter()
 
 
-def post_to_dict(post: Post) -> dict:
-    """Convert a Post model to a plain dict to avoid lazy-loading issues."""
+def post_to_dict(post: Post, include_slides: bool = True) -> dict:
+    """Convert a Post model to a plain dict to avoid lazy-loading issues.
+
+    With include_slides=False the `slide_data` JSON is omitted (for queries
+    loaded with `without_slide_blobs()`); the slide summary fields remain.
+    """
     # Calculate engagement rate: (likes + comments + shares) / reach
     perf_likes = getattr(post, "perf_likes", None) or 0
     perf_comments = getattr(post, "perf_comments", None) or 0
@@ -32,7 +40,7 @@ def post_to_dict(post: Post) -> dict:
     if perf_reach > 0:
         engagement_rate = round(((perf_likes + perf_comments + perf_shares) / perf_reach) * 100, 2)
 
-    return {
+    data = {
         "id": post.id,
         "user_id": post.user_id,
         "template_id": post.template_id,
@@ -41,7 +49,9 @@ def post_to_dict(post: Post) -> dict:
         "platform": post.platform,
         "status": post.status,
         "title": post.title,
-        "slide_data": post.slide_data,
+        "slide_count": post.slide_count,
+        "thumbnail_url": post.thumbnail_url,
+        "first_headline": post.first_headline,
         "caption_instagram": post.caption_instagram,
         "caption_tiktok": post.caption_tiktok,
         "hashtags_instagram": post.hashtags_instagram,
@@ -73,6 +83,9 @@ def post_to_dict(post: Post) -> dict:
         "perf_updated_at": getattr(post, "perf_updated_at", None).isoformat() if getattr(post, "perf_updated_at", None) else None,
         "engagement_rate": engagement_rate,
     }
+    if include_slides:
+        data["slide_data"] = post.slide_data
+    return data
 
 
 @router.get(
@@ -97,13 +110,18 @@ async def list_posts(
     sort_direction: Optional[str] = Query(default="desc", pattern="^(asc|desc)$", description="Sort direction"),
     page: Optional[int] = Query(default=None, ge=1, description="Page number (1-based) for pagination"),
     limit: Optional[int] = Query(default=None, ge=1, le=100, description="Items per page (max 100)"),
+    cursor: Optional[str] = Query(default=None, description="Keyset pagination: empty for the first page, then the returned next_cursor"),
+    stream: Optional[str] = Query(default=None, pattern="^(ndjson|json)$", description="Stream all matching posts as NDJSON or a JSON array"),
+    include_slides: bool = Query(default=True, description="Include the slide_data JSON; false returns only the slide summary fields (slide_count, thumbnail_url, first_headline)"),
     user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
 ):
     """List posts with optional filters, sorting, and pagination.
 
     When page and limit are provided, returns paginated results with metadata.
-    When not provided, returns all results as a flat array (backward compatible).
+    With `cursor` (empty for the first page), returns a keyset page with
+    `next_cursor`; with `stream=ndjson|json`, streams all matching posts.
+    Otherwise returns all results as a flat array (backward compatible).
     """
     base_where = [Post.user_id == user_id]
 
@@ -118,16 +136,20 @@ async def list_posts(
     if student_id:
         base_where.append(Post.student_id == student_id)
     if search and search.strip():
-        search_pattern = f"%{search.strip()}%"
-        base_where.append(
-            or_(
-                Post.title.ilike(search_pattern),
-                Post.slide_data.ilike(search_pattern),
-                Post.caption_instagram.ilike(search_pattern),
-                Post.caption_tiktok.ilike(search_pattern),
-                Post.cta_text.ilike(search_pattern),
+        matches = search_index.match_subquery(user_id, "post", search)
+        if matches is not None:
+            base_where.append(Post.id.in_(matches))
+        else:
+            search_pattern = f"%{search.strip()}%"
+            base_where.append(
+                or_(
+                    Post.title.ilike(search_pattern),
+                    Post.slide_data.ilike(search_pattern),
+                    Post.caption_instagram.ilike(search_pattern),
+                    Post.caption_tiktok.ilike(search_pattern),
+                    Post.cta_text.ilike(search_pattern),
+                )
             )
-        )
     if date_from:
         try:
             from_date = datetime.strptime(date_from, "%Y-%m-%d")
@@ -144,6 +166,11 @@ async def list_posts(
 
     # Build the query with filters
     query = select(Post).where(*base_where)
+    if not include_slides:
+        query = query.options(*without_slide_blobs())
+
+    def serialize(post: Post) -> dict:
+        return post_to_dict(post, include_slides)
 
     # Dynamic sorting
     sort_field_map = {
@@ -158,6 +185,17 @@ async def list_posts(
     else:
         query = query.order_by(sort_column.desc())
 
+    # Keyset pagination: constant cost per page, no OFFSET scan
+    if cursor is not None:
+        return await keyset_page(
+            db, query, sort_column, Post.id, cursor, limit, serialize,
+            descending=sort_direction != "asc",
+        )
+
+    # Streaming: rows are serialized as they are read, never held as one list
+    if stream:
+        return stream_json_response(query, serialize, stream)
+
     # If pagination params provided, return paginated response
     if page is not None and limit is not None:
         # Get total count
@@ -179,7 +217,7 @@ async def list_posts(
         posts = result.scalars().all()
 
         return {
-            "items": [post_to_dict(p) for p in posts],
+            "items": [serialize(p) for p in posts],
             "total": total,
             "page": effective_page,
             "limit": limit,
@@ -189,7 +227,7 @@ async def list_posts(
     # No pagination - return flat array (backward compatible)
     result = await db.execute(query)
     posts = result.scalars().all()
-    return [post_to_dict(p) for p in posts]
+    return [serialize(p) for p in posts]
 
 
 @router.put("/sync-siblings")
@@ -228,7 +266,7 @@ async def sync_sibling_posts(
     result = await db.execute(select(Post).where(and_(*conditions)))
     siblings = result.scalars().all()
 
-    protected_fields = {"id", "user_id", "created_at", "platform", "linked_post_group_id"}
+    protected_fields = {"id", "user_id", "created_at", "platform", "linked_post_group_id", *SUMMARY_COLUMNS}
     updated = []
     for sibling in siblings:
         for field, value in fields.items():
@@ -405,24 +443,26 @@ async def batch_update_status(
     }
 
     result = await db.execute(
-        select(Post).where(Post.id.in_(post_ids), Post.user_id == user_id)
+        select(Post.id, Post.title, Post.status).where(Post.id.in_(post_ids), Post.user_id == user_id)
     )
-    posts = result.scalars().all()
 
     updated = []
     skipped = []
-    for post in posts:
+    for post in result.all():
         current = post.status or "draft"
         if current in allowed_transitions and new_status not in allowed_transitions.get(current, set()):
             skipped.append({"id": post.id, "title": post.title, "reason": f"Wechsel von '{current}' nicht erlaubt"})
             continue
-        post.status = new_status
-        if new_status == "posted" and not post.posted_at:
-            post.posted_at = datetime.now(timezone.utc)
-        if new_status == "exported" and not post.exported_at:
-            post.exported_at = datetime.now(timezone.utc)
         updated.append(post.id)
 
+    # One UPDATE ... WHERE id IN (...) for all allowed posts; timestamps only where unset
+    values = {"status": new_status}
+    if new_status == "posted":
+        values["posted_at"] = func.coalesce(Post.posted_at, datetime.now(timezone.utc))
+    if new_status == "exported":
+        values["exported_at"] = func.coalesce(Post.exported_at, datetime.now(timezone.utc))
+    await update_posts(db, updated, values)
+
     await db.commit()
     return {
         "updated": updated,
@@ -433,6 +473,27 @@ async def batch_update_status(
     }
 
 
+async def _near_duplicate_warnings(db: AsyncSession, post: Post) -> list[dict]:
+    """Existing posts of the user that say nearly the same as `post`."""
+    duplicates = await post_similarity.near_duplicates(db, post)
+    if not duplicates:
+        return []
+    result = await db.execute(
+        select(Post.id, Post.title).where(Post.id.in_([pid for pid, _ in duplicates]), Post.user_id == post.user_id)
+    )
+    titles = dict(result.all())
+    return [
+        {
+            "id": pid,
+            "title": titles[pid],
+            "similarity": similarity,
+            "message": f"Sehr aehnlich zu Post \"{titles[pid] or pid}\" ({round(similarity * 100)}% Uebereinstimmung)",
+        }
+        for pid, similarity in duplicates
+        if pid in titles
+    ]
+
+
 @router.get(
     "/{post_id}",
     summary="Get Post by ID",
@@ -479,6 +540,7 @@ async def create_post(
     await db.flush()
     await db.refresh(post)
     result = post_to_dict(post)
+    result["near_duplicates"] = await _near_duplicate_warnings(db, post)
     await db.commit()
     invalidate_cache("dashboard", "analytics", "overview", "categories", "platforms", "countries", "frequency", "goals", "content_mix")
     return result
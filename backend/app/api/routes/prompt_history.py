@@ -11,6 +11,7 @@ from sqlalchemy import select, func, desc
 
 from app.core.database import get_db
 from app.core.security import get_current_user_id
+from app.core.pagination import keyset_page
 from app.models.prompt_history import PromptHistory
 
 router = APIRouter()
@@ -81,10 +82,15 @@ async def list_prompt_history(
     prompt_type: Optional[str] = Query(None, description="Filter by type: text, image, hashtags, optimization, video_script"),
     favorites_only: bool = Query(False, description="Show only favorites"),
     search: Optional[str] = Query(None, description="Search in prompt text"),
+    cursor: Optional[str] = Query(None, description="Keyset pagination instead of page: empty for the first page, then next_cursor"),
     db: AsyncSession = Depends(get_db),
     user_id: int = Depends(get_current_user_id),
 ):
-    """List AI prompt history with pagination and filtering."""
+    """List AI prompt history with pagination and filtering.
+
+    With `cursor`, returns a keyset page of `page_size` items with `next_cursor`
+    (no total count, constant cost for deep pages).
+    """
     query = select(PromptHistory).where(PromptHistory.user_id == user_id)
 
     # Apply filters
@@ -95,6 +101,9 @@ async def list_prompt_history(
     if search:
         query = query.where(PromptHistory.prompt_text.ilike(f"%{search}%"))
 
+    if cursor is not None:
+        return await keyset_page(db, query, PromptHistory.created_at, PromptHistory.id, cursor, page_size, _serialize)
+
     # Count total
     count_query = select(func.count()).select_from(query.subquery())
     total_result = await db.execute(count_query)
@@ -15,6 +15,7 @@ from app.core.database import get_db
 from app.core.security import get_current_user_id
 from app.models.post import Post
 from app.models.recurring_post_rule import RecurringPostRule
+from app.services.bulk_posts import insert_posts
 
 router = APIRouter()
 
@@ -514,38 +515,37 @@ async def _generate_instances(
             return 0
         target_dates = target_dates[:remaining]
 
-    generated = 0
+    # Instance posts (copies of the source), written in one bulk insert
+    instances = []
     for target_date in target_dates:
         if target_date in existing_dates:
             continue
         if target_date <= today:
             continue
 
-        # Create instance post (copy from source)
-        instance = Post(
-            user_id=source_post.user_id,
-            template_id=source_post.template_id,
-            category=source_post.category,
-            country=source_post.country,
-            platform=source_post.platform,
-            status="scheduled",
-            title=source_post.title,
-            slide_data=source_post.slide_data,
-            caption_instagram=source_post.caption_instagram,
-            caption_tiktok=source_post.caption_tiktok,
-            hashtags_instagram=source_post.hashtags_instagram,
-            hashtags_tiktok=source_post.hashtags_tiktok,
-            cta_text=source_post.cta_text,
-            custom_colors=source_post.custom_colors,
-            custom_fonts=source_post.custom_fonts,
-            tone=source_post.tone,
-            scheduled_date=datetime(target_date.year, target_date.month, target_date.day),
-            scheduled_time=rule.time,
-            recurring_rule_id=rule.id,
-            is_recurring_instance=1,
-        )
-        db.add(instance)
-        generated += 1
+        instances.append({
+            "user_id": source_post.user_id,
+            "template_id": source_post.template_id,
+            "category": source_post.category,
+            "country": source_post.country,
+            "platform": source_post.platform,
+            "status": "scheduled",
+            "title": source_post.title,
+            "slide_data": source_post.slide_data,
+            "caption_instagram": source_post.caption_instagram,
+            "caption_tiktok": source_post.caption_tiktok,
+            "hashtags_instagram": source_post.hashtags_instagram,
+            "hashtags_tiktok": source_post.hashtags_tiktok,
+            "cta_text": source_post.cta_text,
+            "custom_colors": source_post.custom_colors,
+            "custom_fonts": source_post.custom_fonts,
+            "tone": source_post.tone,
+            "scheduled_date": datetime(target_date.year, target_date.month, target_date.day),
+            "scheduled_time": rule.time,
+            "recurring_rule_id": rule.id,
+            "is_recurring_instance": 1,
+        })
+    generated = len(await insert_posts(db, instances))
 
     # Update rule stats
     rule.generated_count += generated
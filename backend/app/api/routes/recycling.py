@@ -4,11 +4,13 @@ from datetime import datetime, timezone, timedelta
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_
+from sqlalchemy import select, func, and_, or_
 
 from app.core.database import get_db
+from app.core.projection import Projection
 from app.core.security import get_current_user_id
 from app.models.post import Post
+from app.services import post_similarity
 
 router = APIRouter()
 
@@ -47,7 +49,22 @@ CATEGORY_LABELS = {
 }
 
 
-def _calculate_recycle_score(post: Post, days_old: int) -> int:
+# Posts created or scheduled within this window count as "recent" content
+RECENT_DAYS = 60
+# Candidates at least this similar to a recent post are not suggested
+RECENT_SIMILARITY_THRESHOLD = 0.5
+
+# Columns needed to score every candidate; full rows are loaded only for the suggestions returned
+RECYCLE_CANDIDATE = Projection(
+    "RecycleCandidate",
+    Post.id, Post.category, Post.status, Post.country, Post.created_at,
+    (
+        (func.coalesce(Post.caption_instagram, "") != "") | (func.coalesce(Post.caption_tiktok, "") != "")
+    ).label("has_caption"),
+)
+
+
+def _calculate_recycle_score(post, days_old: int) -> int:
     """Calculate a recycling score (0-100) based on post attributes.
 
     Factors:
@@ -56,6 +73,8 @@ def _calculate_recycle_score(post: Post, days_old: int) -> int:
     - Has been posted/exported (proven content): +20 points
     - Has country content (reusable for different audience): +10 points
     - Has caption content (richer content): +10 points
+
+    `post` is a RECYCLE_CANDIDATE row.
     """
     score = 0
 
@@ -76,7 +95,7 @@ def _calculate_recycle_score(post: Post, days_old: int) -> int:
         score += 10
 
     # Rich content bonus (has caption)
-    if post.caption_instagram or post.caption_tiktok:
+    if post.has_caption:
         score += 10
 
     return min(100, score)
@@ -129,6 +148,45 @@ def _build_reason(post: Post, days_old: int) -> str:
     return " - ".join(parts)
 
 
+async def _load_posts(db: AsyncSession, post_ids: list[int]) -> dict[int, Post]:
+    """Full Post rows by id (for the few suggestions that are returned)."""
+    if not post_ids:
+        return {}
+    result = await db.execute(select(Post).where(Post.id.in_(post_ids)))
+    return {post.id: post for post in result.scalars().all()}
+
+
+async def _recent_post_ids(db: AsyncSession, user_id: int, now: datetime) -> set[int]:
+    """Posts created in the last RECENT_DAYS or scheduled from now on."""
+    result = await db.execute(
+        select(Post.id).where(
+            Post.user_id == user_id,
+            or_(Post.created_at >= now - timedelta(days=RECENT_DAYS), Post.scheduled_date >= now),
+        )
+    )
+    return set(result.scalars().all())
+
+
+async def _without_recent_repeats(db: AsyncSession, user_id: int, now: datetime, scored: list, limit: int) -> tuple[list, int]:
+    """The best `limit` scored candidates whose content is not already covered by a recent post.
+
+    `scored` is sorted best first. Returns (picked, number of skipped candidates).
+    """
+    recent_ids = await _recent_post_ids(db, user_id, now)
+    if not recent_ids:
+        return scored[:limit], 0
+    index = await post_similarity.user_index(db, user_id)
+    picked, skipped = [], 0
+    for entry in scored:
+        if len(picked) >= limit:
+            break
+        if index.similar(entry[0].id, limit=1, min_similarity=RECENT_SIMILARITY_THRESHOLD, among=recent_ids):
+            skipped += 1
+            continue
+        picked.append(entry)
+    return picked, skipped
+
+
 def _get_now_naive():
     """Get current UTC datetime without timezone info (for SQLite compatibility)."""
     return datetime.utcnow()
@@ -139,6 +197,7 @@ async def get_recyclable_posts(
     min_age_days: int = Query(default=90, ge=1, le=730, description="Minimum age in days"),
     category: Optional[str] = None,
     evergreen_only: bool = Query(default=False, description="Only return evergreen categories"),
+    skip_similar_to_recent: bool = Query(default=True, description="Skip posts whose content is similar to a recent or scheduled post"),
     limit: int = Query(default=10, ge=1, le=50),
     user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
@@ -147,6 +206,7 @@ async def get_recyclable_posts(
 
     Scans posts older than min_age_days and ranks them by recycling potential.
     Evergreen content (FAQs, Tipps, Laender-Spotlights) gets higher scores.
+    Posts that say nearly the same as a recent or scheduled post are skipped.
     """
     now = _get_now_naive()
     cutoff = now - timedelta(days=min_age_days)
@@ -162,10 +222,9 @@ async def get_recyclable_posts(
     if evergreen_only:
         filters.append(Post.category.in_(EVERGREEN_CATEGORIES))
 
-    result = await db.execute(
-        select(Post).where(*filters).order_by(Post.created_at.asc())
+    posts = await RECYCLE_CANDIDATE.all(
+        db, RECYCLE_CANDIDATE.select().where(*filters).order_by(Post.created_at.asc())
     )
-    posts = result.scalars().all()
 
     # Score and sort by recycling potential
     scored_posts = []
@@ -183,10 +242,15 @@ async def get_recyclable_posts(
     scored_posts.sort(key=lambda x: x[2], reverse=True)
 
     # Limit results
-    scored_posts = scored_posts[:limit]
+    skipped = 0
+    if skip_similar_to_recent:
+        scored_posts, skipped = await _without_recent_repeats(db, user_id, now, scored_posts, limit)
+    else:
+        scored_posts = scored_posts[:limit]
+    full_posts = await _load_posts(db, [p.id for p, _, _ in scored_posts])
 
     suggestions = [
-        _post_to_recycling_dict(p, days_old, score)
+        _post_to_recycling_dict(full_posts[p.id], days_old, score)
         for p, days_old, score in scored_posts
     ]
 
@@ -194,6 +258,7 @@ async def get_recyclable_posts(
         "suggestions": suggestions,
         "total_recyclable": len(posts),
         "evergreen_count": sum(1 for p in posts if p.category in EVERGREEN_CATEGORIES),
+        "similar_to_recent_skipped": skipped,
     }
 
 
@@ -327,7 +392,8 @@ async def get_calendar_recycling_suggestions(
     """Suggest recyclable posts for empty calendar days.
 
     Finds days without scheduled posts in the given month and suggests
-    recyclable content from the user's post history for those gaps.
+    recyclable content from the user's post history for those gaps (skipping
+    posts similar to recent or scheduled content).
     """
     from calendar import monthrange
 
@@ -362,13 +428,13 @@ async def get_calendar_recycling_suggestions(
 
     # Get recyclable posts (older than 90 days)
     cutoff = now - timedelta(days=90)
-    recycle_result = await db.execute(
-        select(Post).where(
+    recyclable_posts = await RECYCLE_CANDIDATE.all(
+        db,
+        RECYCLE_CANDIDATE.select().where(
             Post.user_id == user_id,
             Post.created_at <= cutoff,
-        ).order_by(Post.created_at.asc())
+        ).order_by(Post.created_at.asc()),
     )
-    recyclable_posts = recycle_result.scalars().all()
 
     # Score posts
     scored = []
@@ -383,14 +449,17 @@ async def get_calendar_recycling_suggestions(
     scored.sort(key=lambda x: x[2], reverse=True)
 
     # Build suggestions: match top recyclable posts to gap days
+    shown_gaps = gap_days[:10]  # Limit to 10 gap days
+    scored, _ = await _without_recent_repeats(db, user_id, now, scored, len(shown_gaps))
+    full_posts = await _load_posts(db, [post.id for post, _, _ in scored])
     suggestions = []
-    for i, gap_day in enumerate(gap_days[:10]):  # Limit to 10 gap days
+    for i, gap_day in enumerate(shown_gaps):
         if i < len(scored):
             post, days_old, score = scored[i % len(scored)]
             suggestions.append({
                 "gap_date": gap_day.isoformat(),
                 "gap_day_name": gap_day.strftime("%A"),
-                "suggested_post": _post_to_recycling_dict(post, days_old, score),
+                "suggested_post": _post_to_recycling_dict(full_posts[post.id], days_old, score),
             })
         else:
             suggestions.append({
@@ -0,0 +1,46 @@
+"""Search API routes — unified full-text search across posts, assets, students and templates."""
+
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db
+from app.core.security import get_current_user_id
+from app.services import search_index
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@router.get("")
+async def search(
+    q: str = Query(..., min_length=1, description="Search terms; every term is matched as a word prefix"),
+    types: Optional[str] = Query(default=None, description="Comma-separated entity types: post, asset, student, template"),
+    limit: int = Query(default=20, ge=1, le=100, description="Maximum number of results"),
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    """Search the user's content, ranked by relevance (BM25, title hits weigh more).
+
+    Umlauts are folded (e.g. "Länder" also finds "Laender"). Each result has a
+    `snippet` and `title_highlighted` with matches wrapped in `<mark>`.
+    """
+    type_list = None
+    if types:
+        type_list = [t.strip() for t in types.split(",") if t.strip()]
+        unknown = [t for t in type_list if t not in search_index.ENTITY_TYPES]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unbekannte Suchtypen: {', '.join(unknown)}. Erlaubt: {', '.join(search_index.ENTITY_TYPES)}",
+            )
+
+    results = await search_index.search(db, user_id, q, types=type_list, limit=limit)
+    return {
+        "query": q,
+        "backend": "fts5" if search_index.fts5_available() else "fallback",
+        "results": results,
+        "total": len(results),
+    }
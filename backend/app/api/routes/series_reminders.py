@@ -1,5 +1,6 @@
 """Series Reminders API - Automatic notifications for story series scheduling."""
 
+import asyncio
 import logging
 from datetime import datetime, timezone, timedelta
 from typing import Optional
@@ -10,6 +11,7 @@ from sqlalchemy import select, func, and_, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
+from app.core.batch_loader import Loaders, get_loaders
 from app.api.routes.auth import get_current_user
 from app.models.user import User
 from app.models.story_arc import StoryArc
@@ -199,6 +201,7 @@ async def dismiss_reminder(
 async def check_series_reminders(
     pause_warning_days: int = Query(DEFAULT_PAUSE_WARNING_DAYS),
     db: AsyncSession = Depends(get_db),
+    loaders: Loaders = Depends(get_loaders),
     user: User = Depends(get_current_user),
 ):
     """
@@ -223,27 +226,20 @@ async def check_series_reminders(
     )
     arcs = arcs_result.scalars().all()
 
-    for arc in arcs:
-        # Get episodes (posts linked to this arc)
-        episodes_result = await db.execute(
-            select(Post).where(
-                Post.story_arc_id == arc.id,
-                Post.user_id == user.id,
-            ).order_by(Post.created_at.desc())
-        )
-        episodes = episodes_result.scalars().all()
-
-        # Get scheduled future episodes
-        scheduled_result = await db.execute(
-            select(Post).where(
-                Post.story_arc_id == arc.id,
-                Post.user_id == user.id,
-                Post.scheduled_date != None,
-                Post.status.in_(["scheduled", "draft"]),
-            ).order_by(Post.scheduled_date.asc())
-        )
-        scheduled_episodes = scheduled_result.scalars().all()
+    # Episodes and scheduled future episodes for all arcs (one query each)
+    arc_ids = [arc.id for arc in arcs]
+    all_episodes, all_scheduled = await asyncio.gather(
+        loaders.lists(Post.story_arc_id, Post.user_id == user.id, order_by=Post.created_at.desc()).load_many(arc_ids),
+        loaders.lists(
+            Post.story_arc_id,
+            Post.user_id == user.id,
+            Post.scheduled_date != None,
+            Post.status.in_(["scheduled", "draft"]),
+            order_by=Post.scheduled_date.asc(),
+        ).load_many(arc_ids),
+    )
 
+    for arc, episodes, scheduled_episodes in zip(arcs, all_episodes, all_scheduled):
         # ── Check 1: Series Paused Too Long ──
         if arc.status == "active" and episodes:
             last_episode = episodes[0]  # Most recent by created_at
@@ -344,6 +340,7 @@ async def check_series_reminders(
 @router.get("/series-status")
 async def get_series_status(
     db: AsyncSession = Depends(get_db),
+    loaders: Loaders = Depends(get_loaders),
     user: User = Depends(get_current_user),
 ):
     """
@@ -362,37 +359,22 @@ async def get_series_status(
     )
     arcs = arcs_result.scalars().all()
 
-    series_list = []
-    for arc in arcs:
-        # Count episodes for this arc
-        ep_count_result = await db.execute(
-            select(func.count(Post.id)).where(
-                Post.story_arc_id == arc.id,
-                Post.user_id == user.id,
-            )
-        )
-        episode_count = ep_count_result.scalar() or 0
-
-        # Find next scheduled episode
-        next_ep_result = await db.execute(
-            select(Post).where(
-                Post.story_arc_id == arc.id,
-                Post.user_id == user.id,
-                Post.scheduled_date != None,
-                Post.status.in_(["scheduled", "draft"]),
-            ).order_by(Post.scheduled_date.asc()).limit(1)
-        )
-        next_episode = next_ep_result.scalar_one_or_none()
-
-        # Find last episode
-        last_ep_result = await db.execute(
-            select(Post).where(
-                Post.story_arc_id == arc.id,
-                Post.user_id == user.id,
-            ).order_by(Post.created_at.desc()).limit(1)
-        )
-        last_episode = last_ep_result.scalar_one_or_none()
+    # Episode count, next scheduled and last episode for all arcs (one query each)
+    arc_ids = [arc.id for arc in arcs]
+    episode_counts, next_episodes, last_episodes = await asyncio.gather(
+        loaders.counts(Post.story_arc_id, Post.user_id == user.id).load_many(arc_ids),
+        loaders.first(
+            Post.story_arc_id,
+            Post.user_id == user.id,
+            Post.scheduled_date != None,
+            Post.status.in_(["scheduled", "draft"]),
+            order_by=Post.scheduled_date.asc(),
+        ).load_many(arc_ids),
+        loaders.first(Post.story_arc_id, Post.user_id == user.id, order_by=Post.created_at.desc()).load_many(arc_ids),
+    )
 
+    series_list = []
+    for arc, episode_count, next_episode, last_episode in zip(arcs, episode_counts, next_episodes, last_episodes):
         # Calculate days since last episode
         days_since_last = None
         if last_episode and last_episode.created_at:
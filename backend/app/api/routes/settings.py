@@ -5,26 +5,20 @@ Application settings (brand colors, API keys, posting goals) per user.
 
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 
 from app.core.database import get_db
 from app.core.security import get_current_user_id
-from app.models.setting import Setting
+from app.services.user_settings import UserSettings, get_user_settings, store_user_settings
 
 router = APIRouter()
 
 
 @router.get("")
 async def get_settings(
-    user_id: int = Depends(get_current_user_id),
-    db: AsyncSession = Depends(get_db),
+    user_settings: UserSettings = Depends(get_user_settings),
 ):
     """Get all user settings."""
-    result = await db.execute(
-        select(Setting).where(Setting.user_id == user_id)
-    )
-    settings_list = result.scalars().all()
-    return {s.key: s.value for s in settings_list}
+    return user_settings.to_dict()
 
 
 @router.put("")
@@ -33,21 +27,6 @@ async def update_settings(
     user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
 ):
-    """Update settings."""
-    # Single SELECT for all existing settings (avoids N+1 per-key queries)
-    result = await db.execute(
-        select(Setting).where(Setting.user_id == user_id)
-    )
-    existing_map = {s.key: s for s in result.scalars().all()}
-
-    for key, value in settings_data.items():
-        if key in existing_map:
-            existing_map[key].value = str(value)
-        else:
-            new_setting = Setting(user_id=user_id, key=key, value=str(value))
-            db.add(new_setting)
-            existing_map[key] = new_setting
-
-    await db.commit()
-
-    return {k: s.value for k, s in existing_map.items()}
+    """Update settings (single SELECT + upsert, refreshes the settings cache)."""
+    user_settings = await store_user_settings(user_id, settings_data, db)
+    return user_settings.to_dict()
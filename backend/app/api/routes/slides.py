@@ -8,6 +8,7 @@ from app.core.database import get_db
 from app.core.security import get_current_user_id
 from app.models.post import Post
 from app.models.post_slide import PostSlide
+from app.services.slide_summary import SLIDE_ROW_FIELDS, parse_slides, set_slides, slide_from_row
 
 router = APIRouter()
 
@@ -53,6 +54,13 @@ async def get_slides(
     return [slide_to_dict(s) for s in slides]
 
 
+async def _slide_rows(db: AsyncSession, post_id: int) -> list[PostSlide]:
+    result = await db.execute(
+        select(PostSlide).where(PostSlide.post_id == post_id).order_by(PostSlide.slide_index)
+    )
+    return list(result.scalars().all())
+
+
 @router.put("/{post_id}/slides")
 async def update_slides(
     post_id: int,
@@ -60,7 +68,12 @@ async def update_slides(
     user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
 ):
-    """Update all slides for a post (including reorder)."""
+    """Update all slides for a post (including reorder).
+
+    Slides are written to the post's slide_data; the PostSlide rows are
+    rebuilt from it on flush (app.services.slide_summary). Items carrying
+    the `id` of an existing slide keep that slide's other slide_data keys.
+    """
     # Verify post belongs to user
     post_result = await db.execute(
         select(Post).where(Post.id == post_id, Post.user_id == user_id)
@@ -69,29 +82,22 @@ async def update_slides(
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
 
-    # Delete existing slides
-    result = await db.execute(select(PostSlide).where(PostSlide.post_id == post_id))
-    existing = result.scalars().all()
-    for slide in existing:
-        await db.delete(slide)
+    current = parse_slides(post.slide_data)
+    index_by_id = {row.id: row.slide_index for row in await _slide_rows(db, post_id)}
 
-    # Create new slides with correct slide_index
     new_slides = []
-    allowed_fields = {
-        "headline", "subheadline", "body_text", "bullet_points",
-        "quote_text", "quote_author", "cta_text", "image_asset_id",
-        "background_type", "background_value", "custom_css_overrides",
-    }
-    for i, slide_data in enumerate(slides_data):
-        filtered = {k: v for k, v in slide_data.items() if k in allowed_fields}
-        slide = PostSlide(post_id=post_id, slide_index=i, **filtered)
-        db.add(slide)
+    for item in slides_data:
+        old_index = index_by_id.get(item.get("id"))
+        base = current[old_index] if old_index is not None and old_index < len(current) else {}
+        filtered = {k: v for k, v in item.items() if k in SLIDE_ROW_FIELDS}
+        slide = {**base, **slide_from_row(filtered)}
+        for key in (k for k, v in filtered.items() if v is None):
+            slide.pop(key, None)
         new_slides.append(slide)
+    set_slides(post, new_slides)
 
     await db.flush()
-    for slide in new_slides:
-        await db.refresh(slide)
-    response = [slide_to_dict(s) for s in new_slides]
+    response = [slide_to_dict(s) for s in await _slide_rows(db, post_id)]
     await db.commit()
     return response
 
@@ -108,27 +114,15 @@ async def add_slide(
     post_result = await db.execute(
         select(Post).where(Post.id == post_id, Post.user_id == user_id)
     )
-    if not post_result.scalar_one_or_none():
+    post = post_result.scalar_one_or_none()
+    if not post:
         raise HTTPException(status_code=404, detail="Post not found")
 
-    # Get max slide_index
-    result = await db.execute(
-        select(PostSlide).where(PostSlide.post_id == post_id).order_by(PostSlide.slide_index.desc())
-    )
-    last_slide = result.scalar_one_or_none()
-    next_index = (last_slide.slide_index + 1) if last_slide else 0
+    filtered = {k: v for k, v in slide_data.items() if k in SLIDE_ROW_FIELDS}
+    set_slides(post, parse_slides(post.slide_data) + [slide_from_row(filtered)])
 
-    allowed_fields = {
-        "headline", "subheadline", "body_text", "bullet_points",
-        "quote_text", "quote_author", "cta_text", "image_asset_id",
-        "background_type", "background_value", "custom_css_overrides",
-    }
-    filtered = {k: v for k, v in slide_data.items() if k in allowed_fields}
-    slide = PostSlide(post_id=post_id, slide_index=next_index, **filtered)
-    db.add(slide)
     await db.flush()
-    await db.refresh(slide)
-    response = slide_to_dict(slide)
+    response = slide_to_dict((await _slide_rows(db, post_id))[-1])
     await db.commit()
     return response
 
@@ -145,7 +139,8 @@ async def delete_slide(
     post_result = await db.execute(
         select(Post).where(Post.id == post_id, Post.user_id == user_id)
     )
-    if not post_result.scalar_one_or_none():
+    post = post_result.scalar_one_or_none()
+    if not post:
         raise HTTPException(status_code=404, detail="Post not found")
 
     result = await db.execute(
@@ -155,6 +150,8 @@ async def delete_slide(
     if not slide:
         raise HTTPException(status_code=404, detail="Slide not found")
 
-    await db.delete(slide)
+    slides = parse_slides(post.slide_data)
+    del slides[slide.slide_index:slide.slide_index + 1]
+    set_slides(post, slides)
     await db.commit()
     return {"message": "Slide deleted"}
@@ -4,20 +4,24 @@ Multi-episode story arcs following a student's journey. Supports arc creation wi
 chapter suggestions, and timeline tracking.
 """
 
+import asyncio
 import logging
 from typing import Optional
 from datetime import date, timedelta, datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select
 
 from app.core.database import get_db
 from app.core.security import get_current_user_id
+from app.core.batch_loader import Loaders, get_loaders
+from app.core.pagination import keyset_page
 from app.models.story_arc import StoryArc
 from app.models.story_episode import StoryEpisode
 from app.models.post import Post
 from app.models.content_suggestion import ContentSuggestion
 from app.models.student import Student
+from app.models.asset import Asset
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -98,13 +102,17 @@ async def list_story_arcs(
     country: Optional[str] = None,
     status: Optional[str] = None,
     enriched: bool = False,
+    cursor: Optional[str] = Query(default=None, description="Keyset pagination: empty for the first page, then the returned next_cursor"),
+    limit: Optional[int] = Query(default=None, ge=1, le=200, description="Page size for cursor pagination (default 50)"),
     user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
+    loaders: Loaders = Depends(get_loaders),
 ):
     """List story arcs with optional filters: student_id, country, status.
 
     Set enriched=true to include student_name, episode counts (published/total),
-    and cover_image_url for card-based overview displays.
+    and cover_image_url for card-based overview displays. With `cursor` (empty
+    for the first page), returns a keyset page with `next_cursor`.
     """
     where_clauses = [StoryArc.user_id == user_id]
 
@@ -122,57 +130,40 @@ async def list_story_arcs(
         where_clauses.append(StoryArc.status == status)
 
     query = select(StoryArc).where(*where_clauses).order_by(StoryArc.created_at.desc())
-    result = await db.execute(query)
-    arcs = result.scalars().all()
+    page = None
+    if cursor is not None:
+        page = await keyset_page(db, query, StoryArc.created_at, StoryArc.id, cursor, limit)
+        arcs = page["items"]
+    else:
+        result = await db.execute(query)
+        arcs = result.scalars().all()
 
     if not enriched:
-        return [story_arc_to_dict(a) for a in arcs]
+        items = [story_arc_to_dict(a) for a in arcs]
+        return {**page, "items": items} if page is not None else items
 
     # Enriched mode: add student_name, episode stats, cover_image_url
+    # (one batched query per relation, independent of the number of arcs)
+    student_names, total_episodes, published_episodes, cover_paths = await asyncio.gather(
+        loaders.values(Student.id, Student.name).load_many([a.student_id for a in arcs]),
+        loaders.counts(StoryEpisode.arc_id).load_many([a.id for a in arcs]),
+        loaders.counts(StoryEpisode.arc_id, StoryEpisode.status == "published").load_many([a.id for a in arcs]),
+        loaders.values(Asset.id, Asset.file_path).load_many([a.cover_image_id for a in arcs]),
+    )
+
     enriched_arcs = []
-    for arc in arcs:
+    for arc, student_name, total, published, file_path in zip(
+        arcs, student_names, total_episodes, published_episodes, cover_paths
+    ):
         arc_dict = story_arc_to_dict(arc)
-
-        # Get student name
-        if arc.student_id:
-            student_result = await db.execute(
-                select(Student.name).where(Student.id == arc.student_id)
-            )
-            student_name = student_result.scalar_one_or_none()
-            arc_dict["student_name"] = student_name
-        else:
-            arc_dict["student_name"] = None
-
-        # Count episodes and published episodes
-        total_eps_result = await db.execute(
-            select(func.count(StoryEpisode.id)).where(StoryEpisode.arc_id == arc.id)
-        )
-        total_episodes = total_eps_result.scalar() or 0
-
-        published_eps_result = await db.execute(
-            select(func.count(StoryEpisode.id)).where(
-                StoryEpisode.arc_id == arc.id,
-                StoryEpisode.status == "published",
-            )
-        )
-        published_episodes = published_eps_result.scalar() or 0
-
-        arc_dict["total_episodes"] = total_episodes
-        arc_dict["published_episodes"] = published_episodes
-
-        # Get cover image URL if available
-        if arc.cover_image_id:
-            from app.models.asset import Asset
-            asset_result = await db.execute(
-                select(Asset.file_path).where(Asset.id == arc.cover_image_id)
-            )
-            file_path = asset_result.scalar_one_or_none()
-            arc_dict["cover_image_url"] = f"/api/assets/file/{file_path}" if file_path else None
-        else:
-            arc_dict["cover_image_url"] = None
-
+        arc_dict["student_name"] = student_name
+        arc_dict["total_episodes"] = total
+        arc_dict["published_episodes"] = published
+        arc_dict["cover_image_url"] = f"/api/assets/file/{file_path}" if file_path else None
         enriched_arcs.append(arc_dict)
 
+    if page is not None:
+        return {**page, "items": enriched_arcs}
     return enriched_arcs
 
 
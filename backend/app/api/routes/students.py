@@ -3,6 +3,7 @@
 Manage exchange student profiles with countries, personality presets, and individual dashboards.
 """
 
+import asyncio
 from typing import Optional, List
 from datetime import date
 
@@ -13,11 +14,14 @@ from sqlalchemy import select, func, and_, or_
 
 from app.core.database import get_db
 from app.core.security import get_current_user_id
+from app.core.batch_loader import BatchLoader, Loaders, get_loaders
+from app.core.pagination import keyset_page
 from app.models.student import Student
 from app.models.asset import Asset
 from app.models.story_arc import StoryArc
 from app.models.post import Post
 from app.models.story_episode import StoryEpisode
+from app.services import search_index
 
 router = APIRouter()
 
@@ -79,14 +83,23 @@ def student_to_dict(student: Student, profile_image_url: Optional[str] = None) -
     }
 
 
-async def _get_profile_image_url(db: AsyncSession, profile_image_id: Optional[int]) -> Optional[str]:
-    """Resolve profile image ID to URL."""
+async def _get_profile_image_url(
+    db: AsyncSession, profile_image_id: Optional[int], filenames: Optional[BatchLoader] = None,
+) -> Optional[str]:
+    """Resolve profile image ID to URL.
+
+    `filenames` (a `values(Asset.id, Asset.filename)` loader) batches the
+    lookup with other students of the same request.
+    """
     if not profile_image_id:
         return None
-    result = await db.execute(select(Asset).where(Asset.id == profile_image_id))
-    asset = result.scalar_one_or_none()
-    if asset:
-        return f"/uploads/assets/{asset.filename}"
+    if filenames is not None:
+        filename = await filenames.load(profile_image_id)
+    else:
+        result = await db.execute(select(Asset.filename).where(Asset.id == profile_image_id))
+        filename = result.scalar_one_or_none()
+    if filename:
+        return f"/uploads/assets/{filename}"
     return None
 
 
@@ -99,8 +112,11 @@ async def list_students(
     start_date_from: Optional[date] = Query(None, description="Filter by start_date >= this date"),
     start_date_to: Optional[date] = Query(None, description="Filter by start_date <= this date"),
     search: Optional[str] = None,
+    cursor: Optional[str] = Query(default=None, description="Keyset pagination: empty for the first page, then the returned next_cursor"),
+    limit: Optional[int] = Query(default=None, ge=1, le=200, description="Page size for cursor pagination (default 50)"),
     user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
+    loaders: Loaders = Depends(get_loaders),
 ):
     """List students with optional filters (country, status, date_range, search)."""
     query = select(Student).where(Student.user_id == user_id)
@@ -114,24 +130,35 @@ async def list_students(
     if start_date_to:
         query = query.where(Student.start_date <= start_date_to)
     if search:
-        search_term = f"%{search}%"
-        query = query.where(
-            (Student.name.ilike(search_term))
-            | (Student.city.ilike(search_term))
-            | (Student.school_name.ilike(search_term))
-            | (Student.host_family_name.ilike(search_term))
-            | (Student.bio.ilike(search_term))
-        )
-
-    result = await db.execute(query.order_by(Student.created_at.desc()))
-    students = result.scalars().all()
-
-    # Resolve profile image URLs
-    items = []
-    for s in students:
-        img_url = await _get_profile_image_url(db, s.profile_image_id)
-        items.append(student_to_dict(s, img_url))
+        matches = search_index.match_subquery(user_id, "student", search)
+        if matches is not None:
+            query = query.where(Student.id.in_(matches))
+        else:
+            search_term = f"%{search}%"
+            query = query.where(
+                (Student.name.ilike(search_term))
+                | (Student.city.ilike(search_term))
+                | (Student.school_name.ilike(search_term))
+                | (Student.host_family_name.ilike(search_term))
+                | (Student.bio.ilike(search_term))
+            )
 
+    page = None
+    if cursor is not None:
+        page = await keyset_page(db, query, Student.created_at, Student.id, cursor, limit)
+        students = page["items"]
+    else:
+        result = await db.execute(query.order_by(Student.created_at.desc()))
+        students = result.scalars().all()
+
+    # Resolve profile image URLs (one batched query for all students)
+    filenames = loaders.values(Asset.id, Asset.filename)
+    image_urls = await asyncio.gather(
+        *(_get_profile_image_url(db, s.profile_image_id, filenames) for s in students)
+    )
+    items = [student_to_dict(s, url) for s, url in zip(students, image_urls)]
+    if page is not None:
+        return {**page, "items": items}
     return items
 
 
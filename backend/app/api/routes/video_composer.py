@@ -3,7 +3,6 @@
 import json
 import logging
 import os
-import shutil
 import subprocess
 import uuid
 from pathlib import Path
@@ -17,7 +16,19 @@ from sqlalchemy import select
 from app.core.database import get_db
 from app.core.security import get_current_user_id
 from app.core.paths import get_upload_dir
+from app.core.media import AAC_ARGS, FFMPEG_AVAILABLE, H264_ARGS
 from app.models.asset import Asset
+from app.services.video_proxy import (
+    PREVIEW_AUDIO_ARGS,
+    PREVIEW_VIDEO_ARGS,
+    PreviewRenderError,
+    cached_preview,
+    preview_input,
+    preview_path,
+    preview_size,
+    preview_url,
+    source_signature,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -27,8 +38,6 @@ ASSETS_UPLOAD_DIR = get_upload_dir("assets")
 THUMBNAILS_DIR = get_upload_dir("thumbnails")
 COMPOSED_DIR = get_upload_dir("composed")
 
-FFMPEG_AVAILABLE = shutil.which("ffmpeg") is not None
-
 # Transition types
 TRANSITION_TYPES = ["cut", "fade", "crossdissolve"]
 
@@ -55,6 +64,8 @@ class ComposeRequest(BaseModel):
     clips: list[ClipItem] = Field(..., min_length=1)
     output_format: str = "9:16"  # 9:16, 1:1, 16:9
     save_as_asset: bool = True
+    # Fast low-resolution render from proxies (cached, never saved as asset)
+    preview: bool = False
 
 
 class ComposePreviewRequest(BaseModel):
@@ -63,6 +74,13 @@ class ComposePreviewRequest(BaseModel):
     output_format: str = "9:16"
 
 
+def _encode_args(preview: bool, audio: bool = True) -> list[str]:
+    """Encoder flags: the house encoding, or the fast preview settings."""
+    if preview:
+        return PREVIEW_VIDEO_ARGS + (PREVIEW_AUDIO_ARGS if audio else [])
+    return H264_ARGS + (AAC_ARGS if audio else [])
+
+
 def _extract_video_metadata(video_path: Path) -> dict:
     """Extract video metadata using ffprobe."""
     metadata = {"duration_seconds": None, "width": None, "height": None}
@@ -268,6 +286,9 @@ async def compose_video(
             "index": i,
         })
 
+    if request.preview:
+        return await _compose_preview(clip_paths, request.output_format, target_w, target_h, user_id)
+
     # Generate output filename
     output_filename = f"composed_{uuid.uuid4()}.mp4"
     output_path = COMPOSED_DIR / output_filename
@@ -359,7 +380,47 @@ async def compose_video(
     return result_data
 
 
-def _compose_single_clip(clip_info: dict, target_w: int, target_h: int, output_path: Path):
+async def _compose_preview(clip_paths: list, output_format: str, target_w: int, target_h: int, user_id: int) -> dict:
+    """Render a composition from the clips' proxies at preview size (cached)."""
+    width, height = preview_size(target_w, target_h)
+    proxies = 0
+    key_parts = [output_format, width, height]
+    for ci in clip_paths:
+        ci["path"], is_proxy = await preview_input(user_id, ci["asset"].id, ci["path"])
+        proxies += is_proxy
+        clip = ci["clip"]
+        key_parts.append((
+            source_signature(ci["path"]), clip.trim_start, clip.trim_end,
+            clip.transition, clip.transition_duration,
+        ))
+
+    def render(output_path: Path):
+        if len(clip_paths) == 1:
+            _compose_single_clip(clip_paths[0], width, height, output_path, preview=True)
+        else:
+            _compose_multiple_clips(clip_paths, width, height, output_path, preview=True)
+
+    try:
+        path, cached = await cached_preview(preview_path("compose", *key_parts), render)
+    except subprocess.TimeoutExpired:
+        raise HTTPException(status_code=504, detail="Video composition preview timed out")
+    except PreviewRenderError as e:
+        raise HTTPException(status_code=500, detail=f"Video composition preview failed: {e}")
+
+    return {
+        "preview": True,
+        "cached": cached,
+        "file_path": preview_url(path),
+        "file_size": path.stat().st_size,
+        "width": width,
+        "height": height,
+        "output_format": output_format,
+        "clip_count": len(clip_paths),
+        "proxy_clips": proxies,
+    }
+
+
+def _compose_single_clip(clip_info: dict, target_w: int, target_h: int, output_path: Path, preview: bool = False):
     """Compose a single clip with scaling/padding."""
     clip = clip_info["clip"]
     path = clip_info["path"]
@@ -376,10 +437,7 @@ def _compose_single_clip(clip_info: dict, target_w: int, target_h: int, output_p
     vf = f"scale={target_w}:{target_h}:force_original_aspect_ratio=decrease,pad={target_w}:{target_h}:(ow-iw)/2:(oh-ih)/2:black,setsar=1"
     cmd.extend([
         "-vf", vf,
-        "-c:v", "libx264", "-preset", "fast", "-crf", "23",
-        "-pix_fmt", "yuv420p",
-        "-profile:v", "high", "-level", "4.0",
-        "-c:a", "aac", "-b:a", "128k",
+        *_encode_args(preview),
         "-movflags", "+faststart",
         "-y", str(output_path),
     ])
@@ -391,7 +449,7 @@ def _compose_single_clip(clip_info: dict, target_w: int, target_h: int, output_p
         raise HTTPException(status_code=500, detail="Video composition failed (single clip)")
 
 
-def _compose_multiple_clips(clip_infos: list, target_w: int, target_h: int, output_path: Path):
+def _compose_multiple_clips(clip_infos: list, target_w: int, target_h: int, output_path: Path, preview: bool = False):
     """Compose multiple clips with transitions using ffmpeg complex filter graph."""
     # Check if we have any transitions that need xfade (fade or crossdissolve)
     has_transitions = any(
@@ -401,13 +459,13 @@ def _compose_multiple_clips(clip_infos: list, target_w: int, target_h: int, outp
 
     if not has_transitions:
         # Simple concat without transitions - faster
-        _compose_concat_only(clip_infos, target_w, target_h, output_path)
+        _compose_concat_only(clip_infos, target_w, target_h, output_path, preview)
     else:
         # Complex filter with xfade transitions
-        _compose_with_transitions(clip_infos, target_w, target_h, output_path)
+        _compose_with_transitions(clip_infos, target_w, target_h, output_path, preview)
 
 
-def _compose_concat_only(clip_infos: list, target_w: int, target_h: int, output_path: Path):
+def _compose_concat_only(clip_infos: list, target_w: int, target_h: int, output_path: Path, preview: bool = False):
     """Compose clips by simple concatenation (cut transitions only)."""
     # Build filter complex: scale each input, then concat
     cmd = ["ffmpeg"]
@@ -445,10 +503,7 @@ def _compose_concat_only(clip_infos: list, target_w: int, target_h: int, output_
     cmd.extend([
         "-filter_complex", filter_complex,
         "-map", "[outv]", "-map", "[outa]",
-        "-c:v", "libx264", "-preset", "fast", "-crf", "23",
-        "-pix_fmt", "yuv420p",
-        "-profile:v", "high", "-level", "4.0",
-        "-c:a", "aac", "-b:a", "128k",
+        *_encode_args(preview),
         "-movflags", "+faststart",
         "-y", str(output_path),
     ])
@@ -458,10 +513,10 @@ def _compose_concat_only(clip_infos: list, target_w: int, target_h: int, output_
     if proc.returncode != 0:
         logger.error(f"ffmpeg concat failed: {proc.stderr[:2000]}")
         # Fallback: try without audio
-        _compose_concat_video_only(clip_infos, target_w, target_h, output_path)
+        _compose_concat_video_only(clip_infos, target_w, target_h, output_path, preview)
 
 
-def _compose_concat_video_only(clip_infos: list, target_w: int, target_h: int, output_path: Path):
+def _compose_concat_video_only(clip_infos: list, target_w: int, target_h: int, output_path: Path, preview: bool = False):
     """Fallback: concat video only (no audio) when audio stream concat fails."""
     cmd = ["ffmpeg"]
     filter_parts = []
@@ -489,9 +544,7 @@ def _compose_concat_video_only(clip_infos: list, target_w: int, target_h: int, o
     cmd.extend([
         "-filter_complex", filter_complex,
         "-map", "[outv]",
-        "-c:v", "libx264", "-preset", "fast", "-crf", "23",
-        "-pix_fmt", "yuv420p",
-        "-profile:v", "high", "-level", "4.0",
+        *_encode_args(preview, audio=False),
         "-movflags", "+faststart",
         "-an",
         "-y", str(output_path),
@@ -504,7 +557,7 @@ def _compose_concat_video_only(clip_infos: list, target_w: int, target_h: int, o
         raise HTTPException(status_code=500, detail="Video composition failed")
 
 
-def _compose_with_transitions(clip_infos: list, target_w: int, target_h: int, output_path: Path):
+def _compose_with_transitions(clip_infos: list, target_w: int, target_h: int, output_path: Path, preview: bool = False):
     """Compose clips with xfade transitions between them."""
     n = len(clip_infos)
     cmd = ["ffmpeg"]
@@ -594,10 +647,7 @@ def _compose_with_transitions(clip_infos: list, target_w: int, target_h: int, ou
     cmd.extend([
         "-filter_complex", filter_complex,
         "-map", "[outv]", "-map", "[outa]",
-        "-c:v", "libx264", "-preset", "fast", "-crf", "23",
-        "-pix_fmt", "yuv420p",
-        "-profile:v", "high", "-level", "4.0",
-        "-c:a", "aac", "-b:a", "128k",
+        *_encode_args(preview),
         "-movflags", "+faststart",
         "-y", str(output_path),
     ])
@@ -607,12 +657,12 @@ def _compose_with_transitions(clip_infos: list, target_w: int, target_h: int, ou
     if proc.returncode != 0:
         logger.error(f"ffmpeg xfade failed: {proc.stderr[:2000]}")
         # Fallback: try without audio
-        _compose_with_transitions_video_only(clip_infos, clip_durations, target_w, target_h, output_path)
+        _compose_with_transitions_video_only(clip_infos, clip_durations, target_w, target_h, output_path, preview)
 
 
 def _compose_with_transitions_video_only(
     clip_infos: list, clip_durations: list,
-    target_w: int, target_h: int, output_path: Path
+    target_w: int, target_h: int, output_path: Path, preview: bool = False,
 ):
     """Fallback: xfade transitions without audio."""
     n = len(clip_infos)
@@ -674,9 +724,7 @@ def _compose_with_transitions_video_only(
     cmd.extend([
         "-filter_complex", filter_complex,
         "-map", "[outv]",
-        "-c:v", "libx264", "-preset", "fast", "-crf", "23",
-        "-pix_fmt", "yuv420p",
-        "-profile:v", "high", "-level", "4.0",
+        *_encode_args(preview, audio=False),
         "-movflags", "+faststart",
         "-an",
         "-y", str(output_path),
@@ -687,4 +735,4 @@ def _compose_with_transitions_video_only(
     if proc.returncode != 0:
         logger.error(f"ffmpeg video-only xfade failed: {proc.stderr[:2000]}")
         # Final fallback: simple concat without transitions
-        _compose_concat_video_only(clip_infos, target_w, target_h, output_path)
+        _compose_concat_video_only(clip_infos, target_w, target_h, output_path, preview)
@@ -14,7 +14,7 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import FileResponse
 from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -22,9 +22,21 @@ from sqlalchemy import select
 
 from app.core.database import get_db
 from app.core.security import get_current_user_id
-from app.core.paths import get_upload_dir
+from app.core.paths import APP_DIR, get_upload_dir
+from app.core.pagination import keyset_page
 from app.models.asset import Asset
 from app.models.video_export import VideoExport
+from app.services.video_proxy import (
+    PREVIEW_AUDIO_ARGS,
+    PREVIEW_VIDEO_ARGS,
+    PreviewRenderError,
+    cached_preview,
+    preview_input,
+    preview_path,
+    preview_size,
+    preview_url,
+    source_signature,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -91,6 +103,9 @@ class VideoExportRequest(BaseModel):
     focus_x: float = Field(default=50.0, ge=0, le=100)  # Focus point X percentage
     focus_y: float = Field(default=50.0, ge=0, le=100)  # Focus point Y percentage
     max_duration: Optional[float] = None  # Override platform max duration
+    # Fast low-resolution render from the proxy to check framing (cached, no export record);
+    # quality only applies to the final export
+    preview: bool = False
 
 
 class BatchExportRequest(BaseModel):
@@ -201,9 +216,11 @@ def _export_video(
     focus_y: float,
     max_duration: Optional[float],
     src_info: dict,
+    preview: bool = False,
 ) -> tuple[bool, str]:
     """Run ffmpeg to export the video with crop/scale and compression.
 
+    With `preview`, the fast preview encoder settings replace `crf`.
     Returns (success, error_message).
     """
     src_w = src_info.get("width", 1920)
@@ -226,18 +243,21 @@ def _export_video(
     cmd.extend(["-vf", vf])
 
     # Video codec settings (H.264 for maximum compatibility)
-    cmd.extend([
-        "-c:v", "libx264",
-        "-preset", "medium",
-        "-crf", str(crf),
-        "-profile:v", "high",
-        "-level", "4.0",
-        "-pix_fmt", "yuv420p",
-    ])
+    if preview:
+        cmd.extend(PREVIEW_VIDEO_ARGS)
+    else:
+        cmd.extend([
+            "-c:v", "libx264",
+            "-preset", "medium",
+            "-crf", str(crf),
+            "-profile:v", "high",
+            "-level", "4.0",
+            "-pix_fmt", "yuv420p",
+        ])
 
     # Audio
     if src_info.get("has_audio"):
-        cmd.extend(["-c:a", "aac", "-b:a", "128k"])
+        cmd.extend(PREVIEW_AUDIO_ARGS if preview else ["-c:a", "aac", "-b:a", "128k"])
     else:
         cmd.extend(["-an"])
 
@@ -420,6 +440,57 @@ def _resolve_asset_path(asset: Asset) -> Optional[Path]:
     return None
 
 
+async def _export_preview(
+    request: VideoExportRequest,
+    asset: Asset,
+    file_path: Path,
+    target_w: int,
+    target_h: int,
+    max_duration: float,
+    user_id: int,
+) -> dict:
+    """Render the export framing from the asset's proxy at preview size (cached)."""
+    input_path, is_proxy = await preview_input(user_id, asset.id, file_path)
+    width, height = preview_size(target_w, target_h)
+    key = preview_path(
+        "export", source_signature(input_path), width, height,
+        request.focus_x, request.focus_y, max_duration,
+    )
+
+    def render(output_path: Path):
+        success, error_msg = _export_video(
+            input_path=input_path,
+            output_path=output_path,
+            target_w=width,
+            target_h=height,
+            crf=0,
+            focus_x=request.focus_x,
+            focus_y=request.focus_y,
+            max_duration=max_duration,
+            src_info=_get_video_info(input_path),
+            preview=True,
+        )
+        if not success:
+            raise PreviewRenderError(error_msg)
+
+    try:
+        path, cached = await cached_preview(key, render)
+    except PreviewRenderError as e:
+        raise HTTPException(status_code=500, detail=f"Export preview failed: {e}")
+
+    return {
+        "asset_id": asset.id,
+        "preview": True,
+        "cached": cached,
+        "proxy": is_proxy,
+        "aspect_ratio": request.aspect_ratio,
+        "platform": request.platform,
+        "file_path": preview_url(path),
+        "width": width,
+        "height": height,
+    }
+
+
 @router.post("")
 async def export_video(
     request: VideoExportRequest,
@@ -465,9 +536,6 @@ async def export_video(
     if not file_path or not file_path.exists():
         raise HTTPException(status_code=404, detail="Video file not found on disk")
 
-    # Get source video info
-    src_info = _get_video_info(file_path)
-
     # Platform settings
     preset = PLATFORM_PRESETS[request.platform]
     max_duration = request.max_duration or preset["max_duration"]
@@ -477,6 +545,12 @@ async def export_video(
     target_w = fmt["width"]
     target_h = fmt["height"]
 
+    if request.preview:
+        return await _export_preview(request, asset, file_path, target_w, target_h, max_duration, user_id)
+
+    # Get source video info
+    src_info = _get_video_info(file_path)
+
     # Quality -> CRF
     crf = _quality_to_crf(request.quality)
 
@@ -736,8 +810,13 @@ async def list_exports(
     user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
     asset_id: Optional[int] = None,
+    cursor: Optional[str] = Query(default=None, description="Keyset pagination: empty for the first page, then the returned next_cursor"),
+    limit: Optional[int] = Query(default=None, ge=1, le=200, description="Page size for cursor pagination (default 50)"),
 ):
-    """List video exports, optionally filtered by asset_id."""
+    """List video exports, optionally filtered by asset_id.
+
+    With `cursor` (empty for the first page), returns a keyset page with `next_cursor`.
+    """
     query = (
         select(VideoExport)
         .where(VideoExport.user_id == user_id)
@@ -746,6 +825,9 @@ async def list_exports(
     if asset_id:
         query = query.where(VideoExport.asset_id == asset_id)
 
+    if cursor is not None:
+        return await keyset_page(db, query, VideoExport.created_at, VideoExport.id, cursor, limit, export_to_dict)
+
     result = await db.execute(query)
     exports = result.scalars().all()
     return [export_to_dict(e) for e in exports]
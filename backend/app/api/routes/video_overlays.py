@@ -1,24 +1,34 @@
 """Video overlay routes - CRUD and ffmpeg rendering for video overlays."""
 
+import asyncio
 import json
 import logging
 import os
-import shutil
-import subprocess
-import uuid
 from pathlib import Path
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from app.core.database import get_db
 from app.core.security import get_current_user_id
-from app.core.paths import get_upload_dir
+from app.core.paths import APP_DIR, get_upload_dir
+from app.core.media import FFMPEG_AVAILABLE, probe, temp_output
 from app.models.video_overlay import VideoOverlay
 from app.models.asset import Asset
+from app.services.overlay_renderer import definition_hash, render_video_with_overlays
+from app.services.video_proxy import (
+    PREVIEW_VIDEO_ARGS,
+    PreviewRenderError,
+    cached_preview,
+    preview_input,
+    preview_path,
+    preview_size,
+    preview_url,
+    source_signature,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -27,8 +37,6 @@ router = APIRouter()
 EXPORTS_DIR = get_upload_dir("exports")
 ASSETS_DIR = get_upload_dir("assets")
 
-FFMPEG_AVAILABLE = shutil.which("ffmpeg") is not None
-
 
 # ---------- Pydantic schemas ----------
 
@@ -88,241 +96,46 @@ def overlay_to_dict(overlay: VideoOverlay) -> dict:
     }
 
 
-def _get_video_dimensions(video_path: Path) -> tuple[int, int]:
-    """Get video dimensions using ffprobe. Returns (width, height) or (1080, 1920) as default."""
-    try:
-        cmd = [
-            "ffprobe",
-            "-v", "quiet",
-            "-print_format", "json",
-            "-show_streams",
-            str(video_path),
-        ]
-        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=15)
-        if proc.returncode == 0:
-            data = json.loads(proc.stdout)
-            for stream in data.get("streams", []):
-                if stream.get("codec_type") == "video":
-                    return int(stream.get("width", 1080)), int(stream.get("height", 1920))
-    except Exception as e:
-        logger.warning(f"Failed to get video dimensions: {e}")
-    return 1080, 1920
-
-
-def _parse_css_color(color_str: str) -> tuple:
-    """Parse a CSS color (hex or rgba) into an RGBA tuple (0-255 each)."""
-    if not color_str or color_str in ("transparent", "none"):
-        return (0, 0, 0, 0)
-
-    if color_str.startswith("rgba("):
-        try:
-            inner = color_str[5:-1]
-            parts = [p.strip() for p in inner.split(",")]
-            r, g, b = int(parts[0]), int(parts[1]), int(parts[2])
-            a = int(float(parts[3]) * 255)
-            return (r, g, b, a)
-        except (ValueError, IndexError):
-            return (0, 0, 0, 153)
-
-    if color_str.startswith("#"):
-        h = color_str.lstrip("#")
-        if len(h) == 3:
-            h = "".join(c * 2 for c in h)
-        if len(h) == 6:
-            return (int(h[0:2], 16), int(h[2:4], 16), int(h[4:6], 16), 255)
-
-    return (255, 255, 255, 255)
-
-
-def _render_overlay_image(layers: list[dict], video_width: int, video_height: int) -> Path:
-    """Render all overlay layers to a single transparent PNG image using Pillow.
-
-    This creates a static overlay image containing all text, logos, and branding
-    that will be composited onto the video using ffmpeg's overlay filter.
-    Returns the path to the generated PNG.
-    """
-    from PIL import Image, ImageDraw, ImageFont
-
-    img = Image.new("RGBA", (video_width, video_height), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
-
-    for layer in layers:
-        text = layer.get("text", "")
-        if not text:
-            continue
-
-        x_pct = layer.get("x", 50) / 100.0
-        y_pct = layer.get("y", 50) / 100.0
-        w_pct = layer.get("width", 80) / 100.0
-        h_pct = layer.get("height", 10) / 100.0
-        font_size = layer.get("fontSize", 32)
-        opacity = layer.get("opacity", 1.0)
-
-        x = int(x_pct * video_width)
-        y = int(y_pct * video_height)
-        w = int(w_pct * video_width)
-        h = int(h_pct * video_height)
-
-        # Background
-        bg_color = _parse_css_color(layer.get("bgColor", ""))
-        if bg_color[3] > 0:
-            # Apply layer opacity to bg alpha
-            bg_with_opacity = (bg_color[0], bg_color[1], bg_color[2], int(bg_color[3] * opacity))
-            draw.rounded_rectangle([x, y, x + w, y + h], radius=4, fill=bg_with_opacity)
-
-        # Text color
-        fg = _parse_css_color(layer.get("color", "#FFFFFF"))
-        fg_with_opacity = (fg[0], fg[1], fg[2], int(fg[3] * opacity))
-
-        # Font
-        try:
-            font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", font_size)
-        except (OSError, IOError):
-            try:
-                font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", font_size)
-            except (OSError, IOError):
-                font = ImageFont.load_default()
-
-        # Text alignment
-        align = layer.get("textAlign", "left")
-        padding = 8
-
-        # Draw text with alignment
-        text_x = x + padding
-        if align == "center":
-            bbox = draw.textbbox((0, 0), text, font=font)
-            text_w = bbox[2] - bbox[0]
-            text_x = x + (w - text_w) // 2
-        elif align == "right":
-            bbox = draw.textbbox((0, 0), text, font=font)
-            text_w = bbox[2] - bbox[0]
-            text_x = x + w - text_w - padding
-
-        text_y = y + padding
-
-        draw.text((text_x, text_y), text, fill=fg_with_opacity, font=font)
-
-    overlay_path = EXPORTS_DIR / f"_overlay_{uuid.uuid4().hex[:8]}.png"
-    img.save(str(overlay_path), "PNG")
-    return overlay_path
-
-
-def _render_video_with_overlays(video_path: Path, layers: list[dict], output_path: Path) -> tuple[bool, str]:
-    """Render video with text overlays using Pillow (image) + ffmpeg overlay filter.
-
-    Strategy: Render all text layers to a transparent PNG using Pillow,
-    then use ffmpeg's overlay filter to composite it on top of the video.
-    Time-based visibility is handled with the enable='between(t,start,end)' option.
-
-    Returns (success: bool, error_message: str).
-    """
-    video_width, video_height = _get_video_dimensions(video_path)
+async def _render_overlay_preview(
+    overlay: VideoOverlay, asset: Asset, video_path: Path, layers: list[dict], user_id: int
+) -> dict:
+    """Render the overlay onto the video's proxy at preview size (cached by layers and input)."""
+    input_path, is_proxy = await preview_input(user_id, asset.id, video_path)
+    source_width = asset.width or probe(video_path)["width"]
+    key = preview_path(
+        "overlay", source_signature(input_path), source_width,
+        json.dumps(layers, sort_keys=True),
+    )
 
-    # Get video duration
-    duration = 10.0
-    try:
-        cmd = [
-            "ffprobe", "-v", "quiet", "-print_format", "json",
-            "-show_format", str(video_path),
-        ]
-        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=15)
-        if proc.returncode == 0:
-            data = json.loads(proc.stdout)
-            dur = data.get("format", {}).get("duration")
-            if dur:
-                duration = float(dur)
-    except Exception:
-        pass
-
-    # Group layers by time range for efficient rendering
-    # For simplicity, render ALL layers into a single image and overlay it.
-    # Time-based visibility: compute earliest start and latest end across all layers
-    # to set the overlay enable window. For more precise per-layer timing,
-    # we generate separate overlay images per unique time range.
-
-    # Build time-grouped layer sets
-    time_groups = {}
-    for layer in layers:
-        start = layer.get("startTime", 0)
-        end = layer.get("endTime", -1)
-        if end < 0:
-            end = duration
-        key = (start, end)
-        if key not in time_groups:
-            time_groups[key] = []
-        time_groups[key].append(layer)
-
-    if not time_groups:
-        return False, "No overlay layers defined"
-
-    # Render separate overlay images for each time group
-    overlay_images = []
-    try:
-        for (start, end), group_layers in time_groups.items():
-            overlay_path = _render_overlay_image(group_layers, video_width, video_height)
-            overlay_images.append((overlay_path, start, end))
-    except Exception as e:
-        logger.error(f"Failed to render overlay images: {e}")
-        return False, f"Failed to render overlay images: {e}"
-
-    # Build ffmpeg complex filter with multiple overlay inputs
-    # Input 0 = video, Input 1..N = overlay images
-    inputs = ["-i", str(video_path)]
-    for (ov_path, _, _) in overlay_images:
-        inputs.extend(["-i", str(ov_path)])
-
-    # Build filter_complex
-    filter_parts = []
-    current_label = "[0:v]"
-    for i, (ov_path, start, end) in enumerate(overlay_images):
-        next_label = f"[v{i}]" if i < len(overlay_images) - 1 else "[vout]"
-        overlay_input = f"[{i + 1}:v]"
-        enable_expr = f"between(t\\,{start}\\,{end})"
-        filter_parts.append(
-            f"{current_label}{overlay_input}overlay=0:0:enable='{enable_expr}'{next_label}"
+    def render(output_path: Path):
+        info = probe(input_path)
+        success, error_msg = render_video_with_overlays(
+            input_path, layers, output_path, PREVIEW_VIDEO_ARGS,
+            output_size=preview_size(info["width"] or 1080, info["height"] or 1920),
+            source_width=source_width,
         )
-        current_label = next_label
+        if not success:
+            raise PreviewRenderError(error_msg)
 
-    filter_complex = ";".join(filter_parts)
+    try:
+        path, cached = await cached_preview(key, render)
+    except PreviewRenderError as e:
+        raise HTTPException(status_code=500, detail=f"Preview rendering failed: {e}")
 
-    cmd = [
-        "ffmpeg", "-y",
-        *inputs,
-        "-filter_complex", filter_complex,
-        "-map", "[vout]",
-        "-map", "0:a?",
-        "-codec:a", "copy",
-        "-preset", "fast",
-        "-crf", "23",
-        str(output_path),
-    ]
+    return {
+        "id": overlay.id,
+        "preview": True,
+        "cached": cached,
+        "proxy": is_proxy,
+        "file_path": preview_url(path),
+    }
 
-    logger.info(f"Running ffmpeg overlay render: {len(overlay_images)} overlay(s) -> {output_path.name}")
 
-    try:
-        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
-        if proc.returncode != 0:
-            error_msg = proc.stderr[-500:] if proc.stderr else "Unknown ffmpeg error"
-            logger.error(f"ffmpeg rendering failed: {error_msg}")
-            return False, error_msg
-
-        if output_path.exists() and output_path.stat().st_size > 0:
-            # Clean up temp overlay images
-            for (ov_path, _, _) in overlay_images:
-                try:
-                    os.remove(ov_path)
-                except OSError:
-                    pass
-            return True, ""
-        else:
-            return False, "ffmpeg produced empty or missing output file"
-
-    except FileNotFoundError:
-        return False, "ffmpeg not found on system"
-    except subprocess.TimeoutExpired:
-        return False, "ffmpeg rendering timed out (>5 min)"
-    except Exception as e:
-        return False, str(e)
+def _remove_stale_renders(overlay_id: int, current: Path) -> None:
+    """Delete earlier renders of an overlay (outputs of previous definitions)."""
+    for path in EXPORTS_DIR.glob(f"overlay_{overlay_id}_*.mp4"):
+        if path != current and ".tmp." not in path.name:
+            path.unlink(missing_ok=True)
 
 
 # ---------- API Routes ----------
@@ -461,12 +274,15 @@ async def delete_video_overlay(
 @router.post("/{overlay_id}/render")
 async def render_video_overlay(
     overlay_id: int,
+    preview: bool = Query(False, description="Fast low-resolution render from the proxy (cached)"),
     user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
 ):
     """Render the video with overlays using ffmpeg.
 
     Applies all text/branding layers to the source video and produces an MP4 output.
+    With `preview=true` the overlay is rendered onto the video's proxy at
+    preview size instead; the overlay's render status is left untouched.
     """
     if not FFMPEG_AVAILABLE:
         raise HTTPException(status_code=501, detail="Video-Overlay-Rendering ist auf diesem Server nicht verfuegbar (ffmpeg fehlt).")
@@ -503,16 +319,28 @@ async def render_video_overlay(
     if not layers:
         raise HTTPException(status_code=400, detail="No overlay layers defined")
 
-    # Generate output filename
-    output_filename = f"overlay_{overlay.id}_{uuid.uuid4().hex[:8]}.mp4"
-    output_path = EXPORTS_DIR / output_filename
+    if preview:
+        return await _render_overlay_preview(overlay, asset, video_path, layers, user_id)
 
-    # Mark as rendering
-    overlay.render_status = "rendering"
-    await db.commit()
+    # Output named after the overlay definition: an unchanged overlay is not rendered again
+    output_filename = f"overlay_{overlay.id}_{definition_hash(video_path, layers)}.mp4"
+    output_path = EXPORTS_DIR / output_filename
+    cached = output_path.exists()
 
-    # Run ffmpeg
-    success, error_msg = _render_video_with_overlays(video_path, layers, output_path)
+    if cached:
+        success, error_msg = True, ""
+    else:
+        # Mark as rendering
+        overlay.render_status = "rendering"
+        await db.commit()
+
+        # Run ffmpeg into a temporary file, so a partial output never counts as rendered
+        temp_path = temp_output(output_path)
+        success, error_msg = await asyncio.to_thread(render_video_with_overlays, video_path, layers, temp_path)
+        if success:
+            os.replace(temp_path, output_path)
+            _remove_stale_renders(overlay.id, output_path)
+        temp_path.unlink(missing_ok=True)
 
     if success:
         overlay.render_status = "done"
@@ -535,4 +363,5 @@ async def render_video_overlay(
     if not success:
         raise HTTPException(status_code=500, detail=f"Rendering failed: {error_msg}")
 
+    result_dict["cached"] = cached
     return result_dict
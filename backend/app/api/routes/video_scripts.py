@@ -20,7 +20,7 @@ from app.core.security import get_current_user_id
 from app.core.strategy_loader import StrategyLoader
 from app.models.video_script import VideoScript
 from app.models.audio_suggestion import AudioSuggestion
-from app.models.setting import Setting
+from app.services.user_settings import UserSettings, get_user_settings
 
 logger = logging.getLogger(__name__)
 
@@ -364,25 +364,6 @@ def _generate_rule_based_script(
     }
 
 
-async def _get_gemini_api_key(user_id: int, db: AsyncSession) -> Optional[str]:
-    """Get Gemini API key from user settings or environment."""
-    import os
-
-    # Check user settings first
-    result = await db.execute(
-        select(Setting).where(
-            Setting.user_id == user_id,
-            Setting.key == "gemini_api_key",
-        )
-    )
-    setting = result.scalar_one_or_none()
-    if setting and setting.value:
-        return setting.value
-
-    # Fall back to environment
-    return os.environ.get("GEMINI_API_KEY", "")
-
-
 def _script_to_dict(script: VideoScript) -> dict:
     """Convert a VideoScript model to a dict for API response."""
     return {
@@ -442,6 +423,7 @@ async def generate_video_script(
     request: dict,
     user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
+    user_settings: UserSettings = Depends(get_user_settings),
 ):
     """Generate a complete video script with scene-by-scene breakdown.
 
@@ -500,7 +482,7 @@ async def generate_video_script(
     # Try Gemini first
     source = "rule_based"
     script_data = None
-    api_key = await _get_gemini_api_key(user_id, db)
+    api_key = user_settings.gemini_api_key
 
     if api_key:
         try:
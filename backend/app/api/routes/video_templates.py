@@ -1,9 +1,9 @@
 """Video Template routes - CRUD for intro/outro branding templates + ffmpeg concat."""
 
+import asyncio
 import json
 import logging
 import os
-import shutil
 import subprocess
 import uuid
 from pathlib import Path
@@ -16,9 +16,11 @@ from sqlalchemy import select, func, or_
 
 from app.core.database import get_db
 from app.core.security import get_current_user_id
+from app.core.media import FFMPEG_AVAILABLE, concat_copy, probe, stream_copy_compatible
 from app.core.paths import get_upload_dir
 from app.models.video_template import VideoTemplate
 from app.models.asset import Asset
+from app.services.video_branding import BrandingRenderError, branding_clip
 
 logger = logging.getLogger(__name__)
 
@@ -27,9 +29,6 @@ router = APIRouter()
 ASSETS_UPLOAD_DIR = get_upload_dir("assets")
 COMPOSED_DIR = get_upload_dir("composed")
 THUMBNAILS_DIR = get_upload_dir("thumbnails")
-TEMPLATES_DIR = get_upload_dir("video_templates")
-
-FFMPEG_AVAILABLE = shutil.which("ffmpeg") is not None
 
 # Country metadata for templates
 COUNTRY_META = {
@@ -329,162 +328,6 @@ def _extract_video_metadata(video_path: Path) -> dict:
     return metadata
 
 
-def _generate_branding_video(template: VideoTemplate, target_w: int, target_h: int, output_path: Path):
-    """Generate a branding video clip (intro or outro) using ffmpeg.
-
-    Creates a video with TREFF branding elements:
-    - Solid or gradient background in TREFF/country-specific colors
-    - Centered text overlay (brand name, tagline)
-    - Social handles for outro templates
-    - Country-specific color theming
-    - Specified duration (3-5 seconds)
-    """
-    duration = template.duration_seconds
-    primary = template.primary_color or "#4C8BC2"
-    secondary = template.secondary_color or "#FDD000"
-
-    config = {}
-    if template.branding_config:
-        try:
-            config = json.loads(template.branding_config)
-        except (json.JSONDecodeError, TypeError):
-            pass
-
-    # Determine background style
-    bg_style = config.get("background", "gradient_blue_yellow")
-    country_accent = config.get("country_accent", secondary)
-
-    # Build drawtext filter chain for brand elements
-    text_filters = []
-
-    # Main text overlay
-    text_overlay = config.get("text_overlay", "TREFF Sprachreisen")
-    if text_overlay:
-        # Escape special characters for ffmpeg drawtext
-        escaped_text = text_overlay.replace("'", "\\'").replace(":", "\\:").replace("×", "x")
-        text_filters.append(
-            f"drawtext=text='{escaped_text}':"
-            f"fontsize={int(target_w * 0.06)}:fontcolor=white:"
-            f"x=(w-text_w)/2:y=(h-text_h)/2-{int(target_h * 0.05)}:"
-            f"enable='between(t,0.3,{duration})'"
-        )
-
-    # Subtitle text (country-specific subtitle like "Your American Dream")
-    subtitle = config.get("subtitle")
-    if subtitle:
-        escaped_sub = subtitle.replace("'", "\\'").replace(":", "\\:")
-        # Use country accent color for subtitle if available
-        sub_color = f"white@0.9"
-        text_filters.append(
-            f"drawtext=text='{escaped_sub}':"
-            f"fontsize={int(target_w * 0.035)}:fontcolor={sub_color}:"
-            f"x=(w-text_w)/2:y=(h-text_h)/2+{int(target_h * 0.03)}:"
-            f"enable='between(t,0.6,{duration})'"
-        )
-
-    # For outro: social handles, CTA, and country-specific pricing
-    if template.template_type == "outro":
-        show_social = config.get("show_social_handles", True)
-        if show_social and template.social_handle_instagram:
-            ig_text = template.social_handle_instagram.replace("'", "\\'").replace(":", "\\:")
-            text_filters.append(
-                f"drawtext=text='Instagram\\: {ig_text}':"
-                f"fontsize={int(target_w * 0.028)}:fontcolor=white@0.85:"
-                f"x=(w-text_w)/2:y=h*0.7:"
-                f"enable='between(t,0.8,{duration})'"
-            )
-        if show_social and template.social_handle_tiktok:
-            tt_text = template.social_handle_tiktok.replace("'", "\\'").replace(":", "\\:")
-            text_filters.append(
-                f"drawtext=text='TikTok\\: {tt_text}':"
-                f"fontsize={int(target_w * 0.028)}:fontcolor=white@0.85:"
-                f"x=(w-text_w)/2:y=h*0.75:"
-                f"enable='between(t,1.0,{duration})'"
-            )
-
-        show_website = config.get("show_website", True)
-        if show_website and template.website_url:
-            web_text = template.website_url.replace("'", "\\'").replace(":", "\\:")
-            # Use country accent or secondary for website text
-            web_color = country_accent if template.country else secondary
-            text_filters.append(
-                f"drawtext=text='{web_text}':"
-                f"fontsize={int(target_w * 0.032)}:fontcolor={web_color}:"
-                f"x=(w-text_w)/2:y=h*0.82:"
-                f"enable='between(t,1.2,{duration})'"
-            )
-
-        show_cta = config.get("show_cta", True)
-        if show_cta and template.cta_text:
-            cta_text = template.cta_text.replace("'", "\\'").replace(":", "\\:")
-            # Use yellow/gold for CTA to stand out
-            cta_color = "#FDD000" if template.country else secondary
-            text_filters.append(
-                f"drawtext=text='{cta_text}':"
-                f"fontsize={int(target_w * 0.04)}:fontcolor={cta_color}:"
-                f"x=(w-text_w)/2:y=h*0.6:"
-                f"enable='between(t,0.5,{duration})'"
-            )
-
-    # Build the ffmpeg color source + filter
-    # Country-specific background colors for more distinctive templates
-    if "dark" in bg_style:
-        bg_color = "0x1A1A2E"
-    elif "white" in bg_style:
-        bg_color = "0xFFFFFF"
-    elif "usa" in bg_style:
-        bg_color = "0x002868"  # Navy blue for USA
-    elif "canada" in bg_style:
-        bg_color = "0xCC0000"  # Deep red for Canada
-    elif "australia" in bg_style or "surf" in bg_style:
-        bg_color = "0xCC8040"  # Sandy earth tone for Australia
-    elif "nz" in bg_style or "fern" in bg_style:
-        bg_color = "0x1B6B1B"  # Forest green for NZ
-    elif "ireland" in bg_style or "green_gold" in bg_style:
-        bg_color = "0x148050"  # Irish green
-    elif "yellow" in bg_style:
-        bg_color = primary.replace("#", "0x")
-    else:
-        bg_color = primary.replace("#", "0x")
-
-    # Build video filter chain
-    vf_parts = []
-    if text_filters:
-        vf_parts.extend(text_filters)
-
-    # Add fade in/out
-    vf_parts.append(f"fade=t=in:st=0:d=0.3")
-    vf_parts.append(f"fade=t=out:st={max(0, duration - 0.3)}:d=0.3")
-
-    vf_string = ",".join(vf_parts) if vf_parts else "null"
-
-    cmd = [
-        "ffmpeg",
-        "-f", "lavfi",
-        "-i", f"color=c={bg_color}:s={target_w}x{target_h}:d={duration}:r=30",
-        "-f", "lavfi",
-        "-i", f"anullsrc=channel_layout=stereo:sample_rate=44100",
-        "-t", str(duration),
-        "-vf", vf_string,
-        "-c:v", "libx264", "-preset", "fast", "-crf", "23",
-        "-pix_fmt", "yuv420p",
-        "-profile:v", "high", "-level", "4.0",
-        "-c:a", "aac", "-b:a", "128k",
-        "-shortest",
-        "-movflags", "+faststart",
-        "-y", str(output_path),
-    ]
-
-    logger.info(f"Generating branding video: {template.name} ({duration}s, {target_w}x{target_h})")
-    proc = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-    if proc.returncode != 0:
-        logger.error(f"Branding video generation failed: {proc.stderr[:2000]}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to generate branding video: {proc.stderr[:500]}",
-        )
-
-
 def _concat_videos(video_paths: list, output_path: Path, target_w: int, target_h: int):
     """Concatenate multiple video files using ffmpeg concat demuxer.
 
@@ -624,6 +467,14 @@ def _generate_thumbnail(video_path: Path, thumbnail_filename: str) -> Optional[s
     return None
 
 
+async def _branding_clip_or_500(template: VideoTemplate, target_w: int, target_h: int) -> Path:
+    """Cached branding clip of a template; ffmpeg failures become a 500."""
+    try:
+        return await branding_clip(template, target_w, target_h)
+    except BrandingRenderError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # ── Apply Templates Route ──
 
 @router.post("/apply")
@@ -634,8 +485,10 @@ async def apply_video_templates(
 ):
     """Apply intro and/or outro templates to a video asset.
 
-    Generates branding videos from templates, then concatenates:
-    [intro] + [content video] + [outro] using ffmpeg.
+    Uses the cached branding clips of the templates, then concatenates:
+    [intro] + [content video] + [outro] using ffmpeg. Content that already
+    matches the output encoding and size is stream-copied (no re-encode);
+    other content is re-encoded with crossfade transitions.
 
     Returns the composed video with full metadata.
     """
@@ -684,8 +537,7 @@ async def apply_video_templates(
         if intro_template.template_type != "intro":
             raise HTTPException(status_code=400, detail="Selected template is not an intro")
 
-        intro_path = TEMPLATES_DIR / f"intro_{uuid.uuid4()}.mp4"
-        _generate_branding_video(intro_template, target_w, target_h, intro_path)
+        intro_path = await _branding_clip_or_500(intro_template, target_w, target_h)
 
     # Fetch and generate outro if requested
     outro_path = None
@@ -703,8 +555,7 @@ async def apply_video_templates(
         if outro_template.template_type != "outro":
             raise HTTPException(status_code=400, detail="Selected template is not an outro")
 
-        outro_path = TEMPLATES_DIR / f"outro_{uuid.uuid4()}.mp4"
-        _generate_branding_video(outro_template, target_w, target_h, outro_path)
+        outro_path = await _branding_clip_or_500(outro_template, target_w, target_h)
 
     # Build the concatenation sequence: [intro] + content + [outro]
     segments = []
@@ -714,29 +565,21 @@ async def apply_video_templates(
     if outro_path and outro_path.exists():
         segments.append(outro_path)
 
-    # Compose the final video
+    # Compose the final video: content already in the house encoding at the
+    # target size is joined with the cached clips without re-encoding
     output_filename = f"branded_{uuid.uuid4()}.mp4"
     output_path = COMPOSED_DIR / output_filename
+    stream_copy = stream_copy_compatible(await asyncio.to_thread(probe, content_path), target_w, target_h)
 
     try:
-        _concat_videos(segments, output_path, target_w, target_h)
+        if not (stream_copy and await asyncio.to_thread(concat_copy, segments, output_path)):
+            stream_copy = False
+            await asyncio.to_thread(_concat_videos, segments, output_path, target_w, target_h)
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Template application failed: {e}")
         raise HTTPException(status_code=500, detail=f"Video composition failed: {str(e)}")
-    finally:
-        # Clean up temporary branding videos
-        if intro_path and intro_path.exists():
-            try:
-                intro_path.unlink()
-            except Exception:
-                pass
-        if outro_path and outro_path.exists():
-            try:
-                outro_path.unlink()
-            except Exception:
-                pass
 
     # Verify output
     if not output_path.exists() or output_path.stat().st_size == 0:
@@ -762,6 +605,7 @@ async def apply_video_templates(
         "intro_template": _template_to_dict(intro_template) if intro_template else None,
         "outro_template": _template_to_dict(outro_template) if outro_template else None,
         "content_asset_id": request.video_asset_id,
+        "stream_copy": stream_copy,
     }
 
     # Optionally save as a new asset
@@ -876,13 +720,16 @@ async def preview_branded_video(
             })
             total_duration += outro.duration_seconds
 
-    # Account for crossfade transitions (0.3s each)
+    fmt = OUTPUT_FORMATS.get(request.output_format, OUTPUT_FORMATS["9:16"])
+
+    # Stream-copied content is joined with hard cuts (the clips fade to black);
+    # re-encoded content gets 0.3s crossfades
+    content_path = ASSETS_UPLOAD_DIR / video_asset.filename
+    stream_copy = stream_copy_compatible(await asyncio.to_thread(probe, content_path), fmt["width"], fmt["height"])
     transition_count = len(segments) - 1
-    transition_overlap = transition_count * 0.3
+    transition_overlap = 0.0 if stream_copy else transition_count * 0.3
     effective_duration = max(0, total_duration - transition_overlap)
 
-    fmt = OUTPUT_FORMATS.get(request.output_format, OUTPUT_FORMATS["9:16"])
-
     return {
         "segments": segments,
         "segment_count": len(segments),
@@ -892,4 +739,5 @@ async def preview_branded_video(
         "output_format": request.output_format,
         "output_width": fmt["width"],
         "output_height": fmt["height"],
+        "stream_copy": stream_copy,
     }
@@ -0,0 +1,201 @@
+"""Request-scoped batch loading of related rows (DataLoader-style).
+
+Enriched list endpoints used to look up related data row by row (student
+name, episode counts, cover asset, ...), issuing N queries for N items.
+A batch loader collects the keys requested during one event-loop tick and
+resolves them with a single `IN (...)` / `GROUP BY` query, so the number
+of queries stays constant regardless of list length.
+
+Architecture:
+- `BatchLoader` queues keys from `load()` and dispatches them together on
+  the next loop iteration; results are cached per loader (duplicate keys
+  cost nothing) and `None` keys resolve to the default without a query
+- `Loaders` is the per-request factory; all its loaders share the request's
+  AsyncSession and an asyncio.Lock, so concurrent dispatches never overlap
+  on the session
+- Relation shapes: `rows` (entity by key), `values` (one column by key),
+  `counts` (GROUP BY count), `first` (first row per key by an ordering)
+  and `lists` (all rows per key)
+- Large key sets are split into chunks of MAX_BATCH_SIZE keys
+
+Usage:
+    from app.core.batch_loader import Loaders, get_loaders
+
+    @router.get("/story-arcs")
+    async def list_story_arcs(..., loaders: Loaders = Depends(get_loaders)):
+        student_names = loaders.values(Student.id, Student.name)
+        episode_counts = loaders.counts(StoryEpisode.arc_id)
+        names, counts = await asyncio.gather(
+            student_names.load_many([a.student_id for a in arcs]),
+            episode_counts.load_many([a.id for a in arcs]),
+        )
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Hashable, Iterable, Optional
+
+from fastapi import Depends
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.core.database import get_db
+
+logger = logging.getLogger(__name__)
+
+# Keys per IN (...) query (stays well below SQLite's bound-parameter limit)
+MAX_BATCH_SIZE = 500
+
+BatchFn = Callable[[list], Awaitable[dict]]
+
+
+class BatchLoader:
+    """Collects keys and resolves them in batches via `batch_fn(keys) -> {key: value}`.
+
+    Keys missing from the returned dict resolve to `default`.
+    """
+
+    def __init__(
+        self,
+        batch_fn: BatchFn,
+        default: Any = None,
+        lock: Optional[asyncio.Lock] = None,
+        default_factory: Optional[Callable[[], Any]] = None,
+    ):
+        self._batch_fn = batch_fn
+        self._default = default
+        self._default_factory = default_factory
+        self._lock = lock or asyncio.Lock()
+        self._cache: dict[Hashable, asyncio.Future] = {}
+        self._queue: list = []
+        self._scheduled = False
+
+    def _missing(self) -> Any:
+        return self._default_factory() if self._default_factory else self._default
+
+    def load(self, key: Hashable) -> Awaitable:
+        """Future resolving to the value for `key` (batched with other pending keys)."""
+        future = self._cache.get(key)
+        if future is not None:
+            return future
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._cache[key] = future
+        if key is None:
+            future.set_result(self._missing())
+            return future
+
+        self._queue.append(key)
+        if not self._scheduled:
+            self._scheduled = True
+            loop.call_soon(self._dispatch)
+        return future
+
+    async def load_many(self, keys: Iterable[Hashable]) -> list:
+        """Values for `keys`, in order."""
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def prime(self, key: Hashable, value: Any) -> None:
+        """Seed the cache with an already known value."""
+        if key not in self._cache:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(value)
+            self._cache[key] = future
+
+    def _dispatch(self) -> None:
+        keys, self._queue, self._scheduled = self._queue, [], False
+        for start in range(0, len(keys), MAX_BATCH_SIZE):
+            asyncio.ensure_future(self._resolve(keys[start:start + MAX_BATCH_SIZE]))
+
+    async def _resolve(self, keys: list) -> None:
+        futures = [self._cache[key] for key in keys]
+        try:
+            async with self._lock:
+                values = await self._batch_fn(keys)
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for key, future in zip(keys, futures):
+            if not future.done():
+                future.set_result(values[key] if key in values else self._missing())
+
+
+class Loaders:
+    """Factory for batch loaders bound to one request's database session."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self._lock = asyncio.Lock()
+
+    def _loader(self, batch_fn: BatchFn, **kwargs) -> BatchLoader:
+        return BatchLoader(batch_fn, lock=self._lock, **kwargs)
+
+    def rows(self, key_column, *criteria) -> BatchLoader:
+        """Entity whose `key_column` equals the key (e.g. `rows(Asset.id)`)."""
+        entity = key_column.class_
+
+        async def batch(keys):
+            result = await self.db.execute(select(entity).where(key_column.in_(keys), *criteria))
+            return {getattr(obj, key_column.key): obj for obj in result.scalars().all()}
+
+        return self._loader(batch)
+
+    def values(self, key_column, value_column, *criteria) -> BatchLoader:
+        """Single column value by key (e.g. `values(Student.id, Student.name)`)."""
+        async def batch(keys):
+            result = await self.db.execute(
+                select(key_column, value_column).where(key_column.in_(keys), *criteria)
+            )
+            return {key: value for key, value in result.all()}
+
+        return self._loader(batch)
+
+    def counts(self, key_column, *criteria) -> BatchLoader:
+        """Number of rows per key (0 if none), via GROUP BY."""
+        async def batch(keys):
+            result = await self.db.execute(
+                select(key_column, func.count())
+                .where(key_column.in_(keys), *criteria)
+                .group_by(key_column)
+            )
+            return {key: count for key, count in result.all()}
+
+        return self._loader(batch, default=0)
+
+    def first(self, key_column, *criteria, order_by) -> BatchLoader:
+        """First entity per key by `order_by` (ROW_NUMBER window), or None."""
+        entity = key_column.class_
+
+        async def batch(keys):
+            row_number = func.row_number().over(partition_by=key_column, order_by=order_by).label("row_number")
+            ranked = select(entity, row_number).where(key_column.in_(keys), *criteria).subquery()
+            ranked_entity = aliased(entity, ranked)
+            result = await self.db.execute(select(ranked_entity).where(ranked.c.row_number == 1))
+            return {getattr(obj, key_column.key): obj for obj in result.scalars().all()}
+
+        return self._loader(batch)
+
+    def lists(self, key_column, *criteria, order_by=None) -> BatchLoader:
+        """All entities per key (empty list if none), optionally ordered."""
+        entity = key_column.class_
+
+        async def batch(keys):
+            query = select(entity).where(key_column.in_(keys), *criteria)
+            if order_by is not None:
+                query = query.order_by(order_by)
+            grouped = defaultdict(list)
+            for obj in (await self.db.execute(query)).scalars().all():
+                grouped[getattr(obj, key_column.key)].append(obj)
+            return grouped
+
+        return self._loader(batch, default_factory=list)
+
+
+async def get_loaders(db: AsyncSession = Depends(get_db)) -> Loaders:
+    """FastAPI dependency: batch loaders for the current request's session."""
+    return Loaders(db)
@@ -0,0 +1,155 @@
+"""Bulk persistence: chunked Core INSERT ... RETURNING and UPDATE ... WHERE id IN (...).
+
+Adding N ORM objects and flushing issues N INSERT statements (plus one
+SELECT per object whose generated values are read back); updating N loaded
+objects issues N UPDATEs. Batch endpoints (CSV import, batch status,
+recurring instances, batch export) write hundreds of rows at once, so they
+go through these helpers instead: a 1,000-row import is a handful of
+multi-row statements.
+
+Architecture:
+- `bulk_insert()` completes every row with the columns' Python-side
+  defaults (so all rows have the same keys and callers see the values that
+  were written), then executes one multi-row `INSERT ... RETURNING` per
+  chunk. Autoincrement ids are assigned in VALUES order, so the returned
+  rows are sorted by id to line up with `rows` (`sort_by_parameter_order`
+  would make SQLite insert row by row)
+- `bulk_update()` issues one `UPDATE ... WHERE id IN (...)` per chunk;
+  `onupdate` defaults (e.g. `updated_at`) are applied by SQLAlchemy
+- Chunks keep the bound parameters per statement below SQLite's limit
+- These are Core statements: ORM flush hooks (slide summaries, analytics
+  rollups, search index) do not see them. Post writes therefore go through
+  `app.services.bulk_posts`, which maintains the derived data itself.
+  Objects already loaded into the session are not refreshed either
+
+Usage:
+    from app.core.bulk import bulk_insert, bulk_update
+
+    ids = await bulk_insert(db, ExportHistory, rows)
+    records = await bulk_insert(db, ExportHistory, rows, returning=ExportHistory.__table__.c)
+    count = await bulk_update(db, Post, post_ids, {"status": "archived"})
+"""
+
+import logging
+from typing import Any, Iterable, Sequence
+
+from sqlalchemy import insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+# SQLite's default SQLITE_MAX_VARIABLE_NUMBER (3.32+), with headroom
+MAX_BOUND_PARAMETERS = 32000
+
+# Upper bound on rows per statement, independent of the column count
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def _table(model_or_table):
+    return getattr(model_or_table, "__table__", model_or_table)
+
+
+def chunked(items: Sequence, size: int) -> Iterable[Sequence]:
+    """Consecutive slices of `items` with at most `size` elements."""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _chunk_size(columns: int, requested: int) -> int:
+    return max(1, min(requested, MAX_BOUND_PARAMETERS // max(columns, 1)))
+
+
+def _default_value(column) -> Any:
+    default = column.default
+    if default is None or not (default.is_scalar or default.is_callable):
+        return None
+    return default.arg(None) if default.is_callable else default.arg
+
+
+def complete_rows(model_or_table, rows: list[dict]) -> list[dict]:
+    """Give every row the same keys, filling missing columns with their Python default.
+
+    Rows are completed in place (and returned) so callers can pass the
+    written values on, e.g. to rollup or search index maintenance.
+    """
+    table = _table(model_or_table)
+    keys = set().union(*(row.keys() for row in rows))
+    columns = [
+        c for c in table.columns
+        if c.name in keys or (c.default is not None and (c.default.is_scalar or c.default.is_callable))
+    ]
+    for row in rows:
+        for column in columns:
+            if column.name not in row:
+                row[column.name] = _default_value(column)
+    return rows
+
+
+async def bulk_insert(
+    db: AsyncSession,
+    model_or_table,
+    rows: list[dict],
+    returning=None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> list:
+    """Insert `rows` in chunks; return the generated ids in row order.
+
+    With `returning` (a column or a list of columns) the returned rows hold
+    those columns instead, also in row order. Each row dict gets its `id`
+    set when the table has an integer `id` primary key.
+    """
+    if not rows:
+        return []
+    table = _table(model_or_table)
+    complete_rows(table, rows)
+
+    id_column = table.c.get("id")
+    if returning is None:
+        columns, scalar = [id_column], True
+    elif hasattr(returning, "__iter__"):
+        columns, scalar = list(returning), False
+    else:
+        columns, scalar = [returning], True
+    with_id = id_column is not None and not any(c is id_column for c in columns)
+    if with_id:
+        columns.append(id_column)
+
+    # SQLite has no sentinel for sort_by_parameter_order and would fall back to
+    # one INSERT per row; autoincrement ids follow the VALUES order, so sort by id
+    stmt = insert(table).returning(*columns, sort_by_parameter_order=id_column is None)
+    size = _chunk_size(len(rows[0]), chunk_size)
+    results = []
+    for chunk in chunked(rows, size):
+        returned = (await db.execute(stmt, list(chunk))).all()
+        if id_column is not None:
+            position = -1 if with_id else next(i for i, c in enumerate(columns) if c is id_column)
+            returned.sort(key=lambda values: values[position])
+        for row, values in zip(chunk, returned):
+            if id_column is not None:
+                row["id"] = values[position]
+            if scalar:
+                results.append(values[0])
+            else:
+                results.append(values[:-1] if with_id else values)
+    logger.debug(f"Bulk inserted {len(rows)} row(s) into {table.name} in chunks of {size}")
+    return results
+
+
+async def bulk_update(
+    db: AsyncSession,
+    model_or_table,
+    ids: Sequence[int],
+    values: dict,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """Set the same `values` on all rows whose id is in `ids`. Returns the row count."""
+    if not ids or not values:
+        return 0
+    table = _table(model_or_table)
+    stmt = update(table).values(values)
+    size = _chunk_size(len(values), chunk_size)
+    count = 0
+    for chunk in chunked(list(ids), size):
+        result = await db.execute(stmt.where(table.c.id.in_(chunk)))
+        count += result.rowcount
+    return count
@@ -55,6 +55,17 @@ class Settings(BaseSettings):
     LOG_LEVEL: str = "INFO"
     SQL_ECHO: bool = False
 
+    # Query instrumentation (Server-Timing headers, /api/health/perf)
+    SQL_INSTRUMENTATION: bool = True
+    SQL_SLOW_QUERY_MS: float = 200.0
+    SQL_CAPTURE_FILE: str = ""  # dev: append each distinct statement (JSONL) for `migrate.py advise`
+
+    # Cold start (app.core.startup): run outdated seeds on startup; off when the
+    # deploy runs `python migrate.py seed` against a persistent database
+    SEED_ON_STARTUP: bool = True
+    # Import route modules on the first request to their prefix (app.core.lazy_routers)
+    LAZY_ROUTERS: bool = False
+
     class Config:
         # On Vercel, env vars come from the dashboard — no .env file
         env_file = None if IS_VERCEL else str(_BACKEND_DIR / ".env")
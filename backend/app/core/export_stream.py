@@ -0,0 +1,195 @@
+"""Streaming file exports: CSV / iCalendar / ZIP downloads generated while rows are read.
+
+Building an export in an `io.StringIO` (or a list of lines) holds every row
+and the whole file in memory before the first byte is sent; a year or
+all-time export grows with the post history. The exporters here are async
+generators: rows come from `session.stream()` in batches, are formatted and
+encoded in chunks of CHUNK_CHARS, and are sent as they are produced.
+
+Architecture:
+- `stream_rows()` opens its own session (the request session is closed
+  once the handler returns) and yields projection DTOs `yield_per` batch
+- `csv_lines()` formats rows with one reusable csv writer; `encode_chunks()`
+  joins lines into ~CHUNK_CHARS pieces, so memory stays constant
+- `download_response()` gzips the stream when the client sends
+  `Accept-Encoding: gzip` (one zlib stream, flushed per chunk) and sets
+  `Content-Encoding` / `Vary`
+- `file_chunks()` streams a prebuilt file (e.g. a cached report) through
+  the same response path
+- `zip_chunks()` writes a ZIP archive to a non-seekable sink (sizes go
+  into data descriptors), yielding the bytes after every member; PNGs are
+  stored without recompression
+- Client disconnects: Starlette stops iterating the body and closes the
+  generator; the session (and its cursor) is released in `stream_rows()`
+  and the aborted download is logged with the number of rows sent
+
+Usage:
+    from app.core.export_stream import csv_lines, download_response, encode_chunks, stream_rows, zip_chunks
+
+    rows = stream_rows(CALENDAR_POST, query)
+    lines = csv_lines(rows, ["date", "title"], lambda p: [p.scheduled_date, p.title])
+    return download_response(request, encode_chunks(lines), "text/csv", "calendar.csv")
+    return download_response(request, zip_chunks(entries), "application/zip", "post.zip", gzip=False)
+"""
+
+import asyncio
+import csv
+import io
+import logging
+import time
+import zipfile
+import zlib
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Iterable
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+from app.core.database import async_session
+from app.core.projection import Projection
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per round trip
+STREAM_CHUNK_SIZE = 500
+
+# Characters of formatted output per yielded chunk
+CHUNK_CHARS = 64 * 1024
+
+GZIP_LEVEL = 6
+
+
+async def stream_rows(projection: Projection, query, chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[Any]:
+    """Rows of `query` as projection DTOs, read in batches from a dedicated session."""
+    sent = 0
+    completed = False
+    async with async_session() as session:
+        try:
+            async for row in projection.stream(session, query, chunk_size):
+                yield row
+                sent += 1
+            completed = True
+        finally:
+            if not completed:
+                logger.info(f"Export stream closed early after {sent} row(s) (client disconnected?)")
+
+
+async def csv_lines(
+    rows: AsyncIterator[Any],
+    header: Iterable[str],
+    to_row: Callable[[Any], Iterable[Any]],
+    delimiter: str = ",",
+) -> AsyncIterator[str]:
+    """CSV text of `header` and every row (one string per line)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=delimiter)
+
+    def line(values) -> str:
+        buffer.seek(0)
+        buffer.truncate(0)
+        writer.writerow(values)
+        return buffer.getvalue()
+
+    yield line(header)
+    async for row in rows:
+        yield line(to_row(row))
+
+
+async def encode_chunks(lines: AsyncIterator[str], chunk_chars: int = CHUNK_CHARS) -> AsyncIterator[bytes]:
+    """UTF-8 chunks of about `chunk_chars` characters joined from `lines`."""
+    parts, size = [], 0
+    async for text in lines:
+        parts.append(text)
+        size += len(text)
+        if size >= chunk_chars:
+            yield "".join(parts).encode("utf-8")
+            parts, size = [], 0
+    if parts:
+        yield "".join(parts).encode("utf-8")
+
+
+async def file_chunks(path: Path, chunk_size: int = CHUNK_CHARS) -> AsyncIterator[bytes]:
+    """Contents of the file at `path` in pieces of `chunk_size` bytes (read in a worker thread)."""
+    with open(path, "rb") as f:
+        while chunk := await asyncio.to_thread(f.read, chunk_size):
+            yield chunk
+
+
+class _ZipSink:
+    """Write-only file object collecting what ZipFile writes between yields."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def write(self, data) -> int:
+        self.buffer += data
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+
+async def zip_chunks(files: AsyncIterator[tuple[str, bytes]], compress: bool = False) -> AsyncIterator[bytes]:
+    """ZIP archive of (name, data) pairs, streamed member by member.
+
+    Members are stored uncompressed unless `compress` (already compressed
+    data such as PNGs gains nothing from deflate).
+    """
+    sink = _ZipSink()
+    method = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+    date_time = time.localtime()[:6]
+    with zipfile.ZipFile(sink, "w", compression=method) as archive:
+        async for name, data in files:
+            info = zipfile.ZipInfo(name, date_time=date_time)
+            info.compress_type = method
+            archive.writestr(info, data)
+            yield sink.take()
+    yield sink.take()
+
+
+def accepts_gzip(request: Request) -> bool:
+    """Whether the client accepts a gzip Content-Encoding (`q=0` refuses it)."""
+    for coding in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            q = params.strip()
+            if q.startswith("q="):
+                try:
+                    return float(q[2:]) > 0
+                except ValueError:
+                    return False
+            return True
+    return False
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes], level: int = GZIP_LEVEL) -> AsyncIterator[bytes]:
+    """One gzip stream over `chunks`, flushed after every chunk so data keeps flowing."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def download_response(
+    request: Request,
+    chunks: AsyncIterator[bytes],
+    media_type: str,
+    filename: str,
+    gzip: bool = True,
+) -> StreamingResponse:
+    """Attachment response streaming `chunks`, gzip-encoded if the client accepts it.
+
+    Pass `gzip=False` for formats that are already compressed (ZIP, PNG).
+    """
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"', "Vary": "Accept-Encoding"}
+    if gzip and accepts_gzip(request):
+        headers["Content-Encoding"] = "gzip"
+        chunks = gzip_chunks(chunks)
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
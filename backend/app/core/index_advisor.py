@@ -0,0 +1,199 @@
+"""Index advisor: EXPLAIN QUERY PLAN over captured statements, reporting full table scans.
+
+Development tool behind `python migrate.py advise`. Statements are captured
+while the app runs with SQL_CAPTURE_FILE set (see app.core.query_stats); the
+advisor replays each distinct SELECT through `EXPLAIN QUERY PLAN` against
+the local SQLite database and reports every `SCAN <table>` (a full table
+scan) together with an index suggestion derived from the statement.
+
+Architecture:
+- Plans do not depend on parameter values, so placeholders are bound to NULL
+- Suggested column order follows the usual composite-index rule: equality
+  predicates (`=`, `IN`, `IS`) first, then one range predicate, otherwise the
+  first ORDER BY column
+- A suggestion whose columns are already the leading columns of an existing
+  index is reported as such (the planner chose not to use it)
+
+Usage:
+    python migrate.py advise                       # uses SQL_CAPTURE_FILE / query_capture.jsonl
+    python migrate.py advise path/to/capture.jsonl
+"""
+
+import json
+import logging
+import re
+import sqlite3
+from pathlib import Path
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+_SCAN_RE = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS (\w+))?$")
+_TABLE_RE = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+AS\s+(\w+))?", re.IGNORECASE)
+_WHERE_RE = re.compile(r"\bWHERE\b(.*?)(?:\bGROUP BY\b|\bORDER BY\b|\bLIMIT\b|\)\s*AS\b|$)", re.IGNORECASE | re.DOTALL)
+_ORDER_RE = re.compile(r"\bORDER BY\b(.*?)(?:\bLIMIT\b|\)|$)", re.IGNORECASE | re.DOTALL)
+_PREDICATE_RE = r"\b{alias}\.(\w+)\s*(=|!=|<>|IN\b|IS NOT\b|IS\b|>=|<=|>|<|BETWEEN\b|LIKE\b)"
+
+# Statement prefixes worth explaining
+_EXPLAINABLE = ("SELECT", "WITH")
+
+PREVIEW_CHARS = 200
+
+
+def load_captured_statements(path: Path) -> list[str]:
+    """Distinct statements from a capture file (one JSON object per line)."""
+    statements, seen = [], set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                statement = json.loads(line)["statement"]
+            except (json.JSONDecodeError, KeyError, TypeError):
+                continue
+            if statement not in seen:
+                seen.add(statement)
+                statements.append(statement)
+    return statements
+
+
+def explain(conn: sqlite3.Connection, statement: str) -> list[str]:
+    """Plan detail lines of `statement` (placeholders bound to NULL)."""
+    params = [None] * statement.count("?")
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {statement}", params).fetchall()]
+
+
+def _aliases(statement: str) -> dict[str, str]:
+    """alias -> table for every FROM/JOIN in the statement."""
+    aliases = {}
+    for table, alias in _TABLE_RE.findall(statement):
+        aliases[alias or table] = table
+    return aliases
+
+
+def suggest_columns(statement: str, alias: str) -> list[str]:
+    """Composite index columns for `alias` in `statement`: equality, then range/order."""
+    equality, ranges, order = [], [], []
+    predicate = re.compile(_PREDICATE_RE.format(alias=re.escape(alias)), re.IGNORECASE)
+
+    for where in _WHERE_RE.findall(statement):
+        for column, op in predicate.findall(where):
+            op = op.upper().strip()
+            if op in ("=", "IN", "IS"):
+                equality.append(column)
+            elif op in (">=", "<=", ">", "<", "BETWEEN", "LIKE"):
+                ranges.append(column)
+
+    for clause in _ORDER_RE.findall(statement):
+        order.extend(re.findall(rf"\b{re.escape(alias)}\.(\w+)", clause))
+
+    columns = list(dict.fromkeys(equality))
+    tail = ranges[:1] or order[:1]
+    for column in tail:
+        if column not in columns:
+            columns.append(column)
+    return columns
+
+
+def existing_indexes(conn: sqlite3.Connection, table: str) -> dict[str, list[str]]:
+    """index name -> column list for `table`."""
+    indexes = {}
+    for row in conn.execute(f"PRAGMA index_list('{table}')").fetchall():
+        name = row[1]
+        indexes[name] = [info[2] for info in conn.execute(f"PRAGMA index_info('{name}')").fetchall()]
+    return indexes
+
+
+def _preview(statement: str) -> str:
+    text = " ".join(statement.split())
+    return text if len(text) <= PREVIEW_CHARS else text[:PREVIEW_CHARS] + "..."
+
+
+def advise(db_path: Path, statements: Iterable[str]) -> dict:
+    """Explain `statements` against `db_path`; return full scans with index suggestions."""
+    conn = sqlite3.connect(str(db_path))
+    findings: dict[tuple[str, tuple[str, ...]], dict] = {}
+    explained = failed = 0
+    try:
+        for statement in statements:
+            if not statement.lstrip().upper().startswith(_EXPLAINABLE):
+                continue
+            try:
+                plan = explain(conn, statement)
+            except sqlite3.Error as e:
+                failed += 1
+                logger.debug(f"EXPLAIN failed ({e}): {_preview(statement)}")
+                continue
+            explained += 1
+
+            aliases = _aliases(statement)
+            for detail in plan:
+                match = _SCAN_RE.match(detail)
+                if not match:
+                    continue
+                name = match.group(2) or match.group(1)
+                table = aliases.get(name, match.group(1))
+                if table.startswith("sqlite_"):
+                    continue
+                columns = tuple(suggest_columns(statement, name))
+                key = (table, columns)
+                finding = findings.get(key)
+                if finding is None:
+                    finding = findings[key] = {
+                        "table": table,
+                        "columns": list(columns),
+                        "statements": 0,
+                        "example": _preview(statement),
+                    }
+                finding["statements"] += 1
+
+        results = sorted(findings.values(), key=lambda f: (-f["statements"], f["table"]))
+        for finding in results:
+            columns = finding["columns"]
+            finding["existing_index"] = None
+            finding["suggestion"] = None  # No selective predicate: the full read is intended
+            if not columns:
+                continue
+            finding["existing_index"] = next(
+                (name for name, cols in existing_indexes(conn, finding["table"]).items()
+                 if cols[:len(columns)] == columns),
+                None,
+            )
+            if not finding["existing_index"]:
+                finding["suggestion"] = (
+                    f"CREATE INDEX ix_{finding['table']}_{'_'.join(columns)} "
+                    f"ON {finding['table']} ({', '.join(columns)})"
+                )
+    finally:
+        conn.close()
+
+    return {"explained": explained, "failed": failed, "full_scans": results}
+
+
+def format_report(report: dict) -> str:
+    """Human-readable advisor report."""
+    lines = [
+        f"Explained {report['explained']} statement(s), {report['failed']} could not be explained.",
+    ]
+    scans = report["full_scans"]
+    if not scans:
+        lines.append("No full table scans found.")
+        return "\n".join(lines)
+
+    lines.append(f"{len(scans)} full table scan pattern(s):")
+    for finding in scans:
+        lines.append("")
+        lines.append(f"  SCAN {finding['table']}  ({finding['statements']} statement(s))")
+        lines.append(f"    e.g. {finding['example']}")
+        if finding["suggestion"]:
+            lines.append(f"    suggest: {finding['suggestion']}")
+        elif finding["existing_index"]:
+            lines.append(f"    index {finding['existing_index']} exists but was not used (run ANALYZE / check predicate)")
+        else:
+            lines.append("    no selective predicate (reads the whole table by design)")
+    return "\n".join(lines)
+
+
+def default_capture_file(configured: Optional[str], backend_dir: Path) -> Path:
+    return Path(configured) if configured else backend_dir / "query_capture.jsonl"
@@ -0,0 +1,94 @@
+"""Router registration with optional lazy import per path prefix.
+
+Importing every route module (and with them Pillow, the video/audio
+services, the AI clients' helpers, ...) is most of `import app.main`. A
+serverless cold start usually serves one request to one feature area, so
+with LAZY_ROUTERS the route modules of a prefix are imported on the first
+request to that prefix instead of at startup.
+
+Architecture:
+- `RouterSpec` rows (module, prefix, tags) describe all routers;
+  `include_routers()` imports and includes them eagerly (the default)
+- `LazyRouterMiddleware` is pure ASGI: on the first HTTP/WebSocket request
+  whose path equals a prefix or continues it with "/", all routers of that
+  prefix are imported and included (in table order, so routers sharing a
+  prefix keep their matching order) before the request reaches routing.
+  Imports are synchronous, so concurrent first requests cannot include a
+  router twice
+- /openapi.json, /docs and /redoc load every group and reset the cached
+  OpenAPI schema, so the documentation is always complete
+- Routers needed by health checks should stay eager (not in the lazy table)
+
+Usage:
+    from app.core.lazy_routers import LazyRouterMiddleware, RouterSpec, include_routers
+
+    ROUTERS = [RouterSpec("app.api.routes.posts", "/api/posts", ["Posts"]), ...]
+    include_routers(app, ROUTERS)                     # eager
+    app.add_middleware(LazyRouterMiddleware, specs=ROUTERS)   # lazy
+"""
+
+import importlib
+import logging
+import time
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+# Paths that need the complete route table
+DOCUMENTATION_PATHS = ("/openapi.json", "/docs", "/redoc")
+
+
+class RouterSpec(NamedTuple):
+    module: str
+    prefix: str
+    tags: list[str]
+
+
+def include_router_spec(app, spec: RouterSpec) -> None:
+    """Import `spec.module` and include its `router`."""
+    module = importlib.import_module(spec.module)
+    app.include_router(module.router, prefix=spec.prefix, tags=spec.tags)
+
+
+def include_routers(app, specs: list[RouterSpec]) -> None:
+    """Import and include all routers now."""
+    for spec in specs:
+        include_router_spec(app, spec)
+
+
+def _matches(path: str, prefix: str) -> bool:
+    return path == prefix or path.startswith(prefix + "/")
+
+
+class LazyRouterMiddleware:
+    """Include the routers of a path prefix on the first request to it."""
+
+    def __init__(self, app, specs: list[RouterSpec]):
+        self.app = app
+        self.groups: dict[str, list[RouterSpec]] = {}
+        for spec in specs:
+            self.groups.setdefault(spec.prefix, []).append(spec)
+        # Longest prefix first, so a nested prefix wins over its parent
+        self.pending = sorted(self.groups, key=len, reverse=True)
+
+    def _load(self, fastapi_app, prefix: str) -> None:
+        started = time.perf_counter()
+        for spec in self.groups[prefix]:
+            include_router_spec(fastapi_app, spec)
+        self.pending.remove(prefix)
+        fastapi_app.openapi_schema = None
+        logger.info(f"Lazy-loaded routers for {prefix} in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    async def __call__(self, scope, receive, send):
+        if self.pending and scope["type"] in ("http", "websocket"):
+            path = scope["path"]
+            fastapi_app = scope["app"]
+            if path in DOCUMENTATION_PATHS:
+                for prefix in list(self.pending):
+                    self._load(fastapi_app, prefix)
+            else:
+                for prefix in self.pending:
+                    if _matches(path, prefix):
+                        self._load(fastapi_app, prefix)
+                        break
+        await self.app(scope, receive, send)
@@ -0,0 +1,199 @@
+"""Shared ffmpeg plumbing for the video features: probing, encode presets, render caches.
+
+Every video route used to carry its own ffprobe helper and encoder flags,
+so nothing could tell whether two files are compatible for stream copy,
+and every render started from scratch. This module is the common ground
+for cached renders.
+
+Architecture:
+- `probe()` runs ffprobe once per (path, size, mtime) and returns the
+  stream parameters that decide stream-copy compatibility (codec, profile,
+  level, pixel format, size, frame rate, time base, audio layout)
+- `H264_ARGS` / `AAC_ARGS` are the house encoding (libx264 high@4.0
+  yuv420p 30 fps, AAC 44.1 kHz stereo); `H264_ARGS` also tags the file
+  with `HOUSE_ENCODING_TAG`, and only tagged clips are joined by
+  `concat_copy()` (concat demuxer, `-c copy`) without decoding. Uploads
+  that merely look similar are re-encoded: matching stream parameters do
+  not guarantee matching encoder settings (SPS/PPS, reference frames)
+- `cache_key()` hashes the inputs of a render; `prune_cache()` keeps a
+  cache directory below a file count (least recently used first)
+- `temp_output()` names an in-progress file next to its final path, so
+  a cache entry only appears once ffmpeg has finished writing it
+
+Usage:
+    from app.core.media import H264_ARGS, AAC_ARGS, cache_key, concat_copy, probe, stream_copy_compatible
+
+    info = probe(path)
+    if stream_copy_compatible(info, 1080, 1920):
+        concat_copy([intro, path, outro], output)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import subprocess
+import uuid
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+FFMPEG_AVAILABLE = shutil.which("ffmpeg") is not None
+
+# Frame rate of all rendered video
+TARGET_FPS = 30
+# MP4 video track time base at TARGET_FPS (the mov muxer scales 1/30 up to >= 10000)
+TARGET_TIME_BASE = "1/15360"
+AUDIO_SAMPLE_RATE = 44100
+
+# Written to the `comment` tag of everything encoded with H264_ARGS;
+# bump the suffix whenever the encoder flags change
+HOUSE_ENCODING_TAG = "treff-h264-v1"
+
+H264_ARGS = [
+    "-c:v", "libx264", "-preset", "fast", "-crf", "23",
+    "-pix_fmt", "yuv420p",
+    "-profile:v", "high", "-level", "4.0",
+    "-metadata", f"comment={HOUSE_ENCODING_TAG}",
+]
+AAC_ARGS = ["-c:a", "aac", "-b:a", "128k", "-ar", str(AUDIO_SAMPLE_RATE), "-ac", "2"]
+
+EMPTY_INFO = {
+    "duration": None, "width": None, "height": None,
+    "video_codec": None, "profile": None, "level": None, "pix_fmt": None, "fps": None,
+    "time_base": None, "sar": None, "encoding_tag": None,
+    "audio_codec": None, "sample_rate": None, "channels": None,
+}
+
+
+def _fps(rate: Optional[str]) -> Optional[float]:
+    try:
+        num, _, den = (rate or "").partition("/")
+        return round(float(num) / float(den or 1), 3)
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+@lru_cache(maxsize=256)
+def _probe(path: str, size: int, mtime_ns: int) -> dict:
+    info = dict(EMPTY_INFO)
+    try:
+        proc = subprocess.run(
+            ["ffprobe", "-v", "quiet", "-print_format", "json", "-show_format", "-show_streams", path],
+            capture_output=True, text=True, timeout=30,
+        )
+        if proc.returncode != 0:
+            return info
+        data = json.loads(proc.stdout)
+    except Exception as e:
+        logger.warning(f"ffprobe failed for {path}: {e}")
+        return info
+
+    fmt = data.get("format", {})
+    if fmt.get("duration"):
+        info["duration"] = round(float(fmt["duration"]), 3)
+    # Tag keys are lowercase in MP4 but uppercase in Matroska
+    tags = {k.lower(): v for k, v in (fmt.get("tags") or {}).items()}
+    info["encoding_tag"] = tags.get("comment")
+    for stream in data.get("streams", []):
+        if stream.get("codec_type") == "video" and info["video_codec"] is None:
+            info.update(
+                video_codec=stream.get("codec_name"),
+                profile=stream.get("profile"),
+                level=stream.get("level"),
+                pix_fmt=stream.get("pix_fmt"),
+                width=stream.get("width"),
+                height=stream.get("height"),
+                fps=_fps(stream.get("r_frame_rate")),
+                time_base=stream.get("time_base"),
+                sar=stream.get("sample_aspect_ratio"),
+            )
+            if info["duration"] is None and stream.get("duration"):
+                info["duration"] = round(float(stream["duration"]), 3)
+        elif stream.get("codec_type") == "audio" and info["audio_codec"] is None:
+            info.update(
+                audio_codec=stream.get("codec_name"),
+                sample_rate=int(stream.get("sample_rate") or 0) or None,
+                channels=stream.get("channels"),
+            )
+    return info
+
+
+def probe(path: Path) -> dict:
+    """Stream parameters of a media file (cached until the file changes)."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return dict(EMPTY_INFO)
+    return dict(_probe(str(path), stat.st_size, stat.st_mtime_ns))
+
+
+def stream_copy_compatible(info: dict, width: int, height: int) -> bool:
+    """Whether a file was encoded by this app with the house encoding at `width`x`height`.
+
+    Only such files are joined with `-c copy`; anything else (uploads in
+    particular) is re-encoded even if its stream parameters happen to match.
+    """
+    return (
+        info["encoding_tag"] == HOUSE_ENCODING_TAG
+        and info["video_codec"] == "h264"
+        and info["profile"] == "High"
+        and info["level"] == 40
+        and info["pix_fmt"] == "yuv420p"
+        and info["width"] == width
+        and info["height"] == height
+        and info["fps"] == TARGET_FPS
+        and info["time_base"] == TARGET_TIME_BASE
+        and info["sar"] in (None, "1:1", "0:1", "N/A")
+        and info["audio_codec"] == "aac"
+        and info["sample_rate"] == AUDIO_SAMPLE_RATE
+        and info["channels"] == 2
+    )
+
+
+def concat_copy(paths: list[Path], output_path: Path, timeout: int = 120) -> bool:
+    """Join compatible files with the concat demuxer without re-encoding. Returns success."""
+    list_file = output_path.with_suffix(".txt")
+    list_file.write_text("".join(f"file '{Path(p).resolve().as_posix()}'\n" for p in paths))
+    try:
+        proc = subprocess.run(
+            [
+                "ffmpeg", "-v", "error", "-nostdin",
+                "-f", "concat", "-safe", "0", "-i", str(list_file),
+                "-c", "copy", "-movflags", "+faststart",
+                "-y", str(output_path),
+            ],
+            capture_output=True, text=True, timeout=timeout,
+        )
+    except Exception as e:
+        logger.warning(f"Stream-copy concat failed: {e}")
+        return False
+    finally:
+        list_file.unlink(missing_ok=True)
+    if proc.returncode != 0:
+        logger.warning(f"Stream-copy concat failed: {proc.stderr[:500]}")
+        return False
+    return output_path.exists() and output_path.stat().st_size > 0
+
+
+def cache_key(*parts) -> str:
+    """Short stable hash of the inputs of a render."""
+    return hashlib.sha256("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:16]
+
+
+def temp_output(path: Path) -> Path:
+    """In-progress name for `path` (same directory and extension, so ffmpeg infers the format)."""
+    return path.with_name(f"{path.stem}.{uuid.uuid4().hex[:8]}.tmp{path.suffix}")
+
+
+def prune_cache(directory: Path, pattern: str, max_files: int) -> None:
+    """Delete the least recently used files matching `pattern` above `max_files`."""
+    files = [p for p in directory.glob(pattern) if ".tmp." not in p.name]
+    if len(files) <= max_files:
+        return
+    files.sort(key=lambda p: p.stat().st_mtime)
+    for path in files[:len(files) - max_files]:
+        path.unlink(missing_ok=True)
@@ -0,0 +1,190 @@
+"""Keyset (cursor) pagination and streamed JSON responses for list endpoints.
+
+OFFSET pagination reads and discards every skipped row, so deep pages get
+linearly slower, and unpaginated lists materialize the whole result set.
+This module provides the two alternatives used by the list endpoints.
+
+Architecture:
+- Keyset pagination orders by `(sort_key, id)` and continues strictly after
+  the last row of the previous page (`WHERE (sort_key, id) < (:v, :id)`),
+  so every page costs the same and uses `(user_id, sort_key)` indexes
+  (SQLite indexes carry the rowid, i.e. `id`, implicitly)
+- Cursors are opaque URL-safe strings encoding the sort key name, the
+  direction and the last row's `(sort_value, id)`; a cursor only works for
+  the sort it was issued for
+- Nullable sort keys follow SQLite's ordering (NULLs first ascending, last
+  descending)
+- `stream_json_response()` yields rows from `session.stream()` as NDJSON or
+  a JSON array without holding the full list in memory. It opens its own
+  session because the request session is closed once the handler returns.
+
+Usage:
+    from app.core.pagination import keyset_page, stream_json_response
+
+    # First page: ?cursor=  (empty), next pages: ?cursor=<next_cursor>
+    if cursor is not None:
+        return await keyset_page(db, query, Post.created_at, Post.id, cursor, limit, post_to_dict)
+    if stream:
+        return stream_json_response(query, post_to_dict, stream)
+"""
+
+import base64
+import binascii
+import json
+import logging
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Callable, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import async_session
+
+logger = logging.getLogger(__name__)
+
+# Default / maximum page size for cursor pagination
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Rows fetched per round trip when streaming
+STREAM_CHUNK_SIZE = 200
+
+STREAM_FORMATS = ("ndjson", "json")
+STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "json": "application/json"}
+
+
+# ─── Cursor encoding ─────────────────────────────────────────────────────
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+    return value
+
+
+def encode_cursor(sort_key: str, descending: bool, sort_value: Any, row_id: int) -> str:
+    """Opaque cursor pointing just after the row `(sort_value, row_id)`."""
+    payload = {"k": sort_key, "o": "desc" if descending else "asc", "v": _encode_value(sort_value), "id": row_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_key: str, descending: bool) -> tuple[Any, int]:
+    """(sort_value, id) of a cursor issued for the same sort; HTTP 400 otherwise."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        sort_value, row_id = _decode_value(payload["v"]), int(payload["id"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Ungueltiger Cursor")
+    if payload.get("k") != sort_key or payload.get("o") != ("desc" if descending else "asc"):
+        raise HTTPException(status_code=400, detail="Cursor passt nicht zur gewaehlten Sortierung")
+    return sort_value, row_id
+
+
+# ─── Keyset pagination ───────────────────────────────────────────────────
+
+def _is_nullable(column) -> bool:
+    """Whether the sort column can hold NULL (columns with a default count as NOT NULL)."""
+    col = column.property.columns[0]
+    return bool(col.nullable) and col.default is None and col.server_default is None
+
+
+def keyset_condition(sort_column, id_column, sort_value: Any, row_id: int, descending: bool):
+    """WHERE clause selecting rows strictly after `(sort_value, row_id)` in sort order."""
+    nullable = _is_nullable(sort_column)
+    if descending:
+        if sort_value is None:
+            return and_(sort_column.is_(None), id_column < row_id)
+        after = tuple_(sort_column, id_column) < tuple_(sort_value, row_id)
+        return or_(after, sort_column.is_(None)) if nullable else after
+
+    if sort_value is None:
+        return or_(and_(sort_column.is_(None), id_column > row_id), sort_column.isnot(None))
+    return tuple_(sort_column, id_column) > tuple_(sort_value, row_id)
+
+
+def keyset_query(query, sort_column, id_column, cursor: Optional[str], limit: int, descending: bool = True):
+    """Apply cursor filter, `(sort_key, id)` ordering and LIMIT limit+1 (to detect more pages)."""
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor, sort_column.key, descending)
+        query = query.where(keyset_condition(sort_column, id_column, sort_value, row_id, descending))
+    if descending:
+        query = query.order_by(None).order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(None).order_by(sort_column.asc(), id_column.asc())
+    return query.limit(limit + 1)
+
+
+async def keyset_page(
+    db: AsyncSession,
+    query,
+    sort_column,
+    id_column,
+    cursor: Optional[str],
+    limit: Optional[int],
+    serialize: Optional[Callable[[Any], dict]] = None,
+    descending: bool = True,
+) -> dict:
+    """One page of `query` (an ORM select) with `next_cursor` for the following page.
+
+    An empty or None cursor returns the first page. Without `serialize` the
+    items are the ORM rows (for callers that enrich a page in batch).
+    """
+    limit = min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+    result = await db.execute(keyset_query(query, sort_column, id_column, cursor, limit, descending))
+    rows = result.scalars().all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor(
+            sort_column.key, descending, getattr(last, sort_column.key), getattr(last, id_column.key)
+        )
+
+    return {
+        "items": [serialize(row) for row in rows] if serialize else rows,
+        "next_cursor": next_cursor,
+        "has_more": has_more,
+        "limit": limit,
+    }
+
+
+# ─── Streaming ───────────────────────────────────────────────────────────
+
+async def _stream_rows(query, serialize: Callable[[Any], dict], fmt: str) -> AsyncIterator[bytes]:
+    async with async_session() as session:
+        result = await session.stream(query.execution_options(yield_per=STREAM_CHUNK_SIZE))
+        first = True
+        if fmt == "json":
+            yield b"["
+        async for row in result.scalars():
+            line = json.dumps(serialize(row), ensure_ascii=False, default=str)
+            if fmt == "ndjson":
+                yield (line + "\n").encode()
+            else:
+                yield (line if first else "," + line).encode()
+            first = False
+        if fmt == "json":
+            yield b"]"
+
+
+def stream_json_response(query, serialize: Callable[[Any], dict], fmt: str = "ndjson") -> StreamingResponse:
+    """Stream all rows of `query` as NDJSON (one object per line) or a JSON array."""
+    if fmt not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unbekanntes Stream-Format: {fmt}")
+    return StreamingResponse(_stream_rows(query, serialize, fmt), media_type=STREAM_MEDIA_TYPES[fmt])
@@ -0,0 +1,149 @@
+"""Column projections: read-only list queries into lightweight row DTOs.
+
+`select(Post)` hydrates a full ORM object per row: every column (including
+the slide_data, caption and hashtag text blobs), instance state, and an
+identity-map entry. Read-only views that turn rows into dicts need neither,
+so they select only their columns into namedtuple rows instead.
+
+Architecture:
+- A `Projection` is a named column set for one view (e.g. the calendar
+  grid); its rows are namedtuples with the column keys as field names, so
+  serializers written against ORM attributes (`post.title`) work unchanged
+- Column-only selects bypass the ORM identity map and attribute
+  instrumentation entirely; namedtuple rows have `__slots__ = ()` (no
+  per-row `__dict__`)
+- `extend()` derives a wider set for a related view (e.g. iCal = calendar
+  columns + hashtags) so column sets don't drift apart
+- Never use projections for rows that are modified afterwards: they are
+  not session-bound, flush hooks never see them
+
+Usage:
+    from app.core.projection import Projection
+
+    CALENDAR_POST = Projection("CalendarPost", Post.id, Post.title, Post.scheduled_date)
+
+    rows = await CALENDAR_POST.all(db, CALENDAR_POST.select().where(Post.user_id == user_id))
+    rows[0].title
+
+    # Benchmark ORM vs projection for a calendar year:
+    python -m app.core.projection --posts 10000
+"""
+
+import logging
+from collections import namedtuple
+from typing import Any, AsyncIterator
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+
+class Projection:
+    """A named column set materialized as namedtuple rows."""
+
+    def __init__(self, name: str, *columns):
+        self.name = name
+        self.columns = columns
+        self.row = namedtuple(name, [column.key for column in columns])
+
+    def extend(self, name: str, *columns) -> "Projection":
+        """New projection with this one's columns plus `columns`."""
+        return Projection(name, *self.columns, *columns)
+
+    def select(self):
+        """`SELECT <columns>`; add WHERE / ORDER BY as usual."""
+        return select(*self.columns)
+
+    async def all(self, db: AsyncSession, query) -> list:
+        """All rows of `query` (built from `select()`) as DTOs."""
+        result = await db.execute(query)
+        make = self.row._make
+        return [make(row) for row in result.tuples()]
+
+    async def stream(self, db: AsyncSession, query, chunk_size: int = 500) -> AsyncIterator[Any]:
+        """Rows of `query` as DTOs, fetched `chunk_size` at a time."""
+        result = await db.stream(query.execution_options(yield_per=chunk_size))
+        make = self.row._make
+        async for row in result.tuples():
+            yield make(row)
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+    import os
+    import random
+    import tempfile
+    import time
+    import tracemalloc
+    from datetime import datetime, timedelta
+
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    from app.core.database import Base
+    from app.models.post import Post
+    from app.models.user import User
+    from app.api.routes.calendar import CALENDAR_POST, post_to_calendar_dict
+
+    parser = argparse.ArgumentParser(description="Benchmark ORM vs projection for a calendar year")
+    parser.add_argument("--posts", type=int, default=10000, help="Posts scheduled over one year")
+    parser.add_argument("--rounds", type=int, default=5, help="Timed rounds per variant")
+    args = parser.parse_args()
+
+    async def _seed(sessionmaker, count: int) -> None:
+        rng = random.Random(42)
+        start = datetime(2026, 1, 1, 9, 0)
+        blob = "x" * 2000  # Typical slide_data / caption sizes
+        async with sessionmaker() as session:
+            session.add(User(id=1, email="bench@treff.de", password_hash="-", display_name="Bench"))
+            await session.flush()
+            for i in range(count):
+                session.add(Post(
+                    user_id=1, category="laender_spotlight", platform="instagram_feed",
+                    status="scheduled", title=f"Post {i}", country="usa",
+                    slide_data='[{"headline": "%s"}]' % blob[:500],
+                    caption_instagram=blob, caption_tiktok=blob, hashtags_instagram=blob[:300],
+                    scheduled_date=start + timedelta(minutes=rng.randrange(365 * 24 * 60)),
+                ))
+            await session.commit()
+
+    async def _orm(session) -> int:
+        result = await session.execute(select(Post).where(Post.user_id == 1).order_by(Post.scheduled_date))
+        return len([post_to_calendar_dict(p) for p in result.scalars().all()])
+
+    async def _projection(session) -> int:
+        query = CALENDAR_POST.select().where(Post.user_id == 1).order_by(Post.scheduled_date)
+        return len([post_to_calendar_dict(r) for r in await CALENDAR_POST.all(session, query)])
+
+    async def _measure(sessionmaker, fn) -> tuple[float, float]:
+        timings = []
+        for _ in range(args.rounds):
+            async with sessionmaker() as session:
+                started = time.perf_counter()
+                await fn(session)
+                timings.append((time.perf_counter() - started) * 1000)
+        async with sessionmaker() as session:
+            tracemalloc.start()
+            await fn(session)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        return min(timings), peak / 1024 / 1024
+
+    async def _main():
+        db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        db_file.close()
+        engine = create_async_engine(f"sqlite+aiosqlite:///{db_file.name}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+        await _seed(sessionmaker, args.posts)
+
+        print(f"Calendar year, {args.posts} posts (best of {args.rounds} rounds, peak traced memory)")
+        for label, fn in (("select(Post)", _orm), ("projection", _projection)):
+            ms, mb = await _measure(sessionmaker, fn)
+            print(f"  {label:<14} {ms:8.1f} ms  {mb:8.1f} MiB")
+        await engine.dispose()
+        os.unlink(db_file.name)
+
+    asyncio.run(_main())
@@ -0,0 +1,289 @@
+"""SQL query instrumentation: per-request counts, timings, slow-query log and N+1 detection.
+
+Hooks SQLAlchemy `before/after_cursor_execute` events and attributes every
+statement to the HTTP request that issued it (via a context variable), so
+each response knows how many queries it ran and how long they took.
+
+Architecture:
+- `QueryStatsMiddleware` opens a `RequestQueryStats` per request, adds a
+  `Server-Timing` header (`db;dur=..`, `app;dur=..`) plus `X-DB-Query-Count`,
+  and folds the request into per-route aggregates
+- Statements are grouped by shape (whitespace collapsed, IN (?, ?, ...)
+  lists collapsed); a SELECT shape repeated N_PLUS_ONE_THRESHOLD times in
+  one request is flagged as an N+1 suspect and logged
+- Statements slower than SQL_SLOW_QUERY_MS are logged as slow queries
+- Aggregates are in memory (reset on restart, like the API cache stats) and
+  served by `/api/health/perf`
+- In development, SQL_CAPTURE_FILE collects every distinct statement shape
+  (JSONL) for the index advisor (`python migrate.py advise`)
+
+Usage:
+    from app.core.query_stats import QueryStatsMiddleware, install_query_instrumentation
+
+    install_query_instrumentation(engine)
+    app.add_middleware(QueryStatsMiddleware)
+
+    # Inside a request (e.g. in a test or debug endpoint):
+    stats = current_query_stats()
+    stats.query_count, stats.total_ms, stats.n_plus_one_suspects()
+"""
+
+import json
+import logging
+import re
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi import Request, Response
+from sqlalchemy import event
+from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Same statement shape this many times in one request = N+1 suspect
+N_PLUS_ONE_THRESHOLD = 5
+
+# Slowest statements kept per request / per route
+SLOWEST_KEPT = 5
+
+# Characters of SQL kept in logs and stats
+STATEMENT_PREVIEW_CHARS = 300
+
+_current: ContextVar[Optional["RequestQueryStats"]] = ContextVar("request_query_stats", default=None)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_NUMBER_RE = re.compile(r"\b\d+\b")
+
+
+def statement_shape(statement: str) -> str:
+    """Normalized statement used to group repeated queries."""
+    shape = _WHITESPACE_RE.sub(" ", statement).strip()
+    shape = _IN_LIST_RE.sub("(?...)", shape)
+    return _NUMBER_RE.sub("N", shape)
+
+
+def _preview(statement: str) -> str:
+    text = _WHITESPACE_RE.sub(" ", statement).strip()
+    if len(text) > STATEMENT_PREVIEW_CHARS:
+        return text[:STATEMENT_PREVIEW_CHARS] + "..."
+    return text
+
+
+class RequestQueryStats:
+    """Queries issued while handling one request."""
+
+    __slots__ = ("query_count", "total_ms", "shapes", "slowest")
+
+    def __init__(self):
+        self.query_count = 0
+        self.total_ms = 0.0
+        self.shapes: dict[str, int] = {}
+        self.slowest: list[tuple[float, str]] = []
+
+    def record(self, statement: str, duration_ms: float) -> None:
+        self.query_count += 1
+        self.total_ms += duration_ms
+        shape = statement_shape(statement)
+        self.shapes[shape] = self.shapes.get(shape, 0) + 1
+
+        if len(self.slowest) < SLOWEST_KEPT or duration_ms > self.slowest[-1][0]:
+            self.slowest.append((duration_ms, statement))
+            self.slowest.sort(key=lambda entry: entry[0], reverse=True)
+            del self.slowest[SLOWEST_KEPT:]
+
+    def n_plus_one_suspects(self) -> list[tuple[str, int]]:
+        """(shape, count) of SELECT shapes repeated at least N_PLUS_ONE_THRESHOLD times."""
+        return sorted(
+            (
+                (shape, count) for shape, count in self.shapes.items()
+                if count >= N_PLUS_ONE_THRESHOLD and shape.upper().startswith(("SELECT", "WITH"))
+            ),
+            key=lambda entry: entry[1],
+            reverse=True,
+        )
+
+
+_captured_shapes: set[str] = set()
+_capture_lock = threading.Lock()
+
+
+def _capture_statement(statement: str) -> None:
+    """Append a statement to SQL_CAPTURE_FILE the first time its shape is seen."""
+    shape = statement_shape(statement)
+    with _capture_lock:
+        if shape in _captured_shapes:
+            return
+        _captured_shapes.add(shape)
+        try:
+            with open(settings.SQL_CAPTURE_FILE, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"statement": statement}) + "\n")
+        except OSError as e:
+            logger.warning(f"Could not write SQL capture file: {e}")
+
+
+def current_query_stats() -> Optional[RequestQueryStats]:
+    """Stats of the request being handled (None outside a request)."""
+    return _current.get()
+
+
+# ─── Engine events ───────────────────────────────────────────────────────
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    duration_ms = (time.perf_counter() - starts.pop()) * 1000
+
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, duration_ms)
+    if settings.SQL_CAPTURE_FILE:
+        _capture_statement(statement)
+
+    if duration_ms >= settings.SQL_SLOW_QUERY_MS:
+        logger.warning(f"Slow query ({duration_ms:.1f} ms): {_preview(statement)}")
+
+
+def install_query_instrumentation(engine) -> None:
+    """Attach timing listeners to an (async or sync) engine."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# ─── Per-route aggregates ────────────────────────────────────────────────
+
+class RouteQueryStats:
+    """Aggregated query statistics per route (in memory)."""
+
+    def __init__(self):
+        self._routes: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._started_at = time.time()
+
+    def add(self, route: str, stats: RequestQueryStats, request_ms: float) -> None:
+        suspects = stats.n_plus_one_suspects()
+        with self._lock:
+            entry = self._routes.get(route)
+            if entry is None:
+                entry = self._routes[route] = {
+                    "requests": 0,
+                    "queries": 0,
+                    "max_queries": 0,
+                    "db_ms": 0.0,
+                    "max_db_ms": 0.0,
+                    "request_ms": 0.0,
+                    "n_plus_one_requests": 0,
+                    "n_plus_one_shapes": {},
+                    "slowest": [],
+                }
+            entry["requests"] += 1
+            entry["queries"] += stats.query_count
+            entry["max_queries"] = max(entry["max_queries"], stats.query_count)
+            entry["db_ms"] += stats.total_ms
+            entry["max_db_ms"] = max(entry["max_db_ms"], stats.total_ms)
+            entry["request_ms"] += request_ms
+            if suspects:
+                entry["n_plus_one_requests"] += 1
+                for shape, count in suspects:
+                    shapes = entry["n_plus_one_shapes"]
+                    shapes[shape] = max(shapes.get(shape, 0), count)
+
+            slowest = entry["slowest"] + [(ms, _preview(sql)) for ms, sql in stats.slowest]
+            slowest.sort(key=lambda item: item[0], reverse=True)
+            entry["slowest"] = slowest[:SLOWEST_KEPT]
+
+    def get_stats(self, limit: int = 50) -> dict:
+        """Routes ordered by total DB time, with averages and N+1 suspects."""
+        with self._lock:
+            routes = []
+            for route, entry in self._routes.items():
+                requests = entry["requests"] or 1
+                routes.append({
+                    "route": route,
+                    "requests": entry["requests"],
+                    "avg_queries": round(entry["queries"] / requests, 2),
+                    "max_queries": entry["max_queries"],
+                    "total_db_ms": round(entry["db_ms"], 2),
+                    "avg_db_ms": round(entry["db_ms"] / requests, 2),
+                    "max_db_ms": round(entry["max_db_ms"], 2),
+                    "avg_request_ms": round(entry["request_ms"] / requests, 2),
+                    "n_plus_one_requests": entry["n_plus_one_requests"],
+                    "n_plus_one_suspects": [
+                        {"statement": _preview(shape), "max_repeats": count}
+                        for shape, count in sorted(entry["n_plus_one_shapes"].items(), key=lambda s: s[1], reverse=True)
+                    ],
+                    "slowest_queries": [{"ms": round(ms, 2), "statement": sql} for ms, sql in entry["slowest"]],
+                })
+        routes.sort(key=lambda r: r["total_db_ms"], reverse=True)
+        return {
+            "since": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self._started_at)),
+            "slow_query_ms": settings.SQL_SLOW_QUERY_MS,
+            "n_plus_one_threshold": N_PLUS_ONE_THRESHOLD,
+            "route_count": len(routes),
+            "routes": routes[:limit],
+        }
+
+    def reset(self) -> int:
+        with self._lock:
+            count = len(self._routes)
+            self._routes.clear()
+            self._started_at = time.time()
+        return count
+
+
+route_query_stats = RouteQueryStats()
+
+
+# ─── Middleware ──────────────────────────────────────────────────────────
+
+def _route_template(request: Request) -> str:
+    """Request path with path parameters replaced by their names (bounded key set)."""
+    if request.scope.get("route") is None:
+        return "<unmatched>"
+    path = request.url.path
+    params = request.scope.get("path_params") or {}
+    if params:
+        names = {str(value): name for name, value in params.items()}
+        path = "/".join(f"{{{names[segment]}}}" if segment in names else segment for segment in path.split("/"))
+    return path
+
+
+class QueryStatsMiddleware(BaseHTTPMiddleware):
+    """Attributes SQL statements to requests and reports them via Server-Timing."""
+
+    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
+        if not request.url.path.startswith("/api/"):
+            return await call_next(request)
+
+        stats = RequestQueryStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await call_next(request)
+        finally:
+            _current.reset(token)
+        request_ms = (time.perf_counter() - started) * 1000
+
+        route_key = f"{request.method} {_route_template(request)}"
+        route_query_stats.add(route_key, stats, request_ms)
+
+        for shape, count in stats.n_plus_one_suspects():
+            logger.warning(f"Possible N+1 in {route_key}: {count}x {_preview(shape)}")
+
+        response.headers["Server-Timing"] = (
+            f'db;dur={stats.total_ms:.1f};desc="{stats.query_count} queries", app;dur={request_ms:.1f}'
+        )
+        response.headers["X-DB-Query-Count"] = str(stats.query_count)
+        return response
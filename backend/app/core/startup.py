@@ -0,0 +1,445 @@
+"""Cold start: fingerprint-gated schema bootstrap, backfills and seeding.
+
+Every process start (each Vercel cold start) used to probe the schema, run
+the Alembic check, the derived-data backfills and 14 seed functions, each
+with its own count/lookup queries; the music track seed can even synthesize
+audio with ffmpeg. None of that changes between deploys, so the result is
+recorded in a single `app_state` row and a start whose fingerprints match
+costs one query.
+
+Architecture:
+- Schema fingerprint: hash of the mapped tables/columns/indexes of
+  `app.models`, the ALTER TABLE list and the Alembic revision file names.
+  A mismatch runs `create_all`, the ALTERs, the Alembic status check and
+  the derived-data backfills (rollups, slide summaries, search index)
+- Seed fingerprint: hash of the seed manifest, i.e. every seed function's
+  name and its module's source. A mismatch reruns the seeds, which stay
+  idempotent. Seed modules are only imported when seeding runs
+- Seeding belongs to the deploy: `python migrate.py seed` (or
+  `python -m app.core.startup seed`). With SEED_ON_STARTUP (default on, so
+  ephemeral databases still get their admin user) a start with outdated
+  seeds runs them itself
+- Fingerprints are only written after their step succeeded completely, so
+  a failed seed is retried on the next start
+- `python -m app.core.startup bench` measures import time
+  (`python -X importtime`) and time-to-first-request in fresh processes
+
+Usage:
+    from app.core.startup import prepare_database
+
+    await prepare_database()                  # in the lifespan
+
+    python migrate.py seed                    # deploy step: schema, backfills, seeds
+    python -m app.core.startup status         # stored vs. current fingerprints
+    python -m app.core.startup bench --runs 3 [--lazy-routers]
+"""
+
+import hashlib
+import importlib
+import importlib.util
+import logging
+import os
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from sqlalchemy import text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.core.config import settings
+from app.core.database import Base, async_session, engine
+from app.core.paths import IS_VERCEL
+
+logger = logging.getLogger(__name__)
+
+_BACKEND_DIR = Path(__file__).resolve().parent.parent.parent
+_MIGRATIONS_DIR = _BACKEND_DIR / "migrations" / "versions"
+
+# Columns added to existing tables after their first release (ignored if present)
+ALTER_STATEMENTS = [
+    "ALTER TABLE assets ADD COLUMN duration_seconds FLOAT",
+    "ALTER TABLE assets ADD COLUMN thumbnail_path VARCHAR",
+    "ALTER TABLE students ADD COLUMN personality_preset TEXT",
+    "ALTER TABLE posts ADD COLUMN story_arc_id INTEGER REFERENCES story_arcs(id)",
+    "ALTER TABLE posts ADD COLUMN episode_number INTEGER",
+    "ALTER TABLE posts ADD COLUMN linked_post_group_id VARCHAR",
+    "ALTER TABLE posts ADD COLUMN student_id INTEGER REFERENCES students(id) ON DELETE SET NULL",
+    "ALTER TABLE assets ADD COLUMN file_data TEXT",
+    "ALTER TABLE music_tracks ADD COLUMN file_data TEXT",
+    "ALTER TABLE video_overlays ADD COLUMN rendered_data TEXT",
+    "ALTER TABLE content_suggestions ADD COLUMN suggested_format VARCHAR",
+    "ALTER TABLE posts ADD COLUMN recurring_rule_id INTEGER REFERENCES recurring_post_rules(id) ON DELETE SET NULL",
+    "ALTER TABLE posts ADD COLUMN is_recurring_instance INTEGER",
+    "ALTER TABLE posts ADD COLUMN perf_likes INTEGER",
+    "ALTER TABLE posts ADD COLUMN perf_comments INTEGER",
+    "ALTER TABLE posts ADD COLUMN perf_shares INTEGER",
+    "ALTER TABLE posts ADD COLUMN perf_saves INTEGER",
+    "ALTER TABLE posts ADD COLUMN perf_reach INTEGER",
+    "ALTER TABLE posts ADD COLUMN perf_updated_at DATETIME",
+    "ALTER TABLE posts ADD COLUMN pillar_id VARCHAR",
+    "ALTER TABLE posts ADD COLUMN hook_formula VARCHAR(100)",
+    "ALTER TABLE assets ADD COLUMN thumbnail_small VARCHAR",
+    "ALTER TABLE assets ADD COLUMN thumbnail_medium VARCHAR",
+    "ALTER TABLE assets ADD COLUMN thumbnail_large VARCHAR",
+    "ALTER TABLE assets ADD COLUMN exif_data TEXT",
+    "ALTER TABLE assets ADD COLUMN last_used_at DATETIME",
+    "ALTER TABLE assets ADD COLUMN marked_unused INTEGER",
+    "ALTER TABLE posts ADD COLUMN slide_count INTEGER",
+    "ALTER TABLE posts ADD COLUMN thumbnail_url VARCHAR",
+    "ALTER TABLE posts ADD COLUMN first_headline VARCHAR",
+    "ALTER TABLE posts ADD COLUMN plain_text TEXT",
+]
+
+
+class SeedStep(NamedTuple):
+    module: str
+    function: str
+    label: str
+
+
+# Seed manifest, in execution order (users first: other seeds reference them)
+SEED_MANIFEST = [
+    SeedStep("app.core.seed_users", "seed_default_users", "default user(s)"),
+    SeedStep("app.core.seed_templates", "seed_default_templates", "default templates"),
+    SeedStep("app.core.seed_templates", "seed_story_teaser_templates", "story-teaser templates"),
+    SeedStep("app.core.seed_templates", "seed_story_series_templates", "story-series templates"),
+    SeedStep("app.core.seed_treff_standard_templates", "seed_treff_standard_templates", "TREFF standard templates"),
+    SeedStep("app.core.seed_suggestions", "seed_default_suggestions", "content suggestions"),
+    SeedStep("app.core.seed_humor_formats", "seed_humor_formats", "humor formats"),
+    SeedStep("app.core.seed_hashtag_sets", "seed_hashtag_sets", "hashtag sets"),
+    SeedStep("app.core.seed_ctas", "seed_default_ctas", "CTAs"),
+    SeedStep("app.core.seed_music_tracks", "seed_music_tracks", "music tracks"),
+    SeedStep("app.core.seed_video_templates", "seed_video_templates", "video templates"),
+    SeedStep("app.core.seed_recurring_formats", "seed_recurring_formats", "recurring formats"),
+    SeedStep("app.core.seed_content_pillars", "seed_content_pillars", "content pillars"),
+    SeedStep("app.core.seed_audio_suggestions", "seed_audio_suggestions", "audio suggestions"),
+]
+
+_STATE_ID = 1
+
+
+# ─── Fingerprints ────────────────────────────────────────────────────────
+
+def _digest(parts) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode("utf-8", "surrogatepass"))
+        h.update(b"\0")
+    return h.hexdigest()[:32]
+
+
+def schema_fingerprint() -> str:
+    """Hash of the mapped schema (app.models), the ALTER list and the migration files."""
+    import app.models  # noqa: F401 — registers every model on Base.metadata
+
+    parts = []
+    tables = {
+        mapper.local_table for mapper in Base.registry.mappers
+        if mapper.class_.__module__.startswith("app.models.")
+    }
+    for table in sorted(tables, key=lambda t: t.name):
+        parts.append(f"T {table.name}")
+        for column in table.columns:
+            parts.append(f"C {column.name} {column.type!r} {column.nullable} {column.primary_key}")
+        for index in sorted(table.indexes, key=lambda i: i.name or ""):
+            parts.append(f"I {index.name} {[c.name for c in index.columns]} {index.unique}")
+    parts.extend(ALTER_STATEMENTS)
+    if _MIGRATIONS_DIR.is_dir():
+        parts.extend(sorted(p.name for p in _MIGRATIONS_DIR.glob("*.py")))
+    return _digest(parts)
+
+
+def seed_fingerprint() -> str:
+    """Hash of the seed manifest and the source of every seed module (without importing them)."""
+    parts, sources = [], {}
+    for step in SEED_MANIFEST:
+        parts.append(f"{step.module}.{step.function}")
+        if step.module not in sources:
+            spec = importlib.util.find_spec(step.module)
+            sources[step.module] = Path(spec.origin).read_text(encoding="utf-8") if spec and spec.origin else ""
+            parts.append(sources[step.module])
+    return _digest(parts)
+
+
+async def read_state() -> Optional[dict]:
+    """Stored fingerprints (one query); None if the table or row does not exist yet."""
+    try:
+        async with engine.connect() as conn:
+            row = (await conn.execute(text(
+                "SELECT schema_fingerprint, seed_fingerprint, fts5_available FROM app_state WHERE id = :id"
+            ), {"id": _STATE_ID})).mappings().first()
+    except Exception as exc:
+        if "no such table" in str(exc).lower():
+            return None
+        raise
+    return dict(row) if row else None
+
+
+async def write_state(**values) -> None:
+    """Upsert fingerprint columns of the app_state row."""
+    from datetime import datetime, timezone
+
+    from app.models.app_state import AppState
+
+    values["updated_at"] = datetime.now(timezone.utc)
+    stmt = sqlite_insert(AppState.__table__).values(id=_STATE_ID, **values)
+    stmt = stmt.on_conflict_do_update(index_elements=["id"], set_=values)
+    async with engine.begin() as conn:
+        await conn.execute(stmt)
+
+
+# ─── Steps ───────────────────────────────────────────────────────────────
+
+async def bootstrap_schema() -> None:
+    """create_all + ALTER TABLE migrations (idempotent)."""
+    import app.models  # noqa: F401
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    logger.info("Database tables created/verified")
+
+    if IS_VERCEL:
+        # Batch all ALTER TABLEs in a single Turso pipeline request
+        from app.core.database import turso_batch_execute
+        results = await turso_batch_execute(ALTER_STATEMENTS)
+        for stmt, result in zip(ALTER_STATEMENTS, results):
+            if result.get("type") == "ok":
+                col_name = stmt.split("ADD COLUMN ")[1].split(" ")[0]
+                logger.info(f"Migration: added {col_name}")
+    else:
+        # Local: individual execution for clearer error handling
+        async with engine.begin() as conn:
+            for stmt in ALTER_STATEMENTS:
+                try:
+                    await conn.execute(text(stmt))
+                    col_name = stmt.split("ADD COLUMN ")[1].split(" ")[0]
+                    logger.info(f"Migration: added {col_name}")
+                except Exception:
+                    pass  # Column already exists
+
+
+def check_alembic_revision() -> None:
+    """Log whether Alembic migrations are pending (local SQLite only)."""
+    if IS_VERCEL:
+        return  # Useless on Vercel with Turso
+    try:
+        from alembic.config import Config
+        from alembic.runtime.migration import MigrationContext
+        from alembic.script import ScriptDirectory
+        from sqlalchemy import create_engine
+        from sqlalchemy.pool import NullPool
+
+        ini = _BACKEND_DIR / "alembic.ini"
+        if not ini.exists():
+            return
+        cfg = Config(str(ini))
+        cfg.set_main_option("script_location", str(_BACKEND_DIR / "migrations"))
+        head = ScriptDirectory.from_config(cfg).get_current_head()
+        sync_engine = create_engine(f"sqlite:///{_BACKEND_DIR / 'treff.db'}", poolclass=NullPool)
+        with sync_engine.connect() as conn:
+            current = MigrationContext.configure(conn).get_current_revision()
+        sync_engine.dispose()
+        if current == head:
+            logger.info("Alembic migrations: up to date (revision %s)", current)
+        elif current is None:
+            logger.warning("Alembic migrations: no revision stamped yet. Run 'python migrate.py stamp head'")
+        else:
+            logger.warning("Alembic migrations: PENDING! Current=%s, Head=%s. Run 'python migrate.py upgrade'", current, head)
+    except ImportError:
+        pass  # Alembic not installed, skip check
+    except Exception as e:
+        logger.debug("Alembic migration check skipped: %s", e)
+
+
+async def ensure_derived_data(session) -> bool:
+    """Backfill rollups, slide summaries, the search index and post signatures. Returns True if all succeeded."""
+    from app.services.analytics_rollup import ensure_post_daily_stats
+    from app.services.post_similarity import ensure_post_signatures
+    from app.services.search_index import ensure_search_index
+    from app.services.slide_summary import ensure_slide_summaries
+
+    # Slide summaries before the search index and signatures, which read posts.plain_text
+    steps = [
+        (ensure_post_daily_stats, "Backfilled {} post_daily_stats rollup rows", "analytics rollups"),
+        (ensure_slide_summaries, "Backfilled slide summaries for {} posts", "slide summaries"),
+        (ensure_search_index, "Indexed {} documents for full-text search", "search index"),
+        (ensure_post_signatures, "Signed {} posts for similarity lookups", "post signatures"),
+    ]
+    ok = True
+    for ensure, message, label in steps:
+        try:
+            count = await ensure(session)
+            if count > 0:
+                logger.info(message.format(count))
+        except Exception as e:
+            await session.rollback()
+            logger.error(f"Failed to backfill {label}: {e}")
+            ok = False
+    return ok
+
+
+async def run_seeds(session) -> bool:
+    """Run every seed of the manifest. Returns True if all succeeded."""
+    ok = True
+    for step in SEED_MANIFEST:
+        try:
+            seed_fn = getattr(importlib.import_module(step.module), step.function)
+            count = await seed_fn(session)
+            if count > 0:
+                logger.info(f"Seeded {count} {step.label}")
+        except Exception as e:
+            await session.rollback()
+            logger.error(f"Failed to seed {step.label}: {e}")
+            ok = False
+    return ok
+
+
+# ─── Orchestration ───────────────────────────────────────────────────────
+
+async def prepare_database(seed: Optional[bool] = None, force: bool = False) -> dict:
+    """Bring schema, derived data and seed data up to date; skip what the fingerprints cover.
+
+    `seed` defaults to settings.SEED_ON_STARTUP; `force` ignores the stored state.
+    Returns which steps ran.
+    """
+    from app.services import search_index
+
+    seed = settings.SEED_ON_STARTUP if seed is None else seed
+    state = None if force else await read_state()
+    current_schema = schema_fingerprint()
+    current_seeds = seed_fingerprint()
+    ran = {"schema": False, "seeds": False}
+
+    if state and state["schema_fingerprint"] == current_schema:
+        search_index.set_fts5_available(bool(state["fts5_available"]))
+    else:
+        await bootstrap_schema()
+        check_alembic_revision()
+        async with async_session() as session:
+            derived_ok = await ensure_derived_data(session)
+        # A failed backfill leaves the fingerprint stale, so the next startup retries it
+        if derived_ok:
+            await write_state(schema_fingerprint=current_schema, fts5_available=int(search_index.fts5_available()))
+        ran["schema"] = True
+
+    if state and state["seed_fingerprint"] == current_seeds:
+        pass
+    elif seed:
+        async with async_session() as session:
+            if await run_seeds(session):
+                await write_state(seed_fingerprint=current_seeds)
+        ran["seeds"] = True
+    else:
+        logger.warning("Seed data is outdated; run 'python migrate.py seed' as part of the deploy")
+
+    if not any(ran.values()):
+        logger.info("Database schema and seed data up to date — skipping DDL, backfills and seeding")
+    return ran
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+    import json
+    import subprocess
+    import sys
+
+    parser = argparse.ArgumentParser(description="Cold start: deploy-time seeding, fingerprint status, startup benchmark")
+    sub = parser.add_subparsers(dest="command", required=True)
+    seed_parser = sub.add_parser("seed", help="Bootstrap schema, backfill derived data and run all seeds")
+    seed_parser.add_argument("--force", action="store_true", help="Ignore stored fingerprints")
+    sub.add_parser("status", help="Show stored and current fingerprints")
+    bench_parser = sub.add_parser("bench", help="Measure import time and time-to-first-request")
+    bench_parser.add_argument("--runs", type=int, default=3, help="Fresh processes per measurement (best is reported)")
+    bench_parser.add_argument("--lazy-routers", action="store_true", help="Benchmark with LAZY_ROUTERS=1")
+    bench_parser.add_argument("--top", type=int, default=15, help="Slowest imports to list")
+    bench_parser.add_argument("--json", action="store_true", help="Print the result as JSON (for tracking over time)")
+    args = parser.parse_args()
+
+    _FIRST_REQUEST_SCRIPT = (
+        "import json, time\n"
+        "t0 = time.perf_counter()\n"
+        "from app.main import app\n"
+        "t1 = time.perf_counter()\n"
+        "from fastapi.testclient import TestClient\n"
+        "with TestClient(app) as client:\n"
+        "    t2 = time.perf_counter()\n"
+        "    status = client.get('/api/health').status_code\n"
+        "    t3 = time.perf_counter()\n"
+        "print(json.dumps({'import_ms': (t1 - t0) * 1000, 'startup_ms': (t2 - t1) * 1000,\n"
+        "                  'first_request_ms': (t3 - t2) * 1000, 'total_ms': (t3 - t0) * 1000, 'status': status}))\n"
+    )
+
+    def _importtime(env) -> tuple[float, list]:
+        """Total `import app.main` time and the slowest modules (self time) in ms."""
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import app.main"],
+            cwd=_BACKEND_DIR, env=env, capture_output=True, text=True,
+        )
+        modules, total = [], 0.0
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            modules.append((int(self_us) / 1000, int(cumulative_us) / 1000, name.strip()))
+            if name.strip() == "app.main":
+                total = int(cumulative_us) / 1000
+        modules.sort(reverse=True)
+        return total, modules
+
+    def _bench() -> dict:
+        env = dict(os.environ, LAZY_ROUTERS="1" if args.lazy_routers else "0", PYTHONDONTWRITEBYTECODE="0")
+        subprocess.run([sys.executable, "-c", "import app.main"], cwd=_BACKEND_DIR, env=env, capture_output=True)
+
+        import_runs = [_importtime(env) for _ in range(args.runs)]
+        best_import, modules = min(import_runs, key=lambda r: r[0])
+        request_runs = []
+        for _ in range(args.runs):
+            proc = subprocess.run(
+                [sys.executable, "-c", _FIRST_REQUEST_SCRIPT],
+                cwd=_BACKEND_DIR, env=env, capture_output=True, text=True,
+            )
+            lines = [line for line in proc.stdout.splitlines() if line.startswith("{")]
+            if lines:
+                request_runs.append(json.loads(lines[-1]))
+        first_request = min(request_runs, key=lambda r: r["total_ms"]) if request_runs else None
+        return {
+            "lazy_routers": args.lazy_routers,
+            "runs": args.runs,
+            "import_app_main_ms": round(best_import, 1),
+            "time_to_first_request": {k: round(v, 1) for k, v in first_request.items()} if first_request else None,
+            "slowest_imports": [
+                {"module": name, "self_ms": round(self_ms, 1), "cumulative_ms": round(cumulative_ms, 1)}
+                for self_ms, cumulative_ms, name in modules[:args.top]
+            ],
+        }
+
+    async def _main():
+        if args.command == "seed":
+            ran = await prepare_database(seed=True, force=args.force)
+            await engine.dispose()
+            print(f"Schema bootstrap: {'ran' if ran['schema'] else 'up to date'}; "
+                  f"seeds: {'ran' if ran['seeds'] else 'up to date'}")
+        elif args.command == "status":
+            state = await read_state() or {}
+            await engine.dispose()
+            current = {"schema_fingerprint": schema_fingerprint(), "seed_fingerprint": seed_fingerprint()}
+            for key, value in current.items():
+                stored = state.get(key)
+                print(f"{key:<20} stored={stored or '-'}  current={value}  {'OK' if stored == value else 'OUTDATED'}")
+
+    if args.command == "bench":
+        result = _bench()
+        if args.json:
+            print(json.dumps(result))
+        else:
+            ttfr = result["time_to_first_request"] or {}
+            print(f"Startup benchmark (best of {args.runs}, lazy routers: {'on' if args.lazy_routers else 'off'})")
+            print(f"  import app.main         {result['import_app_main_ms']:8.1f} ms (-X importtime)")
+            for key in ("import_ms", "startup_ms", "first_request_ms", "total_ms"):
+                if key in ttfr:
+                    print(f"  {key:<23} {ttfr[key]:8.1f} ms")
+            print("  Slowest imports (self time):")
+            for entry in result["slowest_imports"]:
+                print(f"    {entry['self_ms']:8.1f} ms  {entry['module']}")
+    else:
+        asyncio.run(_main())
@@ -21,21 +21,12 @@ from sqlalchemy import select
 
 from app.core.config import settings
 from app.core.paths import IS_VERCEL, get_upload_dir
-from app.core.database import engine, Base, async_session
-from app.core.seed_users import seed_default_users
-from app.core.seed_templates import seed_default_templates, seed_story_teaser_templates, seed_story_series_templates
-from app.core.seed_suggestions import seed_default_suggestions
-from app.core.seed_humor_formats import seed_humor_formats
-from app.core.seed_hashtag_sets import seed_hashtag_sets
-from app.core.seed_ctas import seed_default_ctas
-from app.core.seed_music_tracks import seed_music_tracks
-from app.core.seed_video_templates import seed_video_templates
-from app.core.seed_treff_standard_templates import seed_treff_standard_templates
-from app.core.seed_recurring_formats import seed_recurring_formats
-from app.core.seed_content_pillars import seed_content_pillars
-from app.core.seed_audio_suggestions import seed_audio_suggestions
+from app.core.database import engine, async_session
+from app.core.lazy_routers import LazyRouterMiddleware, RouterSpec, include_routers
+from app.core.startup import prepare_database
 from app.schemas.responses import ERROR_CODES
-from app.api.routes import auth, posts, templates, assets, calendar, suggestions, analytics, settings as settings_router, health, export, slides, ai, students, story_arcs, story_episodes, hashtag_sets, ctas, interactive_elements, recycling, series_reminders, video_overlays, audio_mixer, video_composer, video_templates, video_export, recurring_formats, recurring_posts, post_relations, pipeline, content_strategy, campaigns, template_favorites, video_scripts, prompt_history, smart_scheduling, tasks, reports, content_pillars, video_thumbnails, config_endpoints, audio_suggestions, shot_lists
+from app.services import analytics_rollup, post_similarity, search_index, slide_summary  # noqa: F401 — register the flush hooks
+from app.api.routes import health
 
 logger = logging.getLogger(__name__)
 
@@ -49,149 +40,15 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting TREFF Post-Generator backend...")
 
-    from sqlalchemy import text
-
-    # ── Schema check: skip all DDL if DB is already up to date ──
-    # Probe the newest column (assets.marked_unused) — if it exists, the schema
-    # is fully migrated and we can skip create_all + all ALTER TABLEs.
-    # IMPORTANT: Update this probe whenever a new ALTER TABLE migration is added.
-    # It must reference the LAST column in the alter_stmts list below.
-    schema_ready = False
-    async with engine.begin() as conn:
-        try:
-            await conn.execute(text("SELECT marked_unused FROM assets LIMIT 0"))
-            schema_ready = True
-            logger.info("Database schema already up to date — skipping DDL")
-        except Exception as exc:
-            err_msg = str(exc).lower()
-            if "no such column" in err_msg or "no such table" in err_msg:
-                schema_ready = False
-            else:
-                logger.error("Schema probe failed unexpectedly: %s", exc)
-                raise
-
-    if not schema_ready:
-        # Full schema bootstrap (first deploy or after schema change)
-        async with engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
-        logger.info("Database tables created/verified")
-
-        # ── ALTER TABLE migrations ──
-        alter_stmts = [
-            "ALTER TABLE assets ADD COLUMN duration_seconds FLOAT",
-            "ALTER TABLE assets ADD COLUMN thumbnail_path VARCHAR",
-            "ALTER TABLE students ADD COLUMN personality_preset TEXT",
-            "ALTER TABLE posts ADD COLUMN story_arc_id INTEGER REFERENCES story_arcs(id)",
-            "ALTER TABLE posts ADD COLUMN episode_number INTEGER",
-            "ALTER TABLE posts ADD COLUMN linked_post_group_id VARCHAR",
-            "ALTER TABLE posts ADD COLUMN student_id INTEGER REFERENCES students(id) ON DELETE SET NULL",
-            "ALTER TABLE assets ADD COLUMN file_data TEXT",
-            "ALTER TABLE music_tracks ADD COLUMN file_data TEXT",
-            "ALTER TABLE video_overlays ADD COLUMN rendered_data TEXT",
-            "ALTER TABLE content_suggestions ADD COLUMN suggested_format VARCHAR",
-            "ALTER TABLE posts ADD COLUMN recurring_rule_id INTEGER REFERENCES recurring_post_rules(id) ON DELETE SET NULL",
-            "ALTER TABLE posts ADD COLUMN is_recurring_instance INTEGER",
-            "ALTER TABLE posts ADD COLUMN perf_likes INTEGER",
-            "ALTER TABLE posts ADD COLUMN perf_comments INTEGER",
-            "ALTER TABLE posts ADD COLUMN perf_shares INTEGER",
-            "ALTER TABLE posts ADD COLUMN perf_saves INTEGER",
-            "ALTER TABLE posts ADD COLUMN perf_reach INTEGER",
-            "ALTER TABLE posts ADD COLUMN perf_updated_at DATETIME",
-            "ALTER TABLE posts ADD COLUMN pillar_id VARCHAR",
-            "ALTER TABLE posts ADD COLUMN hook_formula VARCHAR(100)",
-            "ALTER TABLE assets ADD COLUMN thumbnail_small VARCHAR",
-            "ALTER TABLE assets ADD COLUMN thumbnail_medium VARCHAR",
-            "ALTER TABLE assets ADD COLUMN thumbnail_large VARCHAR",
-            "ALTER TABLE assets ADD COLUMN exif_data TEXT",
-            "ALTER TABLE assets ADD COLUMN last_used_at DATETIME",
-            "ALTER TABLE assets ADD COLUMN marked_unused INTEGER",
-        ]
-
-        if IS_VERCEL:
-            # Batch all ALTER TABLEs in a single Turso pipeline request
-            from app.core.database import turso_batch_execute
-            results = await turso_batch_execute(alter_stmts)
-            for stmt, result in zip(alter_stmts, results):
-                if result.get("type") == "ok":
-                    col_name = stmt.split("ADD COLUMN ")[1].split(" ")[0]
-                    logger.info(f"Migration: added {col_name}")
-        else:
-            # Local: individual execution for clearer error handling
-            async with engine.begin() as conn:
-                for stmt in alter_stmts:
-                    try:
-                        await conn.execute(text(stmt))
-                        col_name = stmt.split("ADD COLUMN ")[1].split(" ")[0]
-                        logger.info(f"Migration: added {col_name}")
-                    except Exception:
-                        pass  # Column already exists
-
-    # ── Alembic check (local only — useless on Vercel with Turso) ──
-    if not IS_VERCEL:
-        try:
-            from pathlib import Path as _Path
-            from alembic.config import Config as _AlembicConfig
-            from alembic.script import ScriptDirectory as _ScriptDir
-            from alembic.runtime.migration import MigrationContext as _MigCtx
-            from sqlalchemy import create_engine as _create_engine
-            from sqlalchemy.pool import NullPool as _NullPool
-
-            _backend_dir = _Path(__file__).resolve().parent.parent
-            _ini = _backend_dir / "alembic.ini"
-            if _ini.exists():
-                _cfg = _AlembicConfig(str(_ini))
-                _cfg.set_main_option("script_location", str(_backend_dir / "migrations"))
-                _script = _ScriptDir.from_config(_cfg)
-                _head = _script.get_current_head()
-                _db_path = str(_backend_dir / "treff.db")
-                _eng = _create_engine(f"sqlite:///{_db_path}", poolclass=_NullPool)
-                with _eng.connect() as _conn:
-                    _ctx = _MigCtx.configure(_conn)
-                    _current = _ctx.get_current_revision()
-                _eng.dispose()
-                if _current == _head:
-                    logger.info("Alembic migrations: up to date (revision %s)", _current)
-                elif _current is None:
-                    logger.warning("Alembic migrations: no revision stamped yet. Run 'python migrate.py stamp head'")
-                else:
-                    logger.warning("Alembic migrations: PENDING! Current=%s, Head=%s. Run 'python migrate.py upgrade'", _current, _head)
-        except ImportError:
-            pass  # Alembic not installed, skip check
-        except Exception as e:
-            logger.debug("Alembic migration check skipped: %s", e)
-
-    # ── Seed data (single session for all seeds) ──
-    SEED_FUNCTIONS = [
-        (seed_default_users, "default user(s)"),
-        (seed_default_templates, "default templates"),
-        (seed_story_teaser_templates, "story-teaser templates"),
-        (seed_story_series_templates, "story-series templates"),
-        (seed_treff_standard_templates, "TREFF standard templates"),
-        (seed_default_suggestions, "content suggestions"),
-        (seed_humor_formats, "humor formats"),
-        (seed_hashtag_sets, "hashtag sets"),
-        (seed_default_ctas, "CTAs"),
-        (seed_music_tracks, "music tracks"),
-        (seed_video_templates, "video templates"),
-        (seed_recurring_formats, "recurring formats"),
-        (seed_content_pillars, "content pillars"),
-        (seed_audio_suggestions, "audio suggestions"),
-    ]
-
-    async with async_session() as session:
-        for seed_fn, label in SEED_FUNCTIONS:
-            try:
-                count = await seed_fn(session)
-                if count > 0:
-                    logger.info(f"Seeded {count} {label}")
-            except Exception as e:
-                await session.rollback()
-                logger.error(f"Failed to seed {label}: {e}")
+    # Schema bootstrap, backfills and seeds only run when their fingerprint changed
+    await prepare_database()
 
     yield
 
     # Shutdown
     logger.info("Shutting down TREFF Post-Generator backend...")
+    from app.services.image_renderer import shutdown_executor
+    shutdown_executor()
     await engine.dispose()
 
 
@@ -289,6 +146,10 @@ OPENAPI_TAGS = [
         "name": "Analytics",
         "description": "Dashboard analytics: category distribution, platform breakdown, country mix, posting frequency, template usage, content mix balance, and goal tracking.",
     },
+    {
+        "name": "Search",
+        "description": "Unified full-text search across posts, assets, students and templates with relevance ranking, prefix matching and highlighted snippets.",
+    },
     # --- Students & Story Arcs ---
     {
         "name": "Students",
@@ -447,13 +308,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset", "Retry-After"],
+    expose_headers=["X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset", "Retry-After", "Server-Timing", "X-DB-Query-Count"],
 )
 
 # Rate-limiting middleware (applied after CORS so preflight OPTIONS are not limited)
 from app.core.rate_limiter import RateLimitMiddleware  # noqa: E402
 app.add_middleware(RateLimitMiddleware)
 
+# SQL instrumentation: per-request query count/time as Server-Timing, per-route stats
+if settings.SQL_INSTRUMENTATION:
+    from app.core.query_stats import QueryStatsMiddleware, install_query_instrumentation  # noqa: E402
+    install_query_instrumentation(engine)
+    app.add_middleware(QueryStatsMiddleware)
+
 # ─── Custom Exception Handlers ──────────────────────────────────────────────
 # All error responses follow the standard format:
 # { "detail": "<message>", "error": { "code": "<CODE>", "message": "<msg>", "details": ... } }
@@ -630,50 +497,58 @@ if IS_VERCEL:
 else:
     app.mount("/uploads", StaticFiles(directory=str(UPLOADS_DIR)), name="uploads")
 
-# API Routes
+# API Routes (health stays eager: it is what cold starts and uptime checks hit first)
 app.include_router(health.router, prefix="/api", tags=["Health"])
-app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
-app.include_router(templates.router, prefix="/api/templates", tags=["Templates"])
-app.include_router(posts.router, prefix="/api/posts", tags=["Posts"])
-app.include_router(slides.router, prefix="/api/posts", tags=["Post Slides"])
-app.include_router(ai.router, prefix="/api/ai", tags=["AI Generation"])
-app.include_router(export.router, prefix="/api/export", tags=["Export"])
-app.include_router(assets.router, prefix="/api/assets", tags=["Assets"])
-app.include_router(calendar.router, prefix="/api/calendar", tags=["Calendar"])
-app.include_router(suggestions.router, prefix="/api/suggestions", tags=["Suggestions"])
-app.include_router(analytics.router, prefix="/api/analytics", tags=["Analytics"])
-app.include_router(settings_router.router, prefix="/api/settings", tags=["Settings"])
-app.include_router(students.router, prefix="/api/students", tags=["Students"])
-app.include_router(story_arcs.router, prefix="/api/story-arcs", tags=["Story Arcs"])
-app.include_router(story_episodes.router, prefix="/api/story-arcs", tags=["Story Episodes"])
-app.include_router(hashtag_sets.router, prefix="/api/hashtag-sets", tags=["Hashtag Sets"])
-app.include_router(ctas.router, prefix="/api/ctas", tags=["CTAs"])
-app.include_router(interactive_elements.router, prefix="/api/posts", tags=["Interactive Elements"])
-app.include_router(recycling.router, prefix="/api/recycling", tags=["Content Recycling"])
-app.include_router(series_reminders.router, prefix="/api/series-reminders", tags=["Series Reminders"])
-app.include_router(video_overlays.router, prefix="/api/video-overlays", tags=["Video Overlays"])
-app.include_router(audio_mixer.router, prefix="/api/audio", tags=["Audio Mixer"])
-app.include_router(video_composer.router, prefix="/api/video-composer", tags=["Video Composer"])
-app.include_router(video_templates.router, prefix="/api/video-templates", tags=["Video Templates"])
-app.include_router(video_export.router, prefix="/api/video-export", tags=["Video Export"])
-app.include_router(video_thumbnails.router, prefix="/api/video/thumbnails", tags=["Video Thumbnails"])
-app.include_router(recurring_formats.router, prefix="/api/recurring-formats", tags=["Recurring Formats"])
-app.include_router(recurring_posts.router, prefix="/api/recurring-posts", tags=["Recurring Posts"])
-app.include_router(post_relations.router, prefix="/api/posts", tags=["Post Relations"])
-app.include_router(pipeline.router, prefix="/api/pipeline", tags=["Content Pipeline"])
-app.include_router(content_strategy.router, prefix="/api/content-strategy", tags=["Content Strategy"])
-app.include_router(campaigns.router, prefix="/api/campaigns", tags=["Campaigns"])
-app.include_router(template_favorites.router, prefix="/api/template-favorites", tags=["Template Favorites"])
-app.include_router(video_scripts.router, prefix="/api/video-scripts", tags=["Video Scripts"])
-app.include_router(audio_suggestions.router, prefix="/api/audio-suggestions", tags=["Audio Suggestions"])
-app.include_router(prompt_history.router, prefix="/api/ai", tags=["AI Prompt History"])
-app.include_router(smart_scheduling.router, prefix="/api/ai", tags=["Smart Scheduling"])
-app.include_router(tasks.router, prefix="/api/tasks", tags=["Background Tasks"])
-app.include_router(reports.router, prefix="/api/reports", tags=["Reports"])
-app.include_router(content_pillars.router, prefix="/api/content-pillars", tags=["Content Pillars"])
-app.include_router(config_endpoints.router, prefix="/api/config", tags=["Config"])
-app.include_router(shot_lists.router, prefix="/api/shot-lists", tags=["Shot Lists"])
 
+ROUTERS = [
+    RouterSpec("app.api.routes.auth", "/api/auth", ["Authentication"]),
+    RouterSpec("app.api.routes.templates", "/api/templates", ["Templates"]),
+    RouterSpec("app.api.routes.posts", "/api/posts", ["Posts"]),
+    RouterSpec("app.api.routes.slides", "/api/posts", ["Post Slides"]),
+    RouterSpec("app.api.routes.ai", "/api/ai", ["AI Generation"]),
+    RouterSpec("app.api.routes.export", "/api/export", ["Export"]),
+    RouterSpec("app.api.routes.assets", "/api/assets", ["Assets"]),
+    RouterSpec("app.api.routes.calendar", "/api/calendar", ["Calendar"]),
+    RouterSpec("app.api.routes.suggestions", "/api/suggestions", ["Suggestions"]),
+    RouterSpec("app.api.routes.analytics", "/api/analytics", ["Analytics"]),
+    RouterSpec("app.api.routes.settings", "/api/settings", ["Settings"]),
+    RouterSpec("app.api.routes.students", "/api/students", ["Students"]),
+    RouterSpec("app.api.routes.story_arcs", "/api/story-arcs", ["Story Arcs"]),
+    RouterSpec("app.api.routes.story_episodes", "/api/story-arcs", ["Story Episodes"]),
+    RouterSpec("app.api.routes.hashtag_sets", "/api/hashtag-sets", ["Hashtag Sets"]),
+    RouterSpec("app.api.routes.ctas", "/api/ctas", ["CTAs"]),
+    RouterSpec("app.api.routes.interactive_elements", "/api/posts", ["Interactive Elements"]),
+    RouterSpec("app.api.routes.recycling", "/api/recycling", ["Content Recycling"]),
+    RouterSpec("app.api.routes.series_reminders", "/api/series-reminders", ["Series Reminders"]),
+    RouterSpec("app.api.routes.video_overlays", "/api/video-overlays", ["Video Overlays"]),
+    RouterSpec("app.api.routes.audio_mixer", "/api/audio", ["Audio Mixer"]),
+    RouterSpec("app.api.routes.video_composer", "/api/video-composer", ["Video Composer"]),
+    RouterSpec("app.api.routes.video_templates", "/api/video-templates", ["Video Templates"]),
+    RouterSpec("app.api.routes.video_export", "/api/video-export", ["Video Export"]),
+    RouterSpec("app.api.routes.video_thumbnails", "/api/video/thumbnails", ["Video Thumbnails"]),
+    RouterSpec("app.api.routes.recurring_formats", "/api/recurring-formats", ["Recurring Formats"]),
+    RouterSpec("app.api.routes.recurring_posts", "/api/recurring-posts", ["Recurring Posts"]),
+    RouterSpec("app.api.routes.post_relations", "/api/posts", ["Post Relations"]),
+    RouterSpec("app.api.routes.pipeline", "/api/pipeline", ["Content Pipeline"]),
+    RouterSpec("app.api.routes.content_strategy", "/api/content-strategy", ["Content Strategy"]),
+    RouterSpec("app.api.routes.campaigns", "/api/campaigns", ["Campaigns"]),
+    RouterSpec("app.api.routes.template_favorites", "/api/template-favorites", ["Template Favorites"]),
+    RouterSpec("app.api.routes.video_scripts", "/api/video-scripts", ["Video Scripts"]),
+    RouterSpec("app.api.routes.audio_suggestions", "/api/audio-suggestions", ["Audio Suggestions"]),
+    RouterSpec("app.api.routes.prompt_history", "/api/ai", ["AI Prompt History"]),
+    RouterSpec("app.api.routes.smart_scheduling", "/api/ai", ["Smart Scheduling"]),
+    RouterSpec("app.api.routes.tasks", "/api/tasks", ["Background Tasks"]),
+    RouterSpec("app.api.routes.reports", "/api/reports", ["Reports"]),
+    RouterSpec("app.api.routes.search", "/api/search", ["Search"]),
+    RouterSpec("app.api.routes.content_pillars", "/api/content-pillars", ["Content Pillars"]),
+    RouterSpec("app.api.routes.config_endpoints", "/api/config", ["Config"]),
+    RouterSpec("app.api.routes.shot_lists", "/api/shot-lists", ["Shot Lists"]),
+]
+
+if settings.LAZY_ROUTERS:
+    app.add_middleware(LazyRouterMiddleware, specs=ROUTERS)
+else:
+    include_routers(app, ROUTERS)
 
 if __name__ == "__main__":
     import uvicorn
@@ -35,6 +35,11 @@ from app.models.background_task import BackgroundTask
 from app.models.content_pillar import ContentPillar
 from app.models.audio_suggestion import AudioSuggestion
 from app.models.shot_list import ShotList
+from app.models.post_daily_stats import PostDailyStats
+from app.models.app_state import AppState
+from app.models.report_history import ReportHistory
+from app.models.report_snapshot import ReportSnapshot
+from app.models.post_signature import PostSignature
 
 __all__ = [
     "User",
@@ -72,4 +77,9 @@ __all__ = [
     "ContentPillar",
     "AudioSuggestion",
     "ShotList",
+    "PostDailyStats",
+    "AppState",
+    "ReportHistory",
+    "ReportSnapshot",
+    "PostSignature",
 ]
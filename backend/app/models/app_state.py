@@ -0,0 +1,25 @@
+"""AppState model - single-row record of what the last startup/deploy prepared.
+
+Holds the schema and seed fingerprints computed by app.core.startup, so a
+cold start can tell with one query whether DDL, backfills and seeding can be
+skipped. Never written by routes.
+"""
+
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy import Integer, String, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class AppState(Base):
+    __tablename__ = "app_state"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)  # Always 1
+    schema_fingerprint: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    seed_fingerprint: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    fts5_available: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # 1/0 once the search index was set up
+    updated_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime, nullable=True, default=lambda: datetime.now(timezone.utc)
+    )
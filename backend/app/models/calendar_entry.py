@@ -2,7 +2,7 @@
 
 from datetime import datetime, timezone, date
 from typing import Optional
-from sqlalchemy import Integer, String, Boolean, Date, DateTime, Text, ForeignKey
+from sqlalchemy import Integer, String, Boolean, Date, DateTime, Text, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -10,6 +10,10 @@ from app.core.database import Base
 
 class CalendarEntry(Base):
     __tablename__ = "calendar_entries"
+    __table_args__ = (
+        Index("ix_calendar_entries_scheduled_date", "scheduled_date"),
+        Index("ix_calendar_entries_post_id", "post_id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     post_id: Mapped[int] = mapped_column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), nullable=False)
@@ -9,21 +9,32 @@ from app.core.database import Base
 
 
 class Post(Base):
+    # Columns with active_history=True feed the post_daily_stats rollups
+    # (app.services.analytics_rollup needs their previous value on change).
     __tablename__ = "posts"
     __table_args__ = (
         Index("ix_posts_user_id", "user_id"),
         Index("ix_posts_user_id_created_at", "user_id", "created_at"),
+        Index("ix_posts_user_id_status", "user_id", "status"),
+        Index("ix_posts_user_id_scheduled_date", "user_id", "scheduled_date"),  # calendar ranges
+        Index("ix_posts_user_id_platform_scheduled_date", "user_id", "platform", "scheduled_date"),
+        Index("ix_posts_story_arc_id_episode_number", "story_arc_id", "episode_number"),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
     template_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("templates.id"), nullable=True)
-    category: Mapped[str] = mapped_column(String, nullable=False)
-    country: Mapped[Optional[str]] = mapped_column(String, nullable=True)
-    platform: Mapped[str] = mapped_column(String, nullable=False)  # instagram_feed, instagram_story, tiktok
-    status: Mapped[str] = mapped_column(String, default="draft")  # draft, scheduled, reminded, exported, posted
+    category: Mapped[str] = mapped_column(String, nullable=False, active_history=True)
+    country: Mapped[Optional[str]] = mapped_column(String, nullable=True, active_history=True)
+    platform: Mapped[str] = mapped_column(String, nullable=False, active_history=True)  # instagram_feed, instagram_story, tiktok
+    status: Mapped[str] = mapped_column(String, default="draft", active_history=True)  # draft, scheduled, reminded, exported, posted
     title: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     slide_data: Mapped[str] = mapped_column(Text, nullable=False, default="[]")  # JSON
+    # Derived from slide_data on write (app.services.slide_summary); never set by hand
+    slide_count: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    thumbnail_url: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    first_headline: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    plain_text: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     caption_instagram: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     caption_tiktok: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     hashtags_instagram: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
@@ -40,20 +51,20 @@ class Post(Base):
     linked_post_group_id: Mapped[Optional[str]] = mapped_column(String, nullable=True)  # UUID grouping sibling posts across platforms
     recurring_rule_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("recurring_post_rules.id", ondelete="SET NULL"), nullable=True)  # Links to recurrence rule
     is_recurring_instance: Mapped[Optional[bool]] = mapped_column(Integer, nullable=True, default=None)  # True if auto-generated from rule
-    pillar_id: Mapped[Optional[str]] = mapped_column(String, nullable=True)  # Content pillar ID (e.g. 'erfahrungsberichte', 'laender_spotlight')
+    pillar_id: Mapped[Optional[str]] = mapped_column(String, nullable=True, active_history=True)  # Content pillar ID (e.g. 'erfahrungsberichte', 'laender_spotlight')
     hook_formula: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)  # Hook formula ID from hookFormulas.js (e.g. 'knowledge_gap', 'myth_buster', 'pov')
     # Performance metrics (manually entered social media stats)
-    perf_likes: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
-    perf_comments: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
-    perf_shares: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
-    perf_saves: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
-    perf_reach: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    perf_likes: Mapped[Optional[int]] = mapped_column(Integer, nullable=True, active_history=True)
+    perf_comments: Mapped[Optional[int]] = mapped_column(Integer, nullable=True, active_history=True)
+    perf_shares: Mapped[Optional[int]] = mapped_column(Integer, nullable=True, active_history=True)
+    perf_saves: Mapped[Optional[int]] = mapped_column(Integer, nullable=True, active_history=True)
+    perf_reach: Mapped[Optional[int]] = mapped_column(Integer, nullable=True, active_history=True)
     perf_updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
 
     exported_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     posted_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
-        DateTime, default=lambda: datetime.now(timezone.utc)
+        DateTime, default=lambda: datetime.now(timezone.utc), active_history=True
     )
     updated_at: Mapped[datetime] = mapped_column(
         DateTime,
@@ -0,0 +1,43 @@
+"""PostDailyStats model - per-day post rollups for analytics.
+
+One row per (user, day, platform, category, country, status, pillar) with the
+number of posts and their summed engagement metrics. Maintained incrementally
+by app.services.analytics_rollup; never written by routes directly.
+"""
+
+from datetime import date
+from sqlalchemy import Integer, String, Date, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class PostDailyStats(Base):
+    __tablename__ = "post_daily_stats"
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id", "day", "platform", "category", "country", "status", "pillar_id",
+            name="uq_post_daily_stats_key",
+        ),
+        Index("ix_post_daily_stats_user_id_day", "user_id", "day"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    day: Mapped[date] = mapped_column(Date, nullable=False)  # Post.created_at date (UTC)
+
+    # Dimensions ("" instead of NULL so the unique key matches)
+    platform: Mapped[str] = mapped_column(String, nullable=False, default="")
+    category: Mapped[str] = mapped_column(String, nullable=False, default="")
+    country: Mapped[str] = mapped_column(String, nullable=False, default="")
+    status: Mapped[str] = mapped_column(String, nullable=False, default="")
+    pillar_id: Mapped[str] = mapped_column(String, nullable=False, default="")
+
+    # Measures
+    post_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    posts_with_metrics: Mapped[int] = mapped_column(Integer, nullable=False, default=0)  # perf_likes or perf_reach set
+    likes: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    comments: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    shares: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    saves: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    reach: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
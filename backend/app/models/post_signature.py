@@ -0,0 +1,23 @@
+"""PostSignature model - MinHash signature of a post's text for similarity lookups.
+
+One row per post with text content. The signature is a packed array of
+unsigned 32-bit MinHash values. Maintained by app.services.post_similarity;
+never written by routes directly.
+"""
+
+from sqlalchemy import BigInteger, Integer, LargeBinary, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class PostSignature(Base):
+    __tablename__ = "post_signatures"
+    __table_args__ = (
+        Index("ix_post_signatures_user_id_updated_ns", "user_id", "updated_ns"),
+    )
+
+    post_id: Mapped[int] = mapped_column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    signature: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)  # array('I') bytes, NUM_PERM values
+    updated_ns: Mapped[int] = mapped_column(BigInteger, nullable=False)  # time.time_ns() of the last write
@@ -1,7 +1,7 @@
 """PromptHistory model for storing AI prompt calls, results, and favorites."""
 
 from datetime import datetime, timezone
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, ForeignKey, Index
 from app.core.database import Base
 
 
@@ -13,6 +13,9 @@ class PromptHistory(Base):
     """
 
     __tablename__ = "prompt_history"
+    __table_args__ = (
+        Index("ix_prompt_history_user_id_created_at", "user_id", "created_at"),  # list + keyset pagination
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
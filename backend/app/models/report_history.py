@@ -0,0 +1,23 @@
+"""ReportHistory model - one row per generated report download."""
+
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy import Integer, String, DateTime, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class ReportHistory(Base):
+    __tablename__ = "report_history"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    report_type: Mapped[str] = mapped_column(String, nullable=False)  # "pdf" or "csv"
+    period: Mapped[str] = mapped_column(String, nullable=False)  # "week" or "month"
+    title: Mapped[str] = mapped_column(String, nullable=False)
+    summary: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    post_count: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(timezone.utc)
+    )
@@ -0,0 +1,30 @@
+"""ReportSnapshot model - aggregates of one report period, computed once.
+
+Keyed by (user, period window, data version): as long as the user's posts
+are unchanged, previews and downloads of the same period are served from
+the stored JSON and the rendered PDF/CSV files next to it. Maintained by
+app.services.report_snapshots; superseded versions are deleted on write.
+"""
+
+from datetime import datetime, timezone
+from sqlalchemy import Integer, String, DateTime, Text, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class ReportSnapshot(Base):
+    __tablename__ = "report_snapshots"
+    __table_args__ = (
+        UniqueConstraint("user_id", "period", "window_key", "data_version", name="uq_report_snapshots_key"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    period: Mapped[str] = mapped_column(String, nullable=False)  # "week" or "month"
+    window_key: Mapped[str] = mapped_column(String, nullable=False)  # "YYYY-MM-DD..YYYY-MM-DD"
+    data_version: Mapped[str] = mapped_column(String(64), nullable=False)  # hash of the user's post state
+    data: Mapped[str] = mapped_column(Text, nullable=False)  # JSON report data
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(timezone.utc)
+    )
@@ -15,6 +15,7 @@ class StoryArc(Base):
         Index("ix_story_arcs_student_id", "student_id"),
         Index("ix_story_arcs_country", "country"),
         Index("ix_story_arcs_status", "status"),
+        Index("ix_story_arcs_user_id_created_at", "user_id", "created_at"),  # list + keyset pagination
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
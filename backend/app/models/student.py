@@ -14,6 +14,7 @@ class Student(Base):
         Index("ix_students_user_id", "user_id"),
         Index("ix_students_country", "country"),
         Index("ix_students_status", "status"),
+        Index("ix_students_user_id_created_at", "user_id", "created_at"),  # list + keyset pagination
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
@@ -2,7 +2,7 @@
 
 from datetime import datetime, timezone
 from typing import Optional
-from sqlalchemy import Integer, String, Text, DateTime, Float, ForeignKey
+from sqlalchemy import Integer, String, Text, DateTime, Float, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.core.database import Base
@@ -10,6 +10,9 @@ from app.core.database import Base
 
 class VideoExport(Base):
     __tablename__ = "video_exports"
+    __table_args__ = (
+        Index("ix_video_exports_user_id_created_at", "user_id", "created_at"),  # list + keyset pagination
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
@@ -0,0 +1,312 @@
+"""
+Analytics Rollup Service - incrementally maintained per-day post statistics.
+
+Dashboard, frequency, heatmap, report and strategy-health analytics only need
+counts and engagement sums per day/platform/category/country/status/pillar.
+Instead of loading every Post row, they read the `post_daily_stats` table,
+whose size is bounded by the number of active days, not the number of posts.
+
+Architecture:
+    - An `after_flush` hook on the ORM Session turns every Post insert,
+      update and delete into +1/-1 deltas on the affected rollup rows
+      (upserted in the same transaction, so rollups commit or roll back
+      together with the posts).
+    - Post columns that feed the rollups use active_history=True so the
+      previous value is known when a post changes category, status, etc.
+    - Core-level bulk statements on posts bypass the hook; bulk writers
+      pass the rows' before/after values to `apply_bulk_changes()` (see
+      app.services.bulk_posts). `rebuild_post_daily_stats()` recomputes
+      rollups from scratch (used for backfill after deploys and to repair
+      drift).
+    - Query helpers (`count_by`, `counts_by_day`, `totals`, `totals_by_day`) answer analytics
+      endpoints with O(days) work.
+
+Usage:
+    from app.services.analytics_rollup import count_by, counts_by_day
+
+    categories = await count_by(db, user_id, "category", since=start_day)
+
+    # Backfill / repair (all users or one user):
+    python -m app.services.analytics_rollup [--user USER_ID]
+"""
+
+import logging
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy import case, delete, event, func, inspect, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.post import Post
+from app.models.post_daily_stats import PostDailyStats
+
+logger = logging.getLogger(__name__)
+
+# Rollup dimensions (same names on Post and PostDailyStats)
+DIMENSIONS = ("platform", "category", "country", "status", "pillar_id")
+
+# Post metric column -> rollup measure column
+METRICS = {
+    "perf_likes": "likes",
+    "perf_comments": "comments",
+    "perf_shares": "shares",
+    "perf_saves": "saves",
+    "perf_reach": "reach",
+}
+
+_MEASURES = ("post_count", "posts_with_metrics") + tuple(METRICS.values())
+TRACKED_COLUMNS = ("user_id", "created_at") + DIMENSIONS + tuple(METRICS)
+
+
+# ─── Incremental maintenance (ORM flush hook) ────────────────────────────
+
+def _post_values(post: Post, previous: bool = False) -> dict:
+    """Tracked column values of a post, optionally as they were before this flush."""
+    state = inspect(post)
+    values = {}
+    for name in TRACKED_COLUMNS:
+        if previous:
+            history = state.attrs[name].history
+            if history.deleted:
+                values[name] = history.deleted[0]
+                continue
+        values[name] = getattr(post, name)
+    return values
+
+
+def _add_delta(deltas: dict, values: dict, sign: int) -> None:
+    created_at = values["created_at"]
+    if values["user_id"] is None or created_at is None:
+        return
+    key = (
+        values["user_id"],
+        created_at.date() if isinstance(created_at, datetime) else created_at,
+    ) + tuple(values[d] or "" for d in DIMENSIONS)
+
+    delta = deltas[key]
+    delta[0] += sign
+    if values["perf_likes"] is not None or values["perf_reach"] is not None:
+        delta[1] += sign
+    for i, column in enumerate(METRICS, start=2):
+        delta[i] += sign * (values[column] or 0)
+
+
+@event.listens_for(Session, "after_flush")
+def _track_post_changes(session: Session, flush_context) -> None:
+    """Apply rollup deltas for all Post rows written in this flush."""
+    deltas = defaultdict(lambda: [0] * len(_MEASURES))
+
+    for obj in session.new:
+        if isinstance(obj, Post):
+            _add_delta(deltas, _post_values(obj), +1)
+
+    for obj in session.dirty:
+        if isinstance(obj, Post) and session.is_modified(obj, include_collections=False):
+            old, new = _post_values(obj, previous=True), _post_values(obj)
+            if old != new:
+                _add_delta(deltas, old, -1)
+                _add_delta(deltas, new, +1)
+
+    for obj in session.deleted:
+        if isinstance(obj, Post):
+            _add_delta(deltas, _post_values(obj, previous=True), -1)
+
+    rows = _delta_rows(deltas)
+    if rows:
+        session.connection().execute(_upsert_statement(), rows)
+
+
+def _delta_rows(deltas: dict) -> list[dict]:
+    return [
+        dict(zip(("user_id", "day") + DIMENSIONS, key), **dict(zip(_MEASURES, delta)))
+        for key, delta in deltas.items()
+        if any(delta)
+    ]
+
+
+def _upsert_statement():
+    """INSERT of delta rows that adds onto existing rollup rows."""
+    table = PostDailyStats.__table__
+    stmt = sqlite_insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=["user_id", "day", *DIMENSIONS],
+        set_={m: table.c[m] + stmt.excluded[m] for m in _MEASURES},
+    )
+
+
+async def apply_bulk_changes(db: AsyncSession, added=(), removed=()) -> None:
+    """Apply rollup deltas for posts written by Core bulk statements.
+
+    `added` / `removed` are tracked column values (`TRACKED_COLUMNS`) of
+    post rows as they are after / were before the statement; an updated
+    post appears in both.
+    """
+    deltas = defaultdict(lambda: [0] * len(_MEASURES))
+    for values in removed:
+        _add_delta(deltas, values, -1)
+    for values in added:
+        _add_delta(deltas, values, +1)
+    rows = _delta_rows(deltas)
+    if rows:
+        await db.execute(_upsert_statement(), rows)
+
+
+# ─── Rebuild / backfill ──────────────────────────────────────────────────
+
+def _rebuild_select(user_id: Optional[int] = None):
+    """SELECT producing the full rollup rows from the posts table."""
+    has_metrics = (Post.perf_likes.isnot(None)) | (Post.perf_reach.isnot(None))
+    query = (
+        select(
+            Post.user_id,
+            func.date(Post.created_at),
+            *(func.coalesce(getattr(Post, d), "") for d in DIMENSIONS),
+            func.count(Post.id),
+            func.sum(case((has_metrics, 1), else_=0)),
+            *(func.coalesce(func.sum(getattr(Post, c)), 0) for c in METRICS),
+        )
+        .where(Post.created_at.isnot(None))
+        .group_by(
+            Post.user_id,
+            func.date(Post.created_at),
+            *(func.coalesce(getattr(Post, d), "") for d in DIMENSIONS),
+        )
+    )
+    if user_id is not None:
+        query = query.where(Post.user_id == user_id)
+    return query
+
+
+async def rebuild_post_daily_stats(db: AsyncSession, user_id: Optional[int] = None) -> int:
+    """Recompute rollups from the posts table (all users or one). Returns row count."""
+    cleanup = delete(PostDailyStats)
+    if user_id is not None:
+        cleanup = cleanup.where(PostDailyStats.user_id == user_id)
+    await db.execute(cleanup)
+
+    await db.execute(
+        PostDailyStats.__table__.insert().from_select(
+            ["user_id", "day", *DIMENSIONS, *_MEASURES],
+            _rebuild_select(user_id),
+        )
+    )
+    count_query = select(func.count(PostDailyStats.id))
+    if user_id is not None:
+        count_query = count_query.where(PostDailyStats.user_id == user_id)
+    return (await db.execute(count_query)).scalar() or 0
+
+
+async def ensure_post_daily_stats(db: AsyncSession) -> int:
+    """Backfill rollups if the table is empty but posts exist (first deploy)."""
+    has_rollups = (await db.execute(select(PostDailyStats.id).limit(1))).first()
+    if has_rollups:
+        return 0
+    has_posts = (await db.execute(select(Post.id).limit(1))).first()
+    if not has_posts:
+        return 0
+    count = await rebuild_post_daily_stats(db)
+    await db.commit()
+    return count
+
+
+# ─── Query helpers ───────────────────────────────────────────────────────
+
+def _scope(query, user_id: int, since: Optional[date], until: Optional[date]):
+    query = query.where(PostDailyStats.user_id == user_id)
+    if since is not None:
+        query = query.where(PostDailyStats.day >= since)
+    if until is not None:
+        query = query.where(PostDailyStats.day <= until)
+    return query
+
+
+async def count_by(
+    db: AsyncSession,
+    user_id: int,
+    *dimensions: str,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+) -> dict:
+    """Post counts grouped by one or more dimensions.
+
+    Keys are the dimension value (one dimension) or a tuple of values; empty
+    dimension values are returned as None. Groups with zero posts are omitted.
+    """
+    columns = [getattr(PostDailyStats, d) for d in dimensions]
+    query = _scope(
+        select(*columns, func.sum(PostDailyStats.post_count)).group_by(*columns),
+        user_id, since, until,
+    )
+    result = {}
+    for row in (await db.execute(query)).all():
+        if not row[-1]:
+            continue
+        key = tuple(v or None for v in row[:-1])
+        result[key[0] if len(key) == 1 else key] = row[-1]
+    return result
+
+
+async def counts_by_day(
+    db: AsyncSession,
+    user_id: int,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+) -> dict[date, int]:
+    """Post counts per day (days without posts are omitted)."""
+    query = _scope(
+        select(PostDailyStats.day, func.sum(PostDailyStats.post_count)).group_by(PostDailyStats.day),
+        user_id, since, until,
+    )
+    return {day: count for day, count in (await db.execute(query)).all() if count}
+
+
+async def totals_by_day(
+    db: AsyncSession,
+    user_id: int,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+) -> dict[date, dict[str, int]]:
+    """Summed measures per day (see `totals` for the keys)."""
+    query = _scope(
+        select(PostDailyStats.day, *(func.sum(getattr(PostDailyStats, m)) for m in _MEASURES))
+        .group_by(PostDailyStats.day),
+        user_id, since, until,
+    )
+    return {row[0]: dict(zip(_MEASURES, row[1:])) for row in (await db.execute(query)).all()}
+
+
+async def totals(
+    db: AsyncSession,
+    user_id: int,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+) -> dict[str, int]:
+    """Summed measures: post_count, posts_with_metrics, likes, comments, shares, saves, reach."""
+    query = _scope(
+        select(*(func.coalesce(func.sum(getattr(PostDailyStats, m)), 0) for m in _MEASURES)),
+        user_id, since, until,
+    )
+    row = (await db.execute(query)).one()
+    return dict(zip(_MEASURES, row))
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+
+    from app.core.database import async_session
+
+    parser = argparse.ArgumentParser(description="Rebuild post_daily_stats rollups from posts")
+    parser.add_argument("--user", type=int, default=None, help="Only rebuild this user's rollups")
+    args = parser.parse_args()
+
+    async def _main():
+        async with async_session() as session:
+            count = await rebuild_post_daily_stats(session, args.user)
+            await session.commit()
+        print(f"Rebuilt post_daily_stats: {count} row(s)")
+
+    asyncio.run(_main())
@@ -0,0 +1,311 @@
+"""
+Audio Engine - loudness analysis, cached audio stems and stem-based mixing.
+
+Every /mix request used to decode the video and the music track from
+scratch and re-probe both files, so each iteration on the volume or fade
+settings cost two full decodes. Each source is now decoded once: the first
+use measures its loudness and writes its audio as a stem; later mixes
+only read the stems and copy the video stream.
+
+Architecture:
+    - `analyze()` runs one ffmpeg pass per source (music track, uploaded
+      audio or a video's own audio). The audio is resampled to 44.1 kHz
+      stereo and split: one branch is written as a lossless FLAC stem, the
+      other goes through `ebur128` (EBU R128 integrated loudness, loudness
+      range, true peak). Duration comes from the cached app.core.media probe.
+    - Normalization: `gain_db` brings a stem to TARGET_LUFS without pushing
+      its true peak above MAX_TRUE_PEAK. It is folded into the mix's volume
+      filter, so one decode serves both the analysis and the stem, and the
+      volume sliders mean the same for every source.
+    - Cache: uploads/audio_stems/stem_<key>.flac + analysis_<key>.json, key
+      = (file name, size, mtime, ENGINE_VERSION); the least recently used
+      stems are pruned above STEM_CACHE_MAX_FILES. A replaced source never
+      hits an old stem.
+    - `mix_with_stems()`: video stream copied (`-c:v copy`, re-encoded only
+      if the container refuses it), stems mixed without amix's halving and
+      then brick-wall limited (MIX_LIMITER), since two normalized stems can
+      sum above 0 dBFS and would clip in the AAC encode.
+      Optional automatic ducking: the video's voice track drives a
+      `sidechaincompress` on the music, so the music dips whenever someone
+      speaks.
+
+Usage:
+    from app.services.audio_engine import analyze, mix_with_stems
+
+    voice = await analyze(video_path)
+    music = await analyze(track_path)
+    success, error = mix_with_stems(video_path, voice, music, output_path, duration=30.0, duck=True)
+
+    # Pre-analyze the whole music library (deploy time):
+    python -m app.services.audio_engine --music
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import subprocess
+from pathlib import Path
+from typing import Optional
+
+from app.core.media import AUDIO_SAMPLE_RATE, H264_ARGS, cache_key, probe, prune_cache, temp_output
+from app.core.paths import get_upload_dir
+
+logger = logging.getLogger(__name__)
+
+# Bump when the stem format or the analysis changes (invalidates the cache)
+ENGINE_VERSION = 1
+
+STEM_DIR = get_upload_dir("audio_stems")
+STEM_CACHE_MAX_FILES = 100
+STEM_TIMEOUT = 300
+
+TARGET_LUFS = -16.0
+MAX_TRUE_PEAK = -1.5
+# Integrated loudness of digital silence as reported by ebur128
+SILENCE_LUFS = -70.0
+
+# Sidechain compressor settings for ducking (threshold/ratio on the voice envelope)
+DUCK_FILTER = "sidechaincompress=threshold=0.03:ratio=8:attack=20:release=400"
+# Peak limit of the summed mix at -1 dBFS; level=0 keeps the limiter from adding makeup gain
+MIX_LIMITER = "alimiter=limit=0.891:attack=5:release=50:level=0"
+
+_SUMMARY_PATTERNS = {
+    "loudness": re.compile(r"I:\s+(-?[\d.]+) LUFS"),
+    "loudness_range": re.compile(r"LRA:\s+(-?[\d.]+) LU"),
+    "true_peak": re.compile(r"Peak:\s+(-?[\d.]+|-inf) dBFS"),
+}
+
+# Source path -> lock, so concurrent mixes of the same file decode it once
+_analysis_locks: dict[str, asyncio.Lock] = {}
+
+
+class AudioEngineError(RuntimeError):
+    """ffmpeg could not decode or analyze a source."""
+
+
+# ── Analysis and stems ──
+
+def _source_key(source: Path) -> str:
+    stat = source.stat()
+    return cache_key(ENGINE_VERSION, source.name, stat.st_size, stat.st_mtime_ns)
+
+
+def _parse_summary(stderr: str) -> dict:
+    """Loudness values from the ebur128 summary (the last one in the log)."""
+    summary = stderr[stderr.rfind("Summary:"):]
+    values = {}
+    for name, pattern in _SUMMARY_PATTERNS.items():
+        match = pattern.search(summary)
+        if match:
+            values[name] = float(match.group(1))
+    return values
+
+
+def _normalization_gain(loudness: Optional[float], true_peak: Optional[float]) -> float:
+    if loudness is None or loudness <= SILENCE_LUFS:
+        return 0.0
+    gain = TARGET_LUFS - loudness
+    if true_peak is not None and true_peak != float("-inf"):
+        gain = min(gain, MAX_TRUE_PEAK - true_peak)
+    return round(gain, 2)
+
+
+def analyze_sync(source: Path) -> dict:
+    """Loudness, duration and stem of a source's audio (decoded on first use only).
+
+    Returns {duration, has_audio, loudness, loudness_range, true_peak,
+    gain_db, stem}; `stem` is the FLAC file name in STEM_DIR (None without
+    audio). Raises AudioEngineError if the audio cannot be decoded.
+    """
+    key = _source_key(source)
+    analysis_path = STEM_DIR / f"analysis_{key}.json"
+    stem_path = STEM_DIR / f"stem_{key}.flac"
+    if analysis_path.exists():
+        analysis = json.loads(analysis_path.read_text())
+        if analysis["stem"] is None or stem_path.exists():
+            if analysis["stem"]:
+                os.utime(stem_path)  # mark as recently used for pruning
+            return analysis
+
+    info = probe(source)
+    analysis = {
+        "duration": info["duration"] or 0.0,
+        "has_audio": info["audio_codec"] is not None,
+        "loudness": None,
+        "loudness_range": None,
+        "true_peak": None,
+        "gain_db": 0.0,
+        "stem": None,
+    }
+
+    if analysis["has_audio"]:
+        temp = temp_output(stem_path)
+        cmd = [
+            "ffmpeg", "-hide_banner", "-nostdin",
+            "-i", str(source),
+            "-filter_complex",
+            f"[0:a:0]aresample={AUDIO_SAMPLE_RATE},aformat=sample_fmts=s16:channel_layouts=stereo,"
+            f"asplit=2[stem][meter];[meter]ebur128=peak=true,anullsink",
+            "-map", "[stem]", "-c:a", "flac",
+            "-y", str(temp),
+        ]
+        try:
+            proc = subprocess.run(cmd, capture_output=True, text=True, timeout=STEM_TIMEOUT)
+            if proc.returncode != 0 or not temp.exists():
+                raise AudioEngineError(f"Audio decode failed for {source.name}: {proc.stderr[-500:]}")
+            os.replace(temp, stem_path)
+        except subprocess.TimeoutExpired:
+            raise AudioEngineError(f"Audio decode timed out for {source.name}")
+        finally:
+            temp.unlink(missing_ok=True)
+
+        analysis.update(_parse_summary(proc.stderr))
+        analysis["gain_db"] = _normalization_gain(analysis["loudness"], analysis["true_peak"])
+        analysis["stem"] = stem_path.name
+        prune_cache(STEM_DIR, "stem_*.flac", STEM_CACHE_MAX_FILES)
+
+    temp = temp_output(analysis_path)
+    temp.write_text(json.dumps(analysis))
+    os.replace(temp, analysis_path)
+    logger.info(
+        f"Analyzed {source.name}: {analysis['duration']}s, "
+        f"{analysis['loudness']} LUFS, gain {analysis['gain_db']} dB"
+    )
+    return analysis
+
+
+async def analyze(source: Path) -> dict:
+    """`analyze_sync()` in a worker thread, once per source even for concurrent callers."""
+    lock = _analysis_locks.setdefault(str(source), asyncio.Lock())
+    async with lock:
+        return await asyncio.to_thread(analyze_sync, source)
+
+
+# ── Mixing ──
+
+def _linear(db: float) -> float:
+    return 10 ** (db / 20)
+
+
+def mix_with_stems(
+    video_path: Path,
+    voice: dict,
+    music: dict,
+    output_path: Path,
+    duration: float,
+    original_volume: float = 1.0,
+    music_volume: float = 0.5,
+    fade_in_seconds: float = 0.0,
+    fade_out_seconds: float = 0.0,
+    duck: bool = False,
+) -> tuple[bool, str]:
+    """Replace the video's audio by its voice stem mixed with a music stem.
+
+    `voice` / `music` are `analyze()` results of the video and the music
+    source. Returns (success: bool, error_message: str).
+    """
+    use_voice = voice["stem"] is not None and original_volume > 0
+    inputs = ["-i", str(video_path)]
+    if use_voice:
+        inputs += ["-i", str(STEM_DIR / voice["stem"])]
+    inputs += ["-i", str(STEM_DIR / music["stem"])]
+    music_input = 2 if use_voice else 1
+
+    # Music: normalized volume, trimmed to the video, fades
+    music_parts = [
+        f"[{music_input}:a]volume={music_volume * _linear(music['gain_db']):.4f}",
+        f"atrim=0:{duration}",
+        "asetpts=PTS-STARTPTS",
+    ]
+    if fade_in_seconds > 0:
+        music_parts.append(f"afade=t=in:d={fade_in_seconds}")
+    if fade_out_seconds > 0:
+        music_parts.append(f"afade=t=out:st={max(0, duration - fade_out_seconds)}:d={fade_out_seconds}")
+
+    filters = []
+    if use_voice:
+        voice_chain = f"[1:a]volume={original_volume * _linear(voice['gain_db']):.4f}"
+        if duck:
+            filters.append(f"{voice_chain},asplit=2[voice][sidechain]")
+            filters.append(",".join(music_parts) + "[music_raw]")
+            filters.append(f"[music_raw][sidechain]{DUCK_FILTER}[music]")
+        else:
+            filters.append(f"{voice_chain}[voice]")
+            filters.append(",".join(music_parts) + "[music]")
+        filters.append(f"[voice][music]amix=inputs=2:duration=first:dropout_transition=2:normalize=0,{MIX_LIMITER}[mixed]")
+    else:
+        # No voice: the music alone, padded to the video's length
+        filters.append(",".join(music_parts) + f",apad=whole_dur={duration},{MIX_LIMITER}[mixed]")
+
+    def command(video_args: list[str]) -> list[str]:
+        return [
+            "ffmpeg", "-y", "-nostdin", "-v", "error",
+            *inputs,
+            "-filter_complex", ";".join(filters),
+            "-map", "0:v",
+            "-map", "[mixed]",
+            *video_args,
+            "-c:a", "aac", "-b:a", "192k",
+            "-shortest",
+            str(output_path),
+        ]
+
+    logger.info(f"Running stem mix (duck={duck and use_voice}) -> {output_path.name}")
+    try:
+        proc = subprocess.run(command(["-c:v", "copy"]), capture_output=True, text=True, timeout=300)
+        if proc.returncode != 0:
+            logger.warning(f"Stream-copy mix failed, re-encoding video: {proc.stderr[:500]}")
+            proc = subprocess.run(command(H264_ARGS), capture_output=True, text=True, timeout=600)
+            if proc.returncode != 0:
+                return False, f"Mixing failed (both attempts): {proc.stderr[:1000]}"
+        if output_path.exists() and output_path.stat().st_size > 0:
+            return True, ""
+        return False, "ffmpeg produced empty or missing output file"
+    except FileNotFoundError:
+        return False, "ffmpeg not found on system"
+    except subprocess.TimeoutExpired:
+        return False, "Audio mixing timed out (>5 min)"
+    except Exception as e:
+        return False, str(e)
+
+
+# ── CLI ──
+
+async def _analyze_music_library() -> None:
+    from sqlalchemy import select
+
+    from app.core.database import async_session
+    from app.models.music_track import MusicTrack
+
+    music_dir = get_upload_dir("music")
+    async with async_session() as session:
+        filenames = (await session.execute(select(MusicTrack.filename))).scalars().all()
+    for filename in filenames:
+        path = music_dir / filename
+        if not path.exists():
+            print(f"{filename}: missing")
+            continue
+        try:
+            analysis = await analyze(path)
+            print(f"{filename}: {analysis['loudness']} LUFS, gain {analysis['gain_db']} dB")
+        except AudioEngineError as e:
+            print(f"{filename}: {e}")
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Analyze audio sources and build their stems")
+    parser.add_argument("files", nargs="*", type=Path)
+    parser.add_argument("--music", action="store_true", help="Analyze every track of the music library")
+    args = parser.parse_args()
+
+    if args.music:
+        asyncio.run(_analyze_music_library())
+    for file in args.files:
+        started = time.perf_counter()
+        print(json.dumps(analyze_sync(file), indent=2))
+        print(f"{time.perf_counter() - started:.2f}s")
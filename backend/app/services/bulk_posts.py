@@ -0,0 +1,117 @@
+"""
+Bulk Posts Service - multi-row post writes that keep derived data consistent.
+
+Batch endpoints create or update many posts at once. Going through the ORM
+costs one INSERT/UPDATE per post; `app.core.bulk` does the same in a few
+multi-row statements but bypasses the Session flush hooks. This module
+wraps the bulk helpers and performs the hooks' work for the written rows.
+
+Architecture:
+    - `insert_posts()`: slide summary columns are computed per row
+      (`summarize_slides()`), posts are inserted with RETURNING, their
+      PostSlide rows follow in one more bulk INSERT, then rollup deltas
+      (`analytics_rollup.apply_bulk_changes()`), search documents
+      (`search_index.index_bulk_posts()`) and similarity signatures
+      (`post_similarity.index_bulk_posts()`) are written in the same
+      transaction.
+    - `update_posts()`: one UPDATE ... WHERE id IN (...) per chunk. The
+      previous values of rollup-tracked columns are read first (one SELECT)
+      so deltas can be applied; searchable columns are re-indexed and
+      re-signed.
+      `slide_data` is not accepted: slide edits go through the ORM.
+    - Values for tracked or searchable columns must be plain values, not
+      SQL expressions, since the new rollup/search state is computed in
+      Python. Other columns may use expressions (e.g. COALESCE).
+
+Usage:
+    from app.services.bulk_posts import insert_posts, update_posts
+
+    ids = await insert_posts(db, [{"user_id": 1, "title": "...", "slide_data": "[]"}, ...])
+    await update_posts(db, ids, {"status": "scheduled"})
+"""
+
+import logging
+from typing import Sequence
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.bulk import bulk_insert, bulk_update, chunked, DEFAULT_CHUNK_SIZE
+from app.models.post import Post
+from app.models.post_slide import PostSlide
+from app.services import analytics_rollup, post_similarity, search_index
+from app.services.slide_summary import SUMMARY_COLUMNS, parse_slides, slide_row_values, summarize_slides
+
+logger = logging.getLogger(__name__)
+
+
+def _pick(row: dict, columns: Sequence[str]) -> dict:
+    return {column: row.get(column) for column in columns}
+
+
+async def insert_posts(db: AsyncSession, rows: list[dict]) -> list[int]:
+    """Insert posts (column dicts) with summaries, slide rows, rollups and search documents.
+
+    Returns the new post ids in row order; each row dict also gets its `id`.
+    """
+    if not rows:
+        return []
+    for row in rows:
+        row.setdefault("slide_data", "[]")
+        row.update(summarize_slides(row["slide_data"]))
+
+    ids = await bulk_insert(db, Post, rows)
+
+    slide_rows = [
+        {"post_id": row["id"], "slide_index": index, **slide_row_values(slide)}
+        for row in rows
+        for index, slide in enumerate(parse_slides(row["slide_data"]))
+    ]
+    if slide_rows:
+        await bulk_insert(db, PostSlide, slide_rows)
+
+    await analytics_rollup.apply_bulk_changes(
+        db, added=[_pick(row, analytics_rollup.TRACKED_COLUMNS) for row in rows],
+    )
+    documents = [_pick(row, search_index.POST_COLUMNS) for row in rows]
+    await search_index.index_bulk_posts(db, documents)
+    await post_similarity.index_bulk_posts(db, documents)
+    logger.info(f"Bulk inserted {len(ids)} post(s) with {len(slide_rows)} slide row(s)")
+    return ids
+
+
+async def update_posts(db: AsyncSession, ids: Sequence[int], values: dict) -> int:
+    """Set `values` on the posts in `ids`, keeping rollups and the search index current.
+
+    Returns the number of updated posts.
+    """
+    if not ids or not values:
+        return 0
+    if "slide_data" in values or any(column in values for column in SUMMARY_COLUMNS):
+        raise ValueError("Slide changes must go through the ORM (slide_summary hook)")
+
+    tracked = analytics_rollup.TRACKED_COLUMNS
+    searchable = [c for c in search_index.POST_COLUMNS if c in values]
+    previous = []
+    if any(column in values for column in tracked):
+        for chunk in chunked(list(ids), DEFAULT_CHUNK_SIZE):
+            result = await db.execute(select(*(getattr(Post, c) for c in tracked)).where(Post.id.in_(chunk)))
+            previous.extend(dict(row._mapping) for row in result)
+
+    count = await bulk_update(db, Post, ids, values)
+
+    if previous:
+        changed = {column: value for column, value in values.items() if column in tracked}
+        await analytics_rollup.apply_bulk_changes(
+            db, added=[{**row, **changed} for row in previous], removed=previous,
+        )
+    if searchable:
+        documents = []
+        for chunk in chunked(list(ids), DEFAULT_CHUNK_SIZE):
+            result = await db.execute(
+                select(*(getattr(Post, c) for c in search_index.POST_COLUMNS)).where(Post.id.in_(chunk))
+            )
+            documents.extend(dict(row._mapping) for row in result)
+        await search_index.index_bulk_posts(db, documents)
+        await post_similarity.index_bulk_posts(db, documents)
+    return count
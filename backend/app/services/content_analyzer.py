@@ -8,18 +8,48 @@ Analyzes uploaded images/videos using Gemini Vision API to suggest:
 - Caption seeds (starting points for captions)
 - Best platforms for the content
 - Detected country (if recognizable landmarks/flags/symbols)
+
+Architecture:
+    - Images are downscaled to ANALYSIS_MAX_EDGE and re-encoded as JPEG before
+      upload; videos are reduced to a few evenly spaced keyframes (ffmpeg).
+    - AI results are cached in-process by content hash (+ uploader context),
+      so re-submitted files skip the Gemini round trip.
+    - `analyze_media_batch()` runs many analyses through a bounded worker pool
+      and yields results as they complete (used by the bulk inbox ingestion).
 """
 
 import asyncio
+import hashlib
+import io
 import json
 import logging
+import shutil
+import subprocess
+from collections import OrderedDict
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import AsyncIterator, Hashable, Optional
 
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Longest image edge sent to Gemini Vision (plenty for scene/landmark detection)
+ANALYSIS_MAX_EDGE = 1024
+
+# Keyframes sampled per video
+VIDEO_KEYFRAME_COUNT = 4
+
+# Max concurrent Gemini analyses in a batch
+MAX_CONCURRENT_ANALYSES = 4
+
+# Cached AI results (content hash -> analysis dict)
+ANALYSIS_CACHE_SIZE = 256
+
+FFMPEG_AVAILABLE = shutil.which("ffmpeg") is not None
+
+_analysis_cache: "OrderedDict[str, dict]" = OrderedDict()
+
 # Country detection keywords/landmarks
 COUNTRY_INDICATORS = {
     "usa": [
@@ -118,7 +148,20 @@ async def analyze_media_with_ai(
     # Try AI analysis first
     if settings.GEMINI_API_KEY:
         try:
-            return await _analyze_with_gemini(file_path, file_type, source_description)
+            loop = asyncio.get_event_loop()
+            cache_key = await loop.run_in_executor(
+                None, _content_hash, file_path, source_description,
+            )
+            cached = _analysis_cache.get(cache_key)
+            if cached is not None:
+                _analysis_cache.move_to_end(cache_key)
+                return dict(cached)
+
+            result = await _analyze_with_gemini(file_path, file_type, source_description)
+            _analysis_cache[cache_key] = result
+            while len(_analysis_cache) > ANALYSIS_CACHE_SIZE:
+                _analysis_cache.popitem(last=False)
+            return dict(result)
         except Exception as e:
             logger.warning(f"Gemini Vision analysis failed, using rule-based fallback: {e}")
 
@@ -126,6 +169,114 @@ async def analyze_media_with_ai(
     return _analyze_rule_based(file_path, file_type, source_description)
 
 
+async def analyze_media_batch(
+    items: list[tuple[Hashable, str, str, Optional[str]]],
+    concurrency: int = MAX_CONCURRENT_ANALYSES,
+) -> AsyncIterator[tuple[Hashable, dict | Exception]]:
+    """Analyze many media files, yielding results in completion order.
+
+    Args:
+        items: (key, file_path, file_type, source_description) tuples; the key
+            is passed through so callers can match results to their records
+        concurrency: Max analyses in flight at once
+
+    Yields:
+        (key, analysis dict) or (key, exception) as each analysis finishes
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(key, file_path, file_type, source_description):
+        async with semaphore:
+            try:
+                return key, await analyze_media_with_ai(file_path, file_type, source_description)
+            except Exception as e:
+                return key, e
+
+    tasks = [asyncio.ensure_future(run(*item)) for item in items]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Consumer went away (e.g. client disconnected): stop pending work
+        for task in tasks:
+            task.cancel()
+
+
+def _content_hash(file_path: str, source_description: Optional[str] = None) -> str:
+    """SHA-256 of the file contents (streamed) plus the uploader context."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    digest.update((source_description or "").encode("utf-8"))
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=4)
+def _get_genai_client(api_key: str):
+    """Shared Gemini client (one per API key) for all analysis threads."""
+    from google import genai
+
+    return genai.Client(api_key=api_key)
+
+
+def _prepare_image(path: Path, file_type: str) -> tuple[str, bytes]:
+    """Downscale an image to ANALYSIS_MAX_EDGE and re-encode it as JPEG."""
+    try:
+        from PIL import Image, ImageOps
+
+        with Image.open(path) as img:
+            img.draft("RGB", (ANALYSIS_MAX_EDGE, ANALYSIS_MAX_EDGE))  # JPEG: decode at reduced scale
+            img = ImageOps.exif_transpose(img).convert("RGB")
+            img.thumbnail((ANALYSIS_MAX_EDGE, ANALYSIS_MAX_EDGE))
+            buf = io.BytesIO()
+            img.save(buf, format="JPEG", quality=85)
+            return "image/jpeg", buf.getvalue()
+    except Exception as e:
+        logger.warning(f"Image downscale failed for {path.name}, sending original: {e}")
+        return file_type, path.read_bytes()
+
+
+def _probe_duration(path: Path) -> Optional[float]:
+    """Video duration in seconds via ffprobe (None if unknown)."""
+    try:
+        proc = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+             "-of", "default=noprint_wrappers=1:nokey=1", str(path)],
+            capture_output=True, text=True, timeout=15,
+        )
+        return float(proc.stdout.strip()) if proc.returncode == 0 else None
+    except (ValueError, subprocess.SubprocessError, OSError):
+        return None
+
+
+def _sample_video_keyframes(path: Path, count: int = VIDEO_KEYFRAME_COUNT) -> list[bytes]:
+    """Extract `count` evenly spaced JPEG frames (fast input seeking, one frame each)."""
+    if not FFMPEG_AVAILABLE:
+        return []
+
+    duration = _probe_duration(path)
+    if duration and duration > 0:
+        timestamps = [duration * (i + 0.5) / count for i in range(count)]
+    else:
+        timestamps = [0.0]
+
+    frames = []
+    for ts in timestamps:
+        try:
+            proc = subprocess.run(
+                ["ffmpeg", "-v", "error", "-ss", f"{ts:.2f}", "-i", str(path),
+                 "-frames:v", "1", "-vf", f"scale='min({ANALYSIS_MAX_EDGE},iw)':-2",
+                 "-f", "image2pipe", "-vcodec", "mjpeg", "-q:v", "4", "-"],
+                capture_output=True, timeout=20,
+            )
+            if proc.returncode == 0 and proc.stdout:
+                frames.append(proc.stdout)
+        except (subprocess.SubprocessError, OSError) as e:
+            logger.warning(f"Keyframe extraction failed at {ts:.1f}s for {path.name}: {e}")
+    return frames
+
+
 async def _analyze_with_gemini(
     file_path: str,
     file_type: str,
@@ -152,18 +303,14 @@ def _analyze_with_gemini_sync(
     source_description: Optional[str] = None,
 ) -> dict:
     """Synchronous Gemini Vision API call (runs in thread pool)."""
-    from google import genai
     from google.genai import types
 
-    client = genai.Client(api_key=settings.GEMINI_API_KEY)
+    client = _get_genai_client(settings.GEMINI_API_KEY)
 
-    # Read the file
     path = Path(file_path)
     if not path.exists():
         raise FileNotFoundError(f"Media file not found: {file_path}")
 
-    file_bytes = path.read_bytes()
-
     context_hint = ""
     if source_description:
         context_hint = f"\nKontext vom Schueler/Uploader: {source_description}"
@@ -193,33 +340,28 @@ Beachte:
 - Land erkennen anhand von Flaggen, Landmarken, Schuluniformen, Natur etc.
 - Falls kein Land erkennbar: detected_country = null"""
 
-    is_image = file_type.startswith("image/")
-
-    if is_image:
-        response = client.models.generate_content(
-            model="gemini-2.5-flash-preview-05-20",
-            contents=[
-                types.Content(
-                    role="user",
-                    parts=[
-                        types.Part(text=prompt),
-                        types.Part(
-                            inline_data=types.Blob(
-                                mime_type=file_type,
-                                data=file_bytes,
-                            )
-                        ),
-                    ],
-                )
-            ],
-        )
+    # Reduced media payload: downscaled image or sampled video keyframes
+    if file_type.startswith("image/"):
+        media_parts = [_prepare_image(path, file_type)]
     else:
-        # For video, just use the prompt with description
-        video_prompt = prompt.replace("dieses Bild/Video", "dieses Video (basierend auf dem Dateinamen und Kontext)")
-        response = client.models.generate_content(
-            model="gemini-2.5-flash-preview-05-20",
-            contents=[types.Content(role="user", parts=[types.Part(text=video_prompt)])],
-        )
+        media_parts = [("image/jpeg", frame) for frame in _sample_video_keyframes(path)]
+        if media_parts:
+            prompt = prompt.replace(
+                "dieses Bild/Video",
+                f"dieses Video (anhand von {len(media_parts)} gleichmaessig verteilten Standbildern)",
+            )
+        else:
+            prompt = prompt.replace("dieses Bild/Video", "dieses Video (basierend auf dem Dateinamen und Kontext)")
+
+    parts = [types.Part(text=prompt)]
+    parts.extend(
+        types.Part(inline_data=types.Blob(mime_type=mime_type, data=data))
+        for mime_type, data in media_parts
+    )
+    response = client.models.generate_content(
+        model="gemini-2.5-flash-preview-05-20",
+        contents=[types.Content(role="user", parts=parts)],
+    )
 
     # Parse JSON from response
     text = response.text.strip()
@@ -18,6 +18,7 @@ import asyncio
 import json
 import logging
 import uuid
+from functools import lru_cache
 from typing import Optional
 
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -65,14 +66,54 @@ PLATFORM_RULES = {
 }
 
 
+# Max concurrent AI adaptations per multiply request
+MAX_CONCURRENT_ADAPTATIONS = 4
+
+
+class SourceView:
+    """Parsed, ORM-free snapshot of the source post shared by all targets.
+
+    Built once per multiply request so slides/captions/hashtags are parsed a
+    single time and worker threads never touch the (non-thread-safe) ORM object.
+    """
+
+    __slots__ = (
+        "title", "platform", "category", "country", "tone", "cta_text",
+        "caption", "hashtags", "hashtag_list", "slide_headlines",
+    )
+
+    def __init__(self, post: Post):
+        self.title = post.title
+        self.platform = post.platform
+        self.category = post.category
+        self.country = post.country
+        self.tone = post.tone
+        self.cta_text = post.cta_text
+        self.caption = post.caption_instagram or post.caption_tiktok or ""
+        self.hashtags = post.hashtags_instagram or post.hashtags_tiktok or ""
+        self.hashtag_list = [t.strip() for t in self.hashtags.split("#") if t.strip()]
+        try:
+            slides = json.loads(post.slide_data or "[]")
+        except (json.JSONDecodeError, TypeError):
+            slides = []
+        self.slide_headlines = [
+            s.get("headline") for s in slides
+            if isinstance(s, dict) and s.get("headline")
+        ]
+
+
 async def multiply_content(
     source_post: Post,
     target_formats: list[str],
     user_id: int,
     db: AsyncSession,
-) -> list[dict]:
+) -> tuple[list[dict], list[dict]]:
     """Generate derivative posts from a source post.
 
+    Adaptations for all target formats run concurrently (bounded by
+    MAX_CONCURRENT_ADAPTATIONS); the derivatives and the source's
+    linked_post_group_id are then written in a single flush.
+
     Args:
         source_post: The original Post object to multiply
         target_formats: List of target platform/format strings
@@ -80,12 +121,16 @@ async def multiply_content(
         db: Database session
 
     Returns:
-        List of dicts with new post info: {post_id, platform, title, status}
+        Tuple of (derivatives, failures):
+            derivatives: dicts with new post info {post_id, platform, title, status, fallback};
+                fallback is True when the rule-based adaptation was used instead of AI
+            failures: dicts {platform, error} for formats that could not be created
     """
-    derivatives = []
     group_id = source_post.linked_post_group_id or str(uuid.uuid4())
+    source = SourceView(source_post)
 
-    for target_format in target_formats:
+    formats = []
+    for target_format in dict.fromkeys(target_formats):
         # Skip if same as source
         if target_format == source_post.platform:
             continue
@@ -93,52 +138,78 @@ async def multiply_content(
         if target_format not in PLATFORM_RULES:
             logger.warning(f"Unknown target format: {target_format}, skipping")
             continue
+        formats.append(target_format)
 
-        try:
-            derivative = await _create_derivative(
-                source_post=source_post,
-                target_format=target_format,
-                user_id=user_id,
-                group_id=group_id,
-                db=db,
-            )
-            derivatives.append(derivative)
-        except Exception as e:
-            logger.error(f"Failed to create {target_format} derivative: {e}")
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_ADAPTATIONS)
+
+    async def adapt(target_format: str) -> tuple[dict, bool]:
+        async with semaphore:
+            return await _adapt_for_format(source, target_format)
+
+    results = await asyncio.gather(*(adapt(f) for f in formats), return_exceptions=True)
+
+    new_posts: list[tuple[str, Post, bool]] = []
+    failures = []
+    for target_format, result in zip(formats, results):
+        if isinstance(result, BaseException):
+            logger.error(f"Failed to create {target_format} derivative: {result}")
+            failures.append({"platform": target_format, "error": str(result)[:200]})
+            continue
+        adapted, fallback = result
+        new_posts.append((target_format, _build_derivative(source_post, target_format, adapted, user_id, group_id), fallback))
+
+    db.add_all([post for _, post, _ in new_posts])
 
     # Update source post group ID if it was new
     if source_post.linked_post_group_id != group_id:
         source_post.linked_post_group_id = group_id
         db.add(source_post)
 
-    return derivatives
+    await db.flush()  # One round trip for all derivatives (+ group id)
 
+    derivatives = [
+        {
+            "post_id": post.id,
+            "platform": target_format,
+            "title": post.title,
+            "status": "draft",
+            "fallback": fallback,
+        }
+        for target_format, post, fallback in new_posts
+    ]
+    return derivatives, failures
 
-async def _create_derivative(
-    source_post: Post,
-    target_format: str,
-    user_id: int,
-    group_id: str,
-    db: AsyncSession,
-) -> dict:
-    """Create a single derivative post adapted for the target format."""
+
+async def _adapt_for_format(source: SourceView, target_format: str) -> tuple[dict, bool]:
+    """Adapt the source content for one target format (AI with rule-based fallback).
+
+    Returns (adapted fields, whether the rule-based fallback was used).
+    """
     rules = PLATFORM_RULES[target_format]
 
     # Try AI-powered adaptation first
     if settings.GEMINI_API_KEY:
         try:
-            adapted = await _adapt_with_ai(source_post, target_format, rules)
+            return await _adapt_with_ai(source, target_format, rules), False
         except Exception as e:
-            logger.warning(f"AI adaptation failed for {target_format}: {e}")
-            adapted = _adapt_rule_based(source_post, target_format, rules)
+            logger.warning(f"AI adaptation failed for {target_format}, using rule-based fallback: {e}")
     else:
-        adapted = _adapt_rule_based(source_post, target_format, rules)
+        logger.warning(f"No GEMINI_API_KEY set, using rule-based fallback for {target_format}")
+    return _adapt_rule_based(source, target_format, rules), True
+
 
+def _build_derivative(
+    source_post: Post,
+    target_format: str,
+    adapted: dict,
+    user_id: int,
+    group_id: str,
+) -> Post:
+    """Create (unsaved) derivative Post for the target format."""
     # Determine the right platform string
     platform = target_format if target_format != "carousel" else "instagram_feed"
 
-    # Create the derivative post
-    new_post = Post(
+    return Post(
         user_id=user_id,
         template_id=source_post.template_id,
         category=adapted.get("category", source_post.category),
@@ -161,19 +232,9 @@ async def _create_derivative(
         linked_post_group_id=group_id,
     )
 
-    db.add(new_post)
-    await db.flush()  # Get the ID
-
-    return {
-        "post_id": new_post.id,
-        "platform": target_format,
-        "title": new_post.title,
-        "status": "draft",
-    }
-
 
 async def _adapt_with_ai(
-    source_post: Post,
+    source: SourceView,
     target_format: str,
     rules: dict,
 ) -> dict:
@@ -183,7 +244,7 @@ async def _adapt_with_ai(
         loop.run_in_executor(
             None,
             _adapt_with_ai_sync,
-            source_post,
+            source,
             target_format,
             rules,
         ),
@@ -191,33 +252,41 @@ async def _adapt_with_ai(
     )
 
 
+@lru_cache(maxsize=4)
+def _get_genai_client(api_key: str):
+    """Shared Gemini client (one per API key) for all adaptation threads."""
+    from google import genai
+
+    return genai.Client(api_key=api_key)
+
+
 def _adapt_with_ai_sync(
-    source_post: Post,
+    source: SourceView,
     target_format: str,
     rules: dict,
 ) -> dict:
     """Synchronous Gemini call for content adaptation (runs in thread pool)."""
-    from google import genai
     from google.genai import types
 
-    client = genai.Client(api_key=settings.GEMINI_API_KEY)
+    client = _get_genai_client(settings.GEMINI_API_KEY)
 
-    source_caption = source_post.caption_instagram or source_post.caption_tiktok or ""
-    source_hashtags = source_post.hashtags_instagram or source_post.hashtags_tiktok or ""
+    slide_line = ""
+    if source.slide_headlines:
+        slide_line = f"\n- Slides: {' | '.join(source.slide_headlines[:8])[:300]}"
 
     prompt = f"""Du bist ein Social-Media-Experte fuer TREFF Sprachreisen (Highschool-Aufenthalte im Ausland).
 
 Adaptiere diesen Social-Media-Post fuer das Format: {target_format}
 
 ORIGINAL-POST:
-- Plattform: {source_post.platform}
-- Titel: {source_post.title or 'Kein Titel'}
-- Kategorie: {source_post.category}
-- Land: {source_post.country or 'Nicht angegeben'}
-- Caption: {source_caption[:500]}
-- Hashtags: {source_hashtags[:200]}
-- CTA: {source_post.cta_text or 'Kein CTA'}
-- Ton: {source_post.tone}
+- Plattform: {source.platform}
+- Titel: {source.title or 'Kein Titel'}
+- Kategorie: {source.category}
+- Land: {source.country or 'Nicht angegeben'}
+- Caption: {source.caption[:500]}
+- Hashtags: {source.hashtags[:200]}
+- CTA: {source.cta_text or 'Kein CTA'}
+- Ton: {source.tone}{slide_line}
 
 ZIELFORMAT-REGELN:
 - Max Caption: {rules['max_caption_length']} Zeichen
@@ -233,7 +302,7 @@ Antworte NUR mit einem JSON-Objekt (kein Markdown):
   "hashtags_instagram": "Adaptierte Instagram Hashtags als String",
   "hashtags_tiktok": "Adaptierte TikTok Hashtags als String",
   "cta_text": "Angepasster CTA (max 25 Zeichen)",
-  "category": "{source_post.category}"
+  "category": "{source.category}"
 }}"""
 
     response = client.models.generate_content(
@@ -251,12 +320,12 @@ Antworte NUR mit einem JSON-Objekt (kein Markdown):
 
 
 def _adapt_rule_based(
-    source_post: Post,
+    source: SourceView,
     target_format: str,
     rules: dict,
 ) -> dict:
     """Rule-based fallback for content adaptation."""
-    source_caption = source_post.caption_instagram or source_post.caption_tiktok or ""
+    source_caption = source.caption
     max_len = rules["optimal_caption_length"]
 
     # Truncate caption for shorter formats
@@ -266,10 +335,9 @@ def _adapt_rule_based(
         adapted_caption = source_caption
 
     # Adapt hashtags count
-    source_tags = source_post.hashtags_instagram or source_post.hashtags_tiktok or ""
-    tag_list = [t.strip() for t in source_tags.split("#") if t.strip()]
+    source_tags = source.hashtags
     min_tags, max_tags = rules["hashtag_count"]
-    adapted_tags = tag_list[:max_tags]
+    adapted_tags = source.hashtag_list[:max_tags]
     adapted_tags_str = " ".join(f"#{t}" for t in adapted_tags) if adapted_tags else source_tags
 
     # Create adapted title
@@ -280,12 +348,12 @@ def _adapt_rule_based(
         "carousel": "Carousel",
     }.get(target_format, target_format)
 
-    title = f"{source_post.title or 'Post'} - {format_label}-Version"
+    title = f"{source.title or 'Post'} - {format_label}-Version"
 
     result = {
         "title": title,
-        "category": source_post.category,
-        "cta_text": source_post.cta_text,
+        "category": source.category,
+        "cta_text": source.cta_text,
         "hashtags_instagram": adapted_tags_str if target_format != "tiktok" else None,
         "hashtags_tiktok": adapted_tags_str if target_format in ("tiktok",) else None,
     }
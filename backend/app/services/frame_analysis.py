@@ -0,0 +1,360 @@
+"""
+Frame Analysis Service - single-pass keyframe scoring for video thumbnail candidates.
+
+Thumbnail extraction used to start one ffmpeg process per candidate (a
+seek and a full-resolution JPEG each) and rank the frames by JPEG file
+size. Here the video is decoded once: ffmpeg samples it with an `fps`
+filter, downscales the samples and pipes them as raw RGB, and every sample
+is scored while the next one is decoded. Only the chosen frames are
+written at full resolution.
+
+Architecture:
+    - Probe: one ffprobe call for duration and frame size.
+    - Sampling: SAMPLES_PER_CANDIDATE samples per requested frame (between
+      MIN_SAMPLES and MAX_SAMPLES), evenly spread over the video, decoded at
+      ANALYSIS_WIDTH px width. The pipe is read one frame at a time, so
+      memory is independent of the video length.
+    - Scores (0..1, Pillow, no extra dependencies):
+        sharpness      variance of the Laplacian of the luma channel
+        exposure       mean luma near mid-grey, few clipped pixels
+        colorfulness   mean HSV saturation
+        scene_change   mean difference to the previous sample (new shots)
+      combined with SCORE_WEIGHTS.
+    - Dedupe: 64-bit difference hash (dHash) per sample; a candidate within
+      DUPLICATE_DISTANCE bits of an already chosen frame is skipped, so a
+      static shot does not fill the whole grid.
+    - Output: the top-K timestamps are extracted by a single ffmpeg process
+      (one fast input seek per frame) as full-resolution JPEGs.
+    - Cache: the result is stored as JSON next to the frames, keyed by
+      (asset, source size/mtime, frame count, ANALYSIS_VERSION); a repeat
+      request for an unchanged asset reads the JSON. On Vercel the base64
+      `file_data` is written to VIDEO_CACHE_DIR once per asset instead of
+      on every call.
+    - The analysis (ffmpeg + scoring) runs in the shared render pool of
+      app.services.image_renderer, off the event loop.
+
+Usage:
+    from app.services.frame_analysis import extract_best_frames
+
+    result = await extract_best_frames(db, asset, frame_count=8)
+    # {"frames": [{"timestamp", "filename", "score", "metrics"}, ...], "duration": 42.0}
+
+    # Analyse a local video file and print the ranking:
+    python -m app.services.frame_analysis video.mp4 [--frames 8]
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import time
+from pathlib import Path
+from typing import Optional
+
+from PIL import Image, ImageChops, ImageFilter, ImageStat
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.paths import APP_DIR, get_upload_dir
+from app.models.asset import Asset
+
+logger = logging.getLogger(__name__)
+
+# Bump when scoring or selection changes (invalidates cached analyses)
+ANALYSIS_VERSION = 1
+
+THUMBNAIL_DIR = get_upload_dir("thumbnails")
+VIDEO_CACHE_DIR = get_upload_dir("video_cache")
+
+# Width of the decoded analysis samples (height follows the aspect ratio)
+ANALYSIS_WIDTH = 160
+SAMPLES_PER_CANDIDATE = 6
+MIN_SAMPLES = 24
+MAX_SAMPLES = 120
+
+ANALYSIS_TIMEOUT = 120
+EXTRACT_TIMEOUT = 60
+
+SCORE_WEIGHTS = {"sharpness": 0.45, "exposure": 0.25, "colorfulness": 0.2, "scene_change": 0.1}
+
+# Laplacian variance treated as "fully sharp" at ANALYSIS_WIDTH
+SHARPNESS_REFERENCE = 900.0
+# Luma values counted as clipped shadows / highlights
+CLIP_LOW, CLIP_HIGH = 12, 243
+# Max. dHash Hamming distance of two frames considered the same shot
+DUPLICATE_DISTANCE = 10
+
+LAPLACIAN = ImageFilter.Kernel((3, 3), [0, 1, 0, 1, -4, 1, 0, 1, 0], scale=1, offset=128)
+
+
+# ── Source files ──
+
+def _source_path(asset: Asset) -> Optional[Path]:
+    """Local file of an asset (absolute path or relative to static/)."""
+    candidates = [get_upload_dir("assets") / asset.filename]
+    if asset.file_path:
+        candidates += [Path(asset.file_path), APP_DIR / "static" / asset.file_path.lstrip("/")]
+    for path in candidates:
+        if path.is_file():
+            return path
+    return None
+
+
+async def resolve_video(db: AsyncSession, asset: Asset) -> Optional[Path]:
+    """Local video file of an asset; base64 `file_data` is materialized once per asset."""
+    path = _source_path(asset)
+    if path:
+        return path
+    suffix = Path(asset.filename).suffix or ".mp4"
+    cached = VIDEO_CACHE_DIR / f"asset_{asset.id}_{asset.file_size or 0}{suffix}"
+    if cached.is_file():
+        return cached
+    file_data = (await db.execute(select(Asset.file_data).where(Asset.id == asset.id))).scalar_one_or_none()
+    if not file_data:
+        return None
+    temp = cached.with_suffix(f".{os.getpid()}.tmp")
+    temp.write_bytes(base64.b64decode(file_data))
+    os.replace(temp, cached)
+    return cached
+
+
+# ── Probing ──
+
+def probe_video(path: Path) -> dict:
+    """Duration (s) and frame size of the first video stream; zeros if unreadable."""
+    try:
+        result = subprocess.run(
+            [
+                "ffprobe", "-v", "quiet",
+                "-select_streams", "v:0",
+                "-show_entries", "format=duration:stream=width,height",
+                "-of", "json",
+                str(path),
+            ],
+            capture_output=True, text=True, timeout=10,
+        )
+        data = json.loads(result.stdout or "{}")
+        stream = (data.get("streams") or [{}])[0]
+        return {
+            "duration": float(data.get("format", {}).get("duration", 0) or 0),
+            "width": int(stream.get("width") or 0),
+            "height": int(stream.get("height") or 0),
+        }
+    except Exception as e:
+        logger.error(f"ffprobe failed for {path}: {e}")
+        return {"duration": 0.0, "width": 0, "height": 0}
+
+
+# ── Scoring ──
+
+def dhash(gray: Image.Image) -> int:
+    """64-bit difference hash: brighter/darker bits of horizontally adjacent pixels."""
+    pixels = list(gray.resize((9, 8), Image.Resampling.BILINEAR).getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return bits
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def score_frame(img: Image.Image, previous: Optional[Image.Image]) -> tuple[dict, Image.Image, int]:
+    """Metrics of one RGB sample; also returns its luma image and dHash."""
+    gray = img.convert("L")
+
+    # Kernel filters leave the 1 px border unfiltered: crop it off
+    laplacian = gray.filter(LAPLACIAN).crop((1, 1, gray.width - 1, gray.height - 1))
+    sharpness = min(1.0, ImageStat.Stat(laplacian).var[0] / SHARPNESS_REFERENCE)
+
+    histogram = gray.histogram()
+    total = sum(histogram) or 1
+    clipped = (sum(histogram[:CLIP_LOW]) + sum(histogram[CLIP_HIGH + 1:])) / total
+    mean = ImageStat.Stat(gray).mean[0]
+    exposure = max(0.0, (1 - abs(mean - 128) / 128) * (1 - clipped))
+
+    colorfulness = min(1.0, ImageStat.Stat(img.convert("HSV").getchannel("S")).mean[0] / 160)
+
+    scene_change = 0.0
+    if previous is not None:
+        scene_change = min(1.0, ImageStat.Stat(ImageChops.difference(gray, previous)).mean[0] / 64)
+
+    metrics = {
+        "sharpness": round(sharpness, 3),
+        "exposure": round(exposure, 3),
+        "colorfulness": round(colorfulness, 3),
+        "scene_change": round(scene_change, 3),
+    }
+    return metrics, gray, dhash(gray)
+
+
+def combined_score(metrics: dict) -> float:
+    return round(sum(metrics[name] * weight for name, weight in SCORE_WEIGHTS.items()), 3)
+
+
+def select_frames(samples: list[dict], count: int) -> list[dict]:
+    """Best `count` samples by score, skipping near-duplicates of chosen ones."""
+    chosen = []
+    for sample in sorted(samples, key=lambda s: s["score"], reverse=True):
+        if any(hamming(sample["hash"], c["hash"]) <= DUPLICATE_DISTANCE for c in chosen):
+            continue
+        chosen.append(sample)
+        if len(chosen) == count:
+            break
+    if len(chosen) < count:
+        # Very static video: fill up with the best remaining samples
+        rest = [s for s in sorted(samples, key=lambda s: s["score"], reverse=True) if s not in chosen]
+        chosen += rest[:count - len(chosen)]
+    return chosen
+
+
+# ── Decoding ──
+
+def _analysis_size(width: int, height: int) -> tuple[int, int]:
+    if width <= 0 or height <= 0:
+        width, height = 16, 9
+    return ANALYSIS_WIDTH, max(2, round(ANALYSIS_WIDTH * height / width / 2) * 2)
+
+
+def analyze_video_sync(path: str, duration: float, width: int, height: int, frame_count: int) -> list[dict]:
+    """Decode `path` once at low resolution and score every sample.
+
+    Returns one dict per sample (timestamp, score, metrics, hash); an empty
+    list if ffmpeg is missing or fails. Never raises, so the render pool
+    does not retry it inline.
+    """
+    samples_wanted = min(MAX_SAMPLES, max(MIN_SAMPLES, frame_count * SAMPLES_PER_CANDIDATE))
+    fps = samples_wanted / duration
+    w, h = _analysis_size(width, height)
+    frame_bytes = w * h * 3
+    cmd = [
+        "ffmpeg", "-v", "error", "-nostdin",
+        "-i", path,
+        "-an", "-sn",
+        "-vf", f"fps={fps:.6f}:start_time={0.5 / fps:.6f},scale={w}:{h}:flags=area",
+        "-frames:v", str(samples_wanted),
+        "-f", "rawvideo", "-pix_fmt", "rgb24", "pipe:1",
+    ]
+    started = time.monotonic()
+    samples = []
+    try:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    except FileNotFoundError:
+        logger.warning("ffmpeg not found, frame analysis unavailable")
+        return []
+    previous = None
+    try:
+        while True:
+            raw = proc.stdout.read(frame_bytes)
+            if len(raw) < frame_bytes:
+                break
+            if time.monotonic() - started > ANALYSIS_TIMEOUT:
+                logger.warning(f"Frame analysis of {path} timed out after {len(samples)} samples")
+                break
+            img = Image.frombytes("RGB", (w, h), raw)
+            metrics, previous, frame_hash = score_frame(img, previous)
+            samples.append({
+                "timestamp": round(min(duration, (len(samples) + 0.5) / fps), 2),
+                "score": combined_score(metrics),
+                "metrics": metrics,
+                "hash": frame_hash,
+            })
+    finally:
+        proc.kill()
+        proc.wait()
+    logger.info(f"Analysed {len(samples)} samples of {path} in {time.monotonic() - started:.2f}s")
+    return samples
+
+
+def write_frames_sync(path: str, frames: list[dict]) -> list[dict]:
+    """Write the chosen frames as full-resolution JPEGs with one ffmpeg process."""
+    cmd = ["ffmpeg", "-y", "-v", "error", "-nostdin"]
+    for frame in frames:
+        cmd += ["-ss", f"{frame['timestamp']:.3f}", "-i", path]
+    for index, frame in enumerate(frames):
+        cmd += ["-map", f"{index}:v:0", "-frames:v", "1", "-q:v", "2", str(THUMBNAIL_DIR / frame["filename"])]
+    try:
+        subprocess.run(cmd, capture_output=True, timeout=EXTRACT_TIMEOUT)
+    except Exception as e:
+        logger.warning(f"Full-resolution frame extraction failed: {e}")
+    return [f for f in frames if (THUMBNAIL_DIR / f["filename"]).exists()]
+
+
+def _analyze_and_extract(path: str, duration: float, width: int, height: int, frame_count: int, prefix: str) -> list[dict]:
+    samples = analyze_video_sync(path, duration, width, height, frame_count)
+    chosen = select_frames(samples, frame_count)
+    for index, frame in enumerate(chosen):
+        frame["filename"] = f"{prefix}_{index:03d}.jpg"
+        del frame["hash"]
+    return write_frames_sync(path, chosen) if chosen else []
+
+
+# ── Entry point ──
+
+def _cache_key(asset: Asset, path: Path, frame_count: int) -> str:
+    stat = path.stat()
+    raw = f"{ANALYSIS_VERSION}|{asset.id}|{stat.st_size}|{stat.st_mtime_ns}|{frame_count}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+
+
+def _load_cached(cache_file: Path) -> Optional[dict]:
+    try:
+        result = json.loads(cache_file.read_text())
+    except (OSError, ValueError):
+        return None
+    if all((THUMBNAIL_DIR / f["filename"]).exists() for f in result["frames"]):
+        return result
+    return None
+
+
+async def extract_best_frames(db: AsyncSession, asset: Asset, frame_count: int = 8) -> Optional[dict]:
+    """Best `frame_count` frames of a video asset, best first (cached per asset).
+
+    Returns None if the video file is not accessible; `duration` is 0 if
+    it could not be probed.
+    """
+    from app.services.image_renderer import run_in_render_pool
+
+    path = await resolve_video(db, asset)
+    if not path:
+        return None
+    key = _cache_key(asset, path, frame_count)
+    cache_file = THUMBNAIL_DIR / f"analysis_{asset.id}_{key}.json"
+    cached = _load_cached(cache_file)
+    if cached:
+        return {**cached, "cached": True}
+
+    info = await asyncio.to_thread(probe_video, path)
+    if info["duration"] <= 0:
+        return {"frames": [], "duration": 0.0, "cached": False}
+    frame_count = min(frame_count, max(3, int(info["duration"])))
+    frames = await run_in_render_pool(
+        _analyze_and_extract, str(path), info["duration"], info["width"], info["height"],
+        frame_count, f"frame_{asset.id}_{key}",
+    )
+    result = {"frames": frames, "duration": round(info["duration"], 2)}
+    if frames:
+        cache_file.write_text(json.dumps(result))
+    return {**result, "cached": False}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Score the frames of a video and print the best ones")
+    parser.add_argument("video")
+    parser.add_argument("--frames", type=int, default=8)
+    args = parser.parse_args()
+
+    info = probe_video(Path(args.video))
+    print(f"duration {info['duration']:.2f}s, {info['width']}x{info['height']}")
+    started = time.perf_counter()
+    samples = analyze_video_sync(args.video, info["duration"], info["width"], info["height"], args.frames)
+    print(f"{len(samples)} samples analysed in {(time.perf_counter() - started) * 1000:.0f} ms")
+    for frame in select_frames(samples, args.frames):
+        print(f"{frame['timestamp']:8.2f}s  score {frame['score']:.3f}  {frame['metrics']}")
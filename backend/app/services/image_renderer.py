@@ -0,0 +1,387 @@
+"""
+Local Image Renderer - fast Pillow fallback for AI image generation/editing.
+
+Used when no Gemini API key is configured (or Gemini fails) to produce the
+branded placeholder, style-transfer and outpainting previews.
+
+Architecture:
+    - Gradients and fade masks are built from 1-pixel-wide ramps (one Python
+      loop over a single row/column) and stretched with a NEAREST resize, so
+      Pillow fills the full frame in C instead of thousands of draw calls.
+    - Fonts are resolved once per (path, size) via a process-wide cache.
+    - Decorative outlines are drawn and blurred in single-channel masks
+      cropped to each shape's bounding box instead of blurring the full frame.
+    - Rendered placeholders are memoized by (prompt, width, height).
+    - CPU-bound rendering runs in a small process pool so the event loop
+      is never blocked (threads are used on Vercel, where forking is unreliable).
+      The pool is shared with app.services.post_renderer (`run_in_render_pool`).
+
+Usage:
+    from app.services.image_renderer import render_placeholder
+
+    png_bytes = await render_placeholder(prompt, 1080, 1350)
+
+Benchmark:
+    python -m app.services.image_renderer
+"""
+
+import asyncio
+import io
+import logging
+import os
+import random
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Optional
+
+from PIL import Image, ImageChops, ImageDraw, ImageEnhance, ImageFilter, ImageFont, ImageOps
+
+from app.core.paths import IS_VERCEL
+
+logger = logging.getLogger(__name__)
+
+# Font candidates in order of preference (macOS dev machines, then Linux/Vercel)
+FONT_REGULAR_PATHS = [
+    "/System/Library/Fonts/Helvetica.ttc",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+]
+FONT_BOLD_PATHS = [
+    "/System/Library/Fonts/Helvetica.ttc",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+]
+
+# TREFF brand colors
+TREFF_BLUE = (59, 122, 177)  # #3B7AB1
+TREFF_YELLOW = (253, 208, 0)  # #FDD000
+DARK_BG = (26, 26, 46)  # #1A1A2E
+
+# Placeholder memo (parent process): 4K PNGs are a few hundred KB each
+PLACEHOLDER_CACHE_SIZE = 16
+# Worker processes for CPU-bound rendering
+MAX_RENDER_WORKERS = 2
+
+_placeholder_cache: "OrderedDict[tuple[str, int, int], bytes]" = OrderedDict()
+_executor: Optional[Executor] = None
+
+
+# ── Font cache ──
+
+@lru_cache(maxsize=64)
+def load_font(path: str, size: int) -> Optional[ImageFont.FreeTypeFont]:
+    """Load a TrueType font once per (path, size). Returns None if unavailable."""
+    try:
+        return ImageFont.truetype(path, size)
+    except (OSError, IOError):
+        return None
+
+
+def get_font(size: int, bold: bool = False) -> ImageFont.ImageFont:
+    """Return the first available system font at the given size (cached)."""
+    for path in (FONT_BOLD_PATHS if bold else FONT_REGULAR_PATHS):
+        font = load_font(path, size)
+        if font is not None:
+            return font
+    return _default_font()
+
+
+@lru_cache(maxsize=1)
+def _default_font() -> ImageFont.ImageFont:
+    return ImageFont.load_default()
+
+
+# ── Vectorized primitives ──
+
+def vertical_gradient(width: int, height: int, top: tuple, bottom: tuple) -> Image.Image:
+    """Build a top-to-bottom RGB gradient from a single 1px column."""
+    column = bytearray(height * 3)
+    for y in range(height):
+        ratio = y / height
+        column[y * 3] = int(top[0] * (1 - ratio) + bottom[0] * ratio)
+        column[y * 3 + 1] = int(top[1] * (1 - ratio) + bottom[1] * ratio)
+        column[y * 3 + 2] = int(top[2] * (1 - ratio) + bottom[2] * ratio)
+    strip = Image.frombytes("RGB", (1, height), bytes(column))
+    return strip.resize((width, height), Image.NEAREST)
+
+
+def _edge_ramp(length: int, fade: int) -> bytes:
+    """Alpha ramp 0..255 over `fade` pixels from both ends of a line."""
+    return bytes(
+        255 if min(i, length - 1 - i) >= fade else int(255 * (min(i, length - 1 - i) / fade))
+        for i in range(length)
+    )
+
+
+def edge_fade_mask(width: int, height: int, fade: int) -> Image.Image:
+    """Mask that fades from 0 at the border to 255 `fade` pixels inwards.
+
+    Equivalent to drawing `fade` nested rectangle outlines, built as the
+    per-pixel minimum of a horizontal and a vertical ramp.
+    """
+    if fade <= 0:
+        return Image.new("L", (width, height), 255)
+    horizontal = Image.frombytes("L", (width, 1), _edge_ramp(width, fade)).resize((width, height), Image.NEAREST)
+    vertical = Image.frombytes("L", (1, height), _edge_ramp(height, fade)).resize((width, height), Image.NEAREST)
+    return ImageChops.darker(horizontal, vertical)
+
+
+def _encode_png(img: Image.Image) -> bytes:
+    buffer = io.BytesIO()
+    # Fast zlib level with run-length strategy (compress_type=3 == Z_RLE):
+    # gradient rows are long runs, so output stays small at minimal CPU cost.
+    img.save(buffer, format="PNG", compress_level=1, compress_type=3)
+    return buffer.getvalue()
+
+
+# ── Renderers (sync, process-pool safe) ──
+
+def _theme_colors(prompt: str) -> tuple[tuple, tuple, tuple]:
+    """Determine (color1, color2, accent) based on prompt keywords."""
+    prompt_lower = prompt.lower()
+    if any(w in prompt_lower for w in ["usa", "american", "high school", "hallway"]):
+        return (30, 60, 120), (180, 60, 40), TREFF_YELLOW
+    if any(w in prompt_lower for w in ["canada", "kanada", "maple", "mountain"]):
+        return (120, 20, 20), (40, 80, 40), (255, 255, 255)
+    if any(w in prompt_lower for w in ["australia", "australien", "sydney", "beach"]):
+        return (20, 100, 160), (200, 160, 60), (255, 255, 255)
+    if any(w in prompt_lower for w in ["neuseeland", "new zealand", "green"]):
+        return (20, 80, 40), (60, 140, 180), (255, 255, 255)
+    if any(w in prompt_lower for w in ["ireland", "irland", "green"]):
+        return (20, 100, 50), (40, 60, 80), TREFF_YELLOW
+    return DARK_BG, TREFF_BLUE, TREFF_YELLOW
+
+
+def _wrap_words(text: str, max_chars_per_line: int = 35) -> list[str]:
+    lines = []
+    current_line = ""
+    for word in text.split():
+        if len(current_line) + len(word) + 1 <= max_chars_per_line:
+            current_line = current_line + " " + word if current_line else word
+        else:
+            if current_line:
+                lines.append(current_line)
+            current_line = word
+    if current_line:
+        lines.append(current_line)
+    return lines
+
+
+def render_placeholder_sync(prompt: str, width: int = 1024, height: int = 1024) -> bytes:
+    """Render a branded placeholder image with the prompt theme (PNG bytes)."""
+    color1, color2, accent = _theme_colors(prompt)
+    img = vertical_gradient(width, height, color1, color2)
+
+    # Subtle geometric outlines. Each shape is drawn into a mask cropped to its
+    # own bounding box, blurred and pasted there — never the full frame.
+    # crc32 instead of hash(): stable across worker processes (PYTHONHASHSEED).
+    rng = random.Random(zlib.crc32(prompt.encode("utf-8")))
+    outline_color = tuple(min(255, c + 30) for c in color1)
+    pad = 6  # room for the blur to spread beyond the 2px outline
+    for _ in range(15):
+        x = rng.randint(0, width)
+        y = rng.randint(0, height)
+        size = rng.randint(40, 200)
+        if rng.choice(["circle", "rect"]) == "circle":
+            box = (x - size, y - size, x + size, y + size)
+            shape = "ellipse"
+        else:
+            box = (x, y, x + size, int(y + size * 0.6))
+            shape = "rectangle"
+        left, top = box[0] - pad, box[1] - pad
+        mask = Image.new("L", (box[2] - box[0] + 2 * pad, box[3] - box[1] + 2 * pad), 0)
+        local_box = [pad, pad, pad + box[2] - box[0], pad + box[3] - box[1]]
+        getattr(ImageDraw.Draw(mask), shape)(local_box, outline=255, width=2)
+        mask = mask.filter(ImageFilter.GaussianBlur(radius=2))
+        img.paste(outline_color, (left, top, left + mask.width, top + mask.height), mask)
+
+    draw = ImageDraw.Draw(img)
+    font_large = get_font(32, bold=True)
+    font_small = get_font(18)
+    font_badge = get_font(22, bold=True)
+    font_prompt = get_font(16)
+
+    # TREFF branding badge (top-left)
+    badge_x, badge_y, badge_w, badge_h = 30, 30, 120, 40
+    draw.rounded_rectangle(
+        [badge_x, badge_y, badge_x + badge_w, badge_y + badge_h], radius=8, fill=TREFF_BLUE,
+    )
+    draw.text((badge_x + 15, badge_y + 8), "TREFF", fill=(255, 255, 255), font=font_badge)
+
+    # "AI Generated" label (top-right)
+    ai_label_w = 140
+    draw.rounded_rectangle([width - ai_label_w - 30, 30, width - 30, 70], radius=8, fill=(0, 0, 0))
+    draw.text((width - ai_label_w - 15, 38), "KI-generiert", fill=accent, font=font_small)
+
+    # Prompt text in center area (wrapped, with shadow)
+    prompt_display = prompt[:120] + ("..." if len(prompt) > 120 else "")
+    lines = _wrap_words(prompt_display)
+    text_y = height // 2 - (len(lines) * 28) // 2
+    for line in lines:
+        draw.text((width // 2 - 2, text_y + 2), line, fill=(0, 0, 0), font=font_large, anchor="mt")
+        draw.text((width // 2, text_y), line, fill=(255, 255, 255), font=font_large, anchor="mt")
+        text_y += 38
+
+    # Bottom info bar
+    bar_h = 60
+    draw.rectangle([0, height - bar_h, width, height], fill=(0, 0, 0))
+    draw.text(
+        (20, height - bar_h + 18),
+        f"Prompt: {prompt[:60]}{'...' if len(prompt) > 60 else ''}",
+        fill=(180, 180, 180),
+        font=font_prompt,
+    )
+
+    return _encode_png(img)
+
+
+def render_style_transfer_sync(image_bytes: bytes, style: str) -> bytes:
+    """Apply basic PIL filters to approximate a style (PNG bytes)."""
+    img = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+    h = img.height
+    if style == "illustration":
+        img = img.filter(ImageFilter.EDGE_ENHANCE_MORE)
+        img = ImageOps.posterize(img, 4)
+    elif style == "watercolor":
+        img = img.filter(ImageFilter.GaussianBlur(radius=2))
+        img = img.filter(ImageFilter.SMOOTH_MORE)
+        img = ImageEnhance.Color(img).enhance(1.3)
+    elif style == "minimalist":
+        img = ImageEnhance.Color(img).enhance(0.3)
+        img = ImageEnhance.Contrast(img).enhance(1.5)
+    elif style == "comic":
+        img = img.filter(ImageFilter.CONTOUR)
+        img = ImageOps.posterize(img, 3)
+        img = ImageEnhance.Color(img).enhance(2.0)
+    elif style == "oil_painting":
+        img = img.filter(ImageFilter.GaussianBlur(radius=3))
+        img = ImageEnhance.Contrast(img).enhance(1.4)
+        img = ImageEnhance.Color(img).enhance(1.3)
+    draw = ImageDraw.Draw(img)
+    draw.text((8, h - 24), "Vorschau - KI-Style mit API-Key", fill=(160, 160, 160), font=get_font(max(12, h // 35)))
+    return _encode_png(img)
+
+
+OUTPAINT_RATIOS = {"1:1": (1, 1), "4:5": (4, 5), "9:16": (9, 16), "16:9": (16, 9), "3:4": (3, 4), "4:3": (4, 3)}
+
+
+def render_outpainting_sync(image_bytes: bytes, target_ratio: str) -> bytes:
+    """Extend the canvas to the target ratio with a blurred edge fill (PNG bytes)."""
+    img = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+    ow, oh = img.size
+    rw, rh = OUTPAINT_RATIOS.get(target_ratio, (4, 5))
+    tr = rw / rh
+    if tr > ow / oh:
+        nw, nh = int(oh * tr), oh
+    else:
+        nw, nh = ow, int(ow / tr)
+
+    # Blur a downscaled copy and stretch it: visually identical to blurring
+    # at full size with a huge radius, at a fraction of the cost.
+    radius = max(nw, nh) // 15
+    scale = 8
+    small = img.resize((max(1, nw // scale), max(1, nh // scale)), Image.BILINEAR)
+    small = small.filter(ImageFilter.GaussianBlur(radius=max(1, radius // scale)))
+    bg = small.resize((nw, nh), Image.BILINEAR)
+
+    fade = min(ow, oh) // 10
+    mask = edge_fade_mask(ow, oh, fade)
+    if fade // 2 > 0:
+        mask = mask.filter(ImageFilter.GaussianBlur(radius=fade // 2))
+    bg.paste(img, ((nw - ow) // 2, (nh - oh) // 2), mask)
+
+    draw = ImageDraw.Draw(bg)
+    draw.text((8, nh - 24), "Vorschau - KI-Outpainting mit API-Key", fill=(160, 160, 160), font=get_font(max(12, nh // 35)))
+    return _encode_png(bg)
+
+
+# ── Async entry points ──
+
+def _get_executor() -> Executor:
+    """Lazily create the shared render pool."""
+    global _executor
+    if _executor is None:
+        if IS_VERCEL:
+            _executor = ThreadPoolExecutor(max_workers=MAX_RENDER_WORKERS)
+        else:
+            _executor = ProcessPoolExecutor(max_workers=min(MAX_RENDER_WORKERS, os.cpu_count() or 1))
+    return _executor
+
+
+async def run_in_render_pool(func, *args):
+    """Run a sync, picklable render function in the shared pool.
+
+    Errors raised by `func` propagate. If a worker died and broke the pool,
+    the pool is rebuilt and the render retried once.
+    """
+    loop = asyncio.get_running_loop()
+    for attempt in range(2):
+        try:
+            return await loop.run_in_executor(_get_executor(), func, *args)
+        except BrokenProcessPool as e:
+            # Drop the dead pool; the next call of _get_executor() builds a fresh one
+            logger.warning(f"Render pool broken ({e}), restarting it")
+            shutdown_executor()
+            if attempt:
+                raise
+
+
+async def render_placeholder(prompt: str, width: int = 1024, height: int = 1024) -> bytes:
+    """Render (or fetch the memoized) branded placeholder PNG."""
+    key = (prompt, width, height)
+    cached = _placeholder_cache.get(key)
+    if cached is not None:
+        _placeholder_cache.move_to_end(key)
+        return cached
+
+    png = await run_in_render_pool(render_placeholder_sync, prompt, width, height)
+    _placeholder_cache[key] = png
+    if len(_placeholder_cache) > PLACEHOLDER_CACHE_SIZE:
+        _placeholder_cache.popitem(last=False)
+    return png
+
+
+async def render_style_transfer(image_bytes: bytes, style: str) -> bytes:
+    return await run_in_render_pool(render_style_transfer_sync, image_bytes, style)
+
+
+async def render_outpainting(image_bytes: bytes, target_ratio: str) -> bytes:
+    return await run_in_render_pool(render_outpainting_sync, image_bytes, target_ratio)
+
+
+def shutdown_executor():
+    """Shut down the render pool (called on application shutdown)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+if __name__ == "__main__":
+    import time
+
+    def _ms(start: float) -> str:
+        return f"{(time.perf_counter() - start) * 1000:.1f} ms"
+
+    prompt = "USA High School hallway with lockers and students, golden hour"
+    render_placeholder_sync(prompt, 256, 256)  # warm font cache
+
+    for w, h in [(1080, 1350), (1920, 1080), (4096, 4096)]:
+        start = time.perf_counter()
+        render_placeholder_sync(prompt, w, h)
+        print(f"placeholder {w}x{h}: {_ms(start)}")
+
+    async def _memo_hit():
+        await render_placeholder(prompt, 4096, 4096)
+        start = time.perf_counter()
+        await render_placeholder(prompt, 4096, 4096)
+        print(f"placeholder 4096x4096 (memoized): {_ms(start)}")
+        shutdown_executor()
+
+    asyncio.run(_memo_hit())
+
+    source = render_placeholder_sync(prompt, 1080, 1080)
+    start = time.perf_counter()
+    render_outpainting_sync(source, "9:16")
+    print(f"outpainting 1080x1080 -> 9:16: {_ms(start)}")
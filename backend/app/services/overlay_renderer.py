@@ -0,0 +1,256 @@
+"""
+Overlay Renderer - incremental text overlay rendering for videos.
+
+Rendering an overlay used to probe the video twice, rasterize the text
+layers into one full-frame PNG per time window and re-encode the whole
+video on every /render, even when nothing had changed since the last
+render or only one layer's text was edited.
+
+Architecture:
+    - Layer rasters: each text layer (background box + text) is drawn into
+      a PNG cropped to its own bounding box and cached in
+      uploads/overlay_layers/layer_<key>_<dx>_<dy>.png (dx/dy: offset from
+      the layer's corner). The key covers everything that changes the
+      pixels (text, style, box size, video size, scale) but not the
+      position or time window. Moving or retiming a layer, or
+      editing another layer, reuses the raster; the least recently used
+      rasters are pruned above LAYER_CACHE_MAX_FILES.
+    - One ffmpeg pass: the video and all layer rasters are inputs of one
+      filter graph that overlays each raster at its position with an
+      `enable` window (layers without an end time stay until the end, so
+      no duration probe is needed). Video size comes from the cached
+      app.core.media probe.
+    - `definition_hash()` hashes the source file and the layer definitions;
+      callers name the output after it and skip the render entirely when
+      that file already exists.
+
+Usage:
+    from app.services.overlay_renderer import definition_hash, render_video_with_overlays
+
+    output_path = EXPORTS_DIR / f"overlay_{overlay.id}_{definition_hash(video_path, layers)}.mp4"
+    if not output_path.exists():
+        success, error = render_video_with_overlays(video_path, layers, output_path)
+"""
+
+import json
+import logging
+import os
+import subprocess
+from pathlib import Path
+from typing import Optional
+
+from PIL import Image, ImageDraw
+
+from app.core.media import cache_key, probe, prune_cache, temp_output
+from app.core.paths import get_upload_dir
+from app.services.image_renderer import get_font
+
+logger = logging.getLogger(__name__)
+
+# Bump when the drawing of layers changes (invalidates rasters and rendered outputs)
+OVERLAY_VERSION = 1
+
+LAYER_CACHE_DIR = get_upload_dir("overlay_layers")
+LAYER_CACHE_MAX_FILES = 500
+
+LAYER_PADDING = 8
+
+# Encoder flags of final overlay renders
+OVERLAY_ENCODE_ARGS = ["-preset", "fast", "-crf", "23"]
+
+# Layer fields that change a layer's pixels (position and timing do not)
+RASTER_FIELDS = ("type", "text", "width", "height", "fontSize", "fontFamily", "color", "bgColor", "opacity", "bold", "italic", "textAlign")
+
+
+def parse_css_color(color_str: str) -> tuple:
+    """Parse a CSS color (hex or rgba) into an RGBA tuple (0-255 each)."""
+    if not color_str or color_str in ("transparent", "none"):
+        return (0, 0, 0, 0)
+
+    if color_str.startswith("rgba("):
+        try:
+            inner = color_str[5:-1]
+            parts = [p.strip() for p in inner.split(",")]
+            r, g, b = int(parts[0]), int(parts[1]), int(parts[2])
+            a = int(float(parts[3]) * 255)
+            return (r, g, b, a)
+        except (ValueError, IndexError):
+            return (0, 0, 0, 153)
+
+    if color_str.startswith("#"):
+        h = color_str.lstrip("#")
+        if len(h) == 3:
+            h = "".join(c * 2 for c in h)
+        if len(h) == 6:
+            return (int(h[0:2], 16), int(h[2:4], 16), int(h[4:6], 16), 255)
+
+    return (255, 255, 255, 255)
+
+
+def definition_hash(video_path: Path, layers: list[dict], *extra) -> str:
+    """Hash of everything a rendered overlay video depends on."""
+    stat = video_path.stat()
+    return cache_key(
+        OVERLAY_VERSION, video_path.name, stat.st_size, stat.st_mtime_ns,
+        json.dumps(layers, sort_keys=True), *extra,
+    )
+
+
+# ── Layer rasters ──
+
+def _draw_layer(layer: dict, video_width: int, video_height: int, scale: float) -> tuple[Optional[Image.Image], int, int]:
+    """Draw one layer cropped to its bounding box.
+
+    Returns (image, dx, dy): the raster and its offset from the layer's
+    top-left corner, or (None, 0, 0) if the layer draws nothing.
+    """
+    w = int(layer.get("width", 80) / 100.0 * video_width)
+    h = int(layer.get("height", 10) / 100.0 * video_height)
+    opacity = layer.get("opacity", 1.0)
+    font = get_font(max(1, round(layer.get("fontSize", 32) * scale)))
+    padding = round(LAYER_PADDING * scale)
+    text = layer["text"]
+
+    # Layout relative to the layer's top-left corner
+    left, top, right, bottom = font.getbbox(text)
+    text_w = right - left
+    align = layer.get("textAlign", "left")
+    text_x = padding
+    if align == "center":
+        text_x = (w - text_w) // 2
+    elif align == "right":
+        text_x = w - text_w - padding
+    text_y = padding
+
+    bg_color = parse_css_color(layer.get("bgColor", ""))
+    bounds = [text_x + left, text_y + top, text_x + right, text_y + bottom]
+    if bg_color[3] > 0:
+        bounds = [min(bounds[0], 0), min(bounds[1], 0), max(bounds[2], w + 1), max(bounds[3], h + 1)]
+    if bounds[2] <= bounds[0] or bounds[3] <= bounds[1]:
+        return None, 0, 0
+    dx, dy = bounds[0], bounds[1]
+
+    img = Image.new("RGBA", (bounds[2] - dx, bounds[3] - dy), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    if bg_color[3] > 0:
+        # Apply layer opacity to bg alpha
+        bg_with_opacity = (bg_color[0], bg_color[1], bg_color[2], int(bg_color[3] * opacity))
+        draw.rounded_rectangle([-dx, -dy, w - dx, h - dy], radius=4, fill=bg_with_opacity)
+
+    fg = parse_css_color(layer.get("color", "#FFFFFF"))
+    draw.text((text_x - dx, text_y - dy), text, fill=(fg[0], fg[1], fg[2], int(fg[3] * opacity)), font=font)
+    return img, dx, dy
+
+
+def layer_raster(layer: dict, video_width: int, video_height: int, scale: float = 1.0) -> Optional[tuple[Path, int, int]]:
+    """Cached raster of a layer: (png_path, dx, dy) relative to the layer's corner, or None if empty."""
+    style = {field: layer.get(field) for field in RASTER_FIELDS}
+    key = cache_key(OVERLAY_VERSION, json.dumps(style, sort_keys=True), video_width, video_height, scale)
+    # The offset is part of the name so a cache hit needs no layout work
+    for path in LAYER_CACHE_DIR.glob(f"layer_{key}_*.png"):
+        if ".tmp." in path.name:
+            continue
+        os.utime(path)  # mark as recently used for pruning
+        _, _, dx, dy = path.stem.split("_")
+        return path, int(dx), int(dy)
+
+    img, dx, dy = _draw_layer(layer, video_width, video_height, scale)
+    if img is None:
+        return None
+    path = LAYER_CACHE_DIR / f"layer_{key}_{dx}_{dy}.png"
+    temp = temp_output(path)
+    try:
+        img.save(temp, "PNG", compress_level=1)
+        os.replace(temp, path)
+    finally:
+        temp.unlink(missing_ok=True)
+    prune_cache(LAYER_CACHE_DIR, "layer_*.png", LAYER_CACHE_MAX_FILES)
+    return path, dx, dy
+
+
+# ── Video render ──
+
+def render_video_with_overlays(
+    video_path: Path,
+    layers: list[dict],
+    output_path: Path,
+    encode_args: list[str] = OVERLAY_ENCODE_ARGS,
+    output_size: Optional[tuple[int, int]] = None,
+    source_width: Optional[int] = None,
+) -> tuple[bool, str]:
+    """Composite all text layers onto the video in one ffmpeg pass.
+
+    For previews, `output_size` scales the video and `source_width` (the
+    original video's width) scales the layers' pixel sizes, so a proxy
+    input looks like a scaled-down final render.
+
+    Returns (success: bool, error_message: str).
+    """
+    info = probe(video_path)
+    input_width, input_height = info["width"] or 1080, info["height"] or 1920
+    video_width, video_height = output_size or (input_width, input_height)
+    scale = video_width / (source_width or input_width)
+
+    placed = []
+    try:
+        for layer in layers:
+            if not layer.get("text"):
+                continue
+            raster = layer_raster(layer, video_width, video_height, scale)
+            if raster is None:
+                continue
+            path, dx, dy = raster
+            x = int(layer.get("x", 50) / 100.0 * video_width) + dx
+            y = int(layer.get("y", 50) / 100.0 * video_height) + dy
+            placed.append((path, x, y, layer.get("startTime", 0), layer.get("endTime", -1)))
+    except Exception as e:
+        logger.error(f"Failed to render overlay layers: {e}")
+        return False, f"Failed to render overlay layers: {e}"
+
+    if not placed:
+        return False, "No overlay layers defined"
+
+    # Input 0 = video, input 1..N = layer rasters
+    inputs = ["-i", str(video_path)]
+    for path, *_ in placed:
+        inputs.extend(["-i", str(path)])
+
+    filter_parts = []
+    current_label = "[0:v]"
+    if (video_width, video_height) != (input_width, input_height):
+        filter_parts.append(f"[0:v]scale={video_width}:{video_height},setsar=1[base]")
+        current_label = "[base]"
+    for i, (_, x, y, start, end) in enumerate(placed):
+        next_label = f"[v{i}]" if i < len(placed) - 1 else "[vout]"
+        enable_expr = f"between(t\\,{start}\\,{end})" if end >= 0 else f"gte(t\\,{start})"
+        filter_parts.append(f"{current_label}[{i + 1}:v]overlay={x}:{y}:enable='{enable_expr}'{next_label}")
+        current_label = next_label
+
+    cmd = [
+        "ffmpeg", "-y", "-v", "error", "-nostdin",
+        *inputs,
+        "-filter_complex", ";".join(filter_parts),
+        "-map", "[vout]",
+        "-map", "0:a?",
+        "-codec:a", "copy",
+        *encode_args,
+        str(output_path),
+    ]
+
+    logger.info(f"Running ffmpeg overlay render: {len(placed)} layer(s) -> {output_path.name}")
+
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+        if proc.returncode != 0:
+            error_msg = proc.stderr[-500:] if proc.stderr else "Unknown ffmpeg error"
+            logger.error(f"ffmpeg rendering failed: {error_msg}")
+            return False, error_msg
+        if output_path.exists() and output_path.stat().st_size > 0:
+            return True, ""
+        return False, "ffmpeg produced empty or missing output file"
+    except FileNotFoundError:
+        return False, "ffmpeg not found on system"
+    except subprocess.TimeoutExpired:
+        return False, "ffmpeg rendering timed out (>5 min)"
+    except Exception as e:
+        return False, str(e)
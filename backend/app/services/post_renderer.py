@@ -0,0 +1,586 @@
+"""
+Post Renderer Service - server-side PNG rendering of post slides with a render cache.
+
+Exports used to be rendered in the browser (html2canvas), one slide after
+another, so a 50-post batch export depended on a single laptop. This
+service draws a post's slides with Pillow from the same inputs as the HTML
+templates: the template's placeholder fields, its brand colors and fonts
+(overridden by the post's `custom_colors` / `custom_fonts`), `Post.slide_data`
+and, for story-arc posts, the episode texts shown in the editor preview.
+
+Architecture:
+    - Layout model: `FIELD_STYLES` describes every template placeholder
+      field (size at 1080 px width, font role, color role, line limit),
+      mirroring the seeded template HTML: TREFF badge in the header,
+      headline/subheadline/body stack in the middle, CTA pill and handle in
+      the footer. Only fields listed in the template's `placeholder_fields`
+      are drawn. The editor's text colors (`custom_colors` keys headline,
+      subheadline, body) override the color role of those fields.
+    - Story-arc episodes (matched by the post's story_arc_id and
+      episode_number): "previously" under the body of the first slide,
+      cliffhanger and next-episode hint above the footer of the last slide.
+    - Frames: 1080x1080 (feed_square / instagram_feed), 1080x1350
+      (feed_portrait) and 1080x1920 (story / tiktok / reels). `resolution`
+      is the output width ("1080" or "2160"); the layout scales with it.
+    - Slides are rendered in the shared render pool of
+      app.services.image_renderer (processes locally, threads on Vercel);
+      the slides of a post render concurrently.
+    - Render cache on disk, keyed by (post id, post `updated_at`, template
+      id, template `updated_at`, slide index, frame, episode texts of the
+      slide, RENDERER_VERSION). Any post or template edit bumps `updated_at`,
+      so stale entries are never hit; the oldest files are pruned above
+      RENDER_CACHE_MAX_FILES.
+    - `zip_entries()` yields (archive name, PNG) pairs post by post, so
+      carousel and batch ZIPs stream with one post in memory at a time.
+
+Usage:
+    from app.services.post_renderer import load_render_sources, render_post_slides
+
+    sources = await load_render_sources(db, user_id, [post_id])
+    pngs = await render_post_slides(sources[0], resolution="1080")
+
+    # Render a post from the local database and time cold vs. cached:
+    python -m app.services.post_renderer <post_id> [--resolution 2160]
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import AsyncIterator, NamedTuple, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.paths import get_upload_dir
+from app.models.post import Post
+from app.models.story_episode import StoryEpisode
+from app.models.template import Template
+from app.services.slide_summary import parse_slides
+
+logger = logging.getLogger(__name__)
+
+# Bump when the drawing code changes, so cached PNGs are not reused
+RENDERER_VERSION = 2
+
+BASE_WIDTH = 1080
+RESOLUTIONS = ("1080", "2160")
+
+# Frame heights at 1080 px width
+FRAMES = {
+    "feed_square": 1080,
+    "feed_portrait": 1350,
+    "story": 1920,
+    "tiktok": 1920,
+}
+PLATFORM_FRAMES = {
+    "instagram_feed": "feed_square",
+    "instagram_story": "story",
+    "instagram_stories": "story",
+    "instagram_reel": "story",
+    "instagram_reels": "story",
+    "tiktok": "tiktok",
+}
+
+RENDER_CACHE_DIR = get_upload_dir("render_cache")
+RENDER_CACHE_MAX_FILES = 2000
+
+# Brand defaults (same as the seeded templates)
+DEFAULT_COLORS = {"primary": "#3B7AB1", "secondary": "#FDD000", "accent": "#FFFFFF", "background": "#1A1A2E"}
+DEFAULT_FONTS = {"heading_font": "Montserrat", "body_font": "Inter"}
+DEFAULT_FIELDS = ["headline", "subheadline", "body_text", "bullet_points", "quote_text", "quote_author", "cta_text"]
+TREFF_BLUE = "#3B7AB1"
+TEXT_COLOR = "#E5E7EB"
+MUTED_COLOR = "#9CA3AF"
+HANDLE = "@treff_sprachreisen"
+
+# Directories searched for brand font files (by family name)
+FONT_DIRS = [
+    Path(__file__).resolve().parent.parent / "static" / "fonts",
+    Path("/usr/share/fonts"),
+    Path("/usr/local/share/fonts"),
+    Path("/Library/Fonts"),
+    Path("/System/Library/Fonts"),
+]
+
+
+class FieldStyle(NamedTuple):
+    size: int  # px at 1080 width
+    font: str  # "heading" | "body"
+    bold: bool
+    color: str  # color role (key of the color set) or a hex color
+    max_lines: int
+    spacing: float = 1.25  # line height factor
+
+
+# Body stack, top to bottom; the CTA is drawn in the footer
+FIELD_STYLES = {
+    "headline": FieldStyle(48, "heading", True, "primary", 4, 1.1),
+    "subheadline": FieldStyle(24, "heading", True, "secondary", 3, 1.3),
+    "quote_text": FieldStyle(36, "body", False, "accent", 6, 1.35),
+    "quote_author": FieldStyle(20, "body", True, "secondary", 1),
+    "body_text": FieldStyle(20, "body", False, TEXT_COLOR, 10, 1.5),
+    "bullet_points": FieldStyle(20, "body", False, TEXT_COLOR, 8, 1.5),
+}
+CTA_STYLE = FieldStyle(16, "heading", True, "background", 1)
+# Editor text colors (custom_colors keys) per field; used when the post sets them
+TEXT_COLOR_KEYS = {"headline": "headline", "subheadline": "subheadline", "body_text": "body", "bullet_points": "body"}
+
+# Story-arc episode texts, drawn in a tinted box (RGBA fill) like the editor preview
+EPISODE_STYLES = {
+    "previously_text": FieldStyle(18, "body", False, TEXT_COLOR, 3, 1.3),
+    "cliffhanger_text": FieldStyle(18, "body", True, "secondary", 2, 1.3),
+    "next_episode_hint": FieldStyle(16, "body", False, "#93C5FD", 2, 1.3),
+}
+EPISODE_BOX_FILLS = {
+    "previously_text": (255, 255, 255, 20),
+    "cliffhanger_text": (255, 255, 255, 20),
+    "next_episode_hint": (59, 122, 177, 51),
+}
+EPISODE_FIELDS = tuple(EPISODE_STYLES)
+PADDING = 60
+FIELD_GAP = 20
+
+
+# ─── Sources and jobs ────────────────────────────────────────────────────
+
+def _json_dict(raw: Optional[str]) -> dict:
+    try:
+        value = json.loads(raw) if raw else {}
+    except (json.JSONDecodeError, TypeError):
+        return {}
+    return value if isinstance(value, dict) else {}
+
+
+def _json_list(raw: Optional[str]) -> list:
+    try:
+        value = json.loads(raw) if raw else []
+    except (json.JSONDecodeError, TypeError):
+        return []
+    return value if isinstance(value, list) else []
+
+
+async def load_render_sources(db: AsyncSession, user_id: int, post_ids: Sequence[int]) -> list[dict]:
+    """Render inputs of the user's posts (in `post_ids` order), their templates and episodes.
+
+    Two queries, plus one for the episode texts when any post belongs to a story arc.
+    """
+    result = await db.execute(
+        select(
+            Post.id, Post.title, Post.platform, Post.slide_data, Post.custom_colors,
+            Post.custom_fonts, Post.template_id, Post.updated_at,
+            Post.story_arc_id, Post.episode_number,
+        ).where(Post.id.in_(post_ids), Post.user_id == user_id)
+    )
+    posts = {row.id: dict(row._mapping) for row in result}
+
+    # Episode texts, shared by all platform variants of an episode
+    arc_ids = {p["story_arc_id"] for p in posts.values() if p["story_arc_id"] and p["episode_number"]}
+    episodes = {}
+    if arc_ids:
+        result = await db.execute(
+            select(
+                StoryEpisode.arc_id, StoryEpisode.episode_number, *(getattr(StoryEpisode, f) for f in EPISODE_FIELDS),
+            ).where(StoryEpisode.arc_id.in_(arc_ids))
+        )
+        episodes = {(row.arc_id, row.episode_number): {f: getattr(row, f) for f in EPISODE_FIELDS} for row in result}
+
+    template_ids = {p["template_id"] for p in posts.values() if p["template_id"]}
+    templates = {}
+    if template_ids:
+        result = await db.execute(
+            select(
+                Template.id, Template.platform_format, Template.default_colors,
+                Template.default_fonts, Template.placeholder_fields, Template.updated_at,
+            ).where(Template.id.in_(template_ids))
+        )
+        templates = {row.id: dict(row._mapping) for row in result}
+
+    sources = []
+    for post_id in post_ids:
+        post = posts.get(post_id)
+        if post:
+            post["template"] = templates.get(post["template_id"])
+            post["episode"] = episodes.get((post["story_arc_id"], post["episode_number"]))
+            sources.append(post)
+    return sources
+
+
+def frame_size(platform: Optional[str], template_format: Optional[str] = None,
+               frame: Optional[str] = None, resolution: str = "1080") -> tuple[int, int]:
+    """Output (width, height): explicit frame > template format > platform, scaled to `resolution`."""
+    name = frame or template_format or PLATFORM_FRAMES.get(platform or "", "feed_square")
+    height = FRAMES.get(name, FRAMES["feed_square"])
+    scale = int(resolution) / BASE_WIDTH if resolution in RESOLUTIONS else 1
+    return round(BASE_WIDTH * scale), round(height * scale)
+
+
+def parse_resolution(value: Optional[str]) -> tuple[str, Optional[str]]:
+    """(resolution, frame) of a stored export resolution: "1080", "2160" or "1080x1350"."""
+    value = str(value or "1080")
+    if "x" not in value:
+        return (value if value in RESOLUTIONS else "1080"), None
+    try:
+        width, height = (int(part) for part in value.split("x", 1))
+    except ValueError:
+        return "1080", None
+    resolution = str(width) if str(width) in RESOLUTIONS else "1080"
+    ratio_height = height * BASE_WIDTH / max(width, 1)
+    frame = min(("feed_square", "feed_portrait", "story"), key=lambda name: abs(FRAMES[name] - ratio_height))
+    return resolution, frame
+
+
+def _background_path(slide: dict) -> Optional[str]:
+    """Local file of the slide's background image (uploads only; remote URLs are skipped)."""
+    value = None
+    if slide.get("background_type") in ("image", "ai_generated"):
+        value = slide.get("background_value")
+    value = value or slide.get("background_image") or slide.get("image_url")
+    if not isinstance(value, str):
+        return None
+    match = re.match(r"^(?:/api)?/uploads/(.+)$", value.split("?")[0])
+    if not match:
+        return None
+    uploads = get_upload_dir()
+    path = (uploads / match.group(1)).resolve()
+    if uploads.resolve() not in path.parents or not path.is_file():
+        return None
+    return str(path)
+
+
+def slide_jobs(source: dict, resolution: str = "1080", frame: Optional[str] = None) -> list[dict]:
+    """One picklable render job per slide of `source` (posts without slides render their title)."""
+    template = source.get("template") or {}
+    colors = {**DEFAULT_COLORS, **_json_dict(template.get("default_colors")), **_json_dict(source.get("custom_colors"))}
+    fonts = {**DEFAULT_FONTS, **_json_dict(template.get("default_fonts")), **_json_dict(source.get("custom_fonts"))}
+    fields = [f for f in _json_list(template.get("placeholder_fields")) if isinstance(f, str)] or DEFAULT_FIELDS
+    width, height = frame_size(source.get("platform"), template.get("platform_format"), frame, resolution)
+
+    slides = parse_slides(source.get("slide_data")) or [{"headline": source.get("title") or ""}]
+    episode = source.get("episode") or {}
+    updated = source.get("updated_at")
+    template_updated = template.get("updated_at")
+    jobs = []
+    for index, slide in enumerate(slides):
+        # Same placement as the editor preview: "previously" opens the episode, the rest closes it
+        slots = ("previously_text",) if index == 0 else ()
+        if index == len(slides) - 1:
+            slots += ("cliffhanger_text", "next_episode_hint")
+        episode_texts = {field: episode[field] for field in slots if episode.get(field)}
+        # Episode edits do not touch the post, so their texts are part of the key
+        key = "|".join(str(part) for part in (
+            RENDERER_VERSION, source["id"], updated.isoformat() if updated else "", template.get("id"),
+            template_updated.isoformat() if template_updated else "", index, width, height,
+            json.dumps(episode_texts, sort_keys=True),
+        ))
+        jobs.append({
+            "cache_key": hashlib.sha256(key.encode("utf-8")).hexdigest()[:40],
+            "slide": slide,
+            "index": index,
+            "total": len(slides),
+            "fields": fields,
+            "colors": colors,
+            "fonts": fonts,
+            "width": width,
+            "height": height,
+            "background_path": _background_path(slide),
+            "episode": episode_texts,
+        })
+    return jobs
+
+
+# ─── Drawing (sync, process-pool safe) ───────────────────────────────────
+
+@lru_cache(maxsize=1)
+def _font_files() -> dict[str, str]:
+    """Normalized font file stem -> path, for every TrueType/OpenType file in FONT_DIRS."""
+    files = {}
+    for directory in FONT_DIRS:
+        if not directory.is_dir():
+            continue
+        for root, _, names in os.walk(directory):
+            for name in names:
+                if name.lower().endswith((".ttf", ".otf", ".ttc")):
+                    stem = re.sub(r"[^a-z0-9]", "", name.rsplit(".", 1)[0].lower())
+                    files.setdefault(stem, os.path.join(root, name))
+    return files
+
+
+@lru_cache(maxsize=128)
+def font_for(family: str, size: int, bold: bool):
+    """Brand font by family name (e.g. "Montserrat"), falling back to the system font."""
+    from app.services.image_renderer import get_font, load_font
+
+    family_key = re.sub(r"[^a-z0-9]", "", (family or "").lower())
+    if family_key:
+        files = _font_files()
+        candidates = [f"{family_key}bold", f"{family_key}semibold"] if bold else [f"{family_key}regular", family_key]
+        candidates.append(family_key)
+        for candidate in candidates:
+            if candidate in files:
+                font = load_font(files[candidate], size)
+                if font is not None:
+                    return font
+    return get_font(size, bold=bold)
+
+
+def _rgb(value: Optional[str], fallback: str) -> tuple:
+    from PIL import ImageColor
+
+    for candidate in (value, fallback):
+        try:
+            return ImageColor.getrgb(candidate)[:3]
+        except (ValueError, AttributeError, TypeError):
+            continue
+    return (255, 255, 255)
+
+
+def _wrap(text: str, font, max_width: float, max_lines: int) -> list[str]:
+    """Word-wrap `text` to `max_width` pixels; the last line is ellipsized beyond `max_lines`."""
+    lines = []
+    for paragraph in str(text).splitlines() or [""]:
+        line = ""
+        for word in paragraph.split():
+            candidate = f"{line} {word}" if line else word
+            if font.getlength(candidate) <= max_width or not line:
+                line = candidate
+            else:
+                lines.append(line)
+                line = word
+        lines.append(line)
+    if len(lines) > max_lines:
+        lines = lines[:max_lines]
+        last = lines[-1]
+        while last and font.getlength(last + "...") > max_width:
+            last = last[:-1]
+        lines[-1] = last.rstrip() + "..."
+    return lines
+
+
+def _field_text(slide: dict, field: str) -> Optional[str]:
+    value = slide.get(field)
+    if field == "bullet_points":
+        items = value if isinstance(value, list) else _json_list(value)
+        return "\n".join(f"• {item}" for item in items if item) or None
+    if value is None or value == "":
+        return None
+    return str(value)
+
+
+def _background(job: dict):
+    from PIL import Image, ImageOps
+
+    width, height = job["width"], job["height"]
+    slide = job["slide"]
+    if job["background_path"]:
+        try:
+            with Image.open(job["background_path"]) as source:
+                img = ImageOps.fit(source.convert("RGB"), (width, height), Image.LANCZOS)
+            # Darken for text contrast (the templates use a dark overlay)
+            return Image.blend(img, Image.new("RGB", (width, height), (0, 0, 0)), 0.45)
+        except OSError as e:
+            logger.warning(f"Background image unreadable ({e}), using color")
+    color = slide.get("background_value") if slide.get("background_type") == "color" else None
+    return Image.new("RGB", (width, height), _rgb(color, job["colors"].get("background", DEFAULT_COLORS["background"])))
+
+
+def render_slide_sync(job: dict) -> bytes:
+    """Draw one slide job (see `slide_jobs()`) and return PNG bytes."""
+    from PIL import ImageDraw
+
+    width, height = job["width"], job["height"]
+    scale = width / BASE_WIDTH
+    colors, fonts, slide = job["colors"], job["fonts"], job["slide"]
+    pad = round(PADDING * scale)
+
+    img = _background(job)
+    draw = ImageDraw.Draw(img, "RGBA")  # RGBA fills blend (episode boxes)
+
+    def color(role: str) -> tuple:
+        return _rgb(colors.get(role, role), DEFAULT_COLORS.get(role, "#FFFFFF"))
+
+    def text_color(field: str, style: FieldStyle) -> tuple:
+        key = TEXT_COLOR_KEYS.get(field, "body" if field == "previously_text" else None)
+        return color(key) if key in colors else color(style.color)
+
+    def font(style: FieldStyle):
+        family = fonts.get("heading_font" if style.font == "heading" else "body_font")
+        return font_for(family, round(style.size * scale), style.bold)
+
+    # Header: TREFF badge and slide counter
+    badge = (pad, pad, pad + round(120 * scale), pad + round(40 * scale))
+    draw.rounded_rectangle(badge, radius=round(8 * scale), fill=_rgb(TREFF_BLUE, TREFF_BLUE))
+    draw.text(((badge[0] + badge[2]) / 2, (badge[1] + badge[3]) / 2), "TREFF",
+              fill=(255, 255, 255), font=font_for(fonts.get("heading_font"), round(14 * scale), True), anchor="mm")
+    if job["total"] > 1:
+        draw.text((width - pad, (badge[1] + badge[3]) / 2), f"{job['index'] + 1}/{job['total']}",
+                  fill=_rgb(MUTED_COLOR, MUTED_COLOR), font=font_for(fonts.get("body_font"), round(16 * scale), False),
+                  anchor="rm")
+
+    # Body: fields stacked and centered vertically between header and footer
+    blocks = []
+    for field in FIELD_STYLES:
+        text = _field_text(slide, field) if field in job["fields"] else None
+        if not text:
+            continue
+        style = FIELD_STYLES[field]
+        field_font = font(style)
+        lines = _wrap(text, field_font, width - 2 * pad, style.max_lines)
+        line_height = round(style.size * scale * style.spacing)
+        blocks.append((lines, field_font, text_color(field, style), line_height))
+    gap = round(FIELD_GAP * scale)
+
+    # Episode boxes: text lines inset by `inset`, height measured up front for the layout
+    inset = round(16 * scale)
+    boxes = {}
+    for field, text in job.get("episode", {}).items():
+        style = EPISODE_STYLES[field]
+        box_font = font(style)
+        lines = _wrap(text, box_font, width - 2 * pad - 2 * inset, style.max_lines)
+        line_height = round(style.size * scale * style.spacing)
+        boxes[field] = (lines, box_font, text_color(field, style), line_height, len(lines) * line_height + 2 * inset)
+
+    def draw_box(field: str, top: int) -> int:
+        lines, box_font, fill, line_height, box_height = boxes[field]
+        draw.rounded_rectangle((pad, top, width - pad, top + box_height), radius=round(8 * scale),
+                               fill=EPISODE_BOX_FILLS[field])
+        for i, line in enumerate(lines):
+            draw.text((pad + inset, top + inset + i * line_height), line, fill=fill, font=box_font)
+        return top + box_height
+
+    closing = [field for field in ("cliffhanger_text", "next_episode_hint") if field in boxes]
+    closing_height = sum(boxes[f][4] for f in closing) + gap * len(closing)
+    body_height = sum(len(lines) * lh for lines, _, _, lh in blocks) + gap * max(0, len(blocks) - 1)
+    if "previously_text" in boxes:
+        body_height += gap + boxes["previously_text"][4]
+    body_bottom = height - pad - round(60 * scale) - closing_height
+    y = badge[3] + max(pad, (body_bottom - badge[3] - pad - body_height) // 2)
+    for lines, field_font, fill, line_height in blocks:
+        for line in lines:
+            draw.text((pad, y), line, fill=fill, font=field_font)
+            y += line_height
+        y += gap
+    if "previously_text" in boxes:
+        draw_box("previously_text", y)
+
+    # Cliffhanger and next-episode hint stack directly above the footer
+    y = body_bottom
+    for field in closing:
+        y = draw_box(field, y) + gap
+
+    # Footer: CTA pill and handle
+    footer_y = height - pad
+    cta = _field_text(slide, "cta_text") if "cta_text" in job["fields"] else None
+    if cta:
+        cta_font = font(CTA_STYLE)
+        label = _wrap(cta.upper(), cta_font, width * 0.6, 1)[0]
+        box_w = cta_font.getlength(label) + round(48 * scale)
+        box_h = round(CTA_STYLE.size * scale) + round(24 * scale)
+        box = (pad, footer_y - box_h, pad + box_w, footer_y)
+        draw.rounded_rectangle(box, radius=round(8 * scale), fill=color("secondary"))
+        draw.text(((box[0] + box[2]) / 2, (box[1] + box[3]) / 2), label, fill=color("background"),
+                  font=cta_font, anchor="mm")
+    draw.text((width - pad, footer_y), HANDLE, fill=_rgb(MUTED_COLOR, MUTED_COLOR),
+              font=font_for(fonts.get("body_font"), round(14 * scale), False), anchor="rd")
+
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG", compress_level=6)
+    return buffer.getvalue()
+
+
+# ─── Cache + async entry points ──────────────────────────────────────────
+
+def _cache_path(job: dict) -> Path:
+    return RENDER_CACHE_DIR / f"{job['cache_key']}.png"
+
+
+def _prune_cache() -> None:
+    """Delete the least recently used cache files above RENDER_CACHE_MAX_FILES."""
+    files = list(RENDER_CACHE_DIR.glob("*.png"))
+    if len(files) <= RENDER_CACHE_MAX_FILES:
+        return
+    files.sort(key=lambda p: p.stat().st_mtime)
+    for path in files[:len(files) - RENDER_CACHE_MAX_FILES]:
+        path.unlink(missing_ok=True)
+
+
+async def render_slide(job: dict) -> bytes:
+    """PNG of one slide job, from the render cache or the render pool."""
+    from app.services.image_renderer import run_in_render_pool
+
+    path = _cache_path(job)
+    try:
+        png = path.read_bytes()
+        os.utime(path)  # LRU order for pruning
+        return png
+    except FileNotFoundError:
+        pass
+
+    png = await run_in_render_pool(render_slide_sync, job)
+    temp = path.with_suffix(f".{os.getpid()}.tmp")
+    temp.write_bytes(png)
+    os.replace(temp, path)
+    _prune_cache()
+    return png
+
+
+async def render_post_slides(source: dict, resolution: str = "1080", frame: Optional[str] = None) -> list[bytes]:
+    """PNGs of all slides of a post, rendered concurrently."""
+    return list(await asyncio.gather(*(render_slide(job) for job in slide_jobs(source, resolution, frame))))
+
+
+def _safe_name(value: Optional[str], fallback: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_-]", "_", value or "")[:40] or fallback
+
+
+async def zip_entries(
+    sources: Sequence[dict],
+    resolution: str = "1080",
+    frame: Optional[str] = None,
+    folders: bool = False,
+) -> AsyncIterator[tuple[str, bytes]]:
+    """(archive name, PNG) pairs post by post; `folders` puts each post in its own directory."""
+    for source in sources:
+        prefix = f"post_{source['id']}_{_safe_name(source.get('title'), 'untitled')}/" if folders else ""
+        for index, png in enumerate(await render_post_slides(source, resolution, frame)):
+            yield f"{prefix}slide_{index + 1}.png", png
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from app.core.database import async_session
+    from app.services.image_renderer import shutdown_executor
+
+    parser = argparse.ArgumentParser(description="Render a post's slides and time cold vs. cached renders")
+    parser.add_argument("post_id", type=int)
+    parser.add_argument("--resolution", default="1080", choices=RESOLUTIONS)
+    parser.add_argument("--frame", choices=sorted(FRAMES))
+    parser.add_argument("--out", default=".", help="Directory for the PNGs")
+    args = parser.parse_args()
+
+    async def _main():
+        async with async_session() as session:
+            user_id = (await session.execute(select(Post.user_id).where(Post.id == args.post_id))).scalar()
+            sources = await load_render_sources(session, user_id, [args.post_id]) if user_id else []
+        if not sources:
+            print(f"Post {args.post_id} not found")
+            return
+        for path in RENDER_CACHE_DIR.glob("*.png"):
+            if any(path.stem == job["cache_key"] for job in slide_jobs(sources[0], args.resolution, args.frame)):
+                path.unlink()
+        for label in ("cold", "cached"):
+            started = time.perf_counter()
+            pngs = await render_post_slides(sources[0], args.resolution, args.frame)
+            print(f"{label:<7} {len(pngs)} slide(s) in {(time.perf_counter() - started) * 1000:.1f} ms")
+        for index, png in enumerate(pngs):
+            Path(args.out, f"post_{args.post_id}_slide_{index + 1}.png").write_bytes(png)
+        shutdown_executor()
+
+    asyncio.run(_main())
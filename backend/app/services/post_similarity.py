@@ -0,0 +1,357 @@
+"""
+Post Similarity Service - MinHash/LSH index over post text.
+
+Relation suggestions only matched posts on exact columns (story arc,
+platform, student, country + category) with one query each, and recycling
+had no idea whether an old post says the same as one published last week.
+This index compares what posts actually say.
+
+Architecture:
+    - Document: title, slide text (`plain_text`), captions, CTA and hashtags
+      (the search_index.POST_COLUMNS), folded like search queries. Shingles
+      are its words and the word pairs within each line (field, slide
+      text line); a post without text has no signature.
+    - Signature: NUM_PERM MinHash values, packed as array('I') (512 bytes)
+      in `post_signatures`. SHAKE-128 turns each shingle into NUM_PERM
+      independent 32-bit hashes in one C call; the signature is their
+      minimum per position.
+      The share of equal positions of two signatures estimates the Jaccard
+      similarity of their shingle sets.
+    - Incremental maintenance: an `after_flush` hook on the ORM Session
+      re-signs new posts and posts whose text columns changed, and deletes
+      the rows of deleted posts, in the same transaction. Bulk post writes
+      call `index_bulk_posts()`. `ensure_post_signatures()` backfills on
+      startup (app.core.startup).
+    - Lookup: `user_index()` keeps one in-memory LSH index per user
+      (BANDS bands of ROWS values; posts sharing any band are candidates,
+      ranked by estimated similarity). It is loaded once, then synced with
+      one query for rows written since its watermark plus a row count that
+      catches deletes, so other workers' writes are picked up too.
+    - Pure Python (array + dicts): NumPy is not a dependency of the
+      backend, and per-user indexes of a few thousand posts answer in
+      well under a millisecond per lookup.
+
+Usage:
+    from app.services import post_similarity
+
+    index = await post_similarity.user_index(db, user_id)
+    related = index.similar(post_id, limit=10)             # [(post_id, similarity)]
+    duplicates = await post_similarity.near_duplicates(db, post)
+
+    # Rebuild all signatures (all users or one), or time a lookup:
+    python -m app.services.post_similarity [--user USER_ID] [--similar POST_ID]
+"""
+
+import hashlib
+import logging
+import operator
+import time
+from array import array
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, event, func, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.post import Post
+from app.models.post_signature import PostSignature
+from app.services.search_index import POST_COLUMNS, query_terms
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 128
+# BANDS * ROWS == NUM_PERM; 2-row bands make posts from ~0.2 similarity on reliable candidates
+BANDS = 64
+ROWS = 2
+
+# Estimated Jaccard similarity thresholds
+NEAR_DUPLICATE_THRESHOLD = 0.7
+RELATED_THRESHOLD = 0.2
+
+# Text columns whose change re-signs a post
+TEXT_COLUMNS = tuple(c for c in POST_COLUMNS if c not in ("id", "user_id"))
+
+MAX_CACHED_USERS = 32
+# Rows written shortly before the watermark are re-read (commits may land out of order)
+SYNC_MARGIN_NS = 10_000_000_000
+
+
+# ─── Signatures ──────────────────────────────────────────────────────────
+
+def _document_text(values: dict) -> str:
+    return "\n".join(values[c] for c in TEXT_COLUMNS if values.get(c))
+
+
+def shingles(text: str) -> set[str]:
+    """Words and word pairs (within a line) of the folded text."""
+    found = set()
+    for line in text.splitlines():
+        words = query_terms(line)
+        found.update(words)
+        found.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    return found
+
+
+def signature(text: str) -> Optional[array]:
+    """MinHash signature of a text, or None if it has no words."""
+    hashes = [array("I", hashlib.shake_128(s.encode("utf-8")).digest(NUM_PERM * 4)) for s in shingles(text)]
+    if len(hashes) < 2:
+        return hashes[0] if hashes else None
+    return array("I", map(min, *hashes))
+
+
+def post_signature(values: dict) -> Optional[array]:
+    """Signature of a post from its `POST_COLUMNS` values."""
+    return signature(_document_text(values))
+
+
+def estimate_similarity(a: array, b: array) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    return sum(map(operator.eq, a, b)) / NUM_PERM
+
+
+def _band_keys(sig: array) -> list[bytes]:
+    return [sig[i * ROWS:(i + 1) * ROWS].tobytes() for i in range(BANDS)]
+
+
+# ─── In-memory LSH index ─────────────────────────────────────────────────
+
+class SimilarityIndex:
+    """LSH index over one user's post signatures."""
+
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self.signatures: dict[int, array] = {}
+        self._buckets: list[dict[bytes, set[int]]] = [{} for _ in range(BANDS)]
+        self.watermark = 0
+
+    def __contains__(self, post_id: int) -> bool:
+        return post_id in self.signatures
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def add(self, post_id: int, sig: array) -> None:
+        self.remove(post_id)
+        self.signatures[post_id] = sig
+        for bucket, key in zip(self._buckets, _band_keys(sig)):
+            bucket.setdefault(key, set()).add(post_id)
+
+    def remove(self, post_id: int) -> None:
+        sig = self.signatures.pop(post_id, None)
+        if sig is None:
+            return
+        for bucket, key in zip(self._buckets, _band_keys(sig)):
+            members = bucket.get(key)
+            if members is not None:
+                members.discard(post_id)
+                if not members:
+                    del bucket[key]
+
+    def candidates(self, sig: array) -> set[int]:
+        """Posts sharing at least one band with `sig`."""
+        found = set()
+        for bucket, key in zip(self._buckets, _band_keys(sig)):
+            members = bucket.get(key)
+            if members:
+                found |= members
+        return found
+
+    def similar(
+        self,
+        post_id: Optional[int] = None,
+        sig: Optional[array] = None,
+        limit: int = 10,
+        min_similarity: float = RELATED_THRESHOLD,
+        among: Optional[set[int]] = None,
+        exclude: Iterable[int] = (),
+    ) -> list[tuple[int, float]]:
+        """Most similar posts to a post of the index (or a signature), best first.
+
+        `among` restricts the result to those post ids; `exclude` drops ids.
+        Returns [(post_id, similarity)].
+        """
+        if sig is None:
+            sig = self.signatures.get(post_id)
+            if sig is None:
+                return []
+        skip = set(exclude)
+        if post_id is not None:
+            skip.add(post_id)
+        ranked = []
+        for candidate in self.candidates(sig):
+            if candidate in skip or (among is not None and candidate not in among):
+                continue
+            similarity = estimate_similarity(sig, self.signatures[candidate])
+            if similarity >= min_similarity:
+                ranked.append((candidate, round(similarity, 3)))
+        ranked.sort(key=lambda r: (-r[1], r[0]))
+        return ranked[:limit]
+
+
+# user_id -> index, least recently used first
+_indexes: "OrderedDict[int, SimilarityIndex]" = OrderedDict()
+
+
+async def _load(db: AsyncSession, index: SimilarityIndex, since_ns: Optional[int] = None) -> None:
+    query = select(PostSignature.post_id, PostSignature.signature, PostSignature.updated_ns).where(
+        PostSignature.user_id == index.user_id,
+    )
+    if since_ns is not None:
+        query = query.where(PostSignature.updated_ns > since_ns)
+    for post_id, packed, updated_ns in (await db.execute(query)).all():
+        sig = array("I")
+        sig.frombytes(packed)
+        index.add(post_id, sig)
+        index.watermark = max(index.watermark, updated_ns)
+
+
+async def user_index(db: AsyncSession, user_id: int) -> SimilarityIndex:
+    """The user's similarity index, synced with the post_signatures table."""
+    index = _indexes.get(user_id)
+    if index is None:
+        index = SimilarityIndex(user_id)
+        await _load(db, index)
+    else:
+        _indexes.move_to_end(user_id)
+        await _load(db, index, since_ns=index.watermark - SYNC_MARGIN_NS)
+        count = (await db.execute(
+            select(func.count()).select_from(PostSignature).where(PostSignature.user_id == user_id)
+        )).scalar()
+        if count != len(index):
+            # Posts were deleted (or a write rolled back): reload from scratch
+            index = SimilarityIndex(user_id)
+            await _load(db, index)
+
+    _indexes[user_id] = index
+    while len(_indexes) > MAX_CACHED_USERS:
+        _indexes.popitem(last=False)
+    return index
+
+
+async def near_duplicates(db: AsyncSession, post: Post, limit: int = 5) -> list[tuple[int, float]]:
+    """Other posts of the post's owner that say nearly the same. Returns [(post_id, similarity)]."""
+    sig = post_signature({c: getattr(post, c) for c in POST_COLUMNS})
+    if sig is None:
+        return []
+    index = await user_index(db, post.user_id)
+    return index.similar(post.id, sig=sig, limit=limit, min_similarity=NEAR_DUPLICATE_THRESHOLD)
+
+
+# ─── Incremental maintenance (ORM flush hook) ────────────────────────────
+
+def _signature_rows(rows: Iterable[dict]) -> tuple[list[int], list[dict]]:
+    """(post ids to clear, rows to insert) for posts given by their `POST_COLUMNS` values."""
+    now = time.time_ns()
+    stale, fresh = [], []
+    for values in rows:
+        stale.append(values["id"])
+        sig = post_signature(values)
+        if sig is not None:
+            fresh.append({
+                "post_id": values["id"],
+                "user_id": values["user_id"],
+                "signature": sig.tobytes(),
+                "updated_ns": now,
+            })
+    return stale, fresh
+
+
+def _text_changed(post: Post) -> bool:
+    state = inspect(post)
+    return any(state.attrs[c].history.has_changes() for c in TEXT_COLUMNS)
+
+
+@event.listens_for(Session, "after_flush")
+def _sign_changes(session: Session, flush_context) -> None:
+    """Re-sign posts whose text was written in this flush."""
+    deleted = [obj.id for obj in session.deleted if isinstance(obj, Post)]
+    changed = [obj for obj in session.new if isinstance(obj, Post)]
+    changed += [
+        obj for obj in session.dirty
+        if isinstance(obj, Post) and session.is_modified(obj, include_collections=False) and _text_changed(obj)
+    ]
+    if not deleted and not changed:
+        return
+
+    stale, fresh = _signature_rows({c: getattr(obj, c) for c in POST_COLUMNS} for obj in changed)
+    stale += deleted
+    connection = session.connection()
+    connection.execute(delete(PostSignature.__table__).where(PostSignature.post_id.in_(stale)))
+    if fresh:
+        connection.execute(PostSignature.__table__.insert(), fresh)
+
+
+async def index_bulk_posts(db: AsyncSession, rows: list[dict]) -> None:
+    """(Re-)sign posts written by Core bulk statements (rows hold `POST_COLUMNS`)."""
+    if not rows:
+        return
+    stale, fresh = _signature_rows(rows)
+    await db.execute(delete(PostSignature).where(PostSignature.post_id.in_(stale)))
+    if fresh:
+        await db.execute(PostSignature.__table__.insert(), fresh)
+
+
+# ─── Rebuild / backfill ──────────────────────────────────────────────────
+
+async def rebuild_post_signatures(db: AsyncSession, user_id: Optional[int] = None) -> int:
+    """Recompute signatures from the posts table (all users or one). Returns row count."""
+    cleanup = delete(PostSignature)
+    query = select(*(getattr(Post, c) for c in POST_COLUMNS))
+    if user_id is not None:
+        cleanup = cleanup.where(PostSignature.user_id == user_id)
+        query = query.where(Post.user_id == user_id)
+    await db.execute(cleanup)
+
+    _, fresh = _signature_rows(dict(row._mapping) for row in (await db.execute(query)).all())
+    if fresh:
+        await db.execute(PostSignature.__table__.insert(), fresh)
+    return len(fresh)
+
+
+async def ensure_post_signatures(db: AsyncSession) -> int:
+    """Backfill signatures if the table is empty but posts exist (first deploy)."""
+    has_signatures = (await db.execute(select(PostSignature.post_id).limit(1))).first()
+    if has_signatures:
+        return 0
+    has_posts = (await db.execute(select(Post.id).limit(1))).first()
+    if not has_posts:
+        return 0
+    count = await rebuild_post_signatures(db)
+    await db.commit()
+    return count
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+
+    from app.core.database import async_session
+
+    parser = argparse.ArgumentParser(description="Rebuild post similarity signatures from posts")
+    parser.add_argument("--user", type=int, default=None, help="Only rebuild this user's signatures")
+    parser.add_argument("--similar", type=int, default=None, metavar="POST_ID", help="Print the posts most similar to this one instead")
+    args = parser.parse_args()
+
+    async def _main():
+        async with async_session() as session:
+            if args.similar is None:
+                count = await rebuild_post_signatures(session, args.user)
+                await session.commit()
+                print(f"Rebuilt post_signatures: {count} row(s)")
+                return
+            post = await session.get(Post, args.similar)
+            if post is None:
+                print(f"Post {args.similar} not found")
+                return
+            started = time.perf_counter()
+            index = await user_index(session, post.user_id)
+            loaded = time.perf_counter()
+            results = index.similar(post.id)
+            done = time.perf_counter()
+            for post_id, similarity in results:
+                print(f"{post_id}: {similarity:.3f}")
+            print(f"load {(loaded - started) * 1000:.1f} ms ({len(index)} posts), lookup {(done - loaded) * 1000:.2f} ms")
+
+    asyncio.run(_main())
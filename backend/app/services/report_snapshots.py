@@ -0,0 +1,624 @@
+"""
+Report Snapshots Service - report aggregates computed once per period and data version.
+
+Generating or previewing a report used to gather the period's counts, sums
+and top posts on every request, and build the PDF inside the request. A
+report is now a snapshot: the aggregates are stored as JSON in
+`report_snapshots`, keyed by (user, period window, data version), and the
+rendered PDF/CSV files are kept next to it. Repeat downloads and previews
+of an unchanged period read the snapshot instead of the posts.
+
+Architecture:
+    - Data version: hash of count, max id and max `updated_at` of the
+      user's posts (one indexed query). Any post create/update/delete
+      changes it, so a snapshot is never stale; superseded snapshots of the
+      same period (and their files) are deleted when a new one is written.
+    - Window: "week" is the last 7 days, "month" the current month, both up
+      to today, so snapshots roll over daily.
+    - Artifacts: `report_<id>.pdf` / `.csv` in uploads/reports. CSVs are
+      written on first download (rows streamed from the database); PDFs are
+      built by a background task (`submit_pdf_job()`, fpdf in a worker
+      thread) whose result carries the download URL. Missing files (e.g.
+      ephemeral /tmp on Vercel) are rebuilt from the snapshot.
+
+Usage:
+    from app.services.report_snapshots import get_snapshot, snapshot_data, submit_pdf_job
+
+    snapshot = await get_snapshot(db, user_id, "month")
+    data = snapshot_data(snapshot)
+    task = await submit_pdf_job(user_id, snapshot.id, data)
+
+    # Time gather vs. snapshot hit for a user:
+    python -m app.services.report_snapshots --user 1 --period month
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import case, delete, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.export_stream import csv_lines, encode_chunks, stream_rows
+from app.core.paths import get_upload_dir
+from app.core.projection import Projection
+from app.models.post import Post
+from app.models.report_snapshot import ReportSnapshot
+from app.services.analytics_rollup import count_by, totals
+
+logger = logging.getLogger(__name__)
+
+# Bump when the snapshot's JSON layout changes (invalidates stored snapshots)
+SNAPSHOT_FORMAT = 1
+
+REPORT_DIR = get_upload_dir("reports")
+
+# Columns of the CSV report's post table
+REPORT_POST = Projection(
+    "ReportPost",
+    Post.id, Post.title, Post.category, Post.platform, Post.country, Post.status,
+    Post.perf_likes, Post.perf_comments, Post.perf_shares, Post.perf_saves, Post.perf_reach,
+    Post.created_at, Post.scheduled_date, Post.posted_at,
+)
+
+# Snapshot id -> task id of the PDF job currently building it (this process)
+_pdf_jobs: dict[int, str] = {}
+
+
+# ─── Gathering ───────────────────────────────────────────────────────────
+
+def report_window(period: str, now: Optional[datetime] = None) -> dict:
+    """Label, date range and window key of a report period ending `now`."""
+    now = now or datetime.now(timezone.utc)
+    if period == "week":
+        start = now - timedelta(days=7)
+        period_label = "Wochenbericht"
+    else:
+        start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        period_label = "Monatsbericht"
+    return {
+        "now": now,
+        "since": start.date(),  # rollups cover whole days
+        "period_label": period_label,
+        "date_range": f"{start.strftime('%d.%m.%Y')} - {now.strftime('%d.%m.%Y')}",
+        "window_key": f"{start.date().isoformat()}..{now.date().isoformat()}",
+    }
+
+
+def posts_query(user_id: int, since: date):
+    """Post rows (CSV columns only) of the report window, newest first."""
+    since_start = datetime.combine(since, datetime.min.time())
+    return REPORT_POST.select().where(
+        Post.user_id == user_id,
+        Post.created_at >= since_start,
+    ).order_by(Post.created_at.desc())
+
+
+async def gather_report_data(db: AsyncSession, user_id: int, period: str, window: dict) -> dict:
+    """Collect all aggregates of a report (JSON-serializable).
+
+    Counts and metric totals come from the post_daily_stats rollups (whole
+    days); the CSV's post rows are streamed from `posts_query()`.
+    """
+    now = window["now"]
+    period_label = window["period_label"]
+    date_range = window["date_range"]
+    since = window["since"]
+    since_start = datetime.combine(since, datetime.min.time())
+
+    # Distributions and metric sums from the analytics rollups
+    categories = {k or "unbekannt": v for k, v in (await count_by(db, user_id, "category", since=since)).items()}
+    platforms = {k or "unbekannt": v for k, v in (await count_by(db, user_id, "platform", since=since)).items()}
+    countries = {k: v for k, v in (await count_by(db, user_id, "country", since=since)).items() if k}
+    statuses = {k or "draft": v for k, v in (await count_by(db, user_id, "status", since=since)).items()}
+    sums = await totals(db, user_id, since=since)
+
+    total_posts = sums["post_count"]
+    posts_with_metrics = sums["posts_with_metrics"]
+    total_likes = sums["likes"]
+    total_comments = sums["comments"]
+    total_shares = sums["shares"]
+    total_saves = sums["saves"]
+    total_reach = sums["reach"]
+    avg_engagement = 0.0
+    if total_reach > 0:
+        avg_engagement = round(((total_likes + total_comments + total_shares) / total_reach) * 100, 2)
+
+    # Top posts by engagement (ranked in SQL, only 10 rows loaded)
+    engagement_rate = case(
+        (Post.perf_reach > 0,
+         (func.coalesce(Post.perf_likes, 0) + func.coalesce(Post.perf_comments, 0) + func.coalesce(Post.perf_shares, 0))
+         * 100.0 / Post.perf_reach),
+        else_=0,
+    )
+    result = await db.execute(
+        select(
+            Post.id, Post.title, Post.category, Post.platform,
+            Post.perf_likes, Post.perf_comments, Post.perf_shares, Post.perf_saves, Post.perf_reach,
+        )
+        .where(
+            Post.user_id == user_id,
+            Post.created_at >= since_start,
+            Post.perf_likes.isnot(None) | Post.perf_reach.isnot(None),
+        )
+        .order_by(engagement_rate.desc())
+        .limit(10)
+    )
+    top_posts = []
+    for row in result.all():
+        likes = row.perf_likes or 0
+        comments = row.perf_comments or 0
+        shares = row.perf_shares or 0
+        reach = row.perf_reach or 0
+        eng = round(((likes + comments + shares) / reach) * 100, 2) if reach > 0 else 0
+        top_posts.append({
+            "id": row.id,
+            "title": row.title or f"Post #{row.id}",
+            "category": row.category,
+            "platform": row.platform,
+            "likes": likes,
+            "comments": comments,
+            "shares": shares,
+            "saves": row.perf_saves or 0,
+            "reach": reach,
+            "engagement_rate": eng,
+        })
+
+    # Recommendations
+    recommendations = []
+    if total_posts == 0:
+        recommendations.append("Keine Posts im Berichtszeitraum. Posting-Frequenz erhoehen!")
+    else:
+        if "instagram_story" not in platforms:
+            recommendations.append("Instagram Stories einsetzen fuer hoehere Reichweite")
+        if "tiktok" not in platforms:
+            recommendations.append("TikTok als Kanal erschliessen")
+        missing_countries = [c for c in ["usa", "canada", "australia", "newzealand", "ireland"] if c not in countries]
+        if missing_countries:
+            labels = {"usa": "USA", "canada": "Kanada", "australia": "Australien", "newzealand": "Neuseeland", "ireland": "Irland"}
+            names = ", ".join(labels.get(c, c) for c in missing_countries[:2])
+            recommendations.append(f"Mehr Content fuer: {names}")
+        if posts_with_metrics < total_posts * 0.5 and total_posts > 2:
+            recommendations.append("Performance-Metriken fuer mehr Posts nachtragen")
+
+    return {
+        "period_label": period_label,
+        "date_range": date_range,
+        "generated_at": now.isoformat(),
+        "since": since.isoformat(),
+        "total_posts": total_posts,
+        "posts_with_metrics": posts_with_metrics,
+        "categories": categories,
+        "platforms": platforms,
+        "countries": countries,
+        "statuses": statuses,
+        "metrics": {
+            "total_likes": total_likes,
+            "total_comments": total_comments,
+            "total_shares": total_shares,
+            "total_saves": total_saves,
+            "total_reach": total_reach,
+            "avg_engagement_rate": avg_engagement,
+        },
+        "top_posts": top_posts,
+        "recommendations": recommendations,
+    }
+
+
+# ─── Rendering ───────────────────────────────────────────────────────────
+
+def generate_pdf(data: dict) -> bytes:
+    """Generate a branded PDF report using fpdf2."""
+    from fpdf import FPDF
+
+    class TreffPDF(FPDF):
+        def header(self):
+            # TREFF brand blue header bar
+            self.set_fill_color(76, 139, 194)  # #4C8BC2
+            self.rect(0, 0, 210, 25, "F")
+            self.set_font("Helvetica", "B", 16)
+            self.set_text_color(255, 255, 255)
+            self.set_y(5)
+            self.cell(0, 10, "TREFF Sprachreisen", align="L")
+            self.set_font("Helvetica", "", 10)
+            self.cell(0, 10, data["period_label"], align="R")
+            self.ln(15)
+            # Yellow accent line
+            self.set_fill_color(253, 208, 0)  # #FDD000
+            self.rect(0, 25, 210, 2, "F")
+            self.set_y(32)
+
+        def footer(self):
+            self.set_y(-15)
+            self.set_font("Helvetica", "I", 8)
+            self.set_text_color(150, 150, 150)
+            self.cell(0, 10, f"TREFF Sprachreisen | Generiert am {datetime.now().strftime('%d.%m.%Y %H:%M')} | Seite {self.page_no()}/{{nb}}", align="C")
+
+    pdf = TreffPDF()
+    pdf.alias_nb_pages()
+    pdf.add_page()
+    pdf.set_auto_page_break(auto=True, margin=20)
+
+    # ─── Title Section ───
+    pdf.set_text_color(26, 26, 46)
+    pdf.set_font("Helvetica", "B", 20)
+    pdf.cell(0, 12, data["period_label"], ln=True)
+    pdf.set_font("Helvetica", "", 11)
+    pdf.set_text_color(100, 100, 100)
+    pdf.cell(0, 7, f"Zeitraum: {data['date_range']}", ln=True)
+    pdf.ln(5)
+
+    # ─── Summary Box ───
+    pdf.set_fill_color(245, 245, 245)
+    pdf.rect(10, pdf.get_y(), 190, 30, "F")
+    pdf.set_font("Helvetica", "B", 12)
+    pdf.set_text_color(26, 26, 46)
+    y_start = pdf.get_y() + 3
+
+    # 4 columns of summary stats
+    col_w = 47.5
+    metrics = [
+        (str(data["total_posts"]), "Posts erstellt"),
+        (str(data["posts_with_metrics"]), "Mit Metriken"),
+        (f"{data['metrics']['avg_engagement_rate']}%", "Engagement Rate"),
+        (f"{data['metrics']['total_reach']:,}".replace(",", "."), "Reichweite"),
+    ]
+    for i, (value, label) in enumerate(metrics):
+        x = 10 + i * col_w
+        pdf.set_xy(x, y_start)
+        pdf.set_font("Helvetica", "B", 16)
+        pdf.set_text_color(76, 139, 194)
+        pdf.cell(col_w, 10, value, align="C")
+        pdf.set_xy(x, y_start + 12)
+        pdf.set_font("Helvetica", "", 8)
+        pdf.set_text_color(100, 100, 100)
+        pdf.cell(col_w, 8, label, align="C")
+
+    pdf.set_y(y_start + 28)
+    pdf.ln(5)
+
+    # ─── Performance Metrics Table ───
+    pdf.set_font("Helvetica", "B", 13)
+    pdf.set_text_color(26, 26, 46)
+    pdf.cell(0, 10, "Performance-Metriken", ln=True)
+
+    # Table header
+    pdf.set_fill_color(76, 139, 194)
+    pdf.set_text_color(255, 255, 255)
+    pdf.set_font("Helvetica", "B", 9)
+    cols = ["Metrik", "Wert"]
+    col_widths = [100, 90]
+    for i, col in enumerate(cols):
+        pdf.cell(col_widths[i], 8, col, 1, 0, "C", True)
+    pdf.ln()
+
+    # Table rows
+    pdf.set_text_color(26, 26, 46)
+    pdf.set_font("Helvetica", "", 9)
+    metric_rows = [
+        ("Likes gesamt", str(data["metrics"]["total_likes"])),
+        ("Kommentare gesamt", str(data["metrics"]["total_comments"])),
+        ("Shares gesamt", str(data["metrics"]["total_shares"])),
+        ("Saves gesamt", str(data["metrics"]["total_saves"])),
+        ("Reichweite gesamt", f"{data['metrics']['total_reach']:,}".replace(",", ".")),
+        ("Durchschn. Engagement Rate", f"{data['metrics']['avg_engagement_rate']}%"),
+    ]
+    fill = False
+    for label, value in metric_rows:
+        if fill:
+            pdf.set_fill_color(245, 245, 245)
+        pdf.cell(col_widths[0], 7, f"  {label}", 1, 0, "L", fill)
+        pdf.cell(col_widths[1], 7, value, 1, 0, "C", fill)
+        pdf.ln()
+        fill = not fill
+
+    pdf.ln(5)
+
+    # ─── Distribution Section ───
+    if data["categories"]:
+        pdf.set_font("Helvetica", "B", 13)
+        pdf.set_text_color(26, 26, 46)
+        pdf.cell(0, 10, "Verteilung", ln=True)
+
+        category_labels = {
+            "laender_spotlight": "Laender-Spotlight",
+            "erfahrungsberichte": "Erfahrungsberichte",
+            "infografiken": "Infografiken",
+            "fristen_cta": "Fristen/CTA",
+            "tipps_tricks": "Tipps & Tricks",
+            "faq": "FAQ",
+            "foto_posts": "Foto-Posts",
+            "reel_tiktok_thumbnails": "Reels/TikTok",
+            "story_posts": "Stories",
+            "story_teaser": "Story-Teaser",
+        }
+        platform_labels = {
+            "instagram_feed": "Instagram Feed",
+            "instagram_story": "Instagram Story",
+            "tiktok": "TikTok",
+        }
+
+        # Categories
+        pdf.set_font("Helvetica", "B", 10)
+        pdf.cell(0, 7, "Kategorien:", ln=True)
+        pdf.set_font("Helvetica", "", 9)
+        for cat, count in sorted(data["categories"].items(), key=lambda x: -x[1]):
+            label = category_labels.get(cat, cat)
+            pct = round(count / data["total_posts"] * 100) if data["total_posts"] > 0 else 0
+            # Draw simple bar
+            bar_width = min(pct * 1.2, 120)
+            pdf.cell(60, 6, f"  {label}", 0, 0)
+            pdf.set_fill_color(76, 139, 194)
+            pdf.cell(bar_width, 6, "", 0, 0, "", True)
+            pdf.cell(30, 6, f"  {count} ({pct}%)", 0, 1)
+
+        pdf.ln(3)
+
+        # Platforms
+        if data["platforms"]:
+            pdf.set_font("Helvetica", "B", 10)
+            pdf.cell(0, 7, "Plattformen:", ln=True)
+            pdf.set_font("Helvetica", "", 9)
+            for plat, count in sorted(data["platforms"].items(), key=lambda x: -x[1]):
+                label = platform_labels.get(plat, plat)
+                pct = round(count / data["total_posts"] * 100) if data["total_posts"] > 0 else 0
+                bar_width = min(pct * 1.2, 120)
+                pdf.cell(60, 6, f"  {label}", 0, 0)
+                pdf.set_fill_color(253, 208, 0)
+                pdf.cell(bar_width, 6, "", 0, 0, "", True)
+                pdf.cell(30, 6, f"  {count} ({pct}%)", 0, 1)
+            pdf.ln(3)
+
+    # ─── Top Posts Section ───
+    if data["top_posts"]:
+        pdf.set_font("Helvetica", "B", 13)
+        pdf.set_text_color(26, 26, 46)
+        pdf.cell(0, 10, "Top-Posts nach Engagement", ln=True)
+
+        # Table header
+        pdf.set_fill_color(76, 139, 194)
+        pdf.set_text_color(255, 255, 255)
+        pdf.set_font("Helvetica", "B", 8)
+        top_cols = ["#", "Titel", "Likes", "Komm.", "Reach", "Eng.%"]
+        top_widths = [10, 75, 20, 20, 30, 25]
+        for i, col in enumerate(top_cols):
+            pdf.cell(top_widths[i], 7, col, 1, 0, "C", True)
+        pdf.ln()
+
+        pdf.set_text_color(26, 26, 46)
+        pdf.set_font("Helvetica", "", 8)
+        fill = False
+        for rank, post in enumerate(data["top_posts"][:10], 1):
+            if fill:
+                pdf.set_fill_color(245, 245, 245)
+            title = (post["title"] or "")[:35]
+            if len(post.get("title", "") or "") > 35:
+                title += "..."
+            pdf.cell(top_widths[0], 6, str(rank), 1, 0, "C", fill)
+            pdf.cell(top_widths[1], 6, f"  {title}", 1, 0, "L", fill)
+            pdf.cell(top_widths[2], 6, str(post["likes"]), 1, 0, "C", fill)
+            pdf.cell(top_widths[3], 6, str(post["comments"]), 1, 0, "C", fill)
+            pdf.cell(top_widths[4], 6, f"{post['reach']:,}".replace(",", "."), 1, 0, "C", fill)
+            pdf.cell(top_widths[5], 6, f"{post['engagement_rate']}%", 1, 0, "C", fill)
+            pdf.ln()
+            fill = not fill
+        pdf.ln(5)
+
+    # ─── Recommendations ───
+    if data["recommendations"]:
+        pdf.set_font("Helvetica", "B", 13)
+        pdf.set_text_color(26, 26, 46)
+        pdf.cell(0, 10, "Empfehlungen", ln=True)
+
+        pdf.set_fill_color(253, 248, 220)
+        rec_y = pdf.get_y()
+        rec_height = len(data["recommendations"]) * 7 + 6
+        pdf.rect(10, rec_y, 190, rec_height, "F")
+        pdf.set_xy(15, rec_y + 3)
+        pdf.set_font("Helvetica", "", 9)
+        pdf.set_text_color(80, 60, 0)
+        for rec in data["recommendations"]:
+            pdf.cell(0, 7, f"  > {rec}", ln=True)
+
+    return pdf.output()
+
+
+def _csv_row(p) -> list:
+    likes = p.perf_likes or 0
+    comments = p.perf_comments or 0
+    shares = p.perf_shares or 0
+    reach = p.perf_reach or 0
+    eng = round(((likes + comments + shares) / reach) * 100, 2) if reach > 0 else ""
+    return [
+        p.id,
+        p.title or "",
+        p.category or "",
+        p.platform or "",
+        p.country or "",
+        p.status or "",
+        p.perf_likes if p.perf_likes is not None else "",
+        p.perf_comments if p.perf_comments is not None else "",
+        p.perf_shares if p.perf_shares is not None else "",
+        p.perf_saves if p.perf_saves is not None else "",
+        p.perf_reach if p.perf_reach is not None else "",
+        eng,
+        p.created_at.strftime("%Y-%m-%d %H:%M") if p.created_at else "",
+        p.scheduled_date.isoformat() if p.scheduled_date else "",
+        p.posted_at.strftime("%Y-%m-%d %H:%M") if p.posted_at else "",
+    ]
+
+
+def csv_chunks(user_id: int, data: dict) -> AsyncIterator[bytes]:
+    """CSV report with all post rows of the window and their metrics (streamed UTF-8 chunks)."""
+    lines = csv_lines(
+        stream_rows(REPORT_POST, posts_query(user_id, date.fromisoformat(data["since"]))),
+        [
+            "ID", "Titel", "Kategorie", "Plattform", "Land", "Status",
+            "Likes", "Kommentare", "Shares", "Saves", "Reichweite",
+            "Engagement Rate (%)", "Erstellt", "Geplant", "Gepostet",
+        ],
+        _csv_row,
+        delimiter=";",
+    )
+    return encode_chunks(lines)
+
+
+# ─── Snapshots ───────────────────────────────────────────────────────────
+
+async def data_version(db: AsyncSession, user_id: int) -> str:
+    """Hash of the state of the user's posts; changes with every post write."""
+    row = (await db.execute(
+        select(func.count(Post.id), func.max(Post.id), func.max(Post.updated_at)).where(Post.user_id == user_id)
+    )).one()
+    key = f"{SNAPSHOT_FORMAT}|{row[0]}|{row[1]}|{row[2].isoformat() if row[2] else ''}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+def artifact_path(snapshot_id: int, report_format: str) -> Path:
+    return REPORT_DIR / f"report_{snapshot_id}.{report_format}"
+
+
+def snapshot_data(snapshot: ReportSnapshot) -> dict:
+    return json.loads(snapshot.data)
+
+
+def report_filename(data: dict, report_format: str) -> str:
+    return f"TREFF_{data['period_label'].replace(' ', '_')}_{datetime.now().strftime('%Y%m%d')}.{report_format}"
+
+
+def _remove_artifacts(snapshot_ids) -> None:
+    for snapshot_id in snapshot_ids:
+        for report_format in ("pdf", "csv"):
+            artifact_path(snapshot_id, report_format).unlink(missing_ok=True)
+
+
+async def get_snapshot(db: AsyncSession, user_id: int, period: str) -> ReportSnapshot:
+    """The current snapshot of a period: stored one if the data is unchanged, else gathered now."""
+    window = report_window(period)
+    version = await data_version(db, user_id)
+    key = (
+        ReportSnapshot.user_id == user_id,
+        ReportSnapshot.period == period,
+        ReportSnapshot.window_key == window["window_key"],
+        ReportSnapshot.data_version == version,
+    )
+    snapshot = (await db.execute(select(ReportSnapshot).where(*key))).scalar_one_or_none()
+    if snapshot:
+        return snapshot
+
+    data = await gather_report_data(db, user_id, period, window)
+    stale = (await db.execute(
+        select(ReportSnapshot.id).where(ReportSnapshot.user_id == user_id, ReportSnapshot.period == period)
+    )).scalars().all()
+    snapshot = ReportSnapshot(
+        user_id=user_id, period=period, window_key=window["window_key"],
+        data_version=version, data=json.dumps(data),
+    )
+    db.add(snapshot)
+    try:
+        if stale:
+            await db.execute(delete(ReportSnapshot).where(ReportSnapshot.id.in_(stale)))
+        await db.commit()
+    except IntegrityError:
+        # A concurrent request stored the same snapshot first
+        await db.rollback()
+        return (await db.execute(select(ReportSnapshot).where(*key))).scalar_one()
+    _remove_artifacts(stale)
+    logger.info(f"Report snapshot {snapshot.id} stored (user {user_id}, {period} {window['window_key']})")
+    return snapshot
+
+
+# ─── Artifacts ───────────────────────────────────────────────────────────
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    temp = path.with_suffix(f".{os.getpid()}.tmp")
+    temp.write_bytes(data)
+    os.replace(temp, path)
+
+
+def write_pdf_artifact(snapshot_id: int, data: dict) -> Path:
+    """Render the PDF of a snapshot to its artifact file (sync, CPU-bound)."""
+    path = artifact_path(snapshot_id, "pdf")
+    _write_atomic(path, bytes(generate_pdf(data)))
+    return path
+
+
+async def ensure_pdf_artifact(snapshot_id: int, data: dict) -> Path:
+    path = artifact_path(snapshot_id, "pdf")
+    if not path.exists():
+        await asyncio.to_thread(write_pdf_artifact, snapshot_id, data)
+    return path
+
+
+async def ensure_csv_artifact(user_id: int, snapshot_id: int, data: dict) -> Path:
+    """Write the CSV of a snapshot on first use (rows streamed from the database)."""
+    path = artifact_path(snapshot_id, "csv")
+    if path.exists():
+        return path
+    temp = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(temp, "wb") as f:
+        async for chunk in csv_chunks(user_id, data):
+            f.write(chunk)
+    os.replace(temp, path)
+    return path
+
+
+def download_url(snapshot_id: int, report_format: str) -> str:
+    return f"/api/reports/download/{snapshot_id}?format={report_format}"
+
+
+async def submit_pdf_job(user_id: int, snapshot_id: int, data: dict) -> dict:
+    """Build the snapshot's PDF in a background task; reuses a job already running for it."""
+    from app.services.task_manager import task_manager, TaskContext
+
+    running = _pdf_jobs.get(snapshot_id)
+    if running:
+        return {"task_id": running, "status": "processing", "task_type": "report_pdf"}
+
+    async def operation(ctx: TaskContext):
+        try:
+            await ctx.update_progress(0.1, "PDF-Bericht wird erstellt")
+            await ensure_pdf_artifact(snapshot_id, data)
+        finally:
+            _pdf_jobs.pop(snapshot_id, None)
+        return {"snapshot_id": snapshot_id, "download_url": download_url(snapshot_id, "pdf")}
+
+    task = await task_manager.submit_task(
+        user_id=user_id,
+        task_type="report_pdf",
+        title=f"{data['period_label']} {data['date_range']}",
+        func=operation,
+        timeout_seconds=120,
+    )
+    _pdf_jobs[snapshot_id] = task["task_id"]
+    return task
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from app.core.database import async_session
+
+    parser = argparse.ArgumentParser(description="Time report gathering vs. a snapshot hit")
+    parser.add_argument("--user", type=int, default=1)
+    parser.add_argument("--period", choices=("week", "month"), default="month")
+    args = parser.parse_args()
+
+    async def _main():
+        async with async_session() as session:
+            started = time.perf_counter()
+            await gather_report_data(session, args.user, args.period, report_window(args.period))
+            print(f"gather          {(time.perf_counter() - started) * 1000:8.1f} ms")
+            await get_snapshot(session, args.user, args.period)
+            started = time.perf_counter()
+            snapshot = await get_snapshot(session, args.user, args.period)
+            print(f"snapshot hit    {(time.perf_counter() - started) * 1000:8.1f} ms  (id {snapshot.id})")
+
+    asyncio.run(_main())
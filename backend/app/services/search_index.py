@@ -0,0 +1,459 @@
+"""
+Search Index Service - SQLite FTS5 full-text search for posts, assets, students and templates.
+
+Replaces `ILIKE '%term%'` scans with a single FTS5 index that is ranked by
+BM25 and supports prefix matching (search-as-you-type).
+
+Architecture:
+    - One FTS5 table `search_index(title, body)` with UNINDEXED entity_type /
+      entity_id / user_id columns. The rowid is derived from (entity type, id),
+      so updates and deletes hit a single row without scanning.
+    - Documents are built by extractor functions: posts use their
+      denormalized slide `plain_text` column, asset tags come from their
+      JSON array, etc.
+    - German-aware folding (ä→ae, ö→oe, ü→ue, ß→ss, accents stripped,
+      lowercase) is applied to both indexed text and queries, so "Länder"
+      finds "Laender" and vice versa.
+    - An `after_flush` hook on the ORM Session re-indexes changed rows in
+      the same transaction; bulk post writes call `index_bulk_posts()`.
+      The index is created and backfilled when the schema fingerprint
+      changes (app.core.startup), which also records FTS5 availability.
+    - If the SQLite build lacks FTS5, `search()` falls back to scoring the
+      user's rows in Python (same result shape, slower).
+    - List endpoints filter with `match_subquery()`, an FTS5 subquery of the
+      matching ids (no id list round trip). It is None without FTS5 or for
+      a query without word terms ("#", "!!"); the routes then keep their
+      ILIKE filter.
+
+Usage:
+    from app.services.search_index import search, match_subquery, matching_ids
+
+    results = await search(db, user_id, "highschool usa", types=["post"])
+    post_ids = await matching_ids(db, user_id, "post", "kanada")
+    matches = match_subquery(user_id, "post", "kanada")
+    if matches is not None:
+        query = query.where(Post.id.in_(matches))
+
+    # Rebuild the index from scratch:
+    python -m app.services.search_index
+"""
+
+import html
+import json
+import logging
+import re
+import unicodedata
+from typing import Optional
+
+from sqlalchemy import column, event, select, table, text
+from sqlalchemy.sql import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.asset import Asset
+from app.models.post import Post
+from app.models.student import Student
+from app.models.template import Template
+
+logger = logging.getLogger(__name__)
+
+# Entity type -> (code used in rowid, model)
+ENTITY_TYPES = {
+    "post": (1, Post),
+    "asset": (2, Asset),
+    "student": (3, Student),
+    "template": (4, Template),
+}
+_ROWID_FACTOR = 8
+
+# BM25 column weights (title, body)
+TITLE_WEIGHT = 5.0
+BODY_WEIGHT = 1.0
+
+SNIPPET_CHARS = 160
+
+# None until ensure_search_index() ran (or set_fts5_available()); then True/False
+_fts5_available: Optional[bool] = None
+
+_CREATE_SQL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+    "title, body, entity_type UNINDEXED, entity_id UNINDEXED, user_id UNINDEXED, "
+    "tokenize = 'unicode61 remove_diacritics 2')"
+)
+
+_FOLD_MAP = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss"})
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+# ─── Text normalization ─────────────────────────────────────────────────
+
+def fold(value: str) -> str:
+    """German-aware search folding: lowercase, umlauts to ae/oe/ue, ß to ss, accents stripped."""
+    value = value.lower().translate(_FOLD_MAP)
+    decomposed = unicodedata.normalize("NFKD", value)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def query_terms(query: str) -> list[str]:
+    """Folded search terms of a user query."""
+    return _TERM_RE.findall(fold(query or ""))
+
+
+def _json_list_text(raw: Optional[str]) -> str:
+    try:
+        values = json.loads(raw) if raw else []
+    except (json.JSONDecodeError, TypeError):
+        return raw or ""
+    if isinstance(values, list):
+        return " ".join(str(v) for v in values)
+    return raw or ""
+
+
+def _join(*parts: Optional[str]) -> str:
+    return "\n".join(p for p in parts if p)
+
+
+# ─── Document extraction ────────────────────────────────────────────────
+
+# Post columns that make up a post's document
+POST_COLUMNS = (
+    "id", "user_id", "title", "plain_text", "caption_instagram", "caption_tiktok",
+    "cta_text", "hashtags_instagram", "hashtags_tiktok",
+)
+
+
+def _post_document(values: dict) -> tuple[str, int, int, str, str]:
+    return "post", values["id"], values["user_id"], values["title"] or "", _join(
+        values["plain_text"], values["caption_instagram"], values["caption_tiktok"],
+        values["cta_text"], values["hashtags_instagram"], values["hashtags_tiktok"],
+    )
+
+
+def _document(obj) -> Optional[tuple[str, int, int, str, str]]:
+    """(entity_type, entity_id, user_id, title, body) with original (unfolded) text."""
+    if isinstance(obj, Post):
+        return _post_document({column: getattr(obj, column) for column in POST_COLUMNS})
+    if isinstance(obj, Asset):
+        return "asset", obj.id, obj.user_id, obj.original_filename or obj.filename or "", _join(
+            obj.filename, _json_list_text(obj.tags), obj.category, obj.country, obj.ai_prompt,
+        )
+    if isinstance(obj, Student):
+        return "student", obj.id, obj.user_id, obj.name or "", _join(
+            obj.city, obj.school_name, obj.host_family_name, obj.bio,
+            _json_list_text(obj.fun_facts), obj.country,
+        )
+    if isinstance(obj, Template):
+        # Templates are shared across users (user_id 0)
+        return "template", obj.id, 0, obj.name or "", _join(obj.category, obj.platform_format, obj.country)
+    return None
+
+
+def _rowid(entity_type: str, entity_id: int) -> int:
+    return entity_id * _ROWID_FACTOR + ENTITY_TYPES[entity_type][0]
+
+
+def _entity_type(obj) -> Optional[str]:
+    for entity_type, (_, model) in ENTITY_TYPES.items():
+        if isinstance(obj, model):
+            return entity_type
+    return None
+
+
+def _index_rows(documents) -> list[dict]:
+    return [
+        {
+            "rowid": _rowid(entity_type, entity_id),
+            "title": fold(title),
+            "body": fold(body),
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "user_id": user_id,
+        }
+        for entity_type, entity_id, user_id, title, body in documents
+    ]
+
+
+_INSERT_SQL = text(
+    "INSERT INTO search_index (rowid, title, body, entity_type, entity_id, user_id) "
+    "VALUES (:rowid, :title, :body, :entity_type, :entity_id, :user_id)"
+)
+_DELETE_SQL = text("DELETE FROM search_index WHERE rowid = :rowid")
+
+
+# ─── Incremental maintenance (ORM flush hook) ───────────────────────────
+
+@event.listens_for(Session, "after_flush")
+def _index_changes(session: Session, flush_context) -> None:
+    """Re-index searchable rows written in this flush."""
+    if not _fts5_available:
+        return
+
+    stale, fresh = [], []
+    for obj in session.deleted:
+        entity_type = _entity_type(obj)
+        if entity_type:
+            # Only the key: unloaded attributes of a deleted row can't be fetched anymore
+            stale.append({"rowid": _rowid(entity_type, obj.id)})
+    for obj in list(session.new) + [o for o in session.dirty if session.is_modified(o, include_collections=False)]:
+        if _entity_type(obj):
+            document = _document(obj)
+            stale.append({"rowid": _rowid(document[0], document[1])})
+            fresh.append(document)
+
+    if not stale:
+        return
+    connection = session.connection()
+    connection.execute(_DELETE_SQL, stale)
+    if fresh:
+        connection.execute(_INSERT_SQL, _index_rows(fresh))
+
+
+async def index_bulk_posts(db: AsyncSession, rows: list[dict]) -> None:
+    """(Re-)index posts written by Core bulk statements (rows hold `POST_COLUMNS`)."""
+    if not _fts5_available or not rows:
+        return
+    documents = [_post_document(row) for row in rows]
+    await db.execute(_DELETE_SQL, [{"rowid": _rowid("post", row["id"])} for row in rows])
+    await db.execute(_INSERT_SQL, _index_rows(documents))
+
+
+# ─── Setup / rebuild ────────────────────────────────────────────────────
+
+def fts5_available() -> bool:
+    return bool(_fts5_available)
+
+
+def set_fts5_available(available: bool) -> None:
+    """Restore the FTS5 flag recorded by a previous start (skips ensure_search_index())."""
+    global _fts5_available
+    _fts5_available = available
+
+
+async def rebuild_search_index(db: AsyncSession) -> int:
+    """Re-index all searchable rows. Returns the number of documents."""
+    await db.execute(text("DELETE FROM search_index"))
+    count = 0
+    for _, model in ENTITY_TYPES.values():
+        result = await db.execute(select(model))
+        rows = _index_rows(_document(obj) for obj in result.scalars().all())
+        if rows:
+            await db.execute(_INSERT_SQL, rows)
+            count += len(rows)
+    return count
+
+
+async def ensure_search_index(db: AsyncSession) -> int:
+    """Create the FTS5 table if possible and backfill it when empty.
+
+    Sets the module-wide FTS5 flag; returns the number of backfilled documents.
+    """
+    global _fts5_available
+    try:
+        await db.execute(text(_CREATE_SQL))
+        await db.commit()
+        _fts5_available = True
+    except Exception as e:
+        await db.rollback()
+        _fts5_available = False
+        logger.warning(f"SQLite FTS5 not available, search uses Python fallback: {e}")
+        return 0
+
+    has_documents = (await db.execute(text("SELECT rowid FROM search_index LIMIT 1"))).first()
+    if has_documents:
+        return 0
+    count = await rebuild_search_index(db)
+    await db.commit()
+    return count
+
+
+# ─── Querying ───────────────────────────────────────────────────────────
+
+def _match_expression(terms: list[str]) -> str:
+    """FTS5 MATCH expression: every term as a quoted prefix query."""
+    return " AND ".join(f'"{term}"*' for term in terms)
+
+
+def _highlight(value: str, terms: list[str], max_chars: int = SNIPPET_CHARS) -> str:
+    """HTML-escaped excerpt of `value` around the first match, matches wrapped in <mark>."""
+    if not value:
+        return ""
+
+    # Fold per character, remembering which original character each folded char came from
+    folded_chars, origin = [], []
+    for i, ch in enumerate(value):
+        for f in fold(ch):
+            folded_chars.append(f)
+            origin.append(i)
+    folded = "".join(folded_chars)
+
+    spans = []
+    for term in terms:
+        for m in re.finditer(r"(?<!\w)" + re.escape(term) + r"[^\W_]*", folded):
+            spans.append((origin[m.start()], origin[m.end() - 1] + 1))
+    spans.sort()
+
+    first = spans[0][0] if spans else 0
+    start = max(0, first - max_chars // 3)
+    end = min(len(value), start + max_chars)
+
+    out, pos = [], start
+    for s, e in spans:
+        if s < pos or e > end:
+            continue
+        out.append(html.escape(value[pos:s]))
+        out.append(f"<mark>{html.escape(value[s:e])}</mark>")
+        pos = e
+    out.append(html.escape(value[pos:end]))
+
+    excerpt = "".join(out).replace("\n", " ")
+    return ("…" if start > 0 else "") + excerpt + ("…" if end < len(value) else "")
+
+
+def _python_score(document, terms: list[str]) -> float:
+    """Fallback relevance: every term must prefix-match a word; title hits weigh more."""
+    _, _, _, title, body = document
+    title_words = _TERM_RE.findall(fold(title))
+    body_words = _TERM_RE.findall(fold(body))
+    score = 0.0
+    for term in terms:
+        title_hits = sum(1 for w in title_words if w.startswith(term))
+        body_hits = sum(1 for w in body_words if w.startswith(term))
+        if not title_hits and not body_hits:
+            return 0.0
+        score += TITLE_WEIGHT * title_hits + BODY_WEIGHT * body_hits
+    return score
+
+
+def _owner_filter(model, user_id: int):
+    return model.user_id == user_id if hasattr(model, "user_id") else True
+
+
+async def _ranked_fts5(
+    db: AsyncSession, user_id: int, terms: list[str], types: list[str], limit: Optional[int],
+) -> list[tuple[str, int, float]]:
+    type_params = {f"t{i}": t for i, t in enumerate(types)}
+    sql = (
+        "SELECT entity_type, entity_id, bm25(search_index, :tw, :bw) AS rank "
+        "FROM search_index WHERE search_index MATCH :q AND user_id IN (:uid, 0) "
+        f"AND entity_type IN ({', '.join(':' + k for k in type_params)}) "
+        "ORDER BY rank"
+    )
+    params = {"q": _match_expression(terms), "uid": user_id, "tw": TITLE_WEIGHT, "bw": BODY_WEIGHT, **type_params}
+    if limit is not None:
+        sql += " LIMIT :limit"
+        params["limit"] = limit
+    result = await db.execute(text(sql), params)
+    # bm25() is negative (more negative = better); expose a positive score
+    return [(entity_type, int(entity_id), round(-rank, 4)) for entity_type, entity_id, rank in result.all()]
+
+
+async def _ranked_fallback(
+    db: AsyncSession, user_id: int, terms: list[str], types: list[str], limit: Optional[int],
+) -> list[tuple[str, int, float]]:
+    scored = []
+    for entity_type in types:
+        model = ENTITY_TYPES[entity_type][1]
+        result = await db.execute(select(model).where(_owner_filter(model, user_id)))
+        for obj in result.scalars().all():
+            document = _document(obj)
+            score = _python_score(document, terms)
+            if score > 0:
+                scored.append((entity_type, obj.id, score))
+    scored.sort(key=lambda r: r[2], reverse=True)
+    return scored[:limit] if limit is not None else scored
+
+
+async def _ranked(db, user_id, terms, types, limit):
+    if _fts5_available:
+        return await _ranked_fts5(db, user_id, terms, types, limit)
+    return await _ranked_fallback(db, user_id, terms, types, limit)
+
+
+async def matching_ids(db: AsyncSession, user_id: int, entity_type: str, query: str) -> Optional[list[int]]:
+    """IDs of the user's entities of one type matching `query` (best match first).
+
+    Returns None if the query has no searchable terms.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return None
+    ranked = await _ranked(db, user_id, terms, [entity_type], None)
+    return [entity_id for _, entity_id, _ in ranked]
+
+
+def match_subquery(user_id: int, entity_type: str, query: str) -> Optional[Select]:
+    """FTS5 subquery of the ids of the user's entities of one type matching `query`.
+
+    Returns None if FTS5 is unavailable or the query has no searchable terms.
+    """
+    terms = query_terms(query)
+    if not _fts5_available or not terms:
+        return None
+    return (
+        select(column("entity_id"))
+        .select_from(table("search_index"))
+        .where(text("search_index MATCH :fts_q AND user_id IN (:fts_uid, 0) AND entity_type = :fts_type").bindparams(
+            fts_q=_match_expression(terms), fts_uid=user_id, fts_type=entity_type,
+        ))
+    )
+
+
+async def search(
+    db: AsyncSession,
+    user_id: int,
+    query: str,
+    types: Optional[list[str]] = None,
+    limit: int = 20,
+) -> list[dict]:
+    """Ranked search across entity types with highlighted title and snippet."""
+    terms = query_terms(query)
+    types = [t for t in (types or ENTITY_TYPES) if t in ENTITY_TYPES]
+    if not terms or not types:
+        return []
+
+    ranked = await _ranked(db, user_id, terms, types, limit)
+
+    # Load the matched rows (one query per type) for display text
+    ids_by_type: dict[str, list[int]] = {}
+    for entity_type, entity_id, _ in ranked:
+        ids_by_type.setdefault(entity_type, []).append(entity_id)
+    documents = {}
+    for entity_type, ids in ids_by_type.items():
+        model = ENTITY_TYPES[entity_type][1]
+        result = await db.execute(select(model).where(model.id.in_(ids), _owner_filter(model, user_id)))
+        for obj in result.scalars().all():
+            documents[(entity_type, obj.id)] = _document(obj)
+
+    results = []
+    for entity_type, entity_id, score in ranked:
+        document = documents.get((entity_type, entity_id))
+        if document is None:
+            continue  # Stale index row (e.g. removed by a bulk statement)
+        _, _, _, title, body = document
+        results.append({
+            "type": entity_type,
+            "id": entity_id,
+            "title": title,
+            "title_highlighted": _highlight(title, terms, max_chars=len(title) or 1),
+            "snippet": _highlight(body, terms),
+            "score": score,
+        })
+    return results
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    from app.core.database import async_session
+
+    async def _main():
+        async with async_session() as session:
+            await ensure_search_index(session)
+            if not _fts5_available:
+                print("SQLite FTS5 not available - nothing to rebuild")
+                return
+            count = await rebuild_search_index(session)
+            await session.commit()
+        print(f"Rebuilt search_index: {count} document(s)")
+
+    asyncio.run(_main())
@@ -0,0 +1,217 @@
+"""
+Slide Summary Service - write-time denormalization of a post's `slide_data`.
+
+`Post.slide_data` is a JSON text blob. Dashboards, exports, analytics and
+search only need a few facts about it (how many slides, a thumbnail, the
+first headline, the plain text), so those are stored in columns on `posts`
+and computed once when a post is written instead of `json.loads`-ing the
+blob on every read.
+
+Architecture:
+    - `slide_data` stays the source of truth. A `before_flush` hook on the
+      ORM Session recomputes `slide_count`, `thumbnail_url`,
+      `first_headline` and `plain_text` for every new post and every post
+      whose `slide_data` changed, and rebuilds its `PostSlide` rows (one
+      per slide) through the `Post.slides` relationship.
+    - Slide endpoints write through `slide_data` (`set_slides()`), so the
+      same hook keeps the rows and the summary consistent.
+    - Core-level bulk INSERT/UPDATE statements on posts bypass the hook and
+      must set the summary columns themselves (`summarize_slides()`, as
+      app.services.bulk_posts does).
+    - Posts without a summary (rows written before the columns existed) are
+      backfilled on startup by `ensure_slide_summaries()` and by the Alembic
+      migration.
+    - Read-only list queries can skip the blobs with `without_slide_blobs()`.
+
+Usage:
+    from app.services.slide_summary import set_slides, without_slide_blobs
+
+    set_slides(post, slides)          # summary + PostSlide rows follow on flush
+    query = select(Post).options(*without_slide_blobs())
+
+    # Recompute all summaries and slide rows:
+    python -m app.services.slide_summary
+"""
+
+import json
+import logging
+from typing import Any
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, defer, selectinload
+
+from app.models.post import Post
+from app.models.post_slide import PostSlide
+
+logger = logging.getLogger(__name__)
+
+# Slide fields that carry user-visible text
+SLIDE_TEXT_FIELDS = (
+    "headline", "subheadline", "body_text", "quote_text", "quote_author", "cta_text", "title", "text",
+)
+
+# Slide keys that may hold the image shown as thumbnail, in order of preference
+THUMBNAIL_FIELDS = ("background_image", "image_url", "thumbnail")
+
+# Slide keys mirrored into PostSlide columns
+SLIDE_ROW_FIELDS = (
+    "headline", "subheadline", "body_text", "bullet_points", "quote_text", "quote_author",
+    "cta_text", "image_asset_id", "background_type", "background_value", "custom_css_overrides",
+)
+
+SUMMARY_COLUMNS = ("slide_count", "thumbnail_url", "first_headline", "plain_text")
+
+
+# ─── Pure helpers ────────────────────────────────────────────────────────
+
+def parse_slides(slide_data: Any) -> list[dict]:
+    """Slides of a `slide_data` value (JSON text or list); [] if malformed."""
+    if isinstance(slide_data, str):
+        try:
+            slide_data = json.loads(slide_data or "[]")
+        except (json.JSONDecodeError, TypeError):
+            return []
+    if not isinstance(slide_data, list):
+        return []
+    return [slide for slide in slide_data if isinstance(slide, dict)]
+
+
+def slide_plain_text(slides: list[dict]) -> str:
+    """Plain text of all slides (one line per text field or bullet)."""
+    parts = []
+    for slide in slides:
+        for field in SLIDE_TEXT_FIELDS:
+            value = slide.get(field)
+            if isinstance(value, str) and value.strip():
+                parts.append(value.strip())
+        bullets = slide.get("bullet_points")
+        if isinstance(bullets, list):
+            parts.extend(b.strip() for b in bullets if isinstance(b, str) and b.strip())
+    return "\n".join(parts)
+
+
+def summarize_slides(slide_data: Any) -> dict:
+    """Summary column values for a `slide_data` value."""
+    slides = parse_slides(slide_data)
+    first = slides[0] if slides else {}
+    thumbnail_url = next((first[f] for f in THUMBNAIL_FIELDS if isinstance(first.get(f), str) and first[f]), None)
+    first_headline = next(
+        (s["headline"].strip() for s in slides if isinstance(s.get("headline"), str) and s["headline"].strip()),
+        None,
+    )
+    return {
+        "slide_count": len(slides),
+        "thumbnail_url": thumbnail_url,
+        "first_headline": first_headline,
+        "plain_text": slide_plain_text(slides),
+    }
+
+
+def _row_value(field: str, value: Any) -> Any:
+    if value is None:
+        return None
+    if field == "image_asset_id":
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, ensure_ascii=False)
+
+
+def slide_row_values(slide: dict) -> dict:
+    """PostSlide column values for one slide dict."""
+    return {field: _row_value(field, slide.get(field)) for field in SLIDE_ROW_FIELDS if field in slide}
+
+
+def slide_from_row(values: dict) -> dict:
+    """Slide dict from PostSlide column values (JSON bullet list decoded)."""
+    slide = {field: values[field] for field in SLIDE_ROW_FIELDS if values.get(field) is not None}
+    bullets = slide.get("bullet_points")
+    if isinstance(bullets, str):
+        try:
+            slide["bullet_points"] = json.loads(bullets)
+        except json.JSONDecodeError:
+            pass
+    return slide
+
+
+def set_slides(post: Post, slides: list[dict]) -> None:
+    """Replace a post's slides; summary columns and PostSlide rows follow on flush."""
+    post.slide_data = json.dumps(slides, ensure_ascii=False)
+
+
+def without_slide_blobs():
+    """Loader options for read-only Post queries that never touch the slide blobs."""
+    return defer(Post.slide_data, raiseload=True), defer(Post.plain_text, raiseload=True)
+
+
+# ─── Write-time maintenance (ORM flush hook) ─────────────────────────────
+
+def _apply_summary(post: Post) -> None:
+    slide_data = post.slide_data if post.slide_data is not None else "[]"
+    for column, value in summarize_slides(slide_data).items():
+        setattr(post, column, value)
+    post.slides = [
+        PostSlide(slide_index=index, **slide_row_values(slide))
+        for index, slide in enumerate(parse_slides(slide_data))
+    ]
+
+
+@event.listens_for(Session, "before_flush")
+def _summarize_changed_posts(session: Session, flush_context, instances) -> None:
+    """Recompute summaries and slide rows of posts whose slide_data is new or changed."""
+    for obj in list(session.new):
+        if isinstance(obj, Post):
+            _apply_summary(obj)
+    for obj in list(session.dirty):
+        if isinstance(obj, Post) and inspect(obj).attrs.slide_data.history.has_changes():
+            _apply_summary(obj)
+
+
+# ─── Backfill ────────────────────────────────────────────────────────────
+
+async def rebuild_slide_summaries(db: AsyncSession, only_missing: bool = False) -> int:
+    """Recompute summary columns and PostSlide rows. Returns the number of posts.
+
+    Posts whose `slide_data` is empty but which have PostSlide rows (written
+    by the slide endpoints before slides were mirrored) get their
+    `slide_data` rebuilt from those rows.
+    """
+    query = select(Post).options(defer(Post.plain_text), selectinload(Post.slides))
+    if only_missing:
+        query = query.where(Post.slide_count.is_(None))
+    posts = (await db.execute(query)).scalars().all()
+
+    for post in posts:
+        if not parse_slides(post.slide_data) and post.slides:
+            set_slides(post, [slide_from_row({f: getattr(row, f) for f in SLIDE_ROW_FIELDS}) for row in post.slides])
+        _apply_summary(post)
+    await db.flush()
+    return len(posts)
+
+
+async def ensure_slide_summaries(db: AsyncSession) -> int:
+    """Backfill posts written before the summary columns existed."""
+    missing = (await db.execute(select(Post.id).where(Post.slide_count.is_(None)).limit(1))).first()
+    if not missing:
+        return 0
+    count = await rebuild_slide_summaries(db, only_missing=True)
+    await db.commit()
+    return count
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    from app.core.database import async_session
+
+    async def _main():
+        async with async_session() as session:
+            count = await rebuild_slide_summaries(session)
+            await session.commit()
+        print(f"Rebuilt slide summaries for {count} post(s)")
+
+    asyncio.run(_main())
@@ -11,6 +11,9 @@ Architecture:
     - Tasks can be cancelled via `cancel_task()`.
     - Automatic timeout cancellation is enforced via `asyncio.wait_for`.
     - A periodic cleanup removes old completed/failed tasks after a retention period.
+    - Callback URLs come from users, so `validate_callback_url()` only admits
+      http(s) hosts that resolve to public addresses (checked on submit and
+      again before the POST, as DNS may have changed in between).
 
 Usage:
     from app.services.task_manager import task_manager
@@ -30,13 +33,15 @@ Usage:
 """
 
 import asyncio
+import ipaddress
 import json
 import logging
+import socket
 import uuid
 from datetime import datetime, timezone, timedelta
 from typing import Any, Callable, Coroutine, Dict, List, Optional
+from urllib.parse import urlsplit
 
-import httpx
 from sqlalchemy import select, update, delete, desc, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -51,21 +56,60 @@ MAX_TASK_HISTORY = 50
 TASK_RETENTION_DAYS = 7
 
 
+async def validate_callback_url(url: str) -> str:
+    """Check that a callback URL is http(s) and every address of its host is public.
+
+    Raises ValueError otherwise (loopback, private, link-local, metadata
+    endpoints, unresolvable hosts), so the server cannot be made to POST
+    into its own network.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError("callback_url must be an http(s) URL")
+    try:
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        infos = await asyncio.get_running_loop().getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)
+    except (OSError, ValueError):
+        raise ValueError("callback_url host cannot be resolved")
+    for info in infos:
+        address = ipaddress.ip_address(info[4][0].split("%")[0])
+        if getattr(address, "ipv4_mapped", None):
+            address = address.ipv4_mapped
+        if not address.is_global or address.is_multicast:
+            raise ValueError("callback_url must point to a public address")
+    return url
+
+
 class TaskContext:
     """Passed to task functions so they can report progress."""
 
     def __init__(self, task_id: str):
         self.task_id = task_id
         self._cancelled = False
+        self._partial: Dict[str, Any] = {}
+
+    async def update_progress(
+        self,
+        progress: float,
+        status_text: Optional[str] = None,
+        data: Optional[Dict[str, Any]] = None,
+    ):
+        """Update task progress (0.0 - 1.0).
 
-    async def update_progress(self, progress: float, status_text: Optional[str] = None):
-        """Update task progress (0.0 - 1.0)."""
+        `data` is merged into the interim result (e.g. a preview URL) and kept
+        across later progress updates until the final result replaces it.
+        """
         if self._cancelled:
             raise asyncio.CancelledError("Task was cancelled")
+        if data:
+            self._partial.update(data)
         async with async_session() as session:
             values: Dict[str, Any] = {"progress": min(max(progress, 0.0), 1.0)}
-            if status_text:
-                values["result"] = json.dumps({"status_text": status_text})
+            if status_text or self._partial:
+                interim = dict(self._partial)
+                if status_text:
+                    interim["status_text"] = status_text
+                values["result"] = json.dumps(interim)
             await session.execute(
                 update(BackgroundTask)
                 .where(BackgroundTask.task_id == self.task_id)
@@ -244,6 +288,10 @@ class TaskManager:
                     "error": task.error,
                 }
 
+            await validate_callback_url(callback_url)
+
+            import httpx  # Only needed for callbacks; keeps it off the startup import path
+
             async with httpx.AsyncClient() as client:
                 await client.post(callback_url, json=payload, timeout=10.0)
                 logger.info("Callback sent for task %s to %s", task_id, callback_url)
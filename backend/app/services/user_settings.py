@@ -0,0 +1,150 @@
+"""
+User Settings Service - cached, typed access to per-user `Setting` rows.
+
+Settings are stored as one key/value row per setting. Routes used to fetch
+them one key per query (the Gemini API key on every AI request, posting
+goals, episode gaps, ...). This service loads all of a user's settings in a
+single query and keeps them in a small in-process cache.
+
+Architecture:
+    - `load_user_settings()` returns a `UserSettings` snapshot, served from the
+      cache when fresh, otherwise loaded with one SELECT.
+    - Writes go through `store_user_settings()`, which upserts the rows and
+      refreshes the cache entry (write-through), so the writing process never
+      serves stale values. Other processes pick up changes after the TTL.
+    - Routes receive the snapshot via the `get_user_settings` FastAPI dependency.
+
+Usage:
+    from app.services.user_settings import UserSettings, get_user_settings
+
+    @router.post("/generate-text")
+    async def generate_text(
+        request: dict,
+        user_settings: UserSettings = Depends(get_user_settings),
+    ):
+        api_key = user_settings.gemini_api_key
+"""
+
+import json
+import logging
+import time
+from typing import Any, Optional
+
+from fastapi import Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.security import get_current_user_id
+from app.models.setting import Setting
+
+logger = logging.getLogger(__name__)
+
+# Seconds a cached snapshot is trusted (bounds staleness across processes)
+SETTINGS_CACHE_TTL = 300
+
+
+class UserSettings:
+    """Immutable snapshot of one user's settings with typed accessors."""
+
+    __slots__ = ("user_id", "values")
+
+    def __init__(self, user_id: int, values: dict[str, str]):
+        self.user_id = user_id
+        self.values = values
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        return self.values.get(key, default)
+
+    def get_int(self, key: str, default: int) -> int:
+        """Integer setting, falling back to `default` if missing or malformed."""
+        try:
+            return int(self.values.get(key, default))
+        except (ValueError, TypeError):
+            return default
+
+    def get_json(self, key: str, default: Any = None) -> Any:
+        """JSON-encoded setting, falling back to `default` if missing or malformed."""
+        raw = self.values.get(key)
+        if raw is None:
+            return default
+        try:
+            return json.loads(raw)
+        except (json.JSONDecodeError, TypeError):
+            return default
+
+    @property
+    def gemini_api_key(self) -> Optional[str]:
+        """Gemini API key: first from user settings, then from env."""
+        value = self.values.get("gemini_api_key")
+        if value and value.strip():
+            return value.strip()
+        return settings.GEMINI_API_KEY or None
+
+    @property
+    def min_episode_gap_days(self) -> int:
+        """Minimum days between story-arc episodes (default: 1)."""
+        return max(0, self.get_int("min_episode_gap_days", 1))
+
+    def to_dict(self) -> dict[str, str]:
+        return dict(self.values)
+
+
+_cache: dict[int, tuple[float, UserSettings]] = {}
+
+
+async def load_user_settings(user_id: int, db: AsyncSession) -> UserSettings:
+    """Return the user's settings, loading all rows in one query on a cache miss."""
+    cached = _cache.get(user_id)
+    if cached and (time.monotonic() - cached[0]) < SETTINGS_CACHE_TTL:
+        return cached[1]
+
+    result = await db.execute(
+        select(Setting.key, Setting.value).where(Setting.user_id == user_id)
+    )
+    snapshot = UserSettings(user_id, {key: value for key, value in result.all()})
+    _cache[user_id] = (time.monotonic(), snapshot)
+    return snapshot
+
+
+async def store_user_settings(user_id: int, updates: dict[str, Any], db: AsyncSession) -> UserSettings:
+    """Upsert settings and refresh the cached snapshot (write-through).
+
+    Values are stored as strings. Commits the session so the cache is only
+    updated once the rows are durable.
+    """
+    result = await db.execute(
+        select(Setting).where(Setting.user_id == user_id)
+    )
+    existing_map = {s.key: s for s in result.scalars().all()}
+
+    for key, value in updates.items():
+        if key in existing_map:
+            existing_map[key].value = str(value)
+        else:
+            new_setting = Setting(user_id=user_id, key=key, value=str(value))
+            db.add(new_setting)
+            existing_map[key] = new_setting
+
+    await db.commit()
+
+    snapshot = UserSettings(user_id, {k: s.value for k, s in existing_map.items()})
+    _cache[user_id] = (time.monotonic(), snapshot)
+    return snapshot
+
+
+def invalidate_user_settings(user_id: Optional[int] = None) -> None:
+    """Drop the cached snapshot for one user (or all users)."""
+    if user_id is None:
+        _cache.clear()
+    else:
+        _cache.pop(user_id, None)
+
+
+async def get_user_settings(
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+) -> UserSettings:
+    """FastAPI dependency: the current user's settings snapshot."""
+    return await load_user_settings(user_id, db)
@@ -0,0 +1,240 @@
+"""
+Video Branding Service - intro/outro clips rendered once and reused.
+
+Applying a video template used to render the intro/outro clip with ffmpeg
+into a fresh file on every apply (and delete it afterwards). Branding
+clips only depend on the template and the output size, so they are now
+rendered once into a cache and reused by every apply.
+
+Architecture:
+    - `render_branding_clip()` draws the clip: background color from the
+      template's branding config, drawtext layers (brand line, subtitle,
+      social handles, website, CTA for outros), fade in/out, silent stereo
+      audio. It encodes with the house settings of app.core.media
+      (H264_ARGS / AAC_ARGS), so the clips can be stream-copied next to
+      content in the same encoding.
+    - Cache: uploads/branding_cache/branding_<template id>_<key>.mp4, key =
+      (template id, template `updated_at`, width, height, encoder args,
+      BRANDING_VERSION). Editing a template bumps `updated_at`, so stale
+      clips are never hit; the least recently used files are pruned above
+      BRANDING_CACHE_MAX_FILES.
+    - Clips are written to a temporary name and renamed when complete, so
+      concurrent applies never read a half-written clip.
+
+Usage:
+    from app.services.video_branding import branding_clip
+
+    intro_path = await branding_clip(intro_template, 1080, 1920)
+"""
+
+import asyncio
+import json
+import logging
+import os
+import subprocess
+from pathlib import Path
+
+from app.core.media import (
+    AAC_ARGS,
+    AUDIO_SAMPLE_RATE,
+    H264_ARGS,
+    TARGET_FPS,
+    cache_key,
+    prune_cache,
+    temp_output,
+)
+from app.core.paths import get_upload_dir
+from app.models.video_template import VideoTemplate
+
+logger = logging.getLogger(__name__)
+
+# Bump when the drawing of branding clips changes (invalidates the cache)
+BRANDING_VERSION = 1
+
+BRANDING_CACHE_DIR = get_upload_dir("branding_cache")
+BRANDING_CACHE_MAX_FILES = 200
+
+
+class BrandingRenderError(RuntimeError):
+    """ffmpeg could not render a branding clip."""
+
+
+# ── Rendering ──
+
+def render_branding_clip(template: VideoTemplate, target_w: int, target_h: int, output_path: Path):
+    """Generate a branding video clip (intro or outro) using ffmpeg.
+
+    Creates a video with TREFF branding elements:
+    - Solid or gradient background in TREFF/country-specific colors
+    - Centered text overlay (brand name, tagline)
+    - Social handles for outro templates
+    - Country-specific color theming
+    - Specified duration (3-5 seconds)
+    """
+    duration = template.duration_seconds
+    primary = template.primary_color or "#4C8BC2"
+    secondary = template.secondary_color or "#FDD000"
+
+    config = {}
+    if template.branding_config:
+        try:
+            config = json.loads(template.branding_config)
+        except (json.JSONDecodeError, TypeError):
+            pass
+
+    # Determine background style
+    bg_style = config.get("background", "gradient_blue_yellow")
+    country_accent = config.get("country_accent", secondary)
+
+    # Build drawtext filter chain for brand elements
+    text_filters = []
+
+    # Main text overlay
+    text_overlay = config.get("text_overlay", "TREFF Sprachreisen")
+    if text_overlay:
+        # Escape special characters for ffmpeg drawtext
+        escaped_text = text_overlay.replace("'", "\\'").replace(":", "\\:").replace("×", "x")
+        text_filters.append(
+            f"drawtext=text='{escaped_text}':"
+            f"fontsize={int(target_w * 0.06)}:fontcolor=white:"
+            f"x=(w-text_w)/2:y=(h-text_h)/2-{int(target_h * 0.05)}:"
+            f"enable='between(t,0.3,{duration})'"
+        )
+
+    # Subtitle text (country-specific subtitle like "Your American Dream")
+    subtitle = config.get("subtitle")
+    if subtitle:
+        escaped_sub = subtitle.replace("'", "\\'").replace(":", "\\:")
+        # Use country accent color for subtitle if available
+        sub_color = "white@0.9"
+        text_filters.append(
+            f"drawtext=text='{escaped_sub}':"
+            f"fontsize={int(target_w * 0.035)}:fontcolor={sub_color}:"
+            f"x=(w-text_w)/2:y=(h-text_h)/2+{int(target_h * 0.03)}:"
+            f"enable='between(t,0.6,{duration})'"
+        )
+
+    # For outro: social handles, CTA, and country-specific pricing
+    if template.template_type == "outro":
+        show_social = config.get("show_social_handles", True)
+        if show_social and template.social_handle_instagram:
+            ig_text = template.social_handle_instagram.replace("'", "\\'").replace(":", "\\:")
+            text_filters.append(
+                f"drawtext=text='Instagram\\: {ig_text}':"
+                f"fontsize={int(target_w * 0.028)}:fontcolor=white@0.85:"
+                f"x=(w-text_w)/2:y=h*0.7:"
+                f"enable='between(t,0.8,{duration})'"
+            )
+        if show_social and template.social_handle_tiktok:
+            tt_text = template.social_handle_tiktok.replace("'", "\\'").replace(":", "\\:")
+            text_filters.append(
+                f"drawtext=text='TikTok\\: {tt_text}':"
+                f"fontsize={int(target_w * 0.028)}:fontcolor=white@0.85:"
+                f"x=(w-text_w)/2:y=h*0.75:"
+                f"enable='between(t,1.0,{duration})'"
+            )
+
+        show_website = config.get("show_website", True)
+        if show_website and template.website_url:
+            web_text = template.website_url.replace("'", "\\'").replace(":", "\\:")
+            # Use country accent or secondary for website text
+            web_color = country_accent if template.country else secondary
+            text_filters.append(
+                f"drawtext=text='{web_text}':"
+                f"fontsize={int(target_w * 0.032)}:fontcolor={web_color}:"
+                f"x=(w-text_w)/2:y=h*0.82:"
+                f"enable='between(t,1.2,{duration})'"
+            )
+
+        show_cta = config.get("show_cta", True)
+        if show_cta and template.cta_text:
+            cta_text = template.cta_text.replace("'", "\\'").replace(":", "\\:")
+            # Use yellow/gold for CTA to stand out
+            cta_color = "#FDD000" if template.country else secondary
+            text_filters.append(
+                f"drawtext=text='{cta_text}':"
+                f"fontsize={int(target_w * 0.04)}:fontcolor={cta_color}:"
+                f"x=(w-text_w)/2:y=h*0.6:"
+                f"enable='between(t,0.5,{duration})'"
+            )
+
+    # Build the ffmpeg color source + filter
+    # Country-specific background colors for more distinctive templates
+    if "dark" in bg_style:
+        bg_color = "0x1A1A2E"
+    elif "white" in bg_style:
+        bg_color = "0xFFFFFF"
+    elif "usa" in bg_style:
+        bg_color = "0x002868"  # Navy blue for USA
+    elif "canada" in bg_style:
+        bg_color = "0xCC0000"  # Deep red for Canada
+    elif "australia" in bg_style or "surf" in bg_style:
+        bg_color = "0xCC8040"  # Sandy earth tone for Australia
+    elif "nz" in bg_style or "fern" in bg_style:
+        bg_color = "0x1B6B1B"  # Forest green for NZ
+    elif "ireland" in bg_style or "green_gold" in bg_style:
+        bg_color = "0x148050"  # Irish green
+    elif "yellow" in bg_style:
+        bg_color = primary.replace("#", "0x")
+    else:
+        bg_color = primary.replace("#", "0x")
+
+    # Build video filter chain
+    vf_parts = []
+    if text_filters:
+        vf_parts.extend(text_filters)
+
+    # Add fade in/out
+    vf_parts.append("fade=t=in:st=0:d=0.3")
+    vf_parts.append(f"fade=t=out:st={max(0, duration - 0.3)}:d=0.3")
+
+    vf_string = ",".join(vf_parts) if vf_parts else "null"
+
+    cmd = [
+        "ffmpeg",
+        "-f", "lavfi",
+        "-i", f"color=c={bg_color}:s={target_w}x{target_h}:d={duration}:r={TARGET_FPS}",
+        "-f", "lavfi",
+        "-i", f"anullsrc=channel_layout=stereo:sample_rate={AUDIO_SAMPLE_RATE}",
+        "-t", str(duration),
+        "-vf", vf_string,
+        *H264_ARGS,
+        *AAC_ARGS,
+        "-shortest",
+        "-movflags", "+faststart",
+        "-y", str(output_path),
+    ]
+
+    logger.info(f"Generating branding video: {template.name} ({duration}s, {target_w}x{target_h})")
+    proc = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+    if proc.returncode != 0:
+        logger.error(f"Branding video generation failed: {proc.stderr[:2000]}")
+        raise BrandingRenderError(f"Failed to generate branding video: {proc.stderr[:500]}")
+
+
+# ── Cache ──
+
+def clip_path(template: VideoTemplate, target_w: int, target_h: int) -> Path:
+    """Cache file of a template's clip at a given size."""
+    updated = template.updated_at.isoformat() if template.updated_at else ""
+    key = cache_key(template.id, updated, target_w, target_h, " ".join(H264_ARGS + AAC_ARGS), BRANDING_VERSION)
+    return BRANDING_CACHE_DIR / f"branding_{template.id}_{key}.mp4"
+
+
+async def branding_clip(template: VideoTemplate, target_w: int, target_h: int) -> Path:
+    """Path of the template's branding clip, rendered on first use.
+
+    Raises BrandingRenderError if ffmpeg fails.
+    """
+    path = clip_path(template, target_w, target_h)
+    if path.exists():
+        os.utime(path)  # mark as recently used for pruning
+        return path
+    temp = temp_output(path)
+    try:
+        await asyncio.to_thread(render_branding_clip, template, target_w, target_h, temp)
+        os.replace(temp, path)
+    finally:
+        temp.unlink(missing_ok=True)
+    prune_cache(BRANDING_CACHE_DIR, "branding_*.mp4", BRANDING_CACHE_MAX_FILES)
+    return path
@@ -0,0 +1,216 @@
+"""
+Video Proxy Service - low-resolution proxy media and cached preview renders.
+
+Composer, overlay and export renders used to run at full output resolution
+from the original upload, so checking a transition or an overlay position
+meant waiting for a full-quality encode. Editing previews now render from
+a small proxy of each video with `ultrafast` settings and are cached; only
+the final render reads the full-resolution source.
+
+Architecture:
+    - Proxies: longest side PROXY_MAX_SIDE px, 30 fps, all-intra H.264
+      (`-g 1`, every frame a keyframe, so trims and seeks are exact and
+      cheap), AAC audio. Stored as uploads/proxies/proxy_<key>.mp4, key =
+      (source name, size, mtime, PROXY_VERSION), so a replaced source never
+      hits an old proxy.
+    - Proxies are built by a background task (task_manager, type
+      "video_proxy") when a video is uploaded, and on demand for videos
+      that have none yet (the preview then reads the source once).
+    - Preview renders: output scaled to at most PREVIEW_MAX_SIDE px,
+      PREVIEW_VIDEO_ARGS (ultrafast, CRF 30). Results are cached in
+      uploads/previews keyed by the caller's render inputs; the least
+      recently used files are pruned above PREVIEW_CACHE_MAX_FILES.
+
+Usage:
+    from app.services.video_proxy import cached_preview, preview_input, preview_size
+
+    source, is_proxy = await preview_input(user_id, asset.id, file_path)
+    width, height = preview_size(1080, 1920)
+    path, cached = await cached_preview(preview_path("compose", ...), render)
+
+    # Build the proxy of a local file:
+    python -m app.services.video_proxy video.mp4
+"""
+
+import asyncio
+import logging
+import os
+import subprocess
+from pathlib import Path
+from typing import Callable, Optional
+
+from app.core.media import TARGET_FPS, cache_key, prune_cache, temp_output
+from app.core.paths import get_upload_dir
+
+logger = logging.getLogger(__name__)
+
+# Bump when the proxy encoding changes (invalidates all proxies)
+PROXY_VERSION = 1
+
+PROXY_DIR = get_upload_dir("proxies")
+PREVIEW_DIR = get_upload_dir("previews")
+
+PROXY_MAX_SIDE = 540
+PREVIEW_MAX_SIDE = 640
+PREVIEW_CACHE_MAX_FILES = 100
+PROXY_TIMEOUT = 600
+
+PROXY_ARGS = [
+    "-c:v", "libx264", "-preset", "ultrafast", "-tune", "fastdecode",
+    "-g", "1", "-crf", "26", "-pix_fmt", "yuv420p",
+    "-c:a", "aac", "-b:a", "96k", "-ar", "44100", "-ac", "2",
+]
+PREVIEW_VIDEO_ARGS = ["-c:v", "libx264", "-preset", "ultrafast", "-crf", "30", "-pix_fmt", "yuv420p"]
+PREVIEW_AUDIO_ARGS = ["-c:a", "aac", "-b:a", "96k"]
+
+# Source path -> task id of the proxy job currently building it (this process)
+_proxy_jobs: dict[str, str] = {}
+
+
+class PreviewRenderError(RuntimeError):
+    """A preview render failed; the message is the ffmpeg error."""
+
+
+# ── Proxies ──
+
+def proxy_file(source: Path) -> Path:
+    """Proxy location of a source file (whether or not it exists yet)."""
+    stat = source.stat()
+    return PROXY_DIR / f"proxy_{cache_key(source.name, stat.st_size, stat.st_mtime_ns, PROXY_VERSION)}.mp4"
+
+
+def existing_proxy(source: Path) -> Optional[Path]:
+    try:
+        path = proxy_file(source)
+    except OSError:
+        return None
+    return path if path.exists() else None
+
+
+def render_proxy(source: Path) -> Optional[Path]:
+    """Encode the proxy of `source` (sync). Returns its path, or None on failure."""
+    path = proxy_file(source)
+    if path.exists():
+        return path
+    temp = temp_output(path)
+    scale = (
+        f"scale={PROXY_MAX_SIDE}:{PROXY_MAX_SIDE}:force_original_aspect_ratio=decrease:force_divisible_by=2,"
+        f"fps={TARGET_FPS}"
+    )
+    cmd = [
+        "ffmpeg", "-v", "error", "-nostdin",
+        "-i", str(source),
+        "-vf", scale,
+        *PROXY_ARGS,
+        "-movflags", "+faststart",
+        "-y", str(temp),
+    ]
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=PROXY_TIMEOUT)
+        if proc.returncode != 0 or not temp.exists() or temp.stat().st_size == 0:
+            logger.warning(f"Proxy for {source.name} failed: {proc.stderr[-500:]}")
+            return None
+        os.replace(temp, path)
+    except Exception as e:
+        logger.warning(f"Proxy for {source.name} failed: {e}")
+        return None
+    finally:
+        temp.unlink(missing_ok=True)
+    logger.info(f"Proxy ready for {source.name}: {path.name}")
+    return path
+
+
+async def submit_proxy_job(user_id: int, asset_id: int, source: Path) -> Optional[dict]:
+    """Build the proxy of a video in a background task (no-op if it exists or is being built)."""
+    from app.services.task_manager import task_manager, TaskContext
+
+    if existing_proxy(source) or str(source) in _proxy_jobs:
+        return None
+
+    async def operation(ctx: TaskContext):
+        try:
+            await ctx.update_progress(0.1, "Vorschau-Proxy wird erstellt")
+            path = await asyncio.to_thread(render_proxy, source)
+        finally:
+            _proxy_jobs.pop(str(source), None)
+        if not path:
+            raise RuntimeError("Proxy konnte nicht erstellt werden")
+        return {"asset_id": asset_id, "proxy": path.name}
+
+    task = await task_manager.submit_task(
+        user_id=user_id,
+        task_type="video_proxy",
+        title=f"Vorschau-Proxy fuer Asset {asset_id}",
+        func=operation,
+        timeout_seconds=PROXY_TIMEOUT,
+    )
+    _proxy_jobs[str(source)] = task["task_id"]
+    return task
+
+
+async def preview_input(user_id: int, asset_id: int, source: Path) -> tuple[Path, bool]:
+    """File to read for a preview render: the proxy, or the source while the proxy is built.
+
+    Returns (path, is_proxy).
+    """
+    proxy = existing_proxy(source)
+    if proxy:
+        return proxy, True
+    await submit_proxy_job(user_id, asset_id, source)
+    return source, False
+
+
+# ── Preview renders ──
+
+def preview_size(width: int, height: int) -> tuple[int, int]:
+    """Output size of a preview: `width`x`height` scaled to PREVIEW_MAX_SIDE (even numbers)."""
+    factor = min(1.0, PREVIEW_MAX_SIDE / max(width, height))
+    return max(2, int(width * factor) // 2 * 2), max(2, int(height * factor) // 2 * 2)
+
+
+def preview_path(kind: str, *parts) -> Path:
+    """Cache file of a preview render, keyed by everything that affects its output."""
+    return PREVIEW_DIR / f"{kind}_{cache_key(kind, *parts)}.mp4"
+
+
+def source_signature(path: Path) -> str:
+    """Cache-key part identifying the current contents of a file."""
+    stat = path.stat()
+    return f"{path.name}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def preview_url(path: Path) -> str:
+    return f"/uploads/previews/{path.name}"
+
+
+async def cached_preview(path: Path, render: Callable[[Path], None]) -> tuple[Path, bool]:
+    """Return the cached preview at `path`, or run `render(output_path)` in a thread first.
+
+    Returns (path, cached). `render` raises PreviewRenderError on failure.
+    """
+    if path.exists():
+        os.utime(path)  # mark as recently used for pruning
+        return path, True
+    temp = temp_output(path)
+    try:
+        await asyncio.to_thread(render, temp)
+        if not temp.exists() or temp.stat().st_size == 0:
+            raise PreviewRenderError("ffmpeg produced empty or missing output file")
+        os.replace(temp, path)
+    finally:
+        temp.unlink(missing_ok=True)
+    prune_cache(PREVIEW_DIR, "*.mp4", PREVIEW_CACHE_MAX_FILES)
+    return path, False
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Build the preview proxy of a video file")
+    parser.add_argument("video", type=Path)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    result = render_proxy(args.video)
+    print(f"{result or 'failed'} in {time.perf_counter() - started:.1f}s")
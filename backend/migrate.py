@@ -12,6 +12,8 @@ Usage:
     python migrate.py generate <message>   # Generate new migration (autogenerate)
     python migrate.py stamp <revision>     # Mark database as being at revision
     python migrate.py check               # Check if there are pending migrations
+    python migrate.py advise [capture]     # EXPLAIN captured queries, report full scans + index suggestions
+    python migrate.py seed [--force]       # Deploy step: schema bootstrap, backfills and seed data
 """
 
 import sys
@@ -131,6 +133,48 @@ def cmd_check(args):
         return False
 
 
+def cmd_advise(args):
+    """Run EXPLAIN QUERY PLAN over captured statements and suggest indexes for full scans.
+
+    Capture statements first by running the app with SQL_CAPTURE_FILE set, e.g.
+    SQL_CAPTURE_FILE=query_capture.jsonl uvicorn app.main:app
+    """
+    from app.core.config import settings
+    from app.core.index_advisor import advise, default_capture_file, format_report, load_captured_statements
+
+    capture_file = Path(args[0]) if args else default_capture_file(settings.SQL_CAPTURE_FILE, backend_dir)
+    if not capture_file.exists():
+        print(f"Capture file not found: {capture_file}")
+        print("Run the app with SQL_CAPTURE_FILE=<path> and exercise the routes first.")
+        sys.exit(1)
+
+    statements = load_captured_statements(capture_file)
+    report = advise(backend_dir / "treff.db", statements)
+    print(format_report(report))
+    return not any(f["suggestion"] for f in report["full_scans"])
+
+
+def cmd_seed(args):
+    """Bootstrap the schema, backfill derived data and run all seeds (deploy step).
+
+    Records the schema/seed fingerprints, so app starts skip this work until
+    models, migrations or seed modules change. --force ignores stored fingerprints.
+    """
+    import asyncio
+    from app.core.database import engine
+    from app.core.startup import prepare_database
+
+    async def _run():
+        try:
+            return await prepare_database(seed=True, force="--force" in args)
+        finally:
+            await engine.dispose()
+
+    ran = asyncio.run(_run())
+    print(f"Schema bootstrap: {'ran' if ran['schema'] else 'up to date'}")
+    print(f"Seed data:        {'ran' if ran['seeds'] else 'up to date'}")
+
+
 COMMANDS = {
     "upgrade": cmd_upgrade,
     "downgrade": cmd_downgrade,
@@ -140,6 +184,8 @@ COMMANDS = {
     "generate": cmd_generate,
     "stamp": cmd_stamp,
     "check": cmd_check,
+    "advise": cmd_advise,
+    "seed": cmd_seed,
 }
 
 
@@ -0,0 +1,55 @@
+"""Add report_history and report_snapshots tables.
+
+report_history used to be created by the report routes with a
+CREATE TABLE IF NOT EXISTS on every request; existing databases already
+have it, so it is only created where missing.
+
+Revision ID: a8d2e5c1f7b4
+Revises: f4c1a7d9b3e6
+Create Date: 2026-10-19 01:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8d2e5c1f7b4'
+down_revision: Union[str, Sequence[str], None] = 'f4c1a7d9b3e6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create report_history (if missing) and report_snapshots."""
+    op.create_table(
+        'report_history',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('report_type', sa.String(), nullable=False),
+        sa.Column('period', sa.String(), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('summary', sa.Text(), nullable=True),
+        sa.Column('post_count', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        if_not_exists=True,
+    )
+    op.create_table(
+        'report_snapshots',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('period', sa.String(), nullable=False),
+        sa.Column('window_key', sa.String(), nullable=False),
+        sa.Column('data_version', sa.String(length=64), nullable=False),
+        sa.Column('data', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.UniqueConstraint('user_id', 'period', 'window_key', 'data_version', name='uq_report_snapshots_key'),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Drop report_snapshots; report_history predates this revision and is kept."""
+    op.drop_table('report_snapshots')
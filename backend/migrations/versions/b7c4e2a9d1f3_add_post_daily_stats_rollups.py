@@ -0,0 +1,54 @@
+"""Add post_daily_stats analytics rollup table.
+
+Revision ID: b7c4e2a9d1f3
+Revises: 1dd2f40ff200
+Create Date: 2026-10-18 21:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7c4e2a9d1f3'
+down_revision: Union[str, Sequence[str], None] = '1dd2f40ff200'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create the post_daily_stats rollup table."""
+    op.create_table(
+        'post_daily_stats',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('platform', sa.String(), nullable=False, server_default=''),
+        sa.Column('category', sa.String(), nullable=False, server_default=''),
+        sa.Column('country', sa.String(), nullable=False, server_default=''),
+        sa.Column('status', sa.String(), nullable=False, server_default=''),
+        sa.Column('pillar_id', sa.String(), nullable=False, server_default=''),
+        sa.Column('post_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('posts_with_metrics', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('likes', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('comments', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('shares', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('saves', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('reach', sa.Integer(), nullable=False, server_default='0'),
+        sa.UniqueConstraint(
+            'user_id', 'day', 'platform', 'category', 'country', 'status', 'pillar_id',
+            name='uq_post_daily_stats_key',
+        ),
+    )
+    op.create_index('ix_post_daily_stats_user_id_day', 'post_daily_stats', ['user_id', 'day'])
+
+    # Rows are backfilled by the app on startup (analytics_rollup.ensure_post_daily_stats)
+    # or explicitly via: python -m app.services.analytics_rollup
+
+
+def downgrade() -> None:
+    """Drop the post_daily_stats rollup table."""
+    op.drop_index('ix_post_daily_stats_user_id_day', table_name='post_daily_stats')
+    op.drop_table('post_daily_stats')
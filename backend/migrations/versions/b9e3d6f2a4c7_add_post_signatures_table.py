@@ -0,0 +1,39 @@
+"""Add post_signatures table for content similarity lookups.
+
+Revision ID: b9e3d6f2a4c7
+Revises: a8d2e5c1f7b4
+Create Date: 2026-10-19 02:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9e3d6f2a4c7'
+down_revision: Union[str, Sequence[str], None] = 'a8d2e5c1f7b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create the post_signatures table."""
+    op.create_table(
+        'post_signatures',
+        sa.Column('post_id', sa.Integer(), sa.ForeignKey('posts.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('signature', sa.LargeBinary(), nullable=False),
+        sa.Column('updated_ns', sa.BigInteger(), nullable=False),
+    )
+    op.create_index('ix_post_signatures_user_id_updated_ns', 'post_signatures', ['user_id', 'updated_ns'])
+
+    # Rows are backfilled by the app on startup (post_similarity.ensure_post_signatures)
+    # or explicitly via: python -m app.services.post_similarity
+
+
+def downgrade() -> None:
+    """Drop the post_signatures table."""
+    op.drop_index('ix_post_signatures_user_id_updated_ns', table_name='post_signatures')
+    op.drop_table('post_signatures')
@@ -0,0 +1,39 @@
+"""Add (user_id, created_at) indexes for keyset-paginated list endpoints.
+
+Revision ID: c3d8f1a6b2e4
+Revises: b7c4e2a9d1f3
+Create Date: 2026-10-18 22:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3d8f1a6b2e4'
+down_revision: Union[str, Sequence[str], None] = 'b7c4e2a9d1f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table) — all on (user_id, created_at); SQLite appends the rowid (id)
+KEYSET_INDEXES = [
+    ('ix_assets_user_id_created_at', 'assets'),
+    ('ix_students_user_id_created_at', 'students'),
+    ('ix_story_arcs_user_id_created_at', 'story_arcs'),
+    ('ix_video_exports_user_id_created_at', 'video_exports'),
+    ('ix_prompt_history_user_id_created_at', 'prompt_history'),
+]
+
+
+def upgrade() -> None:
+    """Create the keyset pagination indexes."""
+    for name, table in KEYSET_INDEXES:
+        op.create_index(name, table, ['user_id', 'created_at'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Drop the keyset pagination indexes."""
+    for name, table in KEYSET_INDEXES:
+        op.drop_index(name, table_name=table, if_exists=True)
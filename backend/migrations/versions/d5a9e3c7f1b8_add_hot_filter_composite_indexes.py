@@ -0,0 +1,42 @@
+"""Add composite indexes for hot Post/Asset/CalendarEntry filters.
+
+Revision ID: d5a9e3c7f1b8
+Revises: c3d8f1a6b2e4
+Create Date: 2026-10-18 22:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a9e3c7f1b8'
+down_revision: Union[str, Sequence[str], None] = 'c3d8f1a6b2e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, columns) — matching the routes' WHERE/ORDER BY predicates
+INDEXES = [
+    ('ix_posts_user_id_status', 'posts', ['user_id', 'status']),
+    ('ix_posts_user_id_scheduled_date', 'posts', ['user_id', 'scheduled_date']),
+    ('ix_posts_user_id_platform_scheduled_date', 'posts', ['user_id', 'platform', 'scheduled_date']),
+    ('ix_posts_story_arc_id_episode_number', 'posts', ['story_arc_id', 'episode_number']),
+    ('ix_assets_filename', 'assets', ['filename']),
+    ('ix_calendar_entries_scheduled_date', 'calendar_entries', ['scheduled_date']),
+    ('ix_calendar_entries_post_id', 'calendar_entries', ['post_id']),
+]
+
+
+def upgrade() -> None:
+    """Create the composite index set and refresh planner statistics."""
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+    op.execute('ANALYZE')
+
+
+def downgrade() -> None:
+    """Drop the composite index set."""
+    for name, table, _ in INDEXES:
+        op.drop_index(name, table_name=table, if_exists=True)
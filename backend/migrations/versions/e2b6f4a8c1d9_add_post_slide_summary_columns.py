@@ -0,0 +1,82 @@
+"""Add denormalized slide summary columns to posts and backfill them.
+
+Revision ID: e2b6f4a8c1d9
+Revises: d5a9e3c7f1b8
+Create Date: 2026-10-18 23:20:00.000000
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.services.slide_summary import (
+    SLIDE_ROW_FIELDS,
+    parse_slides,
+    slide_from_row,
+    slide_row_values,
+    summarize_slides,
+)
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b6f4a8c1d9'
+down_revision: Union[str, Sequence[str], None] = 'd5a9e3c7f1b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+COLUMNS = [
+    sa.Column('slide_count', sa.Integer(), nullable=True),
+    sa.Column('thumbnail_url', sa.String(), nullable=True),
+    sa.Column('first_headline', sa.String(), nullable=True),
+    sa.Column('plain_text', sa.Text(), nullable=True),
+]
+
+
+def upgrade() -> None:
+    """Add the summary columns, then compute them and the post_slides rows from slide_data."""
+    existing = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('posts')}
+    with op.batch_alter_table('posts') as batch:
+        for column in COLUMNS:
+            if column.name not in existing:
+                batch.add_column(column.copy())
+
+    conn = op.get_bind()
+    posts = conn.execute(sa.text('SELECT id, slide_data FROM posts')).all()
+    for post_id, slide_data in posts:
+        slides = parse_slides(slide_data)
+        if not slides:
+            # Slides written only through the slide endpoints: recover them from post_slides
+            rows = conn.execute(
+                sa.text(f"SELECT {', '.join(SLIDE_ROW_FIELDS)} FROM post_slides "
+                        "WHERE post_id = :id ORDER BY slide_index"),
+                {'id': post_id},
+            ).mappings().all()
+            slides = [slide_from_row(dict(row)) for row in rows]
+            if slides:
+                slide_data = json.dumps(slides, ensure_ascii=False)
+
+        conn.execute(
+            sa.text('UPDATE posts SET slide_data = :slide_data, slide_count = :slide_count, '
+                    'thumbnail_url = :thumbnail_url, first_headline = :first_headline, '
+                    'plain_text = :plain_text WHERE id = :id'),
+            {'id': post_id, 'slide_data': slide_data or '[]', **summarize_slides(slide_data)},
+        )
+        conn.execute(sa.text('DELETE FROM post_slides WHERE post_id = :id'), {'id': post_id})
+        for index, slide in enumerate(slides):
+            values = slide_row_values(slide)
+            columns = ['post_id', 'slide_index', *values]
+            conn.execute(
+                sa.text(f"INSERT INTO post_slides ({', '.join(columns)}) "
+                        f"VALUES ({', '.join(':' + c for c in columns)})"),
+                {'post_id': post_id, 'slide_index': index, **values},
+            )
+
+
+def downgrade() -> None:
+    """Drop the summary columns (post_slides rows are kept)."""
+    with op.batch_alter_table('posts') as batch:
+        for column in reversed(COLUMNS):
+            batch.drop_column(column.name)
@@ -0,0 +1,38 @@
+"""Add app_state table holding the startup schema/seed fingerprints.
+
+Revision ID: f4c1a7d9b3e6
+Revises: e2b6f4a8c1d9
+Create Date: 2026-10-19 00:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4c1a7d9b3e6'
+down_revision: Union[str, Sequence[str], None] = 'e2b6f4a8c1d9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create the single-row app_state table."""
+    op.create_table(
+        'app_state',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('schema_fingerprint', sa.String(), nullable=True),
+        sa.Column('seed_fingerprint', sa.String(), nullable=True),
+        sa.Column('fts5_available', sa.Integer(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        if_not_exists=True,
+    )
+    # The row is written by the app after its first full startup
+    # (app.core.startup) or by the deploy command: python migrate.py seed
+
+
+def downgrade() -> None:
+    """Drop the app_state table (the next startup runs the full bootstrap)."""
+    op.drop_table('app_state')
@@ -0,0 +1,141 @@
+"""Test: Query budget of enriched list endpoints (batch loaders).
+
+Verifies that GET /api/story-arcs?enriched=true and GET /api/students run
+the same number of SQL queries (X-DB-Query-Count header) for 1 row as for
+N rows, so an N+1 lookup per row cannot creep back in.
+"""
+import base64
+import uuid
+
+import httpx
+
+BASE = "http://localhost:8000"
+client = httpx.Client(timeout=60.0)
+
+N = 6
+
+# 1x1 transparent PNG (profile and cover image)
+PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=="
+)
+
+# Login
+resp = client.post(f"{BASE}/api/auth/login", json={"email": "admin@treff.de", "password": "treff2024"})
+print(f"Login: {resp.status_code}")
+token = resp.json().get("access_token", "")
+if not token:
+    print("Login failed!")
+    exit(1)
+headers = {"Authorization": f"Bearer {token}"}
+
+passed = 0
+total = 0
+
+def check(test_name, condition, detail=""):
+    global passed, total
+    total += 1
+    if condition:
+        passed += 1
+        print(f"  PASS: {test_name}")
+    else:
+        print(f"  FAIL: {test_name} - {detail}")
+
+def query_count(path, params):
+    resp = client.get(f"{BASE}{path}", params=params, headers=headers)
+    if resp.status_code != 200:
+        print(f"  ERROR: {path} returned {resp.status_code}: {resp.text[:200]}")
+        return None, []
+    count = resp.headers.get("X-DB-Query-Count")
+    return (int(count) if count is not None else None), resp.json()
+
+# Every row gets its own student, profile image and cover image, so each
+# relation a list endpoint enriches has one distinct key per row
+created = {"assets": [], "students": [], "arcs": []}
+country = f"QB-{uuid.uuid4().hex[:8]}"
+
+def add_rows(count):
+    for _ in range(count):
+        resp = client.post(
+            f"{BASE}/api/assets/upload",
+            files={"file": ("query-budget.png", PNG, "image/png")},
+            headers=headers,
+        )
+        asset_id = resp.json()["id"]
+        created["assets"].append(asset_id)
+
+        resp = client.post(
+            f"{BASE}/api/students",
+            json={"name": f"Query Budget {len(created['students']) + 1}", "country": country, "profile_image_id": asset_id},
+            headers=headers,
+        )
+        student_id = resp.json()["id"]
+        created["students"].append(student_id)
+
+        resp = client.post(
+            f"{BASE}/api/story-arcs",
+            json={"title": f"Query Budget Arc {len(created['arcs']) + 1}", "country": country,
+                  "student_id": student_id, "cover_image_id": asset_id},
+            headers=headers,
+        )
+        arc_id = resp.json()["id"]
+        created["arcs"].append(arc_id)
+        client.post(
+            f"{BASE}/api/story-arcs/{arc_id}/episodes",
+            json={"episode_title": "Episode 1", "episode_number": 1},
+            headers=headers,
+        )
+
+ENDPOINTS = [
+    ("/api/story-arcs", {"enriched": "true", "country": country}),
+    ("/api/students", {"country": country}),
+]
+
+try:
+    # ═══════════════════════════════════════════════════════════
+    # Test 1: Query count with 1 row
+    # ═══════════════════════════════════════════════════════════
+    print("\n=== Test 1: Query count with 1 row ===")
+    add_rows(1)
+    single = {}
+    for path, params in ENDPOINTS:
+        count, items = query_count(path, params)
+        single[path] = count
+        print(f"  {path}: {count} queries for {len(items)} row(s)")
+        check(f"{path} reports X-DB-Query-Count", count is not None, "Header missing (SQL_INSTRUMENTATION off?)")
+        check(f"{path} returns 1 row", len(items) == 1, f"Got {len(items)}")
+
+    # ═══════════════════════════════════════════════════════════
+    # Test 2: Same query count with N rows
+    # ═══════════════════════════════════════════════════════════
+    print(f"\n=== Test 2: Query count with {N} rows ===")
+    add_rows(N - 1)
+    for path, params in ENDPOINTS:
+        count, items = query_count(path, params)
+        print(f"  {path}: {count} queries for {len(items)} row(s)")
+        check(f"{path} returns {N} rows", len(items) == N, f"Got {len(items)}")
+        check(f"{path} query count independent of rows", count is not None and count == single[path],
+              f"1 row: {single[path]} queries, {N} rows: {count} queries")
+
+    # ═══════════════════════════════════════════════════════════
+    # Test 3: Enriched fields are resolved for every row
+    # ═══════════════════════════════════════════════════════════
+    print("\n=== Test 3: Enriched fields ===")
+    _, arcs = query_count("/api/story-arcs", {"enriched": "true", "country": country})
+    check("Every arc has its student name", all(a.get("student_name") for a in arcs))
+    check("Every arc has a cover image URL", all(a.get("cover_image_url") for a in arcs))
+    check("Every arc counts its episode", all(a.get("total_episodes") == 1 for a in arcs),
+          f"Got {[a.get('total_episodes') for a in arcs]}")
+    _, students = query_count("/api/students", {"country": country})
+    check("Every student has a profile image URL", all(s.get("profile_image_url") for s in students))
+finally:
+    for arc_id in created["arcs"]:
+        client.delete(f"{BASE}/api/story-arcs/{arc_id}", headers=headers)
+    for student_id in created["students"]:
+        client.delete(f"{BASE}/api/students/{student_id}", headers=headers)
+    for asset_id in created["assets"]:
+        client.delete(f"{BASE}/api/assets/{asset_id}", headers=headers)
+    client.close()
+
+print(f"\n=== {passed}/{total} TESTS PASSED ===")
+if passed != total:
+    exit(1)
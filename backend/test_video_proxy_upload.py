@@ -0,0 +1,113 @@
+"""Test: Video uploads with ffmpeg available submit the proxy job.
+
+Runs the app in-process (FastAPI TestClient) on a throwaway SQLite
+database, because ffmpeg has to be marked as available for the upload
+routes to submit the proxy task. The task manager writes its task row in
+its own session; if the asset is not committed first, SQLite reports
+"database is locked" and the upload fails with 500.
+
+Usage:
+    cd backend && python test_video_proxy_upload.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "video_proxy_upload.db")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{DB_PATH}"
+
+from fastapi.testclient import TestClient
+
+import app.api.routes.assets as assets_routes
+from app.main import app
+
+# Uploads must take the proxy path even where ffmpeg is not installed
+# (the proxy task itself then fails, which is fine for this test)
+assets_routes.FFMPEG_AVAILABLE = True
+
+# Not a playable video; metadata and thumbnail extraction degrade gracefully
+VIDEO = b"\x00\x00\x00\x18ftypmp42" + b"\x00" * 1024
+
+passed = 0
+total = 0
+
+def check(test_name, condition, detail=""):
+    global passed, total
+    total += 1
+    if condition:
+        passed += 1
+        print(f"  PASS: {test_name}")
+    else:
+        print(f"  FAIL: {test_name} - {detail}")
+
+def proxy_tasks(client, headers):
+    resp = client.get("/api/tasks/history", params={"limit": 100}, headers=headers)
+    tasks = resp.json().get("items", []) if resp.status_code == 200 else []
+    return [t for t in tasks if t.get("task_type") == "video_proxy"]
+
+with TestClient(app, raise_server_exceptions=False) as client:
+    resp = client.post("/api/auth/login", json={"email": "admin@treff.de", "password": "treff2024"})
+    print(f"Login: {resp.status_code}")
+    token = resp.json().get("access_token", "")
+    if not token:
+        print("Login failed!")
+        sys.exit(1)
+    headers = {"Authorization": f"Bearer {token}"}
+    created = []
+
+    try:
+        # ═══════════════════════════════════════════════════════════
+        # Test 1: Direct upload
+        # ═══════════════════════════════════════════════════════════
+        print("\n=== Test 1: Direct video upload ===")
+        start = time.monotonic()
+        resp = client.post(
+            "/api/assets/upload",
+            files={"file": ("proxy-test.mp4", VIDEO, "video/mp4")},
+            headers=headers,
+        )
+        elapsed = time.monotonic() - start
+        check("Upload returns 201", resp.status_code == 201, f"Got {resp.status_code}: {resp.text[:200]}")
+        check("Upload does not wait on a database lock", elapsed < 3, f"Took {elapsed:.1f}s")
+        if resp.status_code == 201:
+            created.append(resp.json()["id"])
+
+        # ═══════════════════════════════════════════════════════════
+        # Test 2: Chunked upload
+        # ═══════════════════════════════════════════════════════════
+        print("\n=== Test 2: Chunked video upload ===")
+        resp = client.post(
+            "/api/assets/upload/init-chunked",
+            json={"filename": "proxy-test-chunked.mp4", "file_type": "video/mp4", "file_size": len(VIDEO)},
+            headers=headers,
+        )
+        upload_id = resp.json()["upload_id"]
+        client.post(
+            "/api/assets/upload/chunk",
+            data={"upload_id": upload_id, "chunk_index": "0"},
+            files={"chunk": ("chunk", VIDEO, "application/octet-stream")},
+            headers=headers,
+        )
+        start = time.monotonic()
+        resp = client.post("/api/assets/upload/complete-chunked", json={"upload_id": upload_id}, headers=headers)
+        elapsed = time.monotonic() - start
+        check("Complete returns 201", resp.status_code == 201, f"Got {resp.status_code}: {resp.text[:200]}")
+        check("Complete does not wait on a database lock", elapsed < 3, f"Took {elapsed:.1f}s")
+        if resp.status_code == 201:
+            created.append(resp.json()["id"])
+
+        # ═══════════════════════════════════════════════════════════
+        # Test 3: A proxy task was submitted for each upload
+        # ═══════════════════════════════════════════════════════════
+        print("\n=== Test 3: Proxy tasks ===")
+        titles = {t.get("title") for t in proxy_tasks(client, headers)}
+        for asset_id in created:
+            check(f"Proxy task for asset {asset_id}", f"Vorschau-Proxy fuer Asset {asset_id}" in titles, f"Got {titles}")
+    finally:
+        for asset_id in created:
+            client.delete(f"/api/assets/{asset_id}", headers=headers)
+
+print(f"\n=== {passed}/{total} TESTS PASSED ===")
+if passed != total:
+    sys.exit(1)